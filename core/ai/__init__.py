@@ -7,6 +7,7 @@ from core.ai.memory_manager import MemoryManager
 from core.ai.quota_manager import QuotaManager
 from core.ai.reranker import Reranker
 from core.ai.vector_store import VectorStore
+from core.ai.vector_writer import VectorStoreWriter
 
 from .agent_tools import ToolExecutor
 from .conversation_manager import ConversationManager
@@ -24,4 +25,5 @@ __all__ = [
     "Reranker",
     "ToolExecutor",
     "VectorStore",
+    "VectorStoreWriter",
 ]
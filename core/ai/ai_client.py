@@ -8,10 +8,14 @@
 # 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
 # 许可证全文：参见 LICENSE 文件
 
+import asyncio
 import logging
+import os
 
 from openai import AsyncOpenAI, OpenAI
 
+from core.ai.llm_gateway import Priority, get_llm_gateway
+from core.ai.token_estimator import estimate_tokens, truncate_to_tokens
 from core.i18n.i18n import get_text
 from core.infrastructure.config.poll_prompt_manager import load_poll_prompt
 from core.settings import get_llm_api_key, get_llm_base_url, get_llm_model
@@ -19,6 +23,23 @@ from core.system.error_handler import record_error, retry_with_backoff
 
 logger = logging.getLogger(__name__)
 
+# 分层总结（map-reduce）：单次请求的上下文 token 预算、分段并发数、归并最大层数
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "24000"))
+SUMMARY_MAP_CONCURRENCY = max(1, int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4")))
+SUMMARY_MAX_REDUCE_LEVELS = 4
+
+SUMMARY_SYSTEM_PROMPT = "你是一个专业的资讯摘要助手，擅长提取重点并保持客观。"
+MESSAGE_SEPARATOR = "\n\n---\n\n"
+MAP_PROMPT = (
+    "以下是某个频道一段时间内的部分消息（第 {index}/{total} 段）。"
+    "请提取其中的关键信息、重要事件与讨论要点，保留原文中的链接、数字和专有名词，"
+    "以简洁的要点列表输出，不要添加评论。\n\n"
+)
+REDUCE_PROMPT = (
+    "以下是同一频道若干段消息的要点摘要。请将它们合并为一份去重后的要点列表，"
+    "保留链接、数字和专有名词，不要遗漏重要事件。\n\n"
+)
+
 # 初始化 AI 客户端
 logger.info("开始初始化AI客户端...")
 
@@ -68,9 +89,108 @@ def reinitialize_ai_clients(new_api_key: str, new_base_url: str) -> None:
     exponential_backoff=True,
     retry_on_exceptions=(ConnectionError, TimeoutError, Exception),
 )
+async def _complete_summary(prompt: str) -> str:
+    """发送单次总结请求
+
+    Args:
+        prompt: 完整的用户提示词（提示词 + 上下文）
+
+    Returns:
+        str: AI 生成的文本
+    """
+    model = get_llm_model()
+    logger.debug(f"AI请求配置: 模型={model}, 请求总长度={len(prompt)}字符")
+
+    from datetime import datetime
+
+    start_time = datetime.now()
+    response = await get_llm_gateway().chat(
+        [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        priority=Priority.SCHEDULED,
+        model=model,
+        subsystem="summary",
+    )
+    end_time = datetime.now()
+
+    processing_time = (end_time - start_time).total_seconds()
+    logger.info(f"AI分析完成，处理时间: {processing_time:.2f}秒")
+    logger.debug(
+        f"AI响应状态: 成功，选择索引={response.choices[0].index}, 完成原因={response.choices[0].finish_reason}"
+    )
+    logger.debug(f"AI响应长度: {len(response.choices[0].message.content)}字符")
+
+    return response.choices[0].message.content
+
+
+def chunk_messages(messages: list[str], max_tokens: int) -> list[list[str]]:
+    """按 token 预算将消息顺序切分为若干段
+
+    Args:
+        messages: 消息列表
+        max_tokens: 每段的 token 上限（含分隔符）
+
+    Returns:
+        list[list[str]]: 分段后的消息列表；超出预算的单条消息会被截断
+    """
+    separator_tokens = estimate_tokens(MESSAGE_SEPARATOR)
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    for message in messages:
+        message = truncate_to_tokens(message, max_tokens - separator_tokens)
+        tokens = estimate_tokens(message) + separator_tokens
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(message)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _summarize_chunks(chunks: list[list[str]], prompt_template: str) -> list[str]:
+    """并发总结各段，并发数受 SUMMARY_MAP_CONCURRENCY 限制，结果按原顺序返回"""
+    semaphore = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+
+    async def summarize(index: int, chunk: list[str]) -> str:
+        prompt = prompt_template.format(index=index + 1, total=len(chunks))
+        async with semaphore:
+            return await _complete_summary(f"{prompt}{MESSAGE_SEPARATOR.join(chunk)}")
+
+    return list(await asyncio.gather(*(summarize(i, c) for i, c in enumerate(chunks))))
+
+
+async def _map_reduce_summarize(messages: list[str], current_prompt: str) -> str:
+    """分层总结：按预算分段并发总结，再逐层归并分段摘要，最后按频道提示词生成报告"""
+    map_budget = SUMMARY_CHUNK_TOKENS - estimate_tokens(MAP_PROMPT)
+    chunks = chunk_messages(messages, map_budget)
+    logger.info(f"消息超出单次请求预算，使用分层总结: {len(messages)} 条消息分为 {len(chunks)} 段")
+    partials = await _summarize_chunks(chunks, MAP_PROMPT)
+
+    final_budget = SUMMARY_CHUNK_TOKENS - estimate_tokens(current_prompt)
+    reduce_budget = SUMMARY_CHUNK_TOKENS - estimate_tokens(REDUCE_PROMPT)
+    for level in range(SUMMARY_MAX_REDUCE_LEVELS):
+        if len(partials) == 1 or estimate_tokens(MESSAGE_SEPARATOR.join(partials)) <= final_budget:
+            break
+        groups = chunk_messages(partials, reduce_budget)
+        logger.info(f"第 {level + 1} 层归并: {len(partials)} 段摘要合并为 {len(groups)} 段")
+        partials = await _summarize_chunks(groups, REDUCE_PROMPT)
+
+    return await _complete_summary(f"{current_prompt}{MESSAGE_SEPARATOR.join(partials)}")
+
+
 async def analyze_with_ai(messages, current_prompt):
     """调用 AI 进行汇总（异步版本）
 
+    上下文不超过 SUMMARY_CHUNK_TOKENS 时单次请求；超出时按预算分段并发总结，
+    再将分段摘要（必要时逐层）归并，最后使用频道提示词生成报告。
+
     Args:
         messages: 要分析的消息列表
         current_prompt: 当前使用的提示词
@@ -89,38 +209,17 @@ async def analyze_with_ai(messages, current_prompt):
         logger.info("没有需要分析的消息，返回空结果")
         return "本周无新动态。"
 
-    context_text = "\n\n---\n\n".join(messages)
-    prompt = f"{current_prompt}{context_text}"
-
-    model = get_llm_model()
+    context_text = MESSAGE_SEPARATOR.join(messages)
+    context_tokens = estimate_tokens(context_text)
     logger.debug(
-        f"AI请求配置: 模型={model}, 提示词长度={len(current_prompt)}字符, 上下文长度={len(context_text)}字符"
+        f"提示词长度={len(current_prompt)}字符, 上下文长度={len(context_text)}字符, "
+        f"估算 {context_tokens} tokens"
     )
-    logger.debug(f"AI请求总长度: {len(prompt)}字符")
 
-    from datetime import datetime
+    if context_tokens + estimate_tokens(current_prompt) > SUMMARY_CHUNK_TOKENS:
+        return await _map_reduce_summarize(messages, current_prompt)
 
-    start_time = datetime.now()
-    response = await async_client_llm.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": "你是一个专业的资讯摘要助手，擅长提取重点并保持客观。",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-    end_time = datetime.now()
-
-    processing_time = (end_time - start_time).total_seconds()
-    logger.info(f"AI分析完成，处理时间: {processing_time:.2f}秒")
-    logger.debug(
-        f"AI响应状态: 成功，选择索引={response.choices[0].index}, 完成原因={response.choices[0].finish_reason}"
-    )
-    logger.debug(f"AI响应长度: {len(response.choices[0].message.content)}字符")
-
-    return response.choices[0].message.content
+    return await _complete_summary(f"{current_prompt}{context_text}")
 
 
 @retry_with_backoff(
@@ -130,11 +229,12 @@ async def analyze_with_ai(messages, current_prompt):
     exponential_backoff=True,
     retry_on_exceptions=(ConnectionError, TimeoutError, Exception),
 )
-async def generate_poll_from_summary(summary_text):
+async def generate_poll_from_summary(summary_text, use_cache: bool = True):
     """根据总结内容生成投票（异步版本）
 
     Args:
         summary_text: 总结文本
+        use_cache: 是否使用 LLM 响应缓存；重新生成投票时应关闭以得到不同的结果
 
     Returns:
         dict: 包含question和options的字典，格式为:
@@ -167,15 +267,18 @@ async def generate_poll_from_summary(summary_text):
         from datetime import datetime
 
         start_time = datetime.now()
-        response = await async_client_llm.chat.completions.create(
-            model=model,
-            messages=[
+        response = await get_llm_gateway().chat(
+            [
                 {
                     "role": "system",
                     "content": "你是一个幽默风趣的互动策划专家，擅长从枯燥的文字中挖掘槽点或亮点，创作让人忍不住想投票的双语投票。",
                 },
                 {"role": "user", "content": prompt},
             ],
+            priority=Priority.SCHEDULED,
+            model=model,
+            cache=use_cache,
+            subsystem="poll",
         )
         end_time = datetime.now()
 
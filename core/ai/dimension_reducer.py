@@ -0,0 +1,204 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+向量降维 - 将模型输出的向量缩减到 EMBEDDING_DIMENSION 维后再入库/检索
+
+- truncate: Matryoshka 式截断前 N 维并重新 L2 归一化（适用于 bge-m3 等 MRL 训练的模型）
+- pca:      使用从已有向量拟合的 PCA 投影矩阵，投影后重新 L2 归一化
+
+模型输出维度不大于目标维度时不做处理。已有向量需通过
+core/migrations/reduce_vector_dimension.py 迁移后才能与降维后的查询向量匹配。
+"""
+
+import logging
+import math
+import os
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+REDUCTION_TRUNCATE = "truncate"
+REDUCTION_PCA = "pca"
+VALID_REDUCTION_METHODS = (REDUCTION_TRUNCATE, REDUCTION_PCA)
+
+DEFAULT_PCA_PATH = os.path.join("data", "vectors", "pca_projection.npz")
+
+
+def _l2_normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        return vector
+    return [v / norm for v in vector]
+
+
+class DimensionReducer:
+    """向量降维器"""
+
+    def __init__(
+        self,
+        target_dimension: int,
+        method: str = REDUCTION_TRUNCATE,
+        pca_path: str = DEFAULT_PCA_PATH,
+    ):
+        """
+        初始化降维器
+
+        Args:
+            target_dimension: 目标维度
+            method: 降维方式（truncate / pca）
+            pca_path: PCA 投影矩阵文件路径（npz）
+        """
+        if method not in VALID_REDUCTION_METHODS:
+            logger.warning(f"未知的降维方式: {method}，使用 {REDUCTION_TRUNCATE}")
+            method = REDUCTION_TRUNCATE
+
+        self.target_dimension = target_dimension
+        self.method = method
+        self.pca_path = pca_path
+        self._pca_mean = None
+        self._pca_components = None
+
+        if self.method == REDUCTION_PCA:
+            self.load_pca()
+
+    @classmethod
+    def from_env(cls, target_dimension: int) -> "DimensionReducer":
+        """根据环境变量创建降维器"""
+        return cls(
+            target_dimension=target_dimension,
+            method=os.getenv("EMBEDDING_REDUCTION", REDUCTION_TRUNCATE).strip().lower(),
+            pca_path=os.getenv("EMBEDDING_PCA_PATH", DEFAULT_PCA_PATH),
+        )
+
+    # ── PCA 投影 ────────────────────────────────────────────────────────
+
+    def has_pca(self) -> bool:
+        """PCA 投影矩阵是否已加载"""
+        return self._pca_components is not None
+
+    def load_pca(self) -> bool:
+        """
+        从文件加载 PCA 投影矩阵
+
+        Returns:
+            是否加载成功
+        """
+        if not NUMPY_AVAILABLE:
+            logger.error("numpy 未安装，无法使用 PCA 降维")
+            return False
+        if not os.path.exists(self.pca_path):
+            logger.warning(f"PCA 投影矩阵不存在: {self.pca_path}，请先运行向量降维迁移")
+            return False
+
+        try:
+            with np.load(self.pca_path) as data:
+                mean = data["mean"]
+                components = data["components"]
+        except Exception as e:
+            logger.error(f"加载 PCA 投影矩阵失败: {type(e).__name__}: {e}")
+            return False
+
+        if components.shape[0] != self.target_dimension:
+            logger.error(
+                f"PCA 投影维度({components.shape[0]})与目标维度({self.target_dimension})不一致"
+            )
+            return False
+
+        self._pca_mean = mean
+        self._pca_components = components
+        logger.info(f"PCA 投影矩阵已加载: {components.shape[1]} → {components.shape[0]} 维")
+        return True
+
+    def fit_pca(self, vectors: list[list[float]]) -> None:
+        """
+        从样本向量拟合 PCA 投影矩阵并保存到文件
+
+        Args:
+            vectors: 模型原始维度的样本向量，数量不少于目标维度
+
+        Raises:
+            RuntimeError: numpy 不可用
+            ValueError: 样本不足或维度不足
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy 未安装，无法拟合 PCA")
+
+        matrix = np.asarray(vectors, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[0] < self.target_dimension:
+            raise ValueError(
+                f"PCA 拟合至少需要 {self.target_dimension} 个样本，实际 {len(vectors)} 个"
+            )
+        if matrix.shape[1] <= self.target_dimension:
+            raise ValueError(f"样本维度({matrix.shape[1]})不大于目标维度，无需降维")
+
+        mean = matrix.mean(axis=0)
+        # 右奇异向量即主成分方向，按奇异值降序排列
+        _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        components = vt[: self.target_dimension].astype(np.float32)
+
+        os.makedirs(os.path.dirname(self.pca_path) or ".", exist_ok=True)
+        np.savez(self.pca_path, mean=mean.astype(np.float32), components=components)
+        self._pca_mean = mean.astype(np.float32)
+        self._pca_components = components
+        logger.info(
+            f"PCA 投影矩阵已拟合并保存: {matrix.shape[1]} → {self.target_dimension} 维, "
+            f"样本 {matrix.shape[0]} 个"
+        )
+
+    # ── 降维 ────────────────────────────────────────────────────────────
+
+    def needs_reduction(self, dimension: int) -> bool:
+        """给定维度的向量是否需要降维"""
+        return dimension > self.target_dimension
+
+    def reduce(self, vectors: list[list[float]]) -> list[list[float]]:
+        """
+        将向量降到目标维度
+
+        Args:
+            vectors: 模型输出的向量列表
+
+        Returns:
+            降维并归一化后的向量列表（维度不超过目标维度的向量原样返回）
+
+        Raises:
+            ValueError: 使用 PCA 但投影矩阵未加载或维度不匹配
+        """
+        if not vectors or not any(self.needs_reduction(len(v)) for v in vectors):
+            return vectors
+
+        if self.method == REDUCTION_PCA:
+            return self._reduce_pca(vectors)
+
+        return [
+            _l2_normalize(list(v[: self.target_dimension])) if self.needs_reduction(len(v)) else v
+            for v in vectors
+        ]
+
+    def _reduce_pca(self, vectors: list[list[float]]) -> list[list[float]]:
+        if not self.has_pca():
+            raise ValueError("PCA 投影矩阵未加载，请先运行向量降维迁移")
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape[1] != self._pca_components.shape[1]:
+            raise ValueError(
+                f"向量维度({matrix.shape[1]})与 PCA 输入维度({self._pca_components.shape[1]})不一致"
+            )
+
+        projected = (matrix - self._pca_mean) @ self._pca_components.T
+        projected /= np.clip(np.linalg.norm(projected, axis=1, keepdims=True), 1e-12, None)
+        return projected.tolist()
@@ -0,0 +1,298 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+Embedding 后端注册表
+
+- openai: 远程 OpenAI 兼容 Embedding API（默认）
+- local:  本地 CPU 哈希字符 n-gram 向量，无需网络和模型文件，适用于测试、离线部署与故障降级
+- onnx:   从本地路径加载的 ONNX 句向量模型（需要 onnxruntime 与 tokenizers）
+
+新后端通过 register_embedding_backend() 注册，由 EMBEDDING_BACKEND 环境变量选择。
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    import onnxruntime
+    from tokenizers import Tokenizer
+
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# 本地哈希后端：n-gram 范围、进程池大小、启用进程池的最小批量
+LOCAL_NGRAM_MIN = 1
+LOCAL_NGRAM_MAX = 3
+LOCAL_POOL_MIN_BATCH = 64
+
+
+class EmbeddingBackend(ABC):
+    """Embedding 后端基类"""
+
+    name: str = ""
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """后端是否可用"""
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        批量生成 embedding，失败时抛出异常
+
+        Args:
+            texts: 输入文本列表
+
+        Returns:
+            与输入一一对应的向量列表
+        """
+
+    def embed_with_usage(self, texts: list[str]) -> tuple[list[list[float]], int | None]:
+        """
+        批量生成 embedding 并返回 API 计费的输入 token 数
+
+        Returns:
+            (向量列表, 输入 token 数)；本地后端不计费，token 数为 None
+        """
+        return self.embed(texts), None
+
+    def close(self) -> None:  # noqa: B027 - 默认无资源需要释放
+        """释放后端持有的资源"""
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """远程 OpenAI 兼容 Embedding API"""
+
+    name = "openai"
+
+    def __init__(self, dimension: int):
+        super().__init__(dimension)
+        self.api_key = os.getenv("EMBEDDING_API_KEY")
+        self.api_base = os.getenv("EMBEDDING_API_BASE", "https://api.siliconflow.cn/v1/embeddings")
+        self.model = os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3")
+
+        if not self.api_key:
+            logger.warning("未设置EMBEDDING_API_KEY，远程Embedding后端将不可用")
+            self.client = None
+        else:
+            try:
+                self.client = OpenAI(api_key=self.api_key, base_url=self.api_base)
+                logger.info(f"远程Embedding后端初始化成功: {self.model}")
+            except Exception as e:
+                logger.error(f"远程Embedding后端初始化失败: {type(e).__name__}: {e}")
+                self.client = None
+
+    def is_available(self) -> bool:
+        return self.client is not None
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_with_usage(texts)[0]
+
+    def embed_with_usage(self, texts: list[str]) -> tuple[list[list[float]], int | None]:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        return (
+            [item.embedding for item in response.data],
+            prompt_tokens if isinstance(prompt_tokens, int) else None,
+        )
+
+
+def hash_embed_texts(
+    texts: list[str],
+    dimension: int,
+    ngram_min: int = LOCAL_NGRAM_MIN,
+    ngram_max: int = LOCAL_NGRAM_MAX,
+) -> list[list[float]]:
+    """
+    将文本映射为哈希字符 n-gram 向量（模块级函数，可在子进程中执行）
+
+    每个 n-gram 经 CRC32 散列到 dimension 个桶之一，并由另一位决定正负号以抵消碰撞偏差；
+    词频做 1 + log(tf) 次线性缩放后 L2 归一化。不使用 IDF，向量与语料无关、跨进程稳定。
+
+    Args:
+        texts: 输入文本列表
+        dimension: 输出维度
+        ngram_min: 最短 n-gram 长度
+        ngram_max: 最长 n-gram 长度
+
+    Returns:
+        归一化后的向量列表
+    """
+    vectors = []
+    for text in texts:
+        normalized = " ".join(text.lower().split())
+        counts: dict[str, int] = {}
+        for n in range(ngram_min, ngram_max + 1):
+            for i in range(len(normalized) - n + 1):
+                gram = normalized[i : i + n]
+                if gram.strip():
+                    counts[gram] = counts.get(gram, 0) + 1
+
+        vector = [0.0] * dimension
+        for gram, tf in counts.items():
+            h = zlib.crc32(gram.encode("utf-8"))
+            weight = 1.0 + math.log(tf)
+            vector[h % dimension] += weight if (h >> 31) & 1 else -weight
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm > 0:
+            vector = [v / norm for v in vector]
+        vectors.append(vector)
+    return vectors
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """本地 CPU 哈希字符 n-gram 后端，大批量时在进程池中并行计算"""
+
+    name = "local"
+
+    def __init__(self, dimension: int):
+        super().__init__(dimension)
+        self.workers = int(os.getenv("EMBEDDING_LOCAL_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self._pool: ProcessPoolExecutor | None = None
+        logger.info(f"本地Embedding后端初始化成功: dimension={dimension}, workers={self.workers}")
+
+    def is_available(self) -> bool:
+        return True
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if self.workers <= 1 or len(texts) < LOCAL_POOL_MIN_BATCH:
+            return hash_embed_texts(texts, self.dimension)
+
+        chunk_size = math.ceil(len(texts) / self.workers)
+        chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        pool = self._get_pool()
+        futures = [pool.submit(hash_embed_texts, chunk, self.dimension) for chunk in chunks]
+        return [vector for future in futures for vector in future.result()]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # 使用 spawn 避免在多线程进程中 fork 导致死锁
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """本地 ONNX 句向量模型后端（mean pooling + L2 归一化）"""
+
+    name = "onnx"
+
+    def __init__(self, dimension: int):
+        super().__init__(dimension)
+        self.model_path = os.getenv("EMBEDDING_ONNX_MODEL_PATH", "")
+        self.max_length = int(os.getenv("EMBEDDING_ONNX_MAX_LENGTH", "512"))
+        self.session = None
+        self.tokenizer = None
+
+        if not ONNX_AVAILABLE:
+            logger.warning("onnxruntime/tokenizers 未安装，ONNX Embedding后端将不可用")
+            return
+        if not self.model_path:
+            logger.warning("未设置EMBEDDING_ONNX_MODEL_PATH，ONNX Embedding后端将不可用")
+            return
+
+        try:
+            self.tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+            self.tokenizer.enable_truncation(max_length=self.max_length)
+            self.tokenizer.enable_padding()
+            self.session = onnxruntime.InferenceSession(
+                os.path.join(self.model_path, "model.onnx"),
+                providers=["CPUExecutionProvider"],
+            )
+            self._input_names = {i.name for i in self.session.get_inputs()}
+            logger.info(f"ONNX Embedding后端初始化成功: {self.model_path}")
+        except Exception as e:
+            logger.error(f"ONNX Embedding后端初始化失败: {type(e).__name__}: {e}")
+            self.session = None
+            self.tokenizer = None
+
+    def is_available(self) -> bool:
+        return self.session is not None
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+
+# ── 后端注册表 ──────────────────────────────────────────────────────────
+
+_BACKEND_REGISTRY: dict[str, type[EmbeddingBackend]] = {
+    OpenAIEmbeddingBackend.name: OpenAIEmbeddingBackend,
+    HashingEmbeddingBackend.name: HashingEmbeddingBackend,
+    OnnxEmbeddingBackend.name: OnnxEmbeddingBackend,
+}
+
+
+def register_embedding_backend(name: str, backend_cls: type[EmbeddingBackend]) -> None:
+    """
+    注册 Embedding 后端
+
+    Args:
+        name: 后端名称（EMBEDDING_BACKEND 的取值）
+        backend_cls: EmbeddingBackend 子类
+    """
+    _BACKEND_REGISTRY[name.lower()] = backend_cls
+
+
+def get_registered_backends() -> list[str]:
+    """获取已注册的后端名称"""
+    return sorted(_BACKEND_REGISTRY)
+
+
+def create_embedding_backend(name: str, dimension: int) -> EmbeddingBackend | None:
+    """
+    按名称创建 Embedding 后端
+
+    Args:
+        name: 后端名称
+        dimension: 向量维度
+
+    Returns:
+        后端实例，名称未注册时返回 None
+    """
+    backend_cls = _BACKEND_REGISTRY.get(name.strip().lower())
+    if backend_cls is None:
+        logger.error(f"未知的Embedding后端: {name}，可选: {', '.join(get_registered_backends())}")
+        return None
+    return backend_cls(dimension)
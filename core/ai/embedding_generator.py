@@ -10,91 +10,195 @@
 
 """
 Embedding生成器 - 将文本转换为向量
-支持多种API服务（OpenAI兼容）
+通过后端注册表支持远程 OpenAI 兼容 API 与本地 CPU 后端，可配置故障降级后端
+输出向量统一降到 EMBEDDING_DIMENSION 维（截断或 PCA 投影）
+
+不同后端的向量空间互不兼容：入库时在元数据中记录生成向量的后端
+（EMBEDDING_BACKEND_METADATA_KEY），检索时只匹配与查询向量同一后端的条目，
+主后端恢复后由定时任务将降级期间写入的向量用主后端重新生成。
 """
 
 import logging
 import os
 
-from openai import OpenAI
+from core.ai.dimension_reducer import DimensionReducer
+from core.ai.embedding_backends import EmbeddingBackend, create_embedding_backend
+from core.ai.usage_tracker import get_usage_tracker
 
 logger = logging.getLogger(__name__)
 
+# 向量元数据中记录生成后端的键
+EMBEDDING_BACKEND_METADATA_KEY = "embedding_backend"
+
 
 class EmbeddingGenerator:
     """Embedding生成器"""
 
     def __init__(self):
         """初始化Embedding生成器"""
-        self.api_key = os.getenv("EMBEDDING_API_KEY")
-        self.api_base = os.getenv("EMBEDDING_API_BASE", "https://api.siliconflow.cn/v1/embeddings")
-        self.model = os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3")
         self.dimension = int(os.getenv("EMBEDDING_DIMENSION", "1024"))
-
-        if not self.api_key:
-            logger.warning("未设置EMBEDDING_API_KEY，Embedding功能将不可用")
-            self.client = None
-        else:
-            try:
-                self.client = OpenAI(api_key=self.api_key, base_url=self.api_base)
-                logger.info(f"Embedding生成器初始化成功: {self.model}")
-            except Exception as e:
-                logger.error(f"Embedding生成器初始化失败: {type(e).__name__}: {e}")
-                self.client = None
+        self.backend_name = os.getenv("EMBEDDING_BACKEND", "openai").strip().lower()
+        fallback_name = os.getenv("EMBEDDING_FALLBACK_BACKEND", "").strip().lower()
+
+        self.backend: EmbeddingBackend | None = create_embedding_backend(
+            self.backend_name, self.dimension
+        )
+        # 降级后端：主后端不可用或调用失败时使用
+        self.fallback_backend: EmbeddingBackend | None = None
+        self.fallback_name: str | None = None
+        if fallback_name and fallback_name != self.backend_name:
+            self.fallback_backend = create_embedding_backend(fallback_name, self.dimension)
+            self.fallback_name = fallback_name
+            logger.info(f"Embedding降级后端: {fallback_name}")
+
+        # 兼容旧属性：远程后端的连接信息
+        self.api_key = getattr(self.backend, "api_key", None)
+        self.api_base = getattr(self.backend, "api_base", None)
+        self.model = getattr(self.backend, "model", self.backend_name)
+
+        # 模型输出维度大于 EMBEDDING_DIMENSION 时降维
+        self.reducer = DimensionReducer.from_env(self.dimension)
+
+    @property
+    def client(self):
+        """远程后端的 OpenAI 客户端（非远程后端为 None）"""
+        return getattr(self.backend, "client", None)
+
+    def _active_backends(self) -> list[EmbeddingBackend]:
+        """按优先级返回当前可用的后端"""
+        return [b for b in (self.backend, self.fallback_backend) if b and b.is_available()]
 
     def is_available(self) -> bool:
         """检查Embedding服务是否可用"""
-        return self.client is not None
+        return bool(self._active_backends())
+
+    def _config_name(self, backend: EmbeddingBackend) -> str:
+        """后端的配置名称（EMBEDDING_BACKEND / EMBEDDING_FALLBACK_BACKEND 的取值）"""
+        if backend is self.fallback_backend and self.fallback_name:
+            return self.fallback_name
+        return self.backend_name
 
-    def generate(self, text: str) -> list[float] | None:
+    def backend_filter(self, backend_name: str | None) -> dict | None:
+        """
+        返回只匹配指定后端所生成向量的 ChromaDB where 条件
+
+        未配置降级后端时返回 None（所有向量来自同一后端）；主后端的条件排除降级向量，
+        从而包含未记录后端的旧向量。
+
+        Args:
+            backend_name: 生成查询向量的后端名称
+        """
+        if not self.fallback_name or not backend_name:
+            return None
+        if backend_name == self.fallback_name:
+            return {EMBEDDING_BACKEND_METADATA_KEY: {"$eq": self.fallback_name}}
+        return {EMBEDDING_BACKEND_METADATA_KEY: {"$ne": self.fallback_name}}
+
+    def _embed(
+        self, backend: EmbeddingBackend, texts: list[str], subsystem: str, channel: str | None
+    ) -> list[list[float]]:
+        """调用后端生成向量，远程后端按返回的 usage 记录用量"""
+        embeddings, prompt_tokens = backend.embed_with_usage(texts)
+        if prompt_tokens is not None:
+            get_usage_tracker().record(
+                subsystem, getattr(backend, "model", backend.name), prompt_tokens, channel=channel
+            )
+        return embeddings
+
+    def generate(
+        self, text: str, subsystem: str = "embedding", channel: str | None = None
+    ) -> list[float] | None:
         """
         生成单个文本的embedding
 
         Args:
             text: 输入文本
+            subsystem: 用量统计的子系统名称
+            channel: 用量统计的频道
 
         Returns:
             向量列表，失败返回None
         """
-        if not self.client:
-            logger.warning("Embedding服务不可用")
-            return None
+        return self.generate_with_backend(text, subsystem, channel)[0]
+
+    def generate_with_backend(
+        self, text: str, subsystem: str = "embedding", channel: str | None = None
+    ) -> tuple[list[float] | None, str | None]:
+        """
+        生成单个文本的embedding，并返回实际使用的后端
 
-        try:
-            response = self.client.embeddings.create(model=self.model, input=text)
+        Returns:
+            (向量, 后端名称)，失败返回 (None, None)
+        """
+        backends = self._active_backends()
+        if not backends:
+            logger.warning("Embedding服务不可用")
+            return None, None
 
-            embedding = response.data[0].embedding
-            logger.debug(f"成功生成embedding，维度: {len(embedding)}")
-            return embedding
+        for backend in backends:
+            try:
+                embedding = self.reducer.reduce(self._embed(backend, [text], subsystem, channel))[0]
+                logger.debug(f"成功生成embedding，后端: {backend.name}，维度: {len(embedding)}")
+                return embedding, self._config_name(backend)
+            except Exception as e:
+                logger.error(f"生成embedding失败({backend.name}): {type(e).__name__}: {e}")
 
-        except Exception as e:
-            logger.error(f"生成embedding失败: {type(e).__name__}: {e}")
-            return None
+        return None, None
 
-    def batch_generate(self, texts: list[str]) -> list[list[float] | None]:
+    def batch_generate(
+        self, texts: list[str], subsystem: str = "embedding", channel: str | None = None
+    ) -> list[list[float] | None]:
         """
         批量生成embedding
 
         Args:
             texts: 输入文本列表
+            subsystem: 用量统计的子系统名称
+            channel: 用量统计的频道
 
         Returns:
             向量列表
         """
-        if not self.client:
+        return self.batch_generate_with_backend(texts, subsystem, channel)[0]
+
+    def batch_generate_with_backend(
+        self,
+        texts: list[str],
+        subsystem: str = "embedding",
+        channel: str | None = None,
+        primary_only: bool = False,
+    ) -> tuple[list[list[float] | None], str | None]:
+        """
+        批量生成embedding，并返回实际使用的后端
+
+        Args:
+            primary_only: 只使用主后端（重新生成降级向量时使用）
+
+        Returns:
+            (向量列表, 后端名称)，失败时向量均为 None、后端为 None
+        """
+        backends = self._active_backends()
+        if primary_only:
+            backends = [b for b in backends if b is self.backend]
+        if not backends:
             logger.warning("Embedding服务不可用")
-            return [None] * len(texts)
+            return [None] * len(texts), None
 
-        try:
-            response = self.client.embeddings.create(model=self.model, input=texts)
+        for backend in backends:
+            try:
+                embeddings = self.reducer.reduce(self._embed(backend, texts, subsystem, channel))
+                logger.info(f"成功批量生成{len(embeddings)}个embedding，后端: {backend.name}")
+                return embeddings, self._config_name(backend)
+            except Exception as e:
+                logger.error(f"批量生成embedding失败({backend.name}): {type(e).__name__}: {e}")
 
-            embeddings = [item.embedding for item in response.data]
-            logger.info(f"成功批量生成{len(embeddings)}个embedding")
-            return embeddings
+        return [None] * len(texts), None
 
-        except Exception as e:
-            logger.error(f"批量生成embedding失败: {type(e).__name__}: {e}")
-            return [None] * len(texts)
+    def close(self) -> None:
+        """释放后端资源（如本地后端的进程池）"""
+        for backend in (self.backend, self.fallback_backend):
+            if backend:
+                backend.close()
 
 
 # 创建全局Embedding生成器实例
@@ -0,0 +1,447 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+LLM 网关 - 所有对话补全请求的统一出口
+
+- 优先级：问答等交互请求先于总结，总结先于元数据提取等后台请求
+- 并发：全局并发上限与单模型并发上限，名额空出时按优先级（同级先到先得）分配
+- 速率：令牌桶限制每分钟请求数（LLM_REQUESTS_PER_MINUTE，0 表示不限制）
+- 429：按 Retry-After 暂停所有请求并临时减半速率，之后随成功请求逐步恢复
+- 服务商：请求经服务商池发出，失败时转移、过慢时对冲到备用服务商
+- 缓存：调用方可选择使用响应缓存（见 core.ai.response_cache），命中时不占用名额
+- 用量：每次请求按子系统与频道记录 token 用量（见 core.ai.usage_tracker）
+- 指标：按优先级统计请求数、失败数、429 次数、排队时间与请求耗时
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import os
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any
+
+from openai import RateLimitError
+
+from core.ai.llm_providers import ProviderPool, get_provider_pool
+from core.ai.response_cache import LLM_RESPONSE_CACHE_ENABLED, get_response_cache, make_cache_key
+from core.ai.token_estimator import estimate_tokens
+from core.ai.usage_tracker import get_usage_tracker
+from core.settings import get_llm_model
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """请求优先级，数值越小越先执行"""
+
+    INTERACTIVE = 0  # 问答Bot、管理员交互操作
+    SCHEDULED = 1  # 定时/手动总结、投票生成
+    BACKGROUND = 2  # 元数据提取等后台补充
+
+
+# 同时进行的 LLM 请求总数与单个模型的请求数
+LLM_MAX_CONCURRENCY = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "6")))
+LLM_MODEL_CONCURRENCY = max(1, int(os.getenv("LLM_MODEL_CONCURRENCY", "4")))
+# 每分钟请求数上限（令牌桶），0 表示不限制
+LLM_REQUESTS_PER_MINUTE = max(0.0, float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")))
+# 令牌桶最多积累多少秒的请求配额（允许的突发量）
+RATE_BURST_SECONDS = 10
+# 遇到 429 后的最大重试次数
+LLM_RATE_LIMIT_RETRIES = 3
+# 429 未给出 Retry-After 时的暂停秒数与暂停上限
+DEFAULT_RETRY_AFTER = 5.0
+MAX_RETRY_AFTER = 120.0
+# 429 后速率最低降到配置值的比例；每次成功请求恢复配置值的比例
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_STEP = 0.05
+
+
+class TokenBucket:
+    """令牌桶限速，速率可在遇到 429 时临时下调"""
+
+    def __init__(self, requests_per_minute: float):
+        self.max_rate = requests_per_minute / 60
+        self.rate = self.max_rate
+        self.capacity = max(1.0, self.max_rate * RATE_BURST_SECONDS)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """取得一个令牌，不足时等待"""
+        if not self.enabled:
+            return
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self) -> None:
+        """遇到 429：速率减半并清空积累的令牌"""
+        if not self.enabled:
+            return
+        self._refill()
+        self.rate = max(self.max_rate * MIN_RATE_FACTOR, self.rate / 2)
+        self.tokens = 0.0
+
+    def recover(self) -> None:
+        """请求成功：速率逐步恢复到配置值"""
+        if self.enabled and self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY_STEP)
+
+
+class PrioritySlots:
+    """按优先级分配的并发名额（全局上限 + 单模型上限）"""
+
+    def __init__(self, max_concurrency: int, model_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency
+        self.active = 0
+        self.active_by_model: dict[str, int] = defaultdict(int)
+        # (priority, seq, model, future)，按优先级与到达顺序排列
+        self._waiters: list[tuple[int, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _available(self, model: str) -> bool:
+        return (
+            self.active < self.max_concurrency
+            and self.active_by_model[model] < self.model_concurrency
+        )
+
+    def _grant(self, model: str) -> None:
+        self.active += 1
+        self.active_by_model[model] += 1
+
+    def _dispatch(self) -> None:
+        """把空出的名额按顺序分配给可以运行的等待者"""
+        index = 0
+        while index < len(self._waiters) and self.active < self.max_concurrency:
+            _, _, model, future = self._waiters[index]
+            if future.done():
+                del self._waiters[index]
+            elif self._available(model):
+                del self._waiters[index]
+                self._grant(model)
+                future.set_result(None)
+            else:
+                index += 1
+
+    async def acquire(self, priority: int, model: str) -> None:
+        """等待一个名额；同优先级或更高优先级有人排队时不插队"""
+        if self._available(model) and not any(w[0] <= priority for w in self._waiters):
+            self._grant(model)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        bisect.insort(self._waiters, (priority, next(self._seq), model, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 名额已分配但调用方被取消：归还名额
+                self.release(model)
+            else:
+                self._waiters = [w for w in self._waiters if w[3] is not future]
+            raise
+
+    def release(self, model: str) -> None:
+        self.active -= 1
+        self.active_by_model[model] -= 1
+        self._dispatch()
+
+
+def _retry_after_seconds(error: RateLimitError) -> float:
+    """从 429 响应头读取需要等待的秒数"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            seconds = float(headers["retry-after-ms"]) / 1000
+        elif headers.get("retry-after"):
+            seconds = float(headers["retry-after"])
+        else:
+            seconds = DEFAULT_RETRY_AFTER
+    except (TypeError, ValueError):
+        seconds = DEFAULT_RETRY_AFTER
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def _new_metrics() -> dict[str, float]:
+    return {
+        "requests": 0,
+        "failures": 0,
+        "rate_limited": 0,
+        "queue_time_total": 0.0,
+        "queue_time_max": 0.0,
+        "latency_total": 0.0,
+    }
+
+
+class LLMGateway:
+    """LLM 网关"""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        model_concurrency: int = LLM_MODEL_CONCURRENCY,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        provider_pool: ProviderPool | None = None,
+    ):
+        self._slots = PrioritySlots(max_concurrency, model_concurrency)
+        # None 表示使用全局服务商池
+        self._providers = provider_pool
+        self._bucket = TokenBucket(requests_per_minute)
+        # 429 后所有请求暂停到该时刻（monotonic）
+        self._resume_at = 0.0
+        self._metrics = {priority: _new_metrics() for priority in Priority}
+
+    @asynccontextmanager
+    async def _slot(self, priority: Priority, model: str):
+        """占用一个并发名额，并等待速率限制放行"""
+        queued_at = time.monotonic()
+        await self._slots.acquire(priority, model)
+        try:
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._bucket.acquire()
+
+            waited = time.monotonic() - queued_at
+            metrics = self._metrics[priority]
+            metrics["queue_time_total"] += waited
+            metrics["queue_time_max"] = max(metrics["queue_time_max"], waited)
+            yield
+        finally:
+            self._slots.release(model)
+
+    def _on_rate_limited(self, priority: Priority, error: RateLimitError, attempt: int) -> None:
+        """记录 429：暂停所有请求并降低速率"""
+        self._metrics[priority]["rate_limited"] += 1
+        retry_after = _retry_after_seconds(error)
+        self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+        self._bucket.throttle()
+        logger.warning(
+            f"LLM 请求被限流（429），所有请求暂停 {retry_after:.1f} 秒后重试 "
+            f"({attempt + 1}/{LLM_RATE_LIMIT_RETRIES})"
+        )
+
+    @property
+    def providers(self) -> ProviderPool:
+        return self._providers or get_provider_pool()
+
+    async def _create(self, model: str, messages: list[dict[str, Any]], **kwargs):
+        """经服务商池发出请求（故障转移与对冲见 core.ai.llm_providers）"""
+        return await self.providers.run(
+            model,
+            lambda client, provider_model: client.chat.completions.create(
+                model=provider_model, messages=messages, **kwargs
+            ),
+        )
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        *,
+        priority: Priority = Priority.SCHEDULED,
+        model: str | None = None,
+        cache: bool = False,
+        subsystem: str = "other",
+        **kwargs,
+    ):
+        """
+        发送一次对话补全请求
+
+        Args:
+            messages: 对话消息
+            priority: 请求优先级
+            model: 模型名称，默认使用当前配置的模型
+            cache: 是否使用响应缓存（相同模型、消息与参数的请求直接返回上次的结果）
+            subsystem: 用量统计的子系统名称（见 core.ai.usage_tracker）
+            **kwargs: 透传给 chat.completions.create 的参数（temperature、tools 等）
+
+        Returns:
+            ChatCompletion 响应
+        """
+        model = model or get_llm_model()
+        if cache and LLM_RESPONSE_CACHE_ENABLED:
+            key = make_cache_key(model, messages, **kwargs)
+            return await get_response_cache().get_or_create(
+                key, lambda: self._chat(messages, priority, model, subsystem, **kwargs)
+            )
+        return await self._chat(messages, priority, model, subsystem, **kwargs)
+
+    async def _chat(
+        self,
+        messages: list[dict[str, Any]],
+        priority: Priority,
+        model: str,
+        subsystem: str,
+        **kwargs,
+    ):
+        metrics = self._metrics[priority]
+        for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+            async with self._slot(priority, model):
+                metrics["requests"] += 1
+                started = time.monotonic()
+                try:
+                    response = await self._create(model, messages, **kwargs)
+                except RateLimitError as e:
+                    if attempt == LLM_RATE_LIMIT_RETRIES:
+                        metrics["failures"] += 1
+                        raise
+                    self._on_rate_limited(priority, e, attempt)
+                    continue
+                except Exception:
+                    metrics["failures"] += 1
+                    raise
+                metrics["latency_total"] += time.monotonic() - started
+                self._bucket.recover()
+                get_usage_tracker().record_response(subsystem, model, response)
+                return response
+
+    async def stream(
+        self,
+        messages: list[dict[str, Any]],
+        *,
+        priority: Priority = Priority.INTERACTIVE,
+        model: str | None = None,
+        subsystem: str = "other",
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """
+        流式对话补全，逐段产出文本；整个流读取期间占用并发名额
+
+        Args:
+            messages: 对话消息
+            priority: 请求优先级
+            model: 模型名称，默认使用当前配置的模型
+            subsystem: 用量统计的子系统名称
+            **kwargs: 透传给 chat.completions.create 的参数
+
+        Yields:
+            文本增量
+        """
+        model = model or get_llm_model()
+        metrics = self._metrics[priority]
+        for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+            async with self._slot(priority, model):
+                metrics["requests"] += 1
+                started = time.monotonic()
+                try:
+                    stream = await self._create(model, messages, stream=True, **kwargs)
+                except RateLimitError as e:
+                    if attempt == LLM_RATE_LIMIT_RETRIES:
+                        metrics["failures"] += 1
+                        raise
+                    self._on_rate_limited(priority, e, attempt)
+                    continue
+                except Exception:
+                    metrics["failures"] += 1
+                    raise
+
+                output = []
+                usage = None
+                try:
+                    async for chunk in stream:
+                        usage = getattr(chunk, "usage", None) or usage
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            output.append(chunk.choices[0].delta.content)
+                            yield chunk.choices[0].delta.content
+                except Exception:
+                    metrics["failures"] += 1
+                    raise
+                metrics["latency_total"] += time.monotonic() - started
+                self._bucket.recover()
+                self._record_stream_usage(subsystem, model, messages, "".join(output), usage)
+                return
+
+    @staticmethod
+    def _record_stream_usage(
+        subsystem: str, model: str, messages: list[dict[str, Any]], output: str, usage: Any
+    ) -> None:
+        """记录流式请求的用量；服务商未返回 usage 时按文本估算"""
+        if usage is not None and isinstance(getattr(usage, "prompt_tokens", None), int):
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens or 0
+        else:
+            prompt_tokens = sum(
+                estimate_tokens(m["content"]) for m in messages if isinstance(m.get("content"), str)
+            )
+            completion_tokens = estimate_tokens(output)
+        get_usage_tracker().record(subsystem, model, prompt_tokens, completion_tokens)
+
+    def get_metrics(self) -> dict[str, Any]:
+        """网关当前状态与按优先级统计的请求指标"""
+        response_cache = get_response_cache()
+        by_priority = {}
+        for priority, metrics in self._metrics.items():
+            requests = metrics["requests"]
+            by_priority[priority.name.lower()] = {
+                "requests": int(requests),
+                "failures": int(metrics["failures"]),
+                "rate_limited": int(metrics["rate_limited"]),
+                "avg_queue_seconds": round(metrics["queue_time_total"] / requests, 3)
+                if requests
+                else 0.0,
+                "max_queue_seconds": round(metrics["queue_time_max"], 3),
+                "avg_latency_seconds": round(metrics["latency_total"] / requests, 3)
+                if requests
+                else 0.0,
+            }
+        return {
+            "in_flight": self._slots.active,
+            "queued": self._slots.queued,
+            "max_concurrency": self._slots.max_concurrency,
+            "model_concurrency": self._slots.model_concurrency,
+            "requests_per_minute": round(self._bucket.rate * 60, 2)
+            if self._bucket.enabled
+            else None,
+            "paused_seconds": round(max(0.0, self._resume_at - time.monotonic()), 1),
+            "by_priority": by_priority,
+            "providers": self.providers.get_status(),
+            "cache": {
+                "enabled": LLM_RESPONSE_CACHE_ENABLED,
+                "size": response_cache.size(),
+                "hits": response_cache.hits,
+                "misses": response_cache.misses,
+            },
+        }
+
+
+# 全局网关实例
+_llm_gateway: LLMGateway | None = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """获取全局 LLM 网关实例"""
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway()
+    return _llm_gateway
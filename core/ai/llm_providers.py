@@ -0,0 +1,262 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+LLM 服务商池 - 多服务商故障转移与对冲请求
+
+主服务商为 LLM_BASE_URL / LLM_MODEL 对应的客户端，备用服务商由
+LLM_FALLBACK_PROVIDERS 按顺序配置（OpenAI 兼容接口）。
+
+- 健康评分：请求失败或在对冲中落败的服务商进入冷却期（连续失败越多冷却越久），
+  冷却中的服务商排在健康服务商之后
+- 故障转移：当前服务商请求失败时立即改用下一个服务商
+- 对冲：请求超过自适应延迟阈值（近期成功请求耗时的 P95）仍未返回时，
+  同时向下一个服务商发出请求，先成功者胜出，其余请求被取消
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+
+from core.settings import get_llm_fallback_providers
+
+logger = logging.getLogger(__name__)
+
+# 近期成功请求不足时使用的对冲延迟（秒），0 表示不发起对冲请求（仅故障转移）
+LLM_HEDGE_DELAY = max(0.0, float(os.getenv("LLM_HEDGE_DELAY", "30")))
+# 自适应对冲延迟：近期成功请求耗时的分位数，及其上下限（秒）
+HEDGE_LATENCY_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 2.0
+HEDGE_MAX_DELAY = 120.0
+LATENCY_WINDOW = 200
+# 服务商冷却时间（秒）：首次失败的冷却时间与上限，连续失败时翻倍
+PROVIDER_COOLDOWN_BASE = 30.0
+PROVIDER_COOLDOWN_MAX = 600.0
+
+
+def is_provider_error(error: BaseException) -> bool:
+    """是否为服务商侧的错误（连接/超时、429、5xx、认证），此类错误才转移到其他服务商"""
+    if isinstance(error, (APIConnectionError, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (401, 403, 408, 429) or error.status_code >= 500
+    return False
+
+
+class Provider:
+    """一个 OpenAI 兼容的服务商及其健康状态"""
+
+    def __init__(
+        self,
+        name: str,
+        model: str | None = None,
+        client: AsyncOpenAI | None = None,
+        base_url: str | None = None,
+    ):
+        self.name = name
+        # None 表示使用请求指定的模型（主服务商）
+        self.model = model
+        self.base_url = base_url
+        self._client = client
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.last_error: str | None = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is not None:
+            return self._client
+        # 主服务商每次读取 ai_client 中的客户端，热重载后立即生效
+        from core.ai import ai_client
+
+        return ai_client.async_client_llm
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def record_success(self) -> None:
+        self.wins += 1
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record_failure(self, reason: str) -> None:
+        """请求失败或在对冲中落败：进入冷却期"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = reason
+        cooldown = min(
+            PROVIDER_COOLDOWN_BASE * 2 ** (self.consecutive_failures - 1), PROVIDER_COOLDOWN_MAX
+        )
+        self.cooldown_until = time.monotonic() + cooldown
+
+    def get_status(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "model": self.model,
+            "healthy": self.healthy,
+            "requests": self.requests,
+            "wins": self.wins,
+            "failures": self.failures,
+            "cooldown_seconds": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+            "last_error": self.last_error,
+        }
+
+
+class ProviderPool:
+    """按健康状态排序的服务商池"""
+
+    def __init__(self, providers: list[Provider], hedge_delay: float = LLM_HEDGE_DELAY):
+        self.providers = providers
+        self.hedge_delay = hedge_delay
+        self.hedged = 0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @classmethod
+    def from_settings(cls) -> "ProviderPool":
+        """主服务商 + LLM_FALLBACK_PROVIDERS 中配置的备用服务商"""
+        providers = [Provider("primary")]
+        for config in get_llm_fallback_providers():
+            providers.append(
+                Provider(
+                    config["name"],
+                    model=config["model"],
+                    client=AsyncOpenAI(api_key=config["api_key"], base_url=config["base_url"]),
+                    base_url=config["base_url"],
+                )
+            )
+        if len(providers) > 1:
+            logger.info(f"LLM 服务商池: {', '.join(p.name for p in providers)}")
+        return cls(providers)
+
+    def ordered(self) -> list[Provider]:
+        """健康的服务商按配置顺序在前，冷却中的按冷却结束时间在后"""
+        healthy = [p for p in self.providers if p.healthy]
+        cooling = sorted(
+            (p for p in self.providers if not p.healthy), key=lambda p: p.cooldown_until
+        )
+        return healthy + cooling
+
+    def current_hedge_delay(self) -> float | None:
+        """当前的对冲延迟（秒）；None 表示不发起对冲请求"""
+        if self.hedge_delay <= 0 or len(self.providers) < 2:
+            return None
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return self.hedge_delay
+        threshold = statistics.quantiles(self._latencies, n=100)[
+            int(HEDGE_LATENCY_QUANTILE * 100) - 1
+        ]
+        return min(max(threshold, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    async def run(self, model: str, call: Callable[[AsyncOpenAI, str], Awaitable[Any]]) -> Any:
+        """
+        依次向服务商发出请求：失败时立即转移，超过对冲延迟时并行请求下一个
+
+        Args:
+            model: 请求指定的模型（主服务商使用）
+            call: (client, model) → 请求协程
+
+        Returns:
+            最先成功的结果
+
+        Raises:
+            所有服务商都失败时抛出最后一个异常
+        """
+        queue = self.ordered()
+        running: dict[asyncio.Task, tuple[Provider, float]] = {}
+        last_error: BaseException | None = None
+
+        def launch() -> None:
+            provider = queue.pop(0)
+            provider.requests += 1
+            task = asyncio.create_task(call(provider.client, provider.model or model))
+            running[task] = (provider, time.monotonic())
+
+        launch()
+        try:
+            while running:
+                timeout = self.current_hedge_delay() if queue else None
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedged += 1
+                    slow = ", ".join(provider.name for provider, _ in running.values())
+                    logger.warning(
+                        f"LLM 请求超过 {timeout:.1f} 秒未返回（{slow}），对冲请求 {queue[0].name}"
+                    )
+                    launch()
+                    continue
+
+                winner = None
+                request_error = None
+                for task in done:
+                    provider, started = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        winner = winner or (task, provider, started)
+                    elif is_provider_error(error):
+                        last_error = error
+                        provider.record_failure(f"{type(error).__name__}: {error}")
+                        logger.warning(
+                            f"LLM 服务商 {provider.name} 请求失败: {type(error).__name__}: {error}"
+                        )
+                    else:
+                        request_error = error
+
+                if winner is not None:
+                    task, provider, started = winner
+                    self._latencies.append(time.monotonic() - started)
+                    provider.record_success()
+                    for loser, _ in running.values():
+                        loser.record_failure(f"对冲落败于 {provider.name}")
+                    return task.result()
+                if request_error is not None:
+                    # 请求本身有问题（参数错误、内容审核等），换服务商也无济于事
+                    raise request_error
+                if not running and queue:
+                    logger.warning(f"LLM 请求转移到服务商 {queue[0].name}")
+                    launch()
+            raise last_error
+        finally:
+            for task in running:
+                task.cancel()
+
+    def get_status(self) -> dict[str, Any]:
+        delay = self.current_hedge_delay()
+        return {
+            "hedge_delay_seconds": round(delay, 2) if delay is not None else None,
+            "hedged_requests": self.hedged,
+            "providers": [provider.get_status() for provider in self.providers],
+        }
+
+
+# 全局服务商池实例
+_provider_pool: ProviderPool | None = None
+
+
+def get_provider_pool() -> ProviderPool:
+    """获取全局 LLM 服务商池实例"""
+    global _provider_pool
+    if _provider_pool is None:
+        _provider_pool = ProviderPool.from_settings()
+    return _provider_pool
@@ -10,20 +10,35 @@
 
 """
 记忆管理器 - 提取和管理总结元数据
+
+新总结的元数据（关键词、主题、情感、实体）在后台排队，按批次通过异步客户端
+一次请求提取，再写回总结记录并更新频道画像。
 """
 
+import asyncio
 import json
 import logging
+import os
+import re
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
-from core.ai.ai_client import client_llm
+from core.ai.llm_gateway import Priority, get_llm_gateway
 from core.config import normalize_channel_id
 from core.infrastructure.database import get_db_manager
-from core.settings import get_llm_model
 
 logger = logging.getLogger(__name__)
 
+# 一次 LLM 请求最多提取元数据的总结数
+METADATA_BATCH_SIZE = max(1, int(os.getenv("METADATA_BATCH_SIZE", "8")))
+# 新总结入队后最多等待的秒数，使同一轮任务产生的总结合并为一批
+METADATA_BATCH_DELAY = float(os.getenv("METADATA_BATCH_DELAY", "30"))
+# 每份总结送入提取提示词的最大字符数
+METADATA_TEXT_CHARS = 1000
+# 启动时补提取最近多少天内缺少元数据的总结（上次退出时仍在队列中的总结），及最多补提取的份数
+METADATA_RECOVERY_DAYS = 7
+METADATA_RECOVERY_LIMIT = 100
+
 
 class MemoryManager:
     """记忆管理器"""
@@ -31,81 +46,229 @@ class MemoryManager:
     def __init__(self):
         """初始化记忆管理器"""
         self.db = get_db_manager()
+        self._pending_metadata: list[dict[str, Any]] = []
+        self._metadata_batch_full = asyncio.Event()
+        self._metadata_task: asyncio.Task | None = None
         logger.info("记忆管理器初始化完成")
 
-    def extract_metadata(self, summary_text: str) -> dict[str, Any]:
-        """
-        从总结中提取元数据（关键词、主题、情感、实体）
+    def _build_metadata_prompt(self, summary_texts: list[str]) -> str:
+        """构建批量提取元数据的提示词，每条总结以序号区分"""
+        sections = "\n\n".join(
+            f"### 总结 {index}\n{text[:METADATA_TEXT_CHARS]}"
+            for index, text in enumerate(summary_texts, 1)
+        )
+        return f"""请分析以下 {len(summary_texts)} 份总结文本，分别提取关键信息，以JSON数组格式返回：
 
-        Args:
-            summary_text: 总结文本
+{sections}
 
-        Returns:
-            {
-                "keywords": List[str],
-                "topics": List[str],
-                "sentiment": str,
-                "entities": List[str]
-            }
-        """
-        try:
-            logger.info("开始提取总结元数据")
+请为每份总结提取：
+1. index: 总结序号
+2. keywords: 3-5个关键词
+3. topics: 1-3个主题标签
+4. sentiment: 情感倾向（positive/neutral/negative）
+5. entities: 提及的重要实体（人名、组织、产品等）
 
-            # 使用AI提取元数据
-            prompt = f"""请分析以下总结文本，提取关键信息，以JSON格式返回：
+返回JSON格式：
+[
+    {{
+        "index": 1,
+        "keywords": ["关键词1", "关键词2", ...],
+        "topics": ["主题1", "主题2", ...],
+        "sentiment": "neutral",
+        "entities": ["实体1", "实体2", ...]
+    }},
+    ...
+]
 
-总结内容：
-{summary_text[:1000]}
+只返回JSON，不要其他内容。"""
 
-请提取：
-1. keywords: 3-5个关键词
-2. topics: 1-3个主题标签
-3. sentiment: 情感倾向（positive/neutral/negative）
-4. entities: 提及的重要实体（人名、组织、产品等）
+    def _parse_metadata_batch(self, result_text: str, count: int) -> list[dict[str, Any]]:
+        """解析批量提取结果，缺失或格式错误的条目使用默认值"""
+        json_match = re.search(r"[\[{].*[\]}]", result_text, re.DOTALL)
+        parsed = json.loads(json_match.group() if json_match else result_text)
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+
+        results = [self._get_default_metadata("") for _ in range(count)]
+        for position, item in enumerate(parsed):
+            if not isinstance(item, dict):
+                continue
+            index = item.get("index", position + 1)
+            if isinstance(index, int) and 1 <= index <= count:
+                results[index - 1] = self._normalize_metadata(item)
+        return results
 
-返回JSON格式：
-{{
-    "keywords": ["关键词1", "关键词2", ...],
-    "topics": ["主题1", "主题2", ...],
-    "sentiment": "neutral",
-    "entities": ["实体1", "实体2", ...]
-}}
+    @staticmethod
+    def _normalize_metadata(item: dict[str, Any]) -> dict[str, Any]:
+        """规范化单条元数据的字段类型"""
+
+        def as_list(value) -> list[str]:
+            if isinstance(value, list):
+                return [str(v) for v in value if v]
+            return [str(value)] if value else []
+
+        sentiment = item.get("sentiment")
+        return {
+            "keywords": as_list(item.get("keywords")),
+            "topics": as_list(item.get("topics")),
+            "sentiment": sentiment
+            if sentiment in ("positive", "neutral", "negative")
+            else "neutral",
+            "entities": as_list(item.get("entities")),
+        }
+
+    async def extract_metadata_batch(self, summary_texts: list[str]) -> list[dict[str, Any]]:
+        """
+        在一次 LLM 请求中为多份总结提取元数据（关键词、主题、情感、实体）
 
-只返回JSON，不要其他内容。"""
+        Args:
+            summary_texts: 总结文本列表
 
-            response = client_llm.chat.completions.create(
-                model=get_llm_model(),
-                messages=[
+        Returns:
+            与输入顺序一致的元数据列表，提取失败的条目为默认值
+        """
+        if not summary_texts:
+            return []
+
+        try:
+            logger.info(f"开始批量提取总结元数据，共 {len(summary_texts)} 份")
+
+            response = await get_llm_gateway().chat(
+                [
                     {"role": "system", "content": "你是一个专业的文本分析助手，擅长提取关键信息。"},
-                    {"role": "user", "content": prompt},
+                    {"role": "user", "content": self._build_metadata_prompt(summary_texts)},
                 ],
+                priority=Priority.BACKGROUND,
+                cache=True,
+                subsystem="metadata",
                 temperature=0.3,
             )
 
             result_text = response.choices[0].message.content.strip()
 
-            # 解析JSON
             try:
-                # 提取JSON部分
-                import re
-
-                json_match = re.search(r"\{.*\}", result_text, re.DOTALL)
-                if json_match:
-                    metadata = json.loads(json_match.group())
-                else:
-                    metadata = json.loads(result_text)
-
+                metadata = self._parse_metadata_batch(result_text, len(summary_texts))
                 logger.info(f"成功提取元数据: {metadata}")
                 return metadata
-
             except json.JSONDecodeError:
                 logger.warning(f"AI返回的JSON格式无效: {result_text}")
-                # 返回默认值
-                return self._get_default_metadata(summary_text)
+                return [self._get_default_metadata(text) for text in summary_texts]
 
         except Exception as e:
             logger.error(f"提取元数据失败: {type(e).__name__}: {e}", exc_info=True)
-            return self._get_default_metadata(summary_text)
+            return [self._get_default_metadata(text) for text in summary_texts]
+
+    async def extract_metadata(self, summary_text: str) -> dict[str, Any]:
+        """
+        从单份总结中提取元数据
+
+        Args:
+            summary_text: 总结文本
+
+        Returns:
+            {
+                "keywords": List[str],
+                "topics": List[str],
+                "sentiment": str,
+                "entities": List[str]
+            }
+        """
+        return (await self.extract_metadata_batch([summary_text]))[0]
+
+    def enqueue_metadata(
+        self, summary_id: int, channel_id: str, channel_name: str, summary_text: str
+    ) -> None:
+        """
+        将新保存的总结加入元数据提取队列（需在事件循环中调用）
+
+        队列在等待 METADATA_BATCH_DELAY 秒或攒满 METADATA_BATCH_SIZE 份后批量提取，
+        同一轮定时任务产生的多份总结只需一次 LLM 请求，且不阻塞总结发送流程。
+        """
+        self._pending_metadata.append(
+            {
+                "summary_id": summary_id,
+                "channel_id": channel_id,
+                "channel_name": channel_name,
+                "summary_text": summary_text,
+            }
+        )
+        if len(self._pending_metadata) >= METADATA_BATCH_SIZE:
+            self._metadata_batch_full.set()
+        if self._metadata_task is None or self._metadata_task.done():
+            self._metadata_task = asyncio.create_task(self._flush_metadata_later())
+
+    async def _flush_metadata_later(self) -> None:
+        """等待批次攒满或超时后提取队列中的元数据"""
+        try:
+            await asyncio.wait_for(self._metadata_batch_full.wait(), timeout=METADATA_BATCH_DELAY)
+        except TimeoutError:
+            pass
+        await self.flush_metadata()
+
+    async def flush_metadata(self) -> None:
+        """分批提取队列中所有总结的元数据，写回总结记录并更新频道画像"""
+        while self._pending_metadata:
+            batch = self._pending_metadata[:METADATA_BATCH_SIZE]
+            del self._pending_metadata[:METADATA_BATCH_SIZE]
+            if len(self._pending_metadata) < METADATA_BATCH_SIZE:
+                self._metadata_batch_full.clear()
+
+            metadata_list = await self.extract_metadata_batch(
+                [item["summary_text"] for item in batch]
+            )
+            for item, metadata in zip(batch, metadata_list, strict=True):
+                try:
+                    await self.db.update_summary_metadata(
+                        item["summary_id"],
+                        keywords=metadata["keywords"],
+                        topics=metadata["topics"],
+                        sentiment=metadata["sentiment"],
+                        entities=metadata["entities"],
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"保存总结元数据失败: {type(e).__name__}: {e}",
+                        exc_info=True,
+                    )
+                await self.update_channel_profile(
+                    item["channel_id"], item["channel_name"], item["summary_text"], metadata
+                )
+
+    async def flush_pending_metadata(self) -> None:
+        """取消等待中的批次计时，立即提取队列中的元数据（关机时调用）"""
+        task = self._metadata_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+        self._metadata_task = None
+        if self._pending_metadata:
+            logger.info(f"提取队列中剩余的 {len(self._pending_metadata)} 份总结元数据")
+        await self.flush_metadata()
+
+    async def requeue_missing_metadata(self) -> int:
+        """
+        将最近保存但尚未提取元数据的总结重新入队
+
+        队列只在内存中，进程在批次等待期间退出时其中的总结会缺少元数据，启动后由此补提取。
+
+        Returns:
+            重新入队的总结数
+        """
+        since = datetime.now(UTC) - timedelta(days=METADATA_RECOVERY_DAYS)
+        rows = await self.db.get_summaries_missing_metadata(
+            since.replace(tzinfo=None), limit=METADATA_RECOVERY_LIMIT
+        )
+        queued = {item["summary_id"] for item in self._pending_metadata}
+        count = 0
+        for row in rows:
+            if row["id"] in queued:
+                continue
+            self.enqueue_metadata(
+                row["id"], row["channel_id"], row.get("channel_name") or "", row["summary_text"]
+            )
+            count += 1
+        if count:
+            logger.info(f"已将 {count} 份缺少元数据的总结重新加入提取队列")
+        return count
 
     def _get_default_metadata(self, summary_text: str) -> dict[str, Any]:
         """获取默认元数据"""
@@ -435,3 +598,27 @@ def get_memory_manager():
     if memory_manager is None:
         memory_manager = MemoryManager()
     return memory_manager
+
+
+def schedule_summary_metadata(
+    summary_id: int, channel_id: str, channel_name: str, summary_text: str
+) -> None:
+    """总结保存后登记元数据提取，失败只记录日志，不影响总结流程"""
+    try:
+        get_memory_manager().enqueue_metadata(summary_id, channel_id, channel_name, summary_text)
+    except Exception as e:
+        logger.warning(f"登记总结元数据提取失败: {type(e).__name__}: {e}")
+
+
+async def flush_summary_metadata() -> None:
+    """立即提取队列中的总结元数据（关机流程调用，未完成的在下次启动时补提取）"""
+    if memory_manager is not None:
+        await memory_manager.flush_pending_metadata()
+
+
+async def resume_summary_metadata() -> None:
+    """补提取上次运行中未完成的总结元数据（启动后调用）"""
+    try:
+        await get_memory_manager().requeue_missing_metadata()
+    except Exception as e:
+        logger.warning(f"补提取总结元数据失败: {type(e).__name__}: {e}")
@@ -12,20 +12,18 @@
 问答引擎 v3.2.0 - Agentic RAG + 向量搜索 + 多轮对话
 """
 
-import asyncio
 import json
 import logging
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
 from core.ai.agent_tools import TOOL_SCHEMAS, ToolExecutor
-from core.ai.ai_client import client_llm
+from core.ai.llm_gateway import Priority, get_llm_gateway
 from core.ai.memory_manager import get_memory_manager
 from core.ai.reranker import get_reranker
 from core.ai.vector_store import get_vector_store
 from core.config import get_qa_bot_persona
 from core.infrastructure.database import get_db_manager
-from core.settings import get_llm_model
 
 from .conversation_manager import get_conversation_manager
 from .intent_parser import get_intent_parser
@@ -439,12 +437,13 @@ class QAEngineV3:
                 f"历史消息: {len(conversation_history) if conversation_history else 0}"
             )
 
-            response = client_llm.chat.completions.create(
-                model=get_llm_model(),
-                messages=[
+            response = await get_llm_gateway().chat(
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
                 ],
+                priority=Priority.INTERACTIVE,
+                subsystem="qa",
                 temperature=0.7,
             )
 
@@ -485,8 +484,6 @@ class QAEngineV3:
         conversation_history: list[dict] = None,
     ):
         """使用RAG流式生成回答（异步生成器，降级路径使用）"""
-        import asyncio
-
         system_prompt, user_prompt = await self._build_rag_prompts(
             query=query,
             summaries=summaries,
@@ -499,30 +496,18 @@ class QAEngineV3:
             f"历史消息: {len(conversation_history) if conversation_history else 0}"
         )
 
-        loop = asyncio.get_event_loop()
-
-        def _do_stream():
-            return client_llm.chat.completions.create(
-                model=get_llm_model(),
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.7,
-                stream=True,
-            )
-
-        # 在线程池中调用同步 SDK，避免阻塞事件循环
-        stream = await loop.run_in_executor(None, _do_stream)
-
         full_text = ""
-        for chunk in stream:
-            if not chunk.choices:
-                continue
-            delta = chunk.choices[0].delta.content if chunk.choices[0].delta.content else ""
-            if delta:
-                full_text += delta
-                yield delta
+        async for delta in get_llm_gateway().stream(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            priority=Priority.INTERACTIVE,
+            subsystem="qa",
+            temperature=0.7,
+        ):
+            full_text += delta
+            yield delta
 
         # 追加来源信息
         if "📚 数据来源" not in full_text:
@@ -774,7 +759,7 @@ class QAEngineV3:
     ):
         """Agentic RAG 流式生成器。Tool-calling 循环（非流式）+ 最终回答（流式）。"""
         self.tool_executor.reset()
-        loop = asyncio.get_running_loop()
+        gateway = get_llm_gateway()
 
         # 构建系统提示词：原有提示词 + 工具说明
         channel_context = await self.memory_manager.get_channel_context()
@@ -820,15 +805,13 @@ class QAEngineV3:
         for iteration in range(AGENT_MAX_ITERATIONS):
             logger.info(f"[agent] 迭代 {iteration + 1}/{AGENT_MAX_ITERATIONS}")
 
-            response = await loop.run_in_executor(
-                None,
-                lambda: client_llm.chat.completions.create(
-                    model=get_llm_model(),
-                    messages=messages,
-                    tools=TOOL_SCHEMAS,
-                    tool_choice="auto",
-                    temperature=0.7,
-                ),
+            response = await gateway.chat(
+                messages,
+                priority=Priority.INTERACTIVE,
+                subsystem="qa_agent",
+                tools=TOOL_SCHEMAS,
+                tool_choice="auto",
+                temperature=0.7,
             )
 
             if not response or not response.choices:
@@ -872,24 +855,12 @@ class QAEngineV3:
             )
 
         # 流式生成最终回答
-        stream = await loop.run_in_executor(
-            None,
-            lambda: client_llm.chat.completions.create(
-                model=get_llm_model(),
-                messages=messages,
-                temperature=0.7,
-                stream=True,
-            ),
-        )
-
         full_text = ""
-        for chunk in stream:
-            if not chunk.choices:
-                continue
-            delta = chunk.choices[0].delta.content or ""
-            if delta:
-                full_text += delta
-                yield delta
+        async for delta in gateway.stream(
+            messages, priority=Priority.INTERACTIVE, subsystem="qa_agent", temperature=0.7
+        ):
+            full_text += delta
+            yield delta
 
         # 追加来源信息
         all_results = self.tool_executor.get_all_results()
@@ -0,0 +1,208 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+代表性消息抽样 - 超出总结预算时按话题挑选消息
+
+使用实时 RAG 已写入 messages collection 的消息向量做 k-means 聚类，
+按簇大小分配名额，每个簇挑选最接近簇中心的消息，使总结覆盖窗口内的所有话题。
+向量库不可用或覆盖率不足时退化为按时间均匀抽样。
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+REPRESENTATIVE_SAMPLING_ENABLED = os.getenv("REPRESENTATIVE_SAMPLING_ENABLED", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+# 抽样前最多收集预算多少倍的消息作为候选池
+REPRESENTATIVE_POOL_FACTOR = 4
+# 最大聚类数
+REPRESENTATIVE_MAX_CLUSTERS = 24
+# 候选消息中有向量的比例低于该值时退化为均匀抽样
+REPRESENTATIVE_MIN_COVERAGE = 0.5
+# k-means 最大迭代次数
+KMEANS_ITERATIONS = 25
+
+
+def even_pick(indices: list[int], tokens: list[int], budget: int) -> list[int]:
+    """
+    按时间均匀挑选消息，token 总和不超过 budget
+
+    Args:
+        indices: 候选下标（按时间顺序）
+        tokens: 所有消息的 token 数
+        budget: token 预算
+
+    Returns:
+        挑选出的下标（按时间顺序）
+    """
+    indices = list(indices)
+    total = sum(tokens[i] for i in indices)
+    if total <= budget:
+        return indices
+
+    count = min(len(indices), int(len(indices) * budget / total) + 1)
+    for n in range(count, 0, -1):
+        step = len(indices) / n
+        picked = [indices[int(j * step)] for j in range(n)]
+        if sum(tokens[i] for i in picked) <= budget:
+            return picked
+    return []
+
+
+def kmeans(vectors, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0):
+    """
+    k-means 聚类（k-means++ 初始化）
+
+    Args:
+        vectors: (n, d) 矩阵
+        k: 簇数（不大于 n）
+        iterations: 最大迭代次数
+        seed: 随机种子
+
+    Returns:
+        (labels, centroids)
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sq_norms = (vectors**2).sum(axis=1)
+
+    centroids = np.empty((k, vectors.shape[1]), dtype=vectors.dtype)
+    centroids[0] = vectors[rng.integers(n)]
+    closest = ((vectors - centroids[0]) ** 2).sum(axis=1)
+    for c in range(1, k):
+        total = closest.sum()
+        index = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+        centroids[c] = vectors[index]
+        closest = np.minimum(closest, ((vectors - centroids[c]) ** 2).sum(axis=1))
+
+    labels = None
+    for _ in range(iterations):
+        distances = (
+            sq_norms[:, None] - 2 * vectors @ centroids.T + (centroids**2).sum(axis=1)[None, :]
+        )
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = vectors[labels == c]
+            # 空簇保留原中心
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+    return labels, centroids
+
+
+def select_representatives(embeddings, tokens: list[int], budget: int) -> list[int]:
+    """
+    聚类后按簇大小分配名额，挑选每个簇中最接近中心的消息
+
+    Args:
+        embeddings: (n, d) 消息向量
+        tokens: 每条消息的 token 数
+        budget: token 预算
+
+    Returns:
+        挑选出的下标（升序）
+    """
+    n = len(tokens)
+    if n == 0 or budget <= 0:
+        return []
+    if sum(tokens) <= budget:
+        return list(range(n))
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1.0)
+
+    target = max(1, int(budget * n / sum(tokens)))
+    k = max(1, min(REPRESENTATIVE_MAX_CLUSTERS, target, n))
+    labels, centroids = kmeans(vectors, k)
+
+    clusters = []
+    for c in range(k):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        distances = ((vectors[members] - centroids[c]) ** 2).sum(axis=1)
+        ordered = members[np.argsort(distances)].tolist()
+        quota = max(1, round(target * len(members) / n))
+        clusters.append((ordered, quota))
+    clusters.sort(key=lambda cluster: len(cluster[0]), reverse=True)
+
+    # 按轮次从每个簇取下一条最接近中心的消息，直到名额或预算用尽
+    picked: list[int] = []
+    used = 0
+    for rank in range(max(quota for _, quota in clusters)):
+        for ordered, quota in clusters:
+            if rank < quota and rank < len(ordered) and used + tokens[ordered[rank]] <= budget:
+                picked.append(ordered[rank])
+                used += tokens[ordered[rank]]
+    return sorted(picked)
+
+
+def select_representative_indices(
+    channel_id: str | None, message_ids: list[int], tokens: list[int], budget: int
+) -> list[int]:
+    """
+    为超出预算的频道消息挑选代表性子集（同步函数，涉及向量库读取与聚类，应在线程中调用）
+
+    Args:
+        channel_id: 频道实体 ID（与实时 RAG 写入的向量 ID 前缀一致），未知时为 None
+        message_ids: 候选消息 ID（按时间顺序）
+        tokens: 每条消息的 token 数
+        budget: token 预算
+
+    Returns:
+        挑选出的下标（升序）
+    """
+    all_indices = list(range(len(message_ids)))
+    if not (REPRESENTATIVE_SAMPLING_ENABLED and NUMPY_AVAILABLE and channel_id):
+        return even_pick(all_indices, tokens, budget)
+
+    from core.ai.vector_store import get_vector_store
+
+    ids = [f"{channel_id}:{message_id}" for message_id in message_ids]
+    try:
+        found = get_vector_store().get_message_embeddings(ids)
+    except Exception as e:
+        logger.warning(f"读取消息向量失败，改为均匀抽样: {type(e).__name__}: {e}")
+        return even_pick(all_indices, tokens, budget)
+
+    covered = [i for i, vid in enumerate(ids) if vid in found]
+    if len(covered) < REPRESENTATIVE_MIN_COVERAGE * len(ids):
+        logger.info(f"消息向量覆盖率不足（{len(covered)}/{len(ids)}），改为均匀抽样")
+        return even_pick(all_indices, tokens, budget)
+
+    # 有向量的消息聚类挑选；其余消息按数量比例分得预算，均匀抽样
+    covered_budget = budget * len(covered) // len(ids)
+    embeddings = [found[ids[i]] for i in covered]
+    picked = [
+        covered[j]
+        for j in select_representatives(embeddings, [tokens[i] for i in covered], covered_budget)
+    ]
+    covered_set = set(covered)
+    uncovered = [i for i in all_indices if i not in covered_set]
+    remaining = budget - sum(tokens[i] for i in picked)
+    picked.extend(even_pick(uncovered, tokens, remaining))
+    logger.info(f"代表性抽样: {len(message_ids)} 条候选消息聚类后保留 {len(picked)} 条")
+    return sorted(picked)
@@ -0,0 +1,159 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""LLM 响应缓存
+
+投票生成、元数据提取、投稿优化等调用经常以完全相同的提示词重复发起
+（重试、管理员重复点击等）。缓存以（模型、消息、temperature、tools 等请求参数）
+的哈希为键，保存在进程内，支持 LRU 淘汰和 TTL 过期；
+同一请求正在进行时，后来者等待该请求的结果而不是再次调用。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# 缓存开关、最大条目数与条目生存时间（秒）
+LLM_RESPONSE_CACHE_ENABLED = os.getenv("LLM_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+LLM_RESPONSE_CACHE_SIZE = max(1, int(os.getenv("LLM_RESPONSE_CACHE_SIZE", "256")))
+LLM_RESPONSE_CACHE_TTL = max(0, int(os.getenv("LLM_RESPONSE_CACHE_TTL", "3600")))
+
+
+def make_cache_key(model: str, messages: list[dict[str, Any]], **kwargs) -> str:
+    """根据模型、消息与请求参数计算缓存键
+
+    Args:
+        model: 模型名称
+        messages: 对话消息
+        **kwargs: 其余请求参数（temperature、tools 等）
+
+    Returns:
+        SHA-256 十六进制摘要
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": kwargs},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LLM 响应缓存（LRU + TTL）"""
+
+    def __init__(self, max_size: int = LLM_RESPONSE_CACHE_SIZE, ttl: int = LLM_RESPONSE_CACHE_TTL):
+        """初始化缓存
+
+        Args:
+            max_size: 最大缓存条目数（LRU淘汰阈值）
+            ttl: 缓存条目生存时间（秒），0 表示永不过期
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        # key -> (response, timestamp)
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        # 正在进行的请求：key -> future
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _is_expired(self, timestamp: float) -> bool:
+        return self._ttl > 0 and time.monotonic() - timestamp > self._ttl
+
+    def get(self, key: str) -> Any | None:
+        """获取缓存的响应，不存在或已过期返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response, timestamp = entry
+        if self._is_expired(timestamp):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def set(self, key: str, response: Any) -> None:
+        """缓存响应，超出容量时淘汰最久未使用的条目"""
+        self._entries[key] = (response, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_create(self, key: str, create: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        返回缓存的响应；没有缓存时调用 create，成功的结果写入缓存
+
+        同一键的请求正在进行时等待其结果；create 失败时异常传给所有等待者，不写入缓存。
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            logger.debug(f"LLM 响应缓存命中: {key[:12]}")
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # 发起请求的一方被取消：由当前调用方重新请求
+                return await self.get_or_create(key, create)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await create()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            self.set(key, response)
+            future.set_result(response)
+            return response
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        """清除所有缓存"""
+        self._entries.clear()
+
+    def size(self) -> int:
+        """获取缓存条目数量"""
+        return len(self._entries)
+
+
+# 全局缓存实例
+_response_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """获取全局 LLM 响应缓存实例"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,76 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+总结输入指纹 - 输入未变化时复用已有总结
+
+指纹由频道、消息条数、消息内容（含消息链接，即消息ID）、提示词哈希与模型计算，
+随总结一起保存。任务重试或重复触发时若抓取到的输入完全相同，直接复用已有总结，
+不再调用 LLM。
+"""
+
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def compute_summary_fingerprint(
+    channel: str, messages: list[str], prompt: str, model: str | None
+) -> str:
+    """
+    计算总结输入指纹
+
+    Args:
+        channel: 频道标识
+        messages: 送入 LLM 的格式化消息（按时间顺序）
+        prompt: 总结提示词
+        model: LLM 模型名称
+
+    Returns:
+        十六进制 SHA-256 指纹
+    """
+    digest = hashlib.sha256()
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    for part in (channel, str(len(messages)), prompt_hash, model or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for message in messages:
+        digest.update(message.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def strip_report_title(report_text: str) -> str:
+    """去掉报告文本开头的标题行，得到总结正文"""
+    if report_text.startswith("**") and "\n\n" in report_text:
+        return report_text.split("\n\n", 1)[1]
+    return report_text
+
+
+async def find_summary_by_fingerprint(channel: str, fingerprint: str) -> dict | None:
+    """
+    查找输入指纹相同的已有总结
+
+    Returns:
+        总结记录（附加 summary_body 正文字段），不存在或数据库不可用时返回 None
+    """
+    try:
+        from core.infrastructure.database import get_db_manager
+
+        record = await get_db_manager().get_summary_by_fingerprint(channel, fingerprint)
+    except Exception as e:
+        logger.warning(f"查询总结输入指纹失败: {type(e).__name__}: {e}")
+        return None
+
+    if record:
+        record["summary_body"] = strip_report_title(record["summary_text"])
+        logger.info(f"频道 {channel} 的总结输入未变化，复用已有总结 ID: {record['id']}")
+    return record
@@ -0,0 +1,73 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+
+"""
+Token 数估算 - 不依赖具体模型分词器的近似计算
+
+中日韩字符按每字 1 token 计，其余字符按每 4 个字符 1 token 计，结果偏保守，
+用于在调用 LLM 前按上下文预算切分或裁剪文本。
+"""
+
+import math
+
+# 非 CJK 文本平均每 token 的字符数
+_CHARS_PER_TOKEN = 4
+
+
+def _is_cjk(char: str) -> bool:
+    code = ord(char)
+    return (
+        0x4E00 <= code <= 0x9FFF  # CJK 统一表意文字
+        or 0x3400 <= code <= 0x4DBF  # 扩展 A
+        or 0x3040 <= code <= 0x30FF  # 平假名、片假名
+        or 0xAC00 <= code <= 0xD7AF  # 韩文音节
+        or 0xFF00 <= code <= 0xFFEF  # 全角符号
+        or 0x3000 <= code <= 0x303F  # CJK 标点
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        估算的 token 数
+    """
+    if not text:
+        return 0
+    cjk = sum(1 for char in text if _is_cjk(char))
+    return cjk + math.ceil((len(text) - cjk) / _CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    将文本截断到不超过 max_tokens 的估算 token 数
+
+    Args:
+        text: 输入文本
+        max_tokens: token 上限
+
+    Returns:
+        截断后的文本（未超限时原样返回）
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # 按字符累加估算值，找到最长的合规前缀
+    budget = max_tokens * _CHARS_PER_TOKEN
+    for index, char in enumerate(text):
+        budget -= _CHARS_PER_TOKEN if _is_cjk(char) else 1
+        if budget < 0:
+            return text[:index]
+    return text
@@ -0,0 +1,209 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+LLM / Embedding 用量统计
+
+每次 LLM 与 Embedding 调用按（日期、子系统、频道、模型）记录请求数与
+prompt / completion token 数（取自 API 返回的 usage 字段，流式响应没有 usage 时按文本估算），
+先在内存中累加，定期写入 MySQL 汇总表 llm_usage（主进程由调度器、问答Bot由 job_queue
+调用 flush_llm_usage，两者退出时都会写入剩余用量）。
+
+子系统名称：summary、poll、qa、qa_agent、metadata、submission、
+embedding_index、embedding_search、embedding_realtime、embedding_reembed。
+频道通过 usage_channel() 上下文设置，同一任务中（含其创建的子任务）的调用都会记到该频道。
+
+费用按 LLM_PRICING（模型 → 每百万 token 的 prompt / completion 单价）在查询时计算。
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# 内存中的用量写入数据库的间隔（秒）
+LLM_USAGE_FLUSH_INTERVAL = max(10, int(os.getenv("LLM_USAGE_FLUSH_INTERVAL", "300")))
+
+
+def _load_pricing() -> dict[str, dict[str, float]]:
+    """读取 LLM_PRICING：{"模型": {"prompt": 单价, "completion": 单价}}，单价为每百万 token"""
+    raw = os.getenv("LLM_PRICING", "").strip()
+    if not raw:
+        return {}
+    try:
+        pricing = json.loads(raw)
+        return {
+            str(model): {
+                "prompt": float(prices.get("prompt", 0)),
+                "completion": float(prices.get("completion", 0)),
+            }
+            for model, prices in pricing.items()
+        }
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        logger.warning("LLM_PRICING 格式无效，费用将不会计算")
+        return {}
+
+
+LLM_PRICING = _load_pricing()
+
+# 当前调用所属的频道
+_current_channel: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "llm_usage_channel", default=None
+)
+
+
+@contextmanager
+def usage_channel(channel: str | None) -> Iterator[None]:
+    """在该上下文中发起的 LLM / Embedding 调用记到指定频道"""
+    token = _current_channel.set(channel)
+    try:
+        yield
+    finally:
+        _current_channel.reset(token)
+
+
+def current_channel() -> str | None:
+    """当前上下文的频道"""
+    return _current_channel.get()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    """按 LLM_PRICING 计算费用，未配置该模型的单价时返回 None"""
+    prices = LLM_PRICING.get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices["prompt"] + completion_tokens * prices["completion"]) / 1_000_000
+
+
+def _new_counts() -> dict[str, int]:
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+
+class UsageTracker:
+    """用量统计：内存累加，定期写入数据库
+
+    record() 可在线程池中调用（Embedding 为同步调用），内部加锁。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (日期, 子系统, 频道, 模型) → 计数，尚未写入数据库
+        self._pending: dict[tuple[date, str, str, str], dict[str, int]] = {}
+        # 子系统 → 计数，进程启动以来的累计值
+        self._totals: dict[str, dict[str, int]] = {}
+
+    def record(
+        self,
+        subsystem: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int = 0,
+        channel: str | None = None,
+    ) -> None:
+        """
+        记录一次调用的用量
+
+        Args:
+            subsystem: 子系统名称
+            model: 模型名称
+            prompt_tokens: 输入 token 数
+            completion_tokens: 输出 token 数（Embedding 为 0）
+            channel: 频道，默认取 usage_channel() 设置的频道
+        """
+        channel = channel or current_channel() or ""
+        key = (date.today(), subsystem, channel, model)
+        with self._lock:
+            for counts in (
+                self._pending.setdefault(key, _new_counts()),
+                self._totals.setdefault(subsystem, _new_counts()),
+            ):
+                counts["requests"] += 1
+                counts["prompt_tokens"] += prompt_tokens
+                counts["completion_tokens"] += completion_tokens
+
+    def record_response(self, subsystem: str, model: str, response: Any) -> None:
+        """从 API 响应的 usage 字段记录用量（没有 usage 时只计请求数）"""
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        # 故障转移到备用服务商时，响应中的模型名称与请求的不同
+        response_model = getattr(response, "model", None)
+        self.record(
+            subsystem,
+            response_model if isinstance(response_model, str) and response_model else model,
+            prompt_tokens if isinstance(prompt_tokens, int) else 0,
+            completion_tokens if isinstance(completion_tokens, int) else 0,
+        )
+
+    async def flush(self) -> int:
+        """
+        将内存中的用量写入数据库，写入失败时保留到下次
+
+        Returns:
+            写入的汇总行数
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        from core.infrastructure.database.llm_usage_repo import get_llm_usage_repo
+
+        rows = [
+            {
+                "usage_date": usage_date,
+                "subsystem": subsystem,
+                "channel_id": channel,
+                "model": model,
+                **counts,
+            }
+            for (usage_date, subsystem, channel, model), counts in pending.items()
+        ]
+        try:
+            await get_llm_usage_repo().add_usage(rows)
+            logger.debug(f"已写入 {len(rows)} 条 LLM 用量汇总")
+            return len(rows)
+        except Exception as e:
+            logger.warning(f"写入 LLM 用量失败，将在下次重试: {type(e).__name__}: {e}")
+            with self._lock:
+                for key, counts in pending.items():
+                    merged = self._pending.setdefault(key, _new_counts())
+                    for field, value in counts.items():
+                        merged[field] += value
+            return 0
+
+    def get_totals(self) -> dict[str, dict[str, int]]:
+        """进程启动以来按子系统累计的用量"""
+        with self._lock:
+            return {subsystem: dict(counts) for subsystem, counts in self._totals.items()}
+
+
+# 全局用量统计实例
+_usage_tracker: UsageTracker | None = None
+
+
+def get_usage_tracker() -> UsageTracker:
+    """获取全局用量统计实例"""
+    global _usage_tracker
+    if _usage_tracker is None:
+        _usage_tracker = UsageTracker()
+    return _usage_tracker
+
+
+async def flush_llm_usage() -> None:
+    """将内存中的用量写入数据库（定时任务与关机流程调用）"""
+    await get_usage_tracker().flush()
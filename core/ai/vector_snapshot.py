@@ -0,0 +1,228 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+向量库快照 - 紧凑的二进制导出与批量恢复
+
+快照是一个 zip 容器，按 collection 分块存储列式数据：
+
+    manifest.json                        版本、维度、各 collection 的条目数与分块数
+    <collection>/<chunk>/ids.json        ID 列
+    <collection>/<chunk>/documents.json  文本列
+    <collection>/<chunk>/metadatas.json  元数据列
+    <collection>/<chunk>/embeddings.npy  float16 向量矩阵
+
+导出与恢复都按块流式进行，内存占用只与块大小有关；恢复时直接写入已有向量，
+无需重新调用 Embedding 服务。
+
+命令行用法（需先停止 Bot）:
+    python -m core.ai.vector_snapshot export data/vector_snapshots/backup.zip
+    python -m core.ai.vector_snapshot restore data/vector_snapshots/backup.zip --mode replace
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import zipfile
+from datetime import UTC, datetime
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_DIR = os.path.join("data", "vector_snapshots")
+# 导出时每块的条目数
+EXPORT_CHUNK_SIZE = 2000
+# 恢复时每次写入的条目数（不超过 ChromaDB 的最大批量）
+RESTORE_BATCH_SIZE = 5000
+RESTORE_MODE_MERGE = "merge"
+RESTORE_MODE_REPLACE = "replace"
+VALID_RESTORE_MODES = (RESTORE_MODE_MERGE, RESTORE_MODE_REPLACE)
+
+_MANIFEST = "manifest.json"
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy 未安装，无法读写向量快照")
+
+
+def _write_json(archive: zipfile.ZipFile, name: str, data) -> None:
+    with archive.open(name, "w") as f:
+        f.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def _read_json(archive: zipfile.ZipFile, name: str):
+    with archive.open(name) as f:
+        return json.loads(f.read().decode("utf-8"))
+
+
+def export_collections(collections: dict, path: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> dict:
+    """
+    将 collection 导出为快照文件
+
+    Args:
+        collections: {名称: ChromaDB collection}
+        path: 快照文件路径
+        chunk_size: 每块的条目数
+
+    Returns:
+        导出统计，包含每个 collection 的条目数与维度
+    """
+    _require_numpy()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": datetime.now(UTC).isoformat(),
+        "collections": {},
+    }
+
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, collection in collections.items():
+            if collection is None:
+                continue
+
+            total = collection.count()
+            exported = 0
+            chunks = 0
+            dimension = None
+            # 条目数在导出期间可能变化，+1 作为最大迭代次数保护
+            for _ in range(total // chunk_size + 1):
+                batch = collection.get(
+                    limit=chunk_size,
+                    offset=exported,
+                    include=["embeddings", "documents", "metadatas"],
+                )
+                ids = batch.get("ids") or []
+                if not ids:
+                    break
+
+                embeddings = np.asarray(batch["embeddings"], dtype=np.float16)
+                dimension = int(embeddings.shape[1])
+                prefix = f"{name}/{chunks:05d}"
+                _write_json(archive, f"{prefix}/ids.json", list(ids))
+                _write_json(archive, f"{prefix}/documents.json", batch.get("documents") or [])
+                _write_json(archive, f"{prefix}/metadatas.json", batch.get("metadatas") or [])
+                with archive.open(f"{prefix}/embeddings.npy", "w") as f:
+                    np.lib.format.write_array(f, embeddings, allow_pickle=False)
+
+                chunks += 1
+                exported += len(ids)
+                logger.info(f"快照导出 {name}: {exported}/{total}")
+
+            manifest["collections"][name] = {
+                "count": exported,
+                "chunks": chunks,
+                "dimension": dimension,
+            }
+
+        _write_json(archive, _MANIFEST, manifest)
+
+    os.replace(tmp_path, path)
+    logger.info(f"向量快照导出完成: {os.path.basename(path)}")
+    return manifest
+
+
+def read_manifest(path: str) -> dict:
+    """读取快照清单"""
+    with zipfile.ZipFile(path) as archive:
+        manifest = _read_json(archive, _MANIFEST)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"不支持的快照格式版本: {manifest.get('format_version')}")
+    return manifest
+
+
+def iter_snapshot_chunks(path: str, name: str):
+    """
+    逐块读取快照中某个 collection 的数据
+
+    Yields:
+        (ids, documents, metadatas, embeddings) 元组，embeddings 为 float32 矩阵
+    """
+    _require_numpy()
+    with zipfile.ZipFile(path) as archive:
+        info = _read_json(archive, _MANIFEST)["collections"].get(name)
+        if not info:
+            return
+        for chunk in range(info["chunks"]):
+            prefix = f"{name}/{chunk:05d}"
+            ids = _read_json(archive, f"{prefix}/ids.json")
+            documents = _read_json(archive, f"{prefix}/documents.json") or None
+            metadatas = _read_json(archive, f"{prefix}/metadatas.json") or None
+            with archive.open(f"{prefix}/embeddings.npy") as f:
+                embeddings = np.lib.format.read_array(io.BytesIO(f.read()), allow_pickle=False)
+            yield ids, documents, metadatas, embeddings.astype(np.float32)
+
+
+def restore_collection(
+    path: str, name: str, collection, batch_size: int = RESTORE_BATCH_SIZE
+) -> int:
+    """
+    将快照中某个 collection 的数据批量写入目标 collection（upsert）
+
+    Args:
+        path: 快照文件路径
+        name: 快照中的 collection 名称
+        collection: 目标 ChromaDB collection
+        batch_size: 每次写入的条目数
+
+    Returns:
+        写入的条目数
+    """
+    restored = 0
+    for ids, documents, metadatas, embeddings in iter_snapshot_chunks(path, name):
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end].tolist(),
+                documents=documents[start:end] if documents else None,
+                metadatas=metadatas[start:end] if metadatas else None,
+            )
+            restored += len(ids[start:end])
+        logger.info(f"快照恢复 {name}: 已写入 {restored} 条")
+    return restored
+
+
+# 命令行执行支持
+if __name__ == "__main__":
+    from core.ai.vector_store import get_vector_store
+
+    parser = argparse.ArgumentParser(description="向量库快照导出/恢复")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="导出快照")
+    export_parser.add_argument("path", help="快照文件路径")
+    restore_parser = subparsers.add_parser("restore", help="从快照恢复")
+    restore_parser.add_argument("path", help="快照文件路径")
+    restore_parser.add_argument(
+        "--mode",
+        choices=VALID_RESTORE_MODES,
+        default=RESTORE_MODE_MERGE,
+        help="merge - 合并到现有数据；replace - 先清空再恢复",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    store = get_vector_store()
+    if args.command == "export":
+        outcome = store.export_snapshot(args.path)
+    else:
+        outcome = store.restore_snapshot(args.path, mode=args.mode)
+    print(f"结果: {outcome}")
@@ -12,6 +12,7 @@
 向量存储管理器 - 使用ChromaDB存储和检索向量
 """
 
+import asyncio
 import hashlib
 import logging
 import os
@@ -19,6 +20,12 @@ from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# 重新生成降级向量的检查间隔（秒）与每批条目数
+EMBEDDING_REEMBED_INTERVAL = int(os.getenv("EMBEDDING_REEMBED_INTERVAL", "600"))
+EMBEDDING_REEMBED_BATCH_SIZE = int(os.getenv("EMBEDDING_REEMBED_BATCH_SIZE", "64"))
+# 等待写线程完成重新生成向量写入的超时（秒）
+_REEMBED_WRITE_TIMEOUT = 60
+
 try:
     import chromadb
 
@@ -43,7 +50,7 @@ class VectorStore:
         try:
             # 获取配置
             vector_db_path = os.getenv("VECTOR_DB_PATH", "data/vectors")
-            int(os.getenv("EMBEDDING_DIMENSION", "1024"))
+            self.dimension = int(os.getenv("EMBEDDING_DIMENSION", "1024"))
 
             # 创建持久化客户端
             self.client = chromadb.PersistentClient(path=vector_db_path)
@@ -60,6 +67,9 @@ class VectorStore:
                 metadata={"hnsw:space": "cosine"},
             )
 
+            self._check_dimension(self.collection)
+            self._check_dimension(self.messages_collection)
+
             logger.info(f"向量存储初始化成功: {vector_db_path}")
 
         except Exception as e:
@@ -68,6 +78,30 @@ class VectorStore:
             self.collection = None
             self.messages_collection = None
 
+    def _check_dimension(self, collection) -> int | None:
+        """
+        检查 collection 中已有向量的维度是否与 EMBEDDING_DIMENSION 一致
+
+        Returns:
+            已有向量的维度，collection 为空或读取失败时返回 None
+        """
+        try:
+            sample = collection.get(limit=1, include=["embeddings"])
+            embeddings = sample.get("embeddings")
+            if embeddings is None or len(embeddings) == 0:
+                return None
+            stored_dimension = len(embeddings[0])
+        except Exception as e:
+            logger.warning(f"读取 {collection.name} 向量维度失败: {type(e).__name__}: {e}")
+            return None
+
+        if stored_dimension != self.dimension:
+            logger.warning(
+                f"{collection.name} 中的向量为 {stored_dimension} 维，与 EMBEDDING_DIMENSION="
+                f"{self.dimension} 不一致，请运行 python -m core.migrations.reduce_vector_dimension"
+            )
+        return stored_dimension
+
     def is_available(self) -> bool:
         """检查向量存储是否可用"""
         return self.collection is not None
@@ -89,7 +123,10 @@ class VectorStore:
             return False
 
         try:
-            from core.ai.embedding_generator import get_embedding_generator
+            from core.ai.embedding_generator import (
+                EMBEDDING_BACKEND_METADATA_KEY,
+                get_embedding_generator,
+            )
 
             emb_gen = get_embedding_generator()
 
@@ -98,7 +135,9 @@ class VectorStore:
                 return False
 
             # 生成embedding
-            embedding = emb_gen.generate(text)
+            embedding, backend_name = emb_gen.generate_with_backend(
+                text, subsystem="embedding_index", channel=metadata.get("channel_id")
+            )
             if embedding is None:
                 logger.error(f"生成embedding失败: summary_id={summary_id}")
                 return False
@@ -108,7 +147,7 @@ class VectorStore:
                 ids=[str(summary_id)],
                 embeddings=[embedding],
                 documents=[text],
-                metadatas=[metadata],
+                metadatas=[{**metadata, EMBEDDING_BACKEND_METADATA_KEY: backend_name}],
             )
 
             logger.info(f"成功添加向量: summary_id={summary_id}")
@@ -292,6 +331,29 @@ class VectorStore:
             logger.error(f"搜索消息向量失败: {type(e).__name__}: {e}")
             return []
 
+    def get_message_embeddings(self, ids: list[str], batch_size: int = 1000) -> dict[str, Any]:
+        """
+        按 ID 批量读取消息向量
+
+        Args:
+            ids: 向量 ID 列表（channel_id:message_id）
+            batch_size: 每次查询的 ID 数
+
+        Returns:
+            {向量ID: 向量}，不存在的 ID 不包含在结果中；存储不可用时返回空字典
+        """
+        if not self.messages_collection:
+            return {}
+
+        embeddings: dict[str, Any] = {}
+        for start in range(0, len(ids), batch_size):
+            batch = self.messages_collection.get(
+                ids=ids[start : start + batch_size], include=["embeddings"]
+            )
+            for vid, embedding in zip(batch["ids"], batch["embeddings"], strict=True):
+                embeddings[vid] = embedding
+        return embeddings
+
     def search_all(
         self,
         query: str,
@@ -375,6 +437,30 @@ class VectorStore:
             logger.error(f"删除消息向量失败: {type(e).__name__}: {e}")
             return False
 
+    def delete_messages(self, message_ids: list[str]) -> bool:
+        """
+        批量删除消息向量
+
+        Args:
+            message_ids: 消息ID列表（"channel_id:msg_id" 格式）
+
+        Returns:
+            是否成功
+        """
+        if not self.messages_collection:
+            return False
+        if not message_ids:
+            return True
+
+        try:
+            self.messages_collection.delete(ids=[str(mid) for mid in message_ids])
+            logger.info(f"批量删除消息向量: {len(message_ids)} 条")
+            return True
+
+        except Exception as e:
+            logger.error(f"批量删除消息向量失败: {type(e).__name__}: {e}")
+            return False
+
     def update_message(
         self, message_id: int | str, text: str, metadata: dict[str, Any], embedding: list[float]
     ) -> bool:
@@ -439,7 +525,9 @@ class VectorStore:
         if not emb_gen.is_available():
             return []
 
-        query_embedding = emb_gen.generate(query)
+        query_embedding, backend_name = emb_gen.generate_with_backend(
+            query, subsystem="embedding_search"
+        )
         if query_embedding is None:
             return []
 
@@ -448,6 +536,10 @@ class VectorStore:
         if filter_metadata:
             for k, v in filter_metadata.items():
                 where_conditions.append({k: {"$eq": v}})
+        # 只匹配与查询向量同一后端生成的向量（不同后端的向量空间互不兼容）
+        backend_condition = emb_gen.backend_filter(backend_name)
+        if backend_condition:
+            where_conditions.append(backend_condition)
 
         need_date_filter = date_after or date_before
         fetch_k = top_k * 3 if need_date_filter else top_k
@@ -525,6 +617,77 @@ class VectorStore:
 
         return formatted
 
+    # ── 降级向量重新生成 ──────────────────────────────────────────────────
+
+    def reembed_fallback_vectors(self, batch_size: int = EMBEDDING_REEMBED_BATCH_SIZE) -> int:
+        """
+        用主后端重新生成降级后端写入的向量（同步执行，应在线程中调用）
+
+        逐批处理 summaries 与 messages 中由降级后端生成的条目，主后端调用失败时停止，
+        等待下次执行。
+
+        Args:
+            batch_size: 每批条目数
+
+        Returns:
+            本次重新生成的条目数
+        """
+        from core.ai.embedding_generator import (
+            EMBEDDING_BACKEND_METADATA_KEY,
+            get_embedding_generator,
+        )
+        from core.ai.vector_writer import get_vector_store_writer
+
+        emb_gen = get_embedding_generator()
+        if not emb_gen.fallback_name or not self.is_available():
+            return 0
+
+        where = {EMBEDDING_BACKEND_METADATA_KEY: {"$eq": emb_gen.fallback_name}}
+        total = 0
+        for collection in (self.collection, self.messages_collection):
+            if collection is None:
+                continue
+            while True:
+                rows = collection.get(
+                    where=where, limit=batch_size, include=["documents", "metadatas"]
+                )
+                if not rows["ids"]:
+                    break
+
+                embeddings, backend_name = emb_gen.batch_generate_with_backend(
+                    rows["documents"], subsystem="embedding_reembed", primary_only=True
+                )
+                if backend_name is None or any(e is None for e in embeddings):
+                    logger.info(f"主Embedding后端仍不可用，已重新生成 {total} 条降级向量")
+                    return total
+
+                metadatas = [
+                    {**(meta or {}), EMBEDDING_BACKEND_METADATA_KEY: backend_name}
+                    for meta in rows["metadatas"]
+                ]
+                if collection is self.messages_collection:
+                    # 消息向量的写操作统一交给写线程
+                    written = (
+                        get_vector_store_writer()
+                        .submit_upsert(rows["ids"], rows["documents"], metadatas, embeddings)
+                        .result(timeout=_REEMBED_WRITE_TIMEOUT)
+                    )
+                    if written != len(rows["ids"]):
+                        logger.warning(f"重新生成的消息向量写入失败，已重新生成 {total} 条")
+                        return total
+                else:
+                    collection.upsert(
+                        ids=rows["ids"],
+                        embeddings=embeddings,
+                        documents=rows["documents"],
+                        metadatas=metadatas,
+                    )
+                total += len(rows["ids"])
+
+        if total:
+            logger.info(f"已用主Embedding后端重新生成 {total} 条降级向量")
+        return total
+
     def get_stats(self) -> dict[str, Any]:
         """
         获取向量存储统计信息
@@ -562,6 +725,78 @@ class VectorStore:
 
         return stats
 
+    def export_snapshot(self, path: str) -> dict[str, Any]:
+        """
+        将 summaries 与 messages 导出为二进制快照
+
+        Args:
+            path: 快照文件路径
+
+        Returns:
+            快照清单
+        """
+        from core.ai.vector_snapshot import export_collections
+
+        if not self.is_available():
+            raise RuntimeError("向量存储不可用")
+
+        return export_collections(
+            {"summaries": self.collection, "messages": self.messages_collection}, path
+        )
+
+    def restore_snapshot(self, path: str, mode: str = "merge") -> dict[str, Any]:
+        """
+        从二进制快照恢复向量数据
+
+        Args:
+            path: 快照文件路径
+            mode: merge - 按 ID 合并到现有数据；replace - 先清空对应 collection 再恢复
+
+        Returns:
+            每个 collection 恢复的条目数
+        """
+        from core.ai.vector_snapshot import (
+            RESTORE_MODE_REPLACE,
+            VALID_RESTORE_MODES,
+            read_manifest,
+            restore_collection,
+        )
+
+        if mode not in VALID_RESTORE_MODES:
+            raise ValueError(f"不支持的恢复模式: {mode}")
+        if not self.is_available():
+            raise RuntimeError("向量存储不可用")
+
+        manifest = read_manifest(path)
+        for name, info in manifest["collections"].items():
+            snapshot_dimension = info.get("dimension")
+            if snapshot_dimension and snapshot_dimension != self.dimension:
+                raise ValueError(
+                    f"快照中 {name} 的向量为 {snapshot_dimension} 维，"
+                    f"与 EMBEDDING_DIMENSION={self.dimension} 不一致"
+                )
+
+        restored = {}
+        for name in ("summaries", "messages"):
+            if name not in manifest["collections"]:
+                continue
+
+            if mode == RESTORE_MODE_REPLACE:
+                self.client.delete_collection(name=name)
+                collection = self.client.get_or_create_collection(
+                    name=name, metadata={"hnsw:space": "cosine"}
+                )
+                if name == "summaries":
+                    self.collection = collection
+                else:
+                    self.messages_collection = collection
+
+            target = self.collection if name == "summaries" else self.messages_collection
+            restored[name] = restore_collection(path, name, target)
+
+        logger.info(f"向量快照恢复完成（{mode}）: {restored}")
+        return restored
+
 
 # 创建全局向量存储实例
 vector_store = None
@@ -573,3 +808,12 @@ def get_vector_store():
     if vector_store is None:
         vector_store = VectorStore()
     return vector_store
+
+
+async def reembed_fallback_vectors() -> int:
+    """定时任务：主后端恢复后重新生成降级期间写入的向量"""
+    try:
+        return await asyncio.to_thread(get_vector_store().reembed_fallback_vectors)
+    except Exception as e:
+        logger.error(f"重新生成降级向量失败: {type(e).__name__}: {e}")
+        return 0
@@ -0,0 +1,307 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+向量存储单写线程 - 将 messages collection 的写操作移出事件循环
+
+ChromaDB 的 upsert/delete 会同步落盘（SQLite + HNSW），在事件循环中直接调用会阻塞
+Telethon 的更新处理。所有写操作经由队列交给一个专用线程串行执行，连续的 upsert
+（可能来自多个批次）会被合并成一次更大的写入事务；delete 作为屏障保证操作顺序。
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# 单次合并写入的最大条目数
+WRITER_MAX_BATCH_SIZE = int(os.getenv("VECTOR_WRITER_MAX_BATCH", "256"))
+# 收到第一个写操作后继续等待后续操作的时间（秒），用于跨批次合并
+WRITER_LINGER_SECONDS = float(os.getenv("VECTOR_WRITER_LINGER", "0.2"))
+# 写队列最大容量（操作数）
+WRITER_QUEUE_MAX_SIZE = 1000
+
+_OP_UPSERT = "upsert"
+_OP_DELETE = "delete"
+_STOP = object()
+
+
+class VectorStoreWriter:
+    """向量存储单写线程"""
+
+    def __init__(
+        self,
+        vector_store=None,
+        max_batch_size: int = WRITER_MAX_BATCH_SIZE,
+        linger: float = WRITER_LINGER_SECONDS,
+    ):
+        """
+        初始化写线程
+
+        Args:
+            vector_store: VectorStore 实例，默认使用全局实例
+            max_batch_size: 单次合并写入的最大条目数
+            linger: 收到写操作后等待合并后续操作的时间（秒）
+        """
+        self._vector_store = vector_store
+        self._max_batch_size = max(1, max_batch_size)
+        self._linger = max(0.0, linger)
+        self._queue: queue.Queue = queue.Queue(maxsize=WRITER_QUEUE_MAX_SIZE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._written_count = 0
+        self._failed_count = 0
+        self._transaction_count = 0
+
+    # ── 生命周期 ────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """启动写线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="vector-store-writer", daemon=True
+            )
+            self._thread.start()
+        logger.info("向量存储写线程已启动")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        停止写线程，队列中已提交的写操作会先执行完毕
+
+        该方法会阻塞调用线程，异步代码中应通过 run_in_executor 调用。
+
+        Args:
+            timeout: 等待写线程退出的最长时间（秒）
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if not thread or not thread.is_alive():
+            return
+
+        self._queue.put(_STOP)
+        thread.join(timeout=timeout)
+        if thread.is_alive():
+            logger.warning(f"向量存储写线程停止超时，剩余 {self._queue.qsize()} 个写操作")
+        else:
+            logger.info(
+                f"向量存储写线程已停止，共写入 {self._written_count} 条，"
+                f"失败 {self._failed_count} 条，事务 {self._transaction_count} 次"
+            )
+
+    def is_running(self) -> bool:
+        """写线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    # ── 提交写操作 ──────────────────────────────────────────────────────
+
+    def submit_upsert(
+        self,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        embeddings: list[list[float]],
+    ) -> Future:
+        """
+        提交消息向量 upsert
+
+        Args:
+            ids: 向量ID列表
+            texts: 文本列表
+            metadatas: 元数据列表
+            embeddings: 向量列表
+
+        Returns:
+            Future，结果为成功写入的条目数
+        """
+        payload = {
+            "ids": list(ids),
+            "texts": list(texts),
+            "metadatas": list(metadatas),
+            "embeddings": list(embeddings),
+        }
+        return self._submit(_OP_UPSERT, payload)
+
+    def submit_delete(self, ids: list[str]) -> Future:
+        """
+        提交消息向量删除
+
+        Args:
+            ids: 向量ID列表
+
+        Returns:
+            Future，结果为是否删除成功
+        """
+        return self._submit(_OP_DELETE, {"ids": list(ids)})
+
+    def _submit(self, op: str, payload: dict) -> Future:
+        future: Future = Future()
+        if not self.is_running():
+            self.start()
+        try:
+            self._queue.put_nowait((op, payload, future))
+        except queue.Full:
+            logger.warning(f"向量存储写队列已满({WRITER_QUEUE_MAX_SIZE})，丢弃写操作: {op}")
+            future.set_result(0 if op == _OP_UPSERT else False)
+        return future
+
+    def get_stats(self) -> dict:
+        """获取写线程统计信息"""
+        return {
+            "running": self.is_running(),
+            "queue_size": self._queue.qsize(),
+            "written_count": self._written_count,
+            "failed_count": self._failed_count,
+            "transaction_count": self._transaction_count,
+        }
+
+    # ── 写线程 ──────────────────────────────────────────────────────────
+
+    def _get_vector_store(self):
+        if self._vector_store is None:
+            from core.ai.vector_store import get_vector_store
+
+            self._vector_store = get_vector_store()
+        return self._vector_store
+
+    def _run(self) -> None:
+        """写线程主循环：取出一组写操作，合并后执行"""
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            ops = [first]
+            rows = len(first[1]["ids"])
+            stopping = self._collect(ops, rows)
+
+            try:
+                self._execute(ops)
+            except Exception as e:
+                logger.error(f"向量存储写线程异常: {type(e).__name__}: {e}", exc_info=True)
+                for _, payload, future in ops:
+                    if not future.done():
+                        self._failed_count += len(payload["ids"])
+                        future.set_exception(e)
+
+    def _collect(self, ops: list, rows: int) -> bool:
+        """
+        在 linger 时间内继续收集写操作，直到达到条目上限
+
+        Returns:
+            是否收到了停止信号
+        """
+        deadline = time.monotonic() + self._linger
+        while rows < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return True
+            ops.append(item)
+            rows += len(item[1]["ids"])
+        return False
+
+    def _execute(self, ops: list) -> None:
+        """按顺序执行写操作，连续的同类操作合并为一次调用"""
+        group: list = []
+        for op in ops:
+            if group and group[0][0] != op[0]:
+                self._execute_group(group)
+                group = []
+            group.append(op)
+        if group:
+            self._execute_group(group)
+
+    def _execute_group(self, group: list) -> None:
+        if group[0][0] == _OP_UPSERT:
+            self._execute_upserts(group)
+        else:
+            self._execute_deletes(group)
+
+    def _execute_upserts(self, group: list) -> None:
+        vector_store = self._get_vector_store()
+
+        # 同一事务内 ID 必须唯一（ChromaDB 对重复 ID 报错），后提交的版本覆盖先提交的
+        merged: dict[str, tuple[str, dict, list[float]]] = {}
+        for _, payload, _ in group:
+            for vid, text, meta, emb in zip(
+                payload["ids"],
+                payload["texts"],
+                payload["metadatas"],
+                payload["embeddings"],
+                strict=True,
+            ):
+                merged[vid] = (text, meta, emb)
+
+        ids = list(merged)
+        written = vector_store.add_messages_batch(
+            ids=ids,
+            texts=[v[0] for v in merged.values()],
+            metadatas=[v[1] for v in merged.values()],
+            embeddings=[v[2] for v in merged.values()],
+        )
+        self._transaction_count += 1
+
+        if written == len(ids):
+            for _, payload, future in group:
+                count = len(payload["ids"])
+                self._written_count += count
+                future.set_result(count)
+            return
+
+        if len(group) == 1:
+            _, payload, future = group[0]
+            self._failed_count += len(payload["ids"])
+            future.set_result(0)
+            return
+
+        # 合并写入失败时逐个操作重试，避免单个坏批次拖累其他批次
+        logger.warning(f"合并写入失败，逐个重试 {len(group)} 个写操作")
+        for op in group:
+            self._execute_upserts([op])
+
+    def _execute_deletes(self, group: list) -> None:
+        vector_store = self._get_vector_store()
+        ids = [vid for _, payload, _ in group for vid in payload["ids"]]
+        success = vector_store.delete_messages(ids)
+        self._transaction_count += 1
+        for _, payload, future in group:
+            if success:
+                self._written_count += len(payload["ids"])
+            else:
+                self._failed_count += len(payload["ids"])
+            future.set_result(success)
+
+
+# ── 模块级单例 ──────────────────────────────────────────────────────────
+
+_vector_store_writer: VectorStoreWriter | None = None
+
+
+def get_vector_store_writer() -> VectorStoreWriter:
+    """获取全局向量存储写线程实例"""
+    global _vector_store_writer
+    if _vector_store_writer is None:
+        _vector_store_writer = VectorStoreWriter()
+    return _vector_store_writer
@@ -33,6 +33,7 @@ from core.initializers import (
     CommunicationInitializer,
     DatabaseInitializer,
     ForwardingInitializer,
+    MessageArchiveInitializer,
     RealtimeRAGInitializer,
     SchedulerInitializer,
     StartupNotifier,
@@ -69,6 +70,7 @@ class AppBootstrap:
         self.userbot_initializer = UserBotInitializer()
         self.forwarding_initializer = ForwardingInitializer(event_bus=self._event_bus)
         self.realtime_rag_initializer = RealtimeRAGInitializer()
+        self.message_archive_initializer = MessageArchiveInitializer()
         self.comment_welcome_initializer = CommentWelcomeInitializer()
         self.communication_initializer = CommunicationInitializer()
         self.command_registrar = CommandRegistrar()
@@ -121,6 +123,9 @@ class AppBootstrap:
             # 第11.5步：初始化实时RAG功能
             await self._initialize_realtime_rag()
 
+            # 第11.6步：初始化频道消息归档
+            await self._initialize_message_archive()
+
             # 第12步：启动 WebUI API 服务器
             await self._initialize_web_api()
 
@@ -210,6 +215,13 @@ class AppBootstrap:
             userbot_client=self.userbot_client,
         )
 
+    async def _initialize_message_archive(self) -> None:
+        """初始化频道消息归档（实时写入 + 启动追赶）"""
+        await self.message_archive_initializer.initialize(
+            bot_client=self.client,
+            userbot_client=self.userbot_client,
+        )
+
     async def _initialize_web_api(self) -> None:
         """初始化 WebUI API 服务器"""
         await self.web_api_initializer.initialize()
@@ -265,6 +277,15 @@ class AppBootstrap:
         except Exception as e:
             self.logger.error(f"停止实时RAG处理器时出错: {type(e).__name__}: {e}")
 
+        # 释放 Embedding 后端资源（本地后端的进程池）
+        try:
+            from core.ai import embedding_generator as embedding_module
+
+            if embedding_module.embedding_generator is not None:
+                embedding_module.embedding_generator.close()
+        except Exception as e:
+            self.logger.error(f"关闭Embedding后端时出错: {type(e).__name__}: {e}")
+
         # 1. 停止调度器
         from core.config import get_scheduler_instance
 
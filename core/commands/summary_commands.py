@@ -14,25 +14,31 @@
 
 import asyncio
 import json
-import os
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
-import aiofiles
-
 import core.config as config_module
 from core.ai.ai_client import analyze_with_ai
+from core.ai.memory_manager import schedule_summary_metadata
+from core.ai.summary_fingerprint import compute_summary_fingerprint, find_summary_by_fingerprint
+from core.ai.usage_tracker import usage_channel
 from core.ai.vector_store import get_vector_store
 from core.config import (
     ADMIN_LIST,
     LAST_SUMMARY_FILE,
     get_channel_schedule,
     logger,
+    normalize_channel_id,
 )
 from core.i18n.i18n import get_text
 from core.infrastructure.config.prompt_manager import load_prompt
-from core.summary_time_manager import load_last_summary_time, save_last_summary_time
+from core.summary_time_manager import (
+    get_summary_time_store,
+    load_last_summary_time,
+    save_last_summary_time,
+)
 from core.telegram.client import fetch_last_week_messages, send_long_message, send_report
+from core.telegram.entity_cache import get_cached_entity
 
 
 async def generate_channel_summary(
@@ -110,16 +116,24 @@ async def generate_channel_summary(
 
         # 4. 获取频道实际名称
         try:
-            channel_entity = await client.get_entity(channel_id)
+            channel_entity = await get_cached_entity(client, channel_id)
             channel_actual_name = channel_entity.title
             logger.info(f"获取到频道实际名称: {channel_actual_name}")
         except Exception as e:
             logger.warning(f"获取频道实体失败，使用默认名称: {e}")
             channel_actual_name = channel_id.split("/")[-1]
 
-        # 5. AI生成总结
+        # 5. AI生成总结（输入与已有总结相同时直接复用）
         current_prompt = load_prompt()
-        summary = await analyze_with_ai(messages, current_prompt)
+        fingerprint = compute_summary_fingerprint(
+            channel_id, messages, current_prompt, config_module.LLM_MODEL
+        )
+        previous = await find_summary_by_fingerprint(channel_id, fingerprint)
+        if previous:
+            summary = previous["summary_body"]
+        else:
+            with usage_channel(channel_id):
+                summary = await analyze_with_ai(messages, current_prompt)
 
         # 6. 计算日期范围和生成报告标题
         end_date = datetime.now(UTC)
@@ -173,10 +187,12 @@ async def generate_channel_summary(
                 button_message_id=None,
                 ai_model=None,
                 summary_type="manual",
+                input_fingerprint=fingerprint,
             )
 
             if summary_id:
                 logger.info(f"总结已保存到数据库，记录ID: {summary_id}")
+                schedule_summary_metadata(summary_id, channel_id, channel_actual_name, report_text)
 
                 # 生成并保存向量
                 vector_store = get_vector_store()
@@ -380,10 +396,18 @@ async def handle_manual_summary(event):
                     get_text("summary.start_processing", channel=channel, count=len(messages))
                 )
                 current_prompt = load_prompt()
-                summary = await analyze_with_ai(messages, current_prompt)
+                fingerprint = compute_summary_fingerprint(
+                    channel, messages, current_prompt, config_module.LLM_MODEL
+                )
+                previous = await find_summary_by_fingerprint(channel, fingerprint)
+                if previous:
+                    summary = previous["summary_body"]
+                else:
+                    with usage_channel(channel):
+                        summary = await analyze_with_ai(messages, current_prompt)
                 # 获取频道实际名称
                 try:
-                    channel_entity = await event.client.get_entity(channel)
+                    channel_entity = await get_cached_entity(event.client, channel)
                     channel_actual_name = channel_entity.title
                     logger.info(f"获取到频道实际名称: {channel_actual_name}")
                 except Exception as e:
@@ -442,10 +466,14 @@ async def handle_manual_summary(event):
                         button_message_id=None,
                         ai_model=None,  # 使用默认配置
                         summary_type="manual",
+                        input_fingerprint=fingerprint,
                     )
 
                     if summary_id:
                         logger.info(f"总结已保存到数据库，记录ID: {summary_id}")
+                        schedule_summary_metadata(
+                            summary_id, channel, channel_actual_name, report_text
+                        )
 
                         # 生成并保存向量
                         vector_store = get_vector_store()
@@ -543,7 +571,7 @@ async def handle_manual_summary(event):
                 logger.info(f"频道 {channel} 没有新消息需要总结")
                 # 获取频道实际名称用于无消息提示
                 try:
-                    channel_entity = await event.client.get_entity(channel)
+                    channel_entity = await get_cached_entity(event.client, channel)
                     channel_actual_name = channel_entity.title
                 except Exception:
                     channel_actual_name = channel.split("/")[-1]
@@ -585,43 +613,23 @@ async def handle_clear_summary_time(event):
             else:
                 specific_channel = f"https://t.me/{channel_part}"
 
-        if await asyncio.to_thread(os.path.exists, LAST_SUMMARY_FILE):
+        store = get_summary_time_store()
+        if await asyncio.to_thread(store.exists):
             if specific_channel:
                 # 清除特定频道的时间记录
-                async with aiofiles.open(LAST_SUMMARY_FILE, encoding="utf-8") as f:
-                    content = await f.read().strip()
-                    if content:
-                        existing_data = json.loads(content)
-                        if specific_channel in existing_data:
-                            del existing_data[specific_channel]
-                            # 写回文件
-                            async with aiofiles.open(
-                                LAST_SUMMARY_FILE, "w", encoding="utf-8"
-                            ) as f_write:
-                                await f_write.write(
-                                    json.dumps(existing_data, ensure_ascii=False, indent=2)
-                                )
-                            logger.info(f"已清除频道 {specific_channel} 的上次总结时间记录")
-                            await event.reply(
-                                get_text(
-                                    "summarytime.clear_channel_success", channel=specific_channel
-                                )
-                            )
-                        else:
-                            logger.info(
-                                f"频道 {specific_channel} 的上次总结时间记录不存在，无需清除"
-                            )
-                            await event.reply(
-                                get_text(
-                                    "summarytime.clear_channel_not_exist", channel=specific_channel
-                                )
-                            )
-                    else:
-                        logger.info(f"上次总结时间记录文件 {LAST_SUMMARY_FILE} 内容为空，无需清除")
-                        await event.reply(get_text("summarytime.clear_empty_file"))
+                if await asyncio.to_thread(store.delete, normalize_channel_id(specific_channel)):
+                    logger.info(f"已清除频道 {specific_channel} 的上次总结时间记录")
+                    await event.reply(
+                        get_text("summarytime.clear_channel_success", channel=specific_channel)
+                    )
+                else:
+                    logger.info(f"频道 {specific_channel} 的上次总结时间记录不存在，无需清除")
+                    await event.reply(
+                        get_text("summarytime.clear_channel_not_exist", channel=specific_channel)
+                    )
             else:
                 # 清除所有频道的时间记录
-                await asyncio.to_thread(os.remove, LAST_SUMMARY_FILE)
+                await asyncio.to_thread(store.clear)
                 logger.info(f"已清除所有频道的上次总结时间记录，文件 {LAST_SUMMARY_FILE} 已删除")
                 await event.reply(get_text("summarytime.clear_all_success"))
         else:
@@ -1733,18 +1733,21 @@ async def _reschedule_summary_jobs(event):
             return
 
         # 延迟导入，避免循环依赖
-        from core.system.scheduler import main_job
+        from core.system.schedule_planner import plan_summary_triggers
+        from core.system.scheduler import scheduled_summary_job
+
+        # 相同触发时间的频道在错峰窗口内错开
+        plan = plan_summary_triggers(channels)
 
         rescheduled = 0
         for channel in channels:
-            schedule = get_channel_schedule(channel)
-            trigger_params = build_cron_trigger(schedule)
+            trigger_params = plan[channel]["trigger"]
             job_id = f"summary_job_{channel}"
 
             try:
                 # 使用 replace_existing=True 原子性更新任务
                 scheduler.add_job(
-                    main_job,
+                    scheduled_summary_job,
                     "cron",
                     **trigger_params,
                     args=[channel],
@@ -11,12 +11,20 @@
 """
 消息过滤器模块
 
-提供基于关键词和转发来源的消息过滤功能
+提供基于关键词和转发来源的消息过滤功能。
+
+转发规则的过滤条件在加载配置时编译为 RuleFilter：
+- 白名单 / 黑名单关键词各编译为一个 Aho-Corasick 自动机，消息文本转为小写后扫描一遍即可
+  判断是否命中任一关键词，耗时与关键词数量基本无关
+- 正则表达式预先编译，无效的表达式在编译时报告一次并忽略
 """
 
 import logging
 import re
-from typing import TYPE_CHECKING
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from telethon.tl.types import Message
@@ -24,6 +32,153 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+class KeywordMatcher:
+    """多关键词匹配（Aho-Corasick 自动机，不区分大小写）"""
+
+    def __init__(self, keywords: Iterable[Any]):
+        words = {str(keyword).lower() for keyword in keywords if keyword is not None}
+        # 空关键词与任何文本都匹配（与 "" in text 的行为一致）
+        self._match_all = "" in words
+        words.discard("")
+        self.size = len(words)
+
+        # 状态转移表、失败指针、到达该状态时命中的关键词
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[str | None] = [None]
+        for word in sorted(words):
+            state = 0
+            for char in word:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                state = next_state
+            self._output[state] = word
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # 后缀也是关键词时同样算作命中
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    def __bool__(self) -> bool:
+        return self._match_all or self.size > 0
+
+    def search(self, text: str) -> str | None:
+        """
+        在已转为小写的文本中查找关键词
+
+        Returns:
+            最先命中的关键词，未命中时返回 None
+        """
+        if self._match_all:
+            return ""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+
+def compile_patterns(patterns: Iterable[str] | None, kind: str) -> tuple[re.Pattern, ...]:
+    """编译正则表达式（不区分大小写），无效的表达式记录警告后忽略"""
+    compiled = []
+    for pattern in patterns or []:
+        try:
+            compiled.append(re.compile(pattern, re.IGNORECASE))
+        except (re.error, TypeError) as e:
+            logger.warning(f"{kind}正则表达式无效: {pattern}, 错误: {e}")
+    return tuple(compiled)
+
+
+@dataclass(frozen=True)
+class RuleFilter:
+    """编译后的转发规则过滤条件"""
+
+    forward_original_only: bool = False
+    keywords: KeywordMatcher | None = None
+    blacklist: KeywordMatcher | None = None
+    patterns: tuple[re.Pattern, ...] | None = None
+    blacklist_patterns: tuple[re.Pattern, ...] | None = None
+
+    @classmethod
+    def from_rule(cls, rule: dict[str, Any]) -> "RuleFilter":
+        """编译规则中的 forward_original_only、keywords / blacklist、patterns / blacklist_patterns
+
+        未配置的条件为 None；配置了但为空或全部无效的白名单仍视为已配置（不会命中任何消息）
+        """
+        keywords, blacklist = rule.get("keywords"), rule.get("blacklist")
+        patterns, blacklist_patterns = rule.get("patterns"), rule.get("blacklist_patterns")
+        return cls(
+            forward_original_only=bool(rule.get("forward_original_only", False)),
+            keywords=KeywordMatcher(keywords) if keywords else None,
+            blacklist=KeywordMatcher(blacklist) if blacklist else None,
+            patterns=compile_patterns(patterns, "白名单") if patterns else None,
+            blacklist_patterns=(
+                compile_patterns(blacklist_patterns, "黑名单") if blacklist_patterns else None
+            ),
+        )
+
+    def should_forward(self, message: "Message") -> bool:
+        """判断消息是否通过该规则的所有过滤条件"""
+        if not should_forward_original_only(message, self.forward_original_only):
+            from ..i18n import t
+
+            logger.debug(t("forwarding.filter.forward_skipped"))
+            return False
+
+        has_keywords = self.keywords is not None or self.blacklist is not None
+        has_patterns = self.patterns is not None or self.blacklist_patterns is not None
+        if not has_keywords and not has_patterns:
+            return True
+
+        text = message.message or ""
+        if not text:
+            return False
+
+        if has_keywords:
+            lowered = text.lower()
+            if self.blacklist is not None:
+                keyword = self.blacklist.search(lowered)
+                if keyword is not None:
+                    logger.debug(f"消息匹配黑名单关键词: {keyword}")
+                    return False
+            if self.keywords is not None:
+                keyword = self.keywords.search(lowered)
+                if keyword is None:
+                    logger.debug("消息不匹配任何白名单关键词")
+                    return False
+                logger.debug(f"消息匹配白名单关键词: {keyword}")
+
+        if has_patterns:
+            for pattern in self.blacklist_patterns or ():
+                if pattern.search(text):
+                    logger.debug(f"消息匹配黑名单正则: {pattern.pattern}")
+                    return False
+            if self.patterns is not None:
+                if not any(pattern.search(text) for pattern in self.patterns):
+                    logger.debug("消息不匹配任何白名单正则")
+                    return False
+
+        return True
+
+
 def should_forward_by_keywords(
     message: "Message", keywords: list[str] = None, blacklist: list[str] = None
 ) -> bool:
@@ -43,17 +198,19 @@ def should_forward_by_keywords(
     if not text:
         return False
 
+    lowered = text.lower()
+
     # 先检查黑名单（优先级更高）
     if blacklist:
         for keyword in blacklist:
-            if keyword.lower() in text.lower():
+            if keyword.lower() in lowered:
                 logger.debug(f"消息匹配黑名单关键词: {keyword}")
                 return False
 
     # 检查白名单
     if keywords:
         for keyword in keywords:
-            if keyword.lower() in text.lower():
+            if keyword.lower() in lowered:
                 logger.debug(f"消息匹配白名单关键词: {keyword}")
                 return True
         # 如果设置了白名单但都不匹配，则不转发
@@ -23,13 +23,10 @@ from typing import TYPE_CHECKING, Any
 
 # Import event system for config hot-reload
 from ..config import QA_BOT_USERNAME, AsyncIOEventBus, ConfigChangedEvent
+from ..telegram.entity_cache import get_cached_entity
 from .download_manager import DownloadManager
-from .filters import (
-    should_forward_by_keywords,
-    should_forward_by_regex,
-    should_forward_original_only,
-)
 from .media_utils import ForwardStrategy, decide_forward_strategy
+from .rule_index import ForwardingRuleIndex
 
 if TYPE_CHECKING:
     from telethon import TelegramClient
@@ -74,6 +71,8 @@ class ForwardingHandler:
         self._enabled = False
         self._config = {}
         self._source_channel_ids: set[str] = set()
+        # 源频道 → 转发规则索引（配置更新时整体替换）
+        self._rule_index = ForwardingRuleIndex()
         # 媒体组缓存：{grouped_id: [messages]}
         # 用于收集媒体组的所有消息（Bot无法访问频道历史）
         self._media_group_cache: dict[int, list[Message]] = {}
@@ -123,10 +122,17 @@ class ForwardingHandler:
         Args:
             config: 配置字典
         """
-        self._config = copy.deepcopy(config)
-        self._source_channel_ids = self._extract_source_channel_ids(self._config)
+        new_config = copy.deepcopy(config)
+        new_index = ForwardingRuleIndex.from_config(new_config)
+        self._config = new_config
+        self._source_channel_ids = self._extract_source_channel_ids(new_config)
+        self._rule_index = new_index
         logger.info(f"转发配置已更新: {len(config.get('rules', []))} 条规则")
 
+    def is_source_channel(self, username: str | None, channel_id: Any) -> bool:
+        """频道（用户名或数字ID）是否配置了转发规则"""
+        return self._rule_index.contains(username, channel_id)
+
     @staticmethod
     def _extract_source_channel_ids(config: dict[str, Any]) -> set[str]:
         """从转发配置中提取源频道ID集合
@@ -210,10 +216,15 @@ class ForwardingHandler:
         try:
             # 获取频道信息
             channel_id = None
+            username = None
+            numeric_id = None
             if hasattr(message, "chat") and message.chat:
-                channel_id = message.chat.username or str(message.chat.id)
+                username = message.chat.username
+                numeric_id = message.chat.id
+                channel_id = username or str(numeric_id)
             elif hasattr(message, "peer_id") and message.peer_id:
-                channel_id = str(message.peer_id.channel_id)
+                numeric_id = message.peer_id.channel_id
+                channel_id = str(numeric_id)
 
             if not channel_id:
                 logger.debug("无法获取频道ID，跳过消息")
@@ -221,30 +232,20 @@ class ForwardingHandler:
 
             logger.debug(f"处理转发消息: channel_id={channel_id}, message_id={message.id}")
 
-            # 查找匹配的转发规则
-            matched_rules = []
-            for rule in self._config.get("rules", []):
-                source_url = rule.get("source_channel", "")
-                # 从URL中提取频道ID（如 https://t.me/jffnekjdnfn -> jffnekjdnfn）
-                rule_channel_id = source_url.rstrip("/").split("/")[-1] if source_url else ""
-
-                # 支持username或数字ID匹配
-                if rule_channel_id and (
-                    rule_channel_id == channel_id or rule_channel_id in str(channel_id)
-                ):
-                    matched_rules.append(rule)
-                    logger.debug(f"匹配转发规则: {source_url} -> {rule.get('target_channel')}")
-
+            # 按用户名或数字ID查找匹配的转发规则
+            matched_rules = self._rule_index.lookup(username, numeric_id)
             if not matched_rules:
                 logger.debug(f"频道 {channel_id} 无匹配的转发规则")
                 return False
 
             # 处理每条匹配的规则
             success_count = 0
-            for rule in matched_rules:
-                target_channel = rule.get("target_channel")
+            for compiled in matched_rules:
+                rule = compiled.rule
+                target_channel = compiled.target_channel
                 if not target_channel:
                     continue
+                logger.debug(f"匹配转发规则: {rule.get('source_channel')} -> {target_channel}")
 
                 # 检查是否已转发（使用三字段主键）
                 message_id = str(message.id)
@@ -252,8 +253,8 @@ class ForwardingHandler:
                     logger.debug(f"消息 {message_id} 已转发到 {target_channel}，跳过")
                     continue
 
-                # 应用过滤器
-                if not self._should_forward(message, rule):
+                # 应用过滤器（加载配置时已编译）
+                if not compiled.filter.should_forward(message):
                     logger.debug(f"消息被规则过滤，不转发到 {target_channel}")
                     continue
 
@@ -267,41 +268,6 @@ class ForwardingHandler:
             logger.error(f"处理消息时出错: {type(e).__name__}: {e}", exc_info=True)
             return False
 
-    def _should_forward(self, message: "Message", rule: dict[str, Any]) -> bool:
-        """
-        判断是否应该转发消息
-
-        Args:
-            message: Telegram消息对象
-            rule: 转发规则
-
-        Returns:
-            是否应该转发
-        """
-        # 检查是否只转发原创消息
-        forward_original_only = rule.get("forward_original_only", False)
-        if not should_forward_original_only(message, forward_original_only):
-            from ..i18n import t
-
-            logger.debug(t("forwarding.filter.forward_skipped"))
-            return False
-
-        # 检查关键词过滤
-        keywords = rule.get("keywords")
-        blacklist = rule.get("blacklist")
-        if keywords or blacklist:
-            if not should_forward_by_keywords(message, keywords, blacklist):
-                return False
-
-        # 检查正则表达式过滤
-        patterns = rule.get("patterns")
-        blacklist_patterns = rule.get("blacklist_patterns")
-        if patterns or blacklist_patterns:
-            if not should_forward_by_regex(message, patterns, blacklist_patterns):
-                return False
-
-        return True
-
     async def _forward_message(
         self, message: "Message", target_channel: str, rule: dict[str, Any]
     ) -> bool:
@@ -957,7 +923,7 @@ class ForwardingHandler:
         """
         try:
             # 获取源频道信息（使用监听客户端）
-            source_entity = await self.monitoring_client.get_entity(message.chat_id)
+            source_entity = await get_cached_entity(self.monitoring_client, message.chat_id)
             source_username = getattr(source_entity, "username", None)
             source_title = getattr(source_entity, "title", "Unknown")
 
@@ -970,7 +936,7 @@ class ForwardingHandler:
 
             # 获取目标频道信息（使用监听客户端）
             try:
-                target_entity = await self.monitoring_client.get_entity(target_channel)
+                target_entity = await get_cached_entity(self.monitoring_client, target_channel)
                 target_title = getattr(target_entity, "title", target_channel)
                 target_username = getattr(target_entity, "username", None)
             except Exception as e:
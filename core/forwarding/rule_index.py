@@ -0,0 +1,117 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+转发规则索引
+
+加载配置时将转发规则按源频道编入索引，处理消息时按频道用户名 / 数字ID直接查找，
+不再逐条遍历规则：
+- 源频道统一标准化：用户名去掉链接前缀与 @ 并转为小写，数字ID去掉 -100 前缀
+- 每条规则的过滤条件在构建索引时编译（见 filters.RuleFilter）
+- 索引构建后不再修改，配置热重载时整体替换
+"""
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+from .filters import RuleFilter
+
+_CHANNEL_ID_PREFIX = re.compile(r"^-?(?:100)?(\d+)$")
+
+
+def normalize_source_key(value: Any) -> str:
+    """
+    将频道链接、用户名或数字ID标准化为索引键
+
+    例如 https://t.me/Sakura、@sakura → sakura；-1001234567890、https://t.me/c/1234567890 →
+    1234567890（与消息中频道的 id 一致）
+    """
+    text = str(value).strip().rstrip("/")
+    if "/c/" in text:
+        # 私有频道链接 https://t.me/c/<频道ID>[/<消息ID>]
+        parts = text.split("/c/", 1)[1].split("/")
+        text = parts[0]
+    else:
+        text = text.split("/")[-1]
+    text = text.lstrip("@")
+    match = _CHANNEL_ID_PREFIX.match(text)
+    if match and text.startswith("-"):
+        return match.group(1)
+    return text.lower()
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """编入索引的转发规则"""
+
+    position: int
+    source_key: str
+    target_channel: str | None
+    rule: dict[str, Any]
+    filter: RuleFilter
+
+
+class ForwardingRuleIndex:
+    """源频道 → 转发规则的只读索引"""
+
+    def __init__(self, rules: Iterable[dict[str, Any]] = ()):
+        by_source: dict[str, list[CompiledRule]] = {}
+        count = 0
+        for position, rule in enumerate(rules):
+            count += 1
+            source_url = rule.get("source_channel", "")
+            if not source_url:
+                continue
+            key = normalize_source_key(source_url)
+            if not key:
+                continue
+            by_source.setdefault(key, []).append(
+                CompiledRule(
+                    position, key, rule.get("target_channel"), rule, RuleFilter.from_rule(rule)
+                )
+            )
+        self._by_source = MappingProxyType({k: tuple(v) for k, v in by_source.items()})
+        self.rule_count = count
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "ForwardingRuleIndex":
+        return cls(config.get("rules") or [])
+
+    @property
+    def source_keys(self) -> frozenset[str]:
+        """已标准化的源频道集合"""
+        return frozenset(self._by_source)
+
+    def contains(self, *keys: Any) -> bool:
+        """任一频道标识（用户名或数字ID）是否为转发源频道"""
+        return any(key and normalize_source_key(key) in self._by_source for key in keys)
+
+    def lookup(self, *keys: Any) -> list[CompiledRule]:
+        """
+        按频道用户名与数字ID查找规则
+
+        Returns:
+            匹配的规则，按配置中的顺序排列（同一规则只出现一次）
+        """
+        matched: dict[int, CompiledRule] = {}
+        for key in keys:
+            if not key:
+                continue
+            for compiled in self._by_source.get(normalize_source_key(key), ()):
+                matched[compiled.position] = compiled
+        if len(matched) > 1:
+            return [matched[position] for position in sorted(matched)]
+        return list(matched.values())
+
+    def __len__(self) -> int:
+        return self.rule_count
@@ -25,6 +25,7 @@ from telethon.tl.types import InputMediaPoll, Poll, PollAnswer, TextWithEntities
 
 import core.config as config_module
 from core.ai.ai_client import generate_poll_from_summary
+from core.ai.usage_tracker import usage_channel
 from core.config import (
     is_auto_poll_enabled_for_channel,
 )
@@ -238,7 +239,8 @@ class AutoPollHandler:
 
             # 调用 AI 生成投票
             logger.info(f"开始为频道 {channel_id} 的消息生成趣味投票...")
-            poll_data = await generate_poll_from_summary(message_text)
+            with usage_channel(channel_id):
+                poll_data = await generate_poll_from_summary(message_text)
 
             if not poll_data or "question" not in poll_data or "options" not in poll_data:
                 logger.error("AI 生成趣味投票内容失败，使用默认投票")
@@ -11,11 +11,14 @@
 """
 实时 RAG 处理器 - 异步队列批量处理频道消息并写入向量库
 
-监听频道新消息，通过 asyncio.Queue 异步批量生成 embedding 后写入 ChromaDB messages collection。
+监听频道新消息，通过 asyncio.Queue 异步批量生成 embedding，再交给向量存储单写线程
+写入 ChromaDB messages collection，事件循环不会被磁盘写入阻塞。编辑事件按 vector_id 在合并窗口内去重，只对窗口内最后一次编辑的文本生成 embedding。
 """
 
 import asyncio
 import logging
+import os
+import time
 from datetime import UTC, datetime
 
 logger = logging.getLogger(__name__)
@@ -24,18 +27,36 @@ logger = logging.getLogger(__name__)
 BATCH_SIZE = 5  # 每批处理的消息数量
 BATCH_INTERVAL = 5.0  # 批量处理间隔（秒）
 QUEUE_MAX_SIZE = 1000  # 队列最大容量，防止内存无限增长
+# 编辑合并窗口（秒）：同一条消息在窗口内的多次编辑只处理最后一次，<=0 表示不合并
+EDIT_COALESCE_WINDOW = float(os.getenv("RAG_EDIT_COALESCE_WINDOW", "30"))
 
 
 class RealtimeRAGHandler:
     """实时 RAG 处理器 - 异步队列批量处理频道消息"""
 
-    def __init__(self):
-        """初始化处理器"""
+    def __init__(self, edit_coalesce_window: float | None = None):
+        """
+        初始化处理器
+
+        Args:
+            edit_coalesce_window: 编辑合并窗口（秒），默认读取 RAG_EDIT_COALESCE_WINDOW
+        """
         self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
         self._running = False
         self._worker_task: asyncio.Task | None = None
         self._processed_count = 0
         self._failed_count = 0
+        self._edit_coalesce_window = (
+            EDIT_COALESCE_WINDOW if edit_coalesce_window is None else edit_coalesce_window
+        )
+        # 窗口内待处理的编辑：vector_id -> 队列条目（按首次编辑时间有序）
+        self._pending_edits: dict[str, dict] = {}
+        # 每个 vector_id 最新一次编辑的序号，用于在 worker 中 O(1) 丢弃过期的编辑条目
+        self._edit_seq: dict[str, int] = {}
+        self._next_edit_seq = 0
+        self._coalesced_count = 0
+        # 已提交给写线程、尚未完成的写操作
+        self._write_tasks: set[asyncio.Task] = set()
         logger.info("实时RAG处理器已创建")
 
     async def start(self) -> None:
@@ -55,14 +76,26 @@ class RealtimeRAGHandler:
 
         self._running = False
 
-        # 等待队列清空
-        remaining = self._queue.qsize()
+        # 合并窗口内尚未到期的编辑直接放入队列，避免停止时丢失；队列放不下的部分由 worker
+        # 在腾出空间后继续放入，这里循环等待直到队列与待合并编辑都清空
+        remaining = self._queue.qsize() + len(self._pending_edits)
         if remaining > 0:
             logger.info(f"实时RAG处理器停止前处理剩余 {remaining} 条消息...")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 30.0
+        while self._queue.qsize() or self._pending_edits:
+            self._flush_pending_edits(force=True)
             try:
-                await asyncio.wait_for(self._queue.join(), timeout=30.0)
+                await asyncio.wait_for(self._queue.join(), timeout=deadline - loop.time())
             except TimeoutError:
-                logger.warning(f"实时RAG处理器停止超时，丢弃 {self._queue.qsize()} 条消息")
+                break
+
+        discarded = self._queue.qsize() + len(self._pending_edits)
+        if discarded:
+            logger.warning(
+                f"实时RAG处理器停止超时，丢弃 {discarded} 条消息"
+                f"（其中待合并编辑 {len(self._pending_edits)} 条）"
+            )
 
         if self._worker_task and not self._worker_task.done():
             self._worker_task.cancel()
@@ -71,6 +104,13 @@ class RealtimeRAGHandler:
             except asyncio.CancelledError:
                 pass
 
+        # 等待写线程完成已提交的写入
+        if self._write_tasks:
+            await asyncio.wait(self._write_tasks, timeout=30.0)
+        from core.ai.vector_writer import get_vector_store_writer
+
+        await asyncio.get_running_loop().run_in_executor(None, get_vector_store_writer().stop)
+
         logger.info(
             f"实时RAG处理器已停止，共处理 {self._processed_count} 条，失败 {self._failed_count} 条"
         )
@@ -158,19 +198,46 @@ class RealtimeRAGHandler:
 
         vector_id = f"{channel_id}:{message_id}"
 
+        # 窗口内已有同一消息的待处理编辑：原地覆盖为最新文本，被覆盖的版本不会生成 embedding
+        pending = self._pending_edits.get(vector_id)
+        if pending is not None:
+            pending["channel_name"] = channel_name
+            pending["text"] = text.strip()
+            pending["sender_id"] = sender_id
+            pending["created_at"] = datetime.now(UTC).isoformat()
+            self._coalesced_count += 1
+            logger.debug(f"消息编辑已合并: channel={channel_id}, msg_id={message_id}")
+            return True
+
+        self._next_edit_seq += 1
+        item = {
+            "vector_id": vector_id,
+            "message_id": message_id,
+            "channel_id": channel_id,
+            "channel_name": channel_name,
+            "text": text.strip(),
+            "sender_id": sender_id,
+            "created_at": datetime.now(UTC).isoformat(),
+            "is_update": True,
+            "edit_seq": self._next_edit_seq,
+        }
+
+        if self._edit_coalesce_window > 0:
+            if len(self._pending_edits) >= QUEUE_MAX_SIZE:
+                logger.warning(
+                    f"待合并编辑已满({QUEUE_MAX_SIZE})，丢弃更新: "
+                    f"channel={channel_id}, msg_id={message_id}"
+                )
+                return False
+            item["due_at"] = time.monotonic() + self._edit_coalesce_window
+            self._pending_edits[vector_id] = item
+            # 队列中若还有该消息更早的编辑条目，序号更新后它会在 worker 中被直接丢弃
+            self._edit_seq[vector_id] = item["edit_seq"]
+            logger.debug(f"消息更新已进入合并窗口: channel={channel_id}, msg_id={message_id}")
+            return True
+
         try:
-            self._queue.put_nowait(
-                {
-                    "vector_id": vector_id,
-                    "message_id": message_id,
-                    "channel_id": channel_id,
-                    "channel_name": channel_name,
-                    "text": text.strip(),
-                    "sender_id": sender_id,
-                    "created_at": datetime.now(UTC).isoformat(),
-                    "is_update": True,
-                }
-            )
+            self._queue.put_nowait(item)
         except asyncio.QueueFull:
             logger.warning(
                 f"实时RAG队列已满({self._queue.maxsize})，丢弃更新: "
@@ -178,6 +245,7 @@ class RealtimeRAGHandler:
             )
             return False
 
+        self._edit_seq[vector_id] = item["edit_seq"]
         logger.debug(f"消息更新已入队: channel={channel_id}, msg_id={message_id}")
         return True
 
@@ -194,13 +262,16 @@ class RealtimeRAGHandler:
         """
         try:
             from core.ai.vector_store import get_vector_store
+            from core.ai.vector_writer import get_vector_store_writer
 
             vector_store = get_vector_store()
             if not vector_store.is_messages_available():
                 return False
 
+            # 删除同样经由写线程执行，保证与之前提交的 upsert 的先后顺序
             vector_id = f"{channel_id}:{message_id}"
-            return vector_store.delete_message(vector_id)
+            future = get_vector_store_writer().submit_delete([vector_id])
+            return await asyncio.wrap_future(future)
 
         except Exception as e:
             logger.error(f"删除消息向量失败: {type(e).__name__}: {e}")
@@ -218,39 +289,114 @@ class RealtimeRAGHandler:
             "queue_size": self._queue.qsize(),
             "processed_count": self._processed_count,
             "failed_count": self._failed_count,
+            "pending_edits": len(self._pending_edits),
+            "coalesced_count": self._coalesced_count,
+            "pending_writes": len(self._write_tasks),
         }
 
+    def _flush_pending_edits(self, force: bool = False) -> int:
+        """
+        将合并窗口已到期的编辑放入处理队列
+
+        Args:
+            force: 是否忽略窗口，立即放入全部待处理编辑（停止时使用）
+
+        Returns:
+            放入队列的编辑数量
+        """
+        if not self._pending_edits:
+            return 0
+
+        now = time.monotonic()
+        flushed = 0
+        # 窗口长度固定，插入顺序即到期顺序，遇到第一个未到期的即可停止
+        for vector_id, item in list(self._pending_edits.items()):
+            if not force and item["due_at"] > now:
+                break
+            try:
+                self._queue.put_nowait(item)
+            except asyncio.QueueFull:
+                logger.warning(f"实时RAG队列已满({self._queue.maxsize})，编辑稍后重试入队")
+                break
+            del self._pending_edits[vector_id]
+            flushed += 1
+
+        return flushed
+
+    def _next_wait_timeout(self) -> float:
+        """计算 worker 等待新消息的超时时间，保证到期编辑能及时出队"""
+        if not self._pending_edits:
+            return BATCH_INTERVAL
+        first_due = next(iter(self._pending_edits.values()))["due_at"]
+        return max(0.0, min(BATCH_INTERVAL, first_due - time.monotonic()))
+
+    def _is_superseded(self, item: dict) -> bool:
+        """
+        判断队列条目是否已被同一消息的更新编辑取代（O(1)）
+
+        未被取代的编辑条目会同时清理其序号记录，防止 _edit_seq 无限增长。
+        """
+        if not item.get("is_update"):
+            return False
+
+        vector_id = item["vector_id"]
+        latest_seq = self._edit_seq.get(vector_id)
+        if latest_seq != item.get("edit_seq"):
+            return True
+
+        if vector_id not in self._pending_edits:
+            del self._edit_seq[vector_id]
+        return False
+
     async def _message_worker(self) -> None:
         """后台 worker 循环，定期批量处理队列中的消息"""
         logger.info("实时RAG worker 已启动")
 
-        while self._running:
+        # 停止后继续消费队列中的剩余条目与待合并编辑，stop() 通过 queue.join() 等待其处理完毕
+        while self._running or not self._queue.empty() or self._pending_edits:
             try:
                 batch = []
+                dequeued = 0
+
+                # 合并窗口到期的编辑进入队列（停止后不再等待窗口）
+                self._flush_pending_edits(force=not self._running)
 
                 # 尝试收集一批消息
                 try:
-                    # 等待第一条消息（最多等待 BATCH_INTERVAL 秒）
-                    first_item = await asyncio.wait_for(self._queue.get(), timeout=BATCH_INTERVAL)
-                    batch.append(first_item)
+                    # 等待第一条消息（最多等待 BATCH_INTERVAL 秒，或到下一条编辑到期）
+                    first_item = await asyncio.wait_for(
+                        self._queue.get(), timeout=self._next_wait_timeout()
+                    )
+                    dequeued += 1
+                    if not self._is_superseded(first_item):
+                        batch.append(first_item)
 
                     # 尝试收集更多消息（非阻塞）
                     while len(batch) < BATCH_SIZE:
                         try:
                             item = self._queue.get_nowait()
-                            batch.append(item)
                         except asyncio.QueueEmpty:
                             break
+                        dequeued += 1
+                        if not self._is_superseded(item):
+                            batch.append(item)
 
                 except TimeoutError:
                     # 超时无新消息，继续等待
                     continue
 
-                # 处理这一批消息
-                if batch:
-                    await self._process_batch(batch)
-                    # 标记任务完成
-                    for _ in batch:
+                superseded = dequeued - len(batch)
+                if superseded:
+                    self._coalesced_count += superseded
+                    logger.debug(f"丢弃 {superseded} 条已被新编辑取代的队列条目")
+
+                try:
+                    # 处理这一批消息
+                    if batch:
+                        await self._process_batch(batch)
+                finally:
+                    # 标记任务完成（含被丢弃的过期条目）
+                    for _ in range(dequeued):
                         self._queue.task_done()
 
             except asyncio.CancelledError:
@@ -270,8 +416,12 @@ class RealtimeRAGHandler:
             batch: 消息列表，每条包含 vector_id, text, metadata 等
         """
         try:
-            from core.ai.embedding_generator import get_embedding_generator
+            from core.ai.embedding_generator import (
+                EMBEDDING_BACKEND_METADATA_KEY,
+                get_embedding_generator,
+            )
             from core.ai.vector_store import get_vector_store
+            from core.ai.vector_writer import get_vector_store_writer
 
             vector_store = get_vector_store()
             emb_gen = get_embedding_generator()
@@ -293,9 +443,9 @@ class RealtimeRAGHandler:
             loop = asyncio.get_running_loop()
 
             def _batch_embed():
-                return emb_gen.batch_generate(texts)
+                return emb_gen.batch_generate_with_backend(texts, subsystem="embedding_realtime")
 
-            embeddings = await loop.run_in_executor(None, _batch_embed)
+            embeddings, backend_name = await loop.run_in_executor(None, _batch_embed)
 
             if embeddings is None or len(embeddings) != len(batch):
                 logger.error(
@@ -304,9 +454,9 @@ class RealtimeRAGHandler:
                 self._failed_count += len(batch)
                 return
 
-            # 分离新增和更新操作
-            add_items = []
-            update_items = []
+            # 新增与更新在向量库层面都是 upsert，合并为一次写操作
+            entries = []
+            update_count = 0
 
             for item, embedding in zip(batch, embeddings, strict=True):
                 if embedding is None:
@@ -320,46 +470,32 @@ class RealtimeRAGHandler:
                     "message_id": str(item["message_id"]),
                     "created_at": item["created_at"],
                     "sender_id": str(item["sender_id"]) if item.get("sender_id") else "",
+                    EMBEDDING_BACKEND_METADATA_KEY: backend_name,
                 }
 
-                entry = {
-                    "id": item["vector_id"],
-                    "text": item["text"],
-                    "metadata": metadata,
-                    "embedding": embedding,
-                }
-
-                if item.get("is_update"):
-                    update_items.append(entry)
-                else:
-                    add_items.append(entry)
-
-            # 批量新增
-            if add_items:
-                success_count = vector_store.add_messages_batch(
-                    ids=[it["id"] for it in add_items],
-                    texts=[it["text"] for it in add_items],
-                    metadatas=[it["metadata"] for it in add_items],
-                    embeddings=[it["embedding"] for it in add_items],
+                entries.append(
+                    {
+                        "id": item["vector_id"],
+                        "text": item["text"],
+                        "metadata": metadata,
+                        "embedding": embedding,
+                    }
                 )
-                self._processed_count += success_count
-                self._failed_count += len(add_items) - success_count
-
-            # 逐条更新
-            for item in update_items:
-                success = vector_store.update_message(
-                    message_id=item["id"],
-                    text=item["text"],
-                    metadata=item["metadata"],
-                    embedding=item["embedding"],
+                if item.get("is_update"):
+                    update_count += 1
+
+            # 交给写线程执行，不等待落盘，后续批次可与本批次合并写入
+            if entries:
+                future = get_vector_store_writer().submit_upsert(
+                    ids=[it["id"] for it in entries],
+                    texts=[it["text"] for it in entries],
+                    metadatas=[it["metadata"] for it in entries],
+                    embeddings=[it["embedding"] for it in entries],
                 )
-                if success:
-                    self._processed_count += 1
-                else:
-                    self._failed_count += 1
+                self._track_write(future, len(entries))
 
             logger.info(
-                f"批次处理完成: 新增 {len(add_items)} 条, 更新 {len(update_items)} 条, "
+                f"批次已提交写入: 新增 {len(entries) - update_count} 条, 更新 {update_count} 条, "
                 f"队列剩余 {self._queue.qsize()} 条"
             )
 
@@ -367,6 +503,27 @@ class RealtimeRAGHandler:
             logger.error(f"批次处理失败: {type(e).__name__}: {e}", exc_info=True)
             self._failed_count += len(batch)
 
+    def _track_write(self, future, expected: int) -> None:
+        """
+        跟踪写线程返回的 Future，完成后在事件循环中更新统计
+
+        Args:
+            future: 写线程返回的 concurrent.futures.Future
+            expected: 本次提交的条目数
+        """
+        task = asyncio.create_task(self._await_write(asyncio.wrap_future(future), expected))
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+
+    async def _await_write(self, future: asyncio.Future, expected: int) -> None:
+        try:
+            written = await future
+        except Exception as e:
+            logger.error(f"向量写入失败: {type(e).__name__}: {e}")
+            written = 0
+        self._processed_count += written
+        self._failed_count += expected - written
+
 
 # ── 模块级单例 ──────────────────────────────────────────────────────────
 
@@ -325,6 +325,7 @@ MESSAGE_ZH_CN = {
     "messaging.send_success": "✅ 总结已成功发送到频道 {channel}",
     "messaging.send_forbidden": "⚠️ **频道发送失败**\n\n频道：{channel}\n原因：机器人没有在该频道发送消息的权限\n\n可能原因：\n• 频道设置为仅讨论组模式\n• 机器人未获得发送消息的权限\n• 频道未启用机器人功能\n\n建议：检查频道管理员权限设置\n\n📊 **总结内容如下：**",
     "messaging.send_error": "❌ 向频道 {channel} 发送报告失败：\n{error}",
+    "messaging.partial_delivery": "共 {total} 段中有 {failed} 段未发送（{error}）",
     # ========== AI 配置 ==========
     "aicfg.title": "🤖 **当前 AI 配置**",
     "aicfg.api_key": "• API Key：{value}",
@@ -414,6 +415,7 @@ MESSAGE_ZH_CN = {
     "summary_type.daily": "日报",
     "summary_type.weekly": "周报",
     "summary_type.manual": "手动总结",
+    "summary_type.daily_digest": "日摘要",
     # ========== 调度格式标题 ==========
     "schedule.format_header": "\n使用格式：\n",
     # ========== 投票超时回退 ==========
@@ -1076,6 +1078,7 @@ MESSAGE_EN_US = {
     "messaging.send_success": "✅ Summary successfully sent to channel {channel}",
     "messaging.send_forbidden": "⚠️ **Channel Send Failed**\n\nChannel: {channel}\nReason: Bot does not have permission to send messages in this channel\n\nPossible reasons:\n• Channel is set to discussion-only mode\n• Bot has not been granted message sending permission\n• Channel has not enabled bot functionality\n\nSuggestion: Check channel administrator permission settings\n\n📊 **Summary content:**",
     "messaging.send_error": "❌ Failed to send report to channel {channel}:\n{error}",
+    "messaging.partial_delivery": "{failed} of {total} parts were not sent ({error})",
     # ========== AI Configuration ==========
     "aicfg.title": "🤖 **Current AI Configuration**",
     "aicfg.api_key": "• API Key: {value}",
@@ -1165,6 +1168,7 @@ MESSAGE_EN_US = {
     "summary_type.daily": "Daily Report",
     "summary_type.weekly": "Weekly Report",
     "summary_type.manual": "Manual Summary",
+    "summary_type.daily_digest": "Daily Digest",
     # ========== Schedule Format Header ==========
     "schedule.format_header": "\nUsage format:\n",
     # ========== Poll Timeout Fallback ==========
@@ -43,6 +43,7 @@ class DatabaseManagerBase(ABC):
         button_message_id: int | None = None,
         ai_model: str = "unknown",
         summary_type: str = "weekly",
+        input_fingerprint: str | None = None,
     ) -> int | None:
         """保存总结记录到数据库"""
         pass
@@ -55,8 +56,9 @@ class DatabaseManagerBase(ABC):
         offset: int = 0,
         start_date: datetime | None = None,
         end_date: datetime | None = None,
+        summary_type: str | None = None,
     ) -> list[dict[str, Any]]:
-        """查询历史总结"""
+        """查询历史总结（未指定 summary_type 时不包含内部总结类型）"""
         pass
 
     @abstractmethod
@@ -64,6 +66,13 @@ class DatabaseManagerBase(ABC):
         """根据ID获取单条总结"""
         pass
 
+    @abstractmethod
+    def get_summary_by_fingerprint(
+        self, channel_id: str, input_fingerprint: str
+    ) -> dict[str, Any] | None:
+        """获取某频道输入指纹相同的最近一条总结"""
+        pass
+
     @abstractmethod
     def delete_old_summaries(self, days: int = 90) -> int:
         """删除旧总结记录"""
@@ -142,6 +151,13 @@ class DatabaseManagerBase(ABC):
         """更新总结的元数据"""
         pass
 
+    @abstractmethod
+    def get_summaries_missing_metadata(
+        self, since: datetime, limit: int = 100
+    ) -> list[dict[str, Any]]:
+        """查询 since 之后保存、尚未提取元数据的总结（不包含内部总结类型）"""
+        pass
+
     # ============ 对话历史管理方法 ============
 
     @abstractmethod
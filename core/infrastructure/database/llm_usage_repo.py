@@ -0,0 +1,131 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+
+"""
+LLM 用量数据访问层
+
+提供 llm_usage（按日期、子系统、频道、模型汇总的 LLM / Embedding 用量）的数据库操作接口。
+方法在失败时直接抛出异常，由用量统计决定是否保留到下次写入。
+"""
+
+import logging
+from typing import Any
+
+import aiomysql
+
+logger = logging.getLogger(__name__)
+
+# 可用于分组的列
+USAGE_GROUP_COLUMNS = {
+    "date": "usage_date",
+    "subsystem": "subsystem",
+    "channel": "channel_id",
+    "model": "model",
+}
+
+
+class LLMUsageRepository:
+    """LLM 用量数据访问层"""
+
+    def __init__(self, pool=None):
+        """初始化 LLM 用量仓库
+
+        Args:
+            pool: aiomysql 连接池（可选，支持延迟获取）。
+                未传入时，首次访问 pool 属性将自动从全局数据库管理器获取。
+        """
+        self._pool = pool
+
+    @property
+    def pool(self):
+        """延迟获取数据库连接池"""
+        if self._pool is not None:
+            return self._pool
+        from core.infrastructure.database.manager import get_db_manager
+
+        db = get_db_manager()
+        if db is not None and hasattr(db, "pool") and db.pool is not None:
+            self._pool = db.pool
+            return self._pool
+        raise RuntimeError("数据库连接池尚未初始化")
+
+    async def add_usage(self, rows: list[dict[str, Any]]) -> None:
+        """累加用量到汇总表
+
+        Args:
+            rows: 用量行，包含 usage_date、subsystem、channel_id、model、
+                requests、prompt_tokens、completion_tokens
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.executemany(
+                    """
+                    INSERT INTO llm_usage
+                        (usage_date, subsystem, channel_id, model,
+                         requests, prompt_tokens, completion_tokens)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        requests = requests + VALUES(requests),
+                        prompt_tokens = prompt_tokens + VALUES(prompt_tokens),
+                        completion_tokens = completion_tokens + VALUES(completion_tokens)
+                    """,
+                    [
+                        (
+                            row["usage_date"],
+                            row["subsystem"],
+                            row["channel_id"],
+                            row["model"],
+                            row["requests"],
+                            row["prompt_tokens"],
+                            row["completion_tokens"],
+                        )
+                        for row in rows
+                    ],
+                )
+                await conn.commit()
+
+    async def get_usage(
+        self, days: int = 30, group_by: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """查询最近若干天的用量汇总
+
+        Args:
+            days: 查询天数（含今天）
+            group_by: 分组维度（date / subsystem / channel / model），默认按子系统与模型
+
+        Returns:
+            汇总行，按 token 总数降序
+        """
+        columns = [USAGE_GROUP_COLUMNS[g] for g in (group_by or ["subsystem", "model"])]
+        select = ", ".join(columns)
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"""
+                    SELECT {select},
+                        SUM(requests) AS requests,
+                        SUM(prompt_tokens) AS prompt_tokens,
+                        SUM(completion_tokens) AS completion_tokens
+                    FROM llm_usage
+                    WHERE usage_date >= CURDATE() - INTERVAL %s DAY
+                    GROUP BY {select}
+                    ORDER BY SUM(prompt_tokens + completion_tokens) DESC
+                    """,
+                    (max(days, 1) - 1,),
+                )
+                return list(await cursor.fetchall())
+
+
+# 全局实例
+_llm_usage_repo: LLMUsageRepository | None = None
+
+
+def get_llm_usage_repo() -> LLMUsageRepository:
+    """获取全局 LLM 用量仓库实例"""
+    global _llm_usage_repo
+    if _llm_usage_repo is not None:
+        return _llm_usage_repo
+
+    _llm_usage_repo = LLMUsageRepository()
+    return _llm_usage_repo
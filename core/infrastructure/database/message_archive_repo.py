@@ -0,0 +1,201 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+
+"""
+频道消息归档数据访问层
+
+提供 channel_messages（消息归档）与 channel_archive_state（同步状态）的数据库操作接口。
+与其他仓库不同，这里的方法在失败时直接抛出异常，由调用方决定是否回退到 Telegram 抓取。
+"""
+
+import logging
+from datetime import datetime
+from typing import Any
+
+import aiomysql
+
+logger = logging.getLogger(__name__)
+
+
+class MessageArchiveRepository:
+    """频道消息归档数据访问层"""
+
+    def __init__(self, pool=None):
+        """初始化消息归档仓库
+
+        Args:
+            pool: aiomysql 连接池（可选，支持延迟获取）。
+                未传入时，首次访问 pool 属性将自动从全局数据库管理器获取。
+        """
+        self._pool = pool
+
+    @property
+    def pool(self):
+        """延迟获取数据库连接池"""
+        if self._pool is not None:
+            return self._pool
+        from core.infrastructure.database.manager import get_db_manager
+
+        db = get_db_manager()
+        if db is not None and hasattr(db, "pool") and db.pool is not None:
+            self._pool = db.pool
+            return self._pool
+        raise RuntimeError("数据库连接池尚未初始化")
+
+    async def upsert_messages(
+        self, channel_id: str, messages: list[tuple[int, str, datetime]]
+    ) -> int:
+        """批量写入归档消息，已存在的消息更新文本（用于编辑）
+
+        Args:
+            channel_id: 频道标识
+            messages: (message_id, text, message_date) 列表，message_date 为 naive UTC
+
+        Returns:
+            写入的消息数
+        """
+        if not messages:
+            return 0
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.executemany(
+                    """
+                    INSERT INTO channel_messages (channel_id, message_id, text, message_date)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE text = VALUES(text)
+                    """,
+                    [(channel_id, mid, text, date) for mid, text, date in messages],
+                )
+                await conn.commit()
+        return len(messages)
+
+    async def delete_messages(self, channel_id: str, message_ids: list[int]) -> int:
+        """删除归档消息
+
+        Args:
+            channel_id: 频道标识
+            message_ids: 消息ID列表
+
+        Returns:
+            删除的消息数
+        """
+        if not message_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(message_ids))
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    f"DELETE FROM channel_messages WHERE channel_id = %s "
+                    f"AND message_id IN ({placeholders})",
+                    [channel_id, *message_ids],
+                )
+                await conn.commit()
+                return cursor.rowcount
+
+    async def get_messages(self, channel_id: str, since: datetime) -> list[dict[str, Any]]:
+        """按消息ID顺序读取某时间之后的归档消息
+
+        Args:
+            channel_id: 频道标识
+            since: 起始时间（naive UTC，含）
+
+        Returns:
+            消息字典列表，包含 message_id、text、message_date
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    """
+                    SELECT message_id, text, message_date FROM channel_messages
+                    WHERE channel_id = %s AND message_date >= %s
+                    ORDER BY message_id ASC
+                    """,
+                    (channel_id, since),
+                )
+                return list(await cursor.fetchall())
+
+    async def get_state(self, channel_id: str) -> dict[str, Any] | None:
+        """获取频道的归档同步状态
+
+        Returns:
+            包含 last_synced_id 与 covered_since 的字典，未归档过返回 None
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    "SELECT last_synced_id, covered_since FROM channel_archive_state "
+                    "WHERE channel_id = %s",
+                    (channel_id,),
+                )
+                return await cursor.fetchone()
+
+    async def update_state(
+        self,
+        channel_id: str,
+        last_synced_id: int,
+        covered_since: datetime | None = None,
+    ) -> None:
+        """推进频道的归档同步状态
+
+        last_synced_id 只增不减；covered_since 只向更早推进（传 None 表示不变）。
+
+        Args:
+            channel_id: 频道标识
+            last_synced_id: 已连续归档到的最大消息ID
+            covered_since: 归档完整覆盖的起始时间（naive UTC）
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """
+                    INSERT INTO channel_archive_state (channel_id, last_synced_id, covered_since)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        last_synced_id = GREATEST(last_synced_id, VALUES(last_synced_id)),
+                        covered_since = IF(
+                            VALUES(covered_since) IS NULL, covered_since,
+                            IF(covered_since IS NULL, VALUES(covered_since),
+                               LEAST(covered_since, VALUES(covered_since)))
+                        )
+                    """,
+                    (channel_id, last_synced_id, covered_since),
+                )
+                await conn.commit()
+
+    async def prune_before(self, cutoff: datetime) -> int:
+        """删除早于 cutoff 的归档消息，并将各频道的 covered_since 推进到 cutoff
+
+        Args:
+            cutoff: 截止时间（naive UTC）
+
+        Returns:
+            删除的消息数
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    "DELETE FROM channel_messages WHERE message_date < %s", (cutoff,)
+                )
+                deleted = cursor.rowcount
+                await cursor.execute(
+                    "UPDATE channel_archive_state SET covered_since = %s "
+                    "WHERE covered_since IS NOT NULL AND covered_since < %s",
+                    (cutoff, cutoff),
+                )
+                await conn.commit()
+                return deleted
+
+
+# 全局实例
+_message_archive_repo: MessageArchiveRepository | None = None
+
+
+def get_message_archive_repo() -> MessageArchiveRepository:
+    """获取全局消息归档仓库实例"""
+    global _message_archive_repo
+    if _message_archive_repo is not None:
+        return _message_archive_repo
+
+    _message_archive_repo = MessageArchiveRepository()
+    return _message_archive_repo
@@ -29,6 +29,13 @@ from .base import DatabaseManagerBase
 
 logger = logging.getLogger(__name__)
 
+# 内部总结类型（如滚动模式的日摘要），默认不出现在历史总结查询中
+INTERNAL_SUMMARY_TYPES = ("daily_digest",)
+# 排除内部总结类型的查询条件，参数为 INTERNAL_SUMMARY_TYPES；统计、排行、频道列表等同样使用
+PUBLIC_SUMMARY_CONDITION = "(summary_type IS NULL OR summary_type NOT IN ({}))".format(
+    ", ".join(["%s"] * len(INTERNAL_SUMMARY_TYPES))
+)
+
 
 def utc_now_naive() -> datetime:
     """返回 naive UTC datetime，兼容 MySQL DATETIME 列
@@ -169,12 +176,37 @@ class MySQLManager(DatabaseManagerBase):
                     topics JSON,
                     sentiment VARCHAR(50),
                     entities JSON,
+                    input_fingerprint CHAR(64),
                     INDEX idx_channel_created (channel_id, created_at DESC),
                     INDEX idx_created (created_at DESC),
-                    INDEX idx_channel (channel_id)
+                    INDEX idx_channel (channel_id),
+                    INDEX idx_channel_fingerprint (channel_id, input_fingerprint)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
 
+                # 如果表已存在，尝试添加输入指纹列与索引（幂等操作）
+                try:
+                    await cursor.execute(
+                        "ALTER TABLE summaries ADD COLUMN input_fingerprint CHAR(64) AFTER entities"
+                    )
+                    logger.info("总结表新增 input_fingerprint 列成功")
+                except Exception as alter_err:
+                    if "Duplicate column name" in str(alter_err):
+                        logger.debug("input_fingerprint 列已存在，跳过")
+                    else:
+                        logger.warning(f"添加 input_fingerprint 列时出错: {alter_err}")
+
+                try:
+                    await cursor.execute(
+                        "ALTER TABLE summaries ADD INDEX idx_channel_fingerprint "
+                        "(channel_id, input_fingerprint)"
+                    )
+                except Exception as alter_err:
+                    if "Duplicate key name" in str(alter_err):
+                        logger.debug("idx_channel_fingerprint 索引已存在，跳过")
+                    else:
+                        logger.warning(f"添加 idx_channel_fingerprint 索引时出错: {alter_err}")
+
                 # 2. 创建数据库版本管理表
                 await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS db_version (
@@ -432,6 +464,61 @@ class MySQLManager(DatabaseManagerBase):
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
 
+                # 16. 创建频道消息归档表（总结时从本地读取，避免重复抓取历史消息）
+                await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS channel_messages (
+                    channel_id VARCHAR(255) NOT NULL,
+                    message_id BIGINT NOT NULL,
+                    text MEDIUMTEXT NOT NULL,
+                    message_date DATETIME NOT NULL,
+                    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (channel_id, message_id),
+                    INDEX idx_channel_messages_date (channel_id, message_date)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+                # 17. 创建消息归档同步状态表
+                await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS channel_archive_state (
+                    channel_id VARCHAR(255) PRIMARY KEY,
+                    last_synced_id BIGINT NOT NULL DEFAULT 0,
+                    covered_since DATETIME,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+                # 18. 创建总结任务表（分阶段检查点，重启后从未完成的阶段继续）
+                await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS summary_jobs (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    channel_id VARCHAR(255) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'running',
+                    stage VARCHAR(20) NOT NULL,
+                    state JSON,
+                    attempts INT NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_summary_jobs_status (status, channel_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+                # 19. 创建 LLM 用量汇总表（按日期、子系统、频道、模型累加 token 用量）
+                await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS llm_usage (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    usage_date DATE NOT NULL,
+                    subsystem VARCHAR(50) NOT NULL,
+                    channel_id VARCHAR(255) NOT NULL DEFAULT '',
+                    model VARCHAR(100) NOT NULL,
+                    requests INT NOT NULL DEFAULT 0,
+                    prompt_tokens BIGINT NOT NULL DEFAULT 0,
+                    completion_tokens BIGINT NOT NULL DEFAULT 0,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    UNIQUE KEY uk_llm_usage (usage_date, subsystem, channel_id, model)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
                 # 插入或更新版本号
                 await cursor.execute("""
                     INSERT INTO db_version (version, upgraded_at)
@@ -461,6 +548,7 @@ class MySQLManager(DatabaseManagerBase):
         button_message_id: int | None = None,
         ai_model: str = "unknown",
         summary_type: str = "weekly",
+        input_fingerprint: str | None = None,
     ) -> int | None:
         """保存总结记录到数据库"""
         try:
@@ -476,8 +564,9 @@ class MySQLManager(DatabaseManagerBase):
                         INSERT INTO summaries (
                             channel_id, channel_name, summary_text, message_count,
                             start_time, end_time, ai_model, summary_type,
-                            summary_message_ids, poll_message_id, button_message_id
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            summary_message_ids, poll_message_id, button_message_id,
+                            input_fingerprint
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """,
                         (
                             channel_id,
@@ -491,6 +580,7 @@ class MySQLManager(DatabaseManagerBase):
                             summary_ids_json,
                             poll_message_id,
                             button_message_id,
+                            input_fingerprint,
                         ),
                     )
 
@@ -510,8 +600,9 @@ class MySQLManager(DatabaseManagerBase):
         offset: int = 0,
         start_date: datetime | None = None,
         end_date: datetime | None = None,
+        summary_type: str | None = None,
     ) -> list[dict[str, Any]]:
-        """查询历史总结"""
+        """查询历史总结（未指定 summary_type 时不包含内部总结类型）"""
         try:
             async with self.pool.acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cursor:
@@ -523,6 +614,8 @@ class MySQLManager(DatabaseManagerBase):
                         conditions.append("channel_id = %s")
                         params.append(channel_id)
 
+                    self._add_summary_type_condition(conditions, params, summary_type)
+
                     if start_date:
                         conditions.append("created_at >= %s")
                         # 移除时区信息，只保留日期时间值
@@ -563,7 +656,7 @@ class MySQLManager(DatabaseManagerBase):
         start_date: datetime | None = None,
         end_date: datetime | None = None,
     ) -> int:
-        """统计历史总结总数"""
+        """统计历史总结总数（不包含内部总结类型）"""
         try:
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cursor:
@@ -574,6 +667,8 @@ class MySQLManager(DatabaseManagerBase):
                         conditions.append("channel_id = %s")
                         params.append(channel_id)
 
+                    self._add_summary_type_condition(conditions, params, None)
+
                     if start_date:
                         conditions.append("created_at >= %s")
                         naive_start = (
@@ -603,6 +698,18 @@ class MySQLManager(DatabaseManagerBase):
             logger.error(f"统计总结记录失败: {type(e).__name__}: {e}", exc_info=True)
             return 0
 
+    @staticmethod
+    def _add_summary_type_condition(
+        conditions: list[str], params: list[Any], summary_type: str | None
+    ) -> None:
+        """按总结类型过滤；未指定类型时排除内部总结类型"""
+        if summary_type:
+            conditions.append("summary_type = %s")
+            params.append(summary_type)
+        else:
+            conditions.append(PUBLIC_SUMMARY_CONDITION)
+            params.extend(INTERNAL_SUMMARY_TYPES)
+
     @staticmethod
     def _parse_summary_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """解析总结记录中的 JSON 字段"""
@@ -645,6 +752,29 @@ class MySQLManager(DatabaseManagerBase):
             )
             return None
 
+    async def get_summary_by_fingerprint(
+        self, channel_id: str, input_fingerprint: str
+    ) -> dict[str, Any] | None:
+        """获取某频道输入指纹相同的最近一条总结"""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(
+                        """
+                        SELECT * FROM summaries
+                        WHERE channel_id = %s AND input_fingerprint = %s
+                        ORDER BY created_at DESC
+                        LIMIT 1
+                        """,
+                        (channel_id, input_fingerprint),
+                    )
+                    row = await cursor.fetchone()
+                    return self._parse_summary_rows([row])[0] if row else None
+
+        except Exception as e:
+            logger.error(f"按输入指纹查询总结失败: {type(e).__name__}: {e}")
+            return None
+
     async def delete_old_summaries(self, days: int = 90) -> int:
         """删除旧总结记录"""
         try:
@@ -675,8 +805,13 @@ class MySQLManager(DatabaseManagerBase):
         try:
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cursor:
-                    channel_condition = "WHERE channel_id = %s" if channel_id else ""
-                    params = [channel_id] if channel_id else []
+                    # 不统计内部总结类型（如日摘要），避免重复计数
+                    conditions = [PUBLIC_SUMMARY_CONDITION]
+                    params: list[Any] = list(INTERNAL_SUMMARY_TYPES)
+                    if channel_id:
+                        conditions.append("channel_id = %s")
+                        params.append(channel_id)
+                    channel_condition = "WHERE " + " AND ".join(conditions)
 
                     # 总总结次数
                     await cursor.execute(
@@ -725,42 +860,24 @@ class MySQLManager(DatabaseManagerBase):
 
                     # 本周统计
                     week_ago = (datetime.now(UTC) - timedelta(days=7)).isoformat()
-                    if channel_id:
-                        await cursor.execute(
-                            """
-                            SELECT COUNT(*) FROM summaries
-                            WHERE channel_id = %s AND created_at >= %s
-                        """,
-                            [channel_id, week_ago],
-                        )
-                    else:
-                        await cursor.execute(
-                            """
-                            SELECT COUNT(*) FROM summaries
-                            WHERE created_at >= %s
-                        """,
-                            [week_ago],
-                        )
+                    await cursor.execute(
+                        f"""
+                        SELECT COUNT(*) FROM summaries
+                        {channel_condition} AND created_at >= %s
+                    """,
+                        [*params, week_ago],
+                    )
                     week_count = (await cursor.fetchone())[0] or 0
 
                     # 本月统计
                     month_ago = (datetime.now(UTC) - timedelta(days=30)).isoformat()
-                    if channel_id:
-                        await cursor.execute(
-                            """
-                            SELECT COUNT(*) FROM summaries
-                            WHERE channel_id = %s AND created_at >= %s
-                        """,
-                            [channel_id, month_ago],
-                        )
-                    else:
-                        await cursor.execute(
-                            """
-                            SELECT COUNT(*) FROM summaries
-                            WHERE created_at >= %s
-                        """,
-                            [month_ago],
-                        )
+                    await cursor.execute(
+                        f"""
+                        SELECT COUNT(*) FROM summaries
+                        {channel_condition} AND created_at >= %s
+                    """,
+                        [*params, month_ago],
+                    )
                     month_count = (await cursor.fetchone())[0] or 0
 
             stats = {
@@ -786,18 +903,19 @@ class MySQLManager(DatabaseManagerBase):
             async with self.pool.acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cursor:
                     await cursor.execute(
-                        """
+                        f"""
                         SELECT
                             channel_id,
                             channel_name,
                             COUNT(*) as summary_count,
                             SUM(message_count) as total_messages
                         FROM summaries
+                        WHERE {PUBLIC_SUMMARY_CONDITION}
                         GROUP BY channel_id, channel_name
                         ORDER BY summary_count DESC
                         LIMIT %s
                     """,
-                        (limit,),
+                        (*INTERNAL_SUMMARY_TYPES, limit),
                     )
 
                     ranking = await cursor.fetchall()
@@ -1089,12 +1207,12 @@ class MySQLManager(DatabaseManagerBase):
 
                     # 统计该频道的总结数和平均消息长度
                     await cursor.execute(
-                        """
+                        f"""
                         SELECT COUNT(*) as count, AVG(message_count) as avg_len
                         FROM summaries
-                        WHERE channel_id = %s
+                        WHERE channel_id = %s AND {PUBLIC_SUMMARY_CONDITION}
                     """,
-                        (channel_id,),
+                        (channel_id, *INTERNAL_SUMMARY_TYPES),
                     )
                     stats = await cursor.fetchone()
 
@@ -1215,6 +1333,30 @@ class MySQLManager(DatabaseManagerBase):
         except Exception as e:
             logger.error(f"更新总结元数据失败: {type(e).__name__}: {e}", exc_info=True)
 
+    async def get_summaries_missing_metadata(
+        self, since: datetime, limit: int = 100
+    ) -> list[dict[str, Any]]:
+        """查询 since 之后保存、尚未提取元数据的总结（提取后 sentiment 总会写入）"""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(
+                        f"""
+                        SELECT id, channel_id, channel_name, summary_text
+                        FROM summaries
+                        WHERE sentiment IS NULL AND created_at >= %s
+                            AND {PUBLIC_SUMMARY_CONDITION}
+                        ORDER BY created_at
+                        LIMIT %s
+                    """,
+                        (since, *INTERNAL_SUMMARY_TYPES, limit),
+                    )
+                    return list(await cursor.fetchall())
+
+        except Exception as e:
+            logger.error(f"查询缺少元数据的总结失败: {type(e).__name__}: {e}", exc_info=True)
+            return []
+
     # ============ 对话历史管理方法 ============
 
     async def save_conversation(
@@ -1673,7 +1815,8 @@ class MySQLManager(DatabaseManagerBase):
         try:
             async with self.pool.acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cursor:
-                    await cursor.execute("""
+                    await cursor.execute(
+                        f"""
                         SELECT
                             channel_id,
                             COALESCE(MAX(NULLIF(channel_name, '')), channel_id) AS channel_name,
@@ -1681,9 +1824,12 @@ class MySQLManager(DatabaseManagerBase):
                             COUNT(*) AS summary_count,
                             COALESCE(SUM(message_count), 0) AS message_count
                         FROM summaries
+                        WHERE {PUBLIC_SUMMARY_CONDITION}
                         GROUP BY channel_id
                         ORDER BY last_summary_time DESC
-                    """)
+                    """,
+                        INTERNAL_SUMMARY_TYPES,
+                    )
 
                     rows = await cursor.fetchall()
 
@@ -1722,7 +1868,7 @@ class MySQLManager(DatabaseManagerBase):
             async with self.pool.acquire() as conn:
                 async with conn.cursor(aiomysql.DictCursor) as cursor:
                     await cursor.execute(
-                        """
+                        f"""
                         SELECT
                             channel_id,
                             COALESCE(MAX(NULLIF(channel_name, '')), channel_id) AS channel_name,
@@ -1731,10 +1877,10 @@ class MySQLManager(DatabaseManagerBase):
                             MAX(created_at) AS last_summary_time,
                             MIN(created_at) AS first_summary_time
                         FROM summaries
-                        WHERE channel_id = %s
+                        WHERE channel_id = %s AND {PUBLIC_SUMMARY_CONDITION}
                         GROUP BY channel_id
                     """,
-                        (channel_id,),
+                        (channel_id, *INTERNAL_SUMMARY_TYPES),
                     )
                     row = await cursor.fetchone()
 
@@ -2068,6 +2214,8 @@ class MySQLManager(DatabaseManagerBase):
             "users",
             "channel_profiles",
             "usage_quota",
+            "summary_jobs",
+            "llm_usage",
             "summaries",
             "system_audit_logs",
         ]
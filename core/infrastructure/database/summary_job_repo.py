@@ -0,0 +1,166 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+
+"""
+总结任务数据访问层
+
+提供 summary_jobs（分阶段总结任务及其检查点）的数据库操作接口。
+方法在失败时直接抛出异常，由任务引擎决定是否在无检查点的情况下继续执行。
+"""
+
+import json
+import logging
+from typing import Any
+
+import aiomysql
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryJobRepository:
+    """总结任务数据访问层"""
+
+    def __init__(self, pool=None):
+        """初始化总结任务仓库
+
+        Args:
+            pool: aiomysql 连接池（可选，支持延迟获取）。
+                未传入时，首次访问 pool 属性将自动从全局数据库管理器获取。
+        """
+        self._pool = pool
+
+    @property
+    def pool(self):
+        """延迟获取数据库连接池"""
+        if self._pool is not None:
+            return self._pool
+        from core.infrastructure.database.manager import get_db_manager
+
+        db = get_db_manager()
+        if db is not None and hasattr(db, "pool") and db.pool is not None:
+            self._pool = db.pool
+            return self._pool
+        raise RuntimeError("数据库连接池尚未初始化")
+
+    async def create_job(self, channel_id: str, stage: str, state: dict[str, Any]) -> int:
+        """创建总结任务
+
+        Args:
+            channel_id: 频道标识
+            stage: 下一个待执行的阶段
+            state: 已完成阶段的输出
+
+        Returns:
+            任务ID
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """
+                    INSERT INTO summary_jobs (channel_id, status, stage, state)
+                    VALUES (%s, 'running', %s, %s)
+                    """,
+                    (channel_id, stage, json.dumps(state, ensure_ascii=False)),
+                )
+                await conn.commit()
+                return cursor.lastrowid
+
+    async def save_checkpoint(
+        self,
+        job_id: int,
+        stage: str,
+        state: dict[str, Any],
+        status: str = "running",
+        last_error: str | None = None,
+    ) -> None:
+        """保存任务检查点
+
+        Args:
+            job_id: 任务ID
+            stage: 下一个待执行的阶段
+            state: 已完成阶段的输出
+            status: running / failed / completed / abandoned
+            last_error: 最近一次失败的错误信息
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """
+                    UPDATE summary_jobs
+                    SET stage = %s, state = %s, status = %s, last_error = %s,
+                        attempts = attempts + IF(%s = 'failed', 1, 0)
+                    WHERE id = %s
+                    """,
+                    (
+                        stage,
+                        json.dumps(state, ensure_ascii=False),
+                        status,
+                        last_error,
+                        status,
+                        job_id,
+                    ),
+                )
+                await conn.commit()
+
+    async def get_unfinished_jobs(self, channel_id: str | None = None) -> list[dict[str, Any]]:
+        """读取未完成（running / failed）的任务，按创建时间升序
+
+        Args:
+            channel_id: 仅读取该频道的任务，None 表示所有频道
+
+        Returns:
+            任务字典列表，state 已解析为字典
+        """
+        sql = "SELECT * FROM summary_jobs WHERE status IN ('running', 'failed')"
+        params: list[Any] = []
+        if channel_id is not None:
+            sql += " AND channel_id = %s"
+            params.append(channel_id)
+        sql += " ORDER BY created_at ASC, id ASC"
+
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(sql, params)
+                jobs = list(await cursor.fetchall())
+
+        for job in jobs:
+            if isinstance(job.get("state"), str):
+                job["state"] = json.loads(job["state"])
+        return jobs
+
+    async def delete_finished_before(self, days: int = 30) -> int:
+        """删除早于指定天数的已结束任务
+
+        Args:
+            days: 保留天数
+
+        Returns:
+            删除的任务数
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """
+                    DELETE FROM summary_jobs
+                    WHERE status IN ('completed', 'abandoned')
+                    AND updated_at < NOW() - INTERVAL %s DAY
+                    """,
+                    (days,),
+                )
+                await conn.commit()
+                return cursor.rowcount
+
+
+# 全局实例
+_summary_job_repo: SummaryJobRepository | None = None
+
+
+def get_summary_job_repo() -> SummaryJobRepository:
+    """获取全局总结任务仓库实例"""
+    global _summary_job_repo
+    if _summary_job_repo is not None:
+        return _summary_job_repo
+
+    _summary_job_repo = SummaryJobRepository()
+    return _summary_job_repo
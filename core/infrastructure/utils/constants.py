@@ -22,6 +22,7 @@ CONFIG_FILE = "data/config.json"
 RESTART_FLAG_FILE = "data/.restart_flag"
 LAST_SUMMARY_FILE = "data/.last_summary_time.json"
 POLL_REGENERATIONS_FILE = "data/.poll_regenerations.json"
+ENTITY_CACHE_FILE = "data/.entity_cache.json"
 DATABASE_FILE = "data/bot.db"
 
 # ==================== 投票相关常量 ====================
@@ -19,6 +19,7 @@ from .comment_welcome_initializer import CommentWelcomeInitializer
 from .communication_initializer import CommunicationInitializer
 from .database_initializer import DatabaseInitializer
 from .forwarding_initializer import ForwardingInitializer
+from .message_archive_initializer import MessageArchiveInitializer
 from .realtime_rag_initializer import RealtimeRAGInitializer
 from .scheduler_initializer import SchedulerInitializer
 from .startup_notifier import StartupNotifier
@@ -34,6 +35,7 @@ __all__ = [
     "CommentWelcomeInitializer",
     "CommunicationInitializer",
     "RealtimeRAGInitializer",
+    "MessageArchiveInitializer",
     "StartupNotifier",
     "WebAPIInitializer",
 ]
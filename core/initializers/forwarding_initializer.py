@@ -189,9 +189,9 @@ class ForwardingInitializer:
                     )
 
                 # 检查是否是配置的源频道
-                is_source_channel = (
-                    chat_username and chat_username in current_source_channel_ids
-                ) or (chat_id in current_source_channel_ids)
+                is_source_channel = self.forwarding_handler.is_source_channel(
+                    chat_username, chat_id
+                )
 
                 if not is_source_channel:
                     self.logger.debug(f"频道 {chat_username or chat_id} 不是源频道，跳过")
@@ -0,0 +1,154 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+消息归档初始化器
+
+注册频道消息监听器，将新消息、编辑消息、删除消息写入本地归档，
+并在后台执行启动追赶抓取（需要 UserBot，Bot 账号无法读取频道历史）。
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import TYPE_CHECKING, Optional
+
+from telethon import events
+
+if TYPE_CHECKING:
+    from telethon import TelegramClient
+
+import core.config as config_module
+from core.telegram.entity_cache import get_cached_entity
+from core.telegram.message_archive import get_message_archive, resolve_channel
+
+logger = logging.getLogger(__name__)
+
+# 断线期间检查重新连接的间隔（秒）
+_RECONNECT_POLL_SECONDS = 5
+
+
+class MessageArchiveInitializer:
+    """消息归档初始化器 - 注册监听器并启动追赶抓取"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._catch_up_task: asyncio.Task | None = None
+        self._disconnect_watch_task: asyncio.Task | None = None
+
+    async def initialize(
+        self,
+        bot_client: "TelegramClient",
+        userbot_client: Optional["TelegramClient"] = None,
+    ) -> None:
+        """
+        初始化消息归档
+
+        Args:
+            bot_client: Bot 客户端
+            userbot_client: UserBot 客户端（可选，优先用于监听和追赶抓取）
+        """
+        archive = get_message_archive()
+        if not archive.is_enabled():
+            self.logger.info("消息归档未启用，跳过初始化")
+            return
+
+        try:
+            monitoring_client = userbot_client if userbot_client else bot_client
+            # 先注册监听器再追赶，保证追赶期间的新消息不会遗漏
+            self._register_listeners(monitoring_client, archive)
+            # 断线期间的更新可能丢失，断开后暂停游标推进，等待下次同步
+            self._disconnect_watch_task = asyncio.create_task(
+                self._watch_disconnect(monitoring_client, archive)
+            )
+
+            if userbot_client:
+                self._catch_up_task = asyncio.create_task(
+                    archive.catch_up(userbot_client, list(config_module.CHANNELS))
+                )
+                self.logger.info(
+                    f"消息归档初始化完成，后台追赶 {len(config_module.CHANNELS)} 个频道"
+                )
+            else:
+                self.logger.info("消息归档初始化完成（无 UserBot，首次总结时再回填历史消息）")
+
+        except Exception as e:
+            self.logger.error(f"初始化消息归档失败: {type(e).__name__}: {e}", exc_info=True)
+
+    @staticmethod
+    async def _watch_disconnect(client: "TelegramClient", archive) -> None:
+        """每次客户端断开连接时暂停归档游标推进"""
+        while True:
+            with suppress(Exception):
+                await client.disconnected
+            archive.reset_live()
+            await asyncio.sleep(_RECONNECT_POLL_SECONDS)
+
+    def _register_listeners(self, client: "TelegramClient", archive) -> None:
+        """
+        注册消息事件监听器
+
+        Args:
+            client: Telethon 客户端
+            archive: MessageArchive 实例
+        """
+
+        async def record(event) -> None:
+            if not event.is_channel:
+                return
+            chat = event.chat or await event.get_chat()
+            channel = resolve_channel(str(chat.id), getattr(chat, "username", None))
+            if channel is None:
+                return
+            # 与抓取路径一致，归档带格式的 message.text
+            text = event.message.text
+            if not text or not text.strip():
+                return
+            await archive.record_message(channel, event.message.id, text, event.message.date)
+
+        @client.on(events.NewMessage)
+        async def on_new_message(event):
+            """归档频道新消息"""
+            try:
+                await record(event)
+            except Exception as e:
+                logger.error(f"归档新消息失败: {type(e).__name__}: {e}")
+
+        @client.on(events.MessageEdited)
+        async def on_message_edited(event):
+            """更新归档中被编辑的消息"""
+            try:
+                await record(event)
+            except Exception as e:
+                logger.error(f"归档编辑消息失败: {type(e).__name__}: {e}")
+
+        @client.on(events.MessageDeleted)
+        async def on_message_deleted(event):
+            """删除归档中被删除的消息"""
+            try:
+                if not event.chat_id:
+                    return
+                # 删除事件只有带 -100 前缀的 chat_id，通过实体缓存取得 username
+                username = None
+                try:
+                    entity = await get_cached_entity(client, event.chat_id)
+                    username = getattr(entity, "username", None)
+                except Exception as e:
+                    logger.debug(f"解析频道 {event.chat_id} 失败，仅按 ID 匹配: {e}")
+                channel = resolve_channel(str(event.chat_id), username)
+                if channel is None:
+                    return
+                await archive.record_delete(channel, list(event.deleted_ids))
+            except Exception as e:
+                logger.error(f"归档删除消息失败: {type(e).__name__}: {e}")
+
+        self.logger.info(
+            "消息归档事件监听器注册完成（NewMessage + MessageEdited + MessageDeleted）"
+        )
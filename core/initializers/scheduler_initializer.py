@@ -15,6 +15,7 @@
 """
 
 import logging
+from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -22,9 +23,27 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 if TYPE_CHECKING:
     from telethon import TelegramClient
 
-from core.config import build_cron_trigger, get_channel_schedule, set_scheduler_instance
+from core.ai.memory_manager import resume_summary_metadata
+from core.ai.usage_tracker import LLM_USAGE_FLUSH_INTERVAL, flush_llm_usage
+from core.ai.vector_store import EMBEDDING_REEMBED_INTERVAL, reembed_fallback_vectors
+from core.config import get_channel_schedule, set_scheduler_instance
 from core.infrastructure.config.system_config import SystemConfigManager
-from core.system.scheduler import cleanup_old_poll_regenerations, main_job
+from core.system.rolling_summary import (
+    ROLLING_SUMMARY_ENABLED,
+    ROLLING_SUMMARY_HOUR,
+    ROLLING_SUMMARY_MINUTE,
+    run_daily_digests,
+)
+from core.system.schedule_planner import SUMMARY_SCHEDULE_SPREAD_MINUTES, plan_summary_triggers
+from core.system.scheduler import (
+    cleanup_old_poll_regenerations,
+    resume_summary_jobs,
+    scheduled_summary_job,
+)
+from core.system.summary_jobs import cleanup_summary_jobs
+
+# 启动后延迟恢复未完成的总结任务，等待客户端与各项服务就绪
+SUMMARY_JOB_RESUME_DELAY_SECONDS = 30
 
 
 class SchedulerInitializer:
@@ -52,9 +71,21 @@ class SchedulerInitializer:
         # 添加频道定时总结任务
         await self._add_channel_summary_jobs(client)
 
+        # 添加滚动日摘要任务（可选）
+        self._add_rolling_summary_jobs()
+
+        # 恢复上次运行中断的总结任务
+        self._add_summary_job_recovery()
+
         # 添加定期清理任务
         self._add_cleanup_jobs()
 
+        # 定期写入 LLM 用量统计
+        self._add_usage_flush_job()
+
+        # 主Embedding后端恢复后重新生成降级向量
+        self._add_embedding_reembed_job()
+
         # 添加跨Bot通信检查任务
         self._add_communication_jobs(client)
 
@@ -81,16 +112,17 @@ class SchedulerInitializer:
         channels = self.system_config_manager.channels if self.system_config_manager else []
         self.logger.info(f"开始为 {len(channels)} 个频道配置定时任务...")
 
+        # 相同触发时间的频道在错峰窗口内错开
+        plan = plan_summary_triggers(channels)
+
         for channel in channels:
             # 获取频道的自动总结时间配置
             schedule = get_channel_schedule(channel)
-
-            # 构建 cron 触发器参数
-            trigger_params = build_cron_trigger(schedule)
+            trigger_params = plan[channel]["trigger"]
 
             # 创建定时任务
             self.scheduler.add_job(
-                main_job,
+                scheduled_summary_job,
                 "cron",
                 **trigger_params,
                 args=[channel],
@@ -117,12 +149,57 @@ class SchedulerInitializer:
             else:
                 frequency_text = "未知"
 
+            offset = plan[channel]["offset_seconds"]
+            offset_text = f"（错峰 +{offset // 60}分{offset % 60}秒）" if offset else ""
             self.logger.info(
-                f"频道 {channel} 的定时任务已配置：{frequency_text} {schedule['hour']:02d}:{schedule['minute']:02d}"
+                f"频道 {channel} 的定时任务已配置：{frequency_text} {schedule['hour']:02d}:{schedule['minute']:02d}{offset_text}"
             )
 
         channels = self.system_config_manager.channels if self.system_config_manager else []
-        self.logger.info(f"定时任务配置完成：共 {len(channels)} 个频道")
+        self.logger.info(
+            f"定时任务配置完成：共 {len(channels)} 个频道，"
+            f"相同时间的频道在 {SUMMARY_SCHEDULE_SPREAD_MINUTES} 分钟内错峰执行"
+        )
+
+    def _add_rolling_summary_jobs(self) -> None:
+        """添加滚动日摘要任务（仅在启用滚动模式时）"""
+        if not ROLLING_SUMMARY_ENABLED:
+            return
+
+        self.scheduler.add_job(
+            run_daily_digests,
+            "cron",
+            hour=ROLLING_SUMMARY_HOUR,
+            minute=ROLLING_SUMMARY_MINUTE,
+            id="rolling_daily_digests",
+            replace_existing=True,
+        )
+        self.logger.info(
+            f"滚动日摘要任务已配置：每天 {ROLLING_SUMMARY_HOUR:02d}:{ROLLING_SUMMARY_MINUTE:02d} 执行，"
+            f"每周总结的频道将由日摘要归并生成周报"
+        )
+
+    def _add_summary_job_recovery(self) -> None:
+        """添加一次性任务：启动后从检查点恢复未完成的总结任务"""
+        self.scheduler.add_job(
+            resume_summary_jobs,
+            "date",
+            run_date=datetime.now() + timedelta(seconds=SUMMARY_JOB_RESUME_DELAY_SECONDS),
+            id="resume_summary_jobs",
+            replace_existing=True,
+        )
+        self.logger.info(
+            f"总结任务恢复已配置：启动 {SUMMARY_JOB_RESUME_DELAY_SECONDS} 秒后从检查点继续未完成的任务"
+        )
+
+        # 上次退出时仍在队列中的总结元数据
+        self.scheduler.add_job(
+            resume_summary_metadata,
+            "date",
+            run_date=datetime.now() + timedelta(seconds=SUMMARY_JOB_RESUME_DELAY_SECONDS),
+            id="resume_summary_metadata",
+            replace_existing=True,
+        )
 
     def _add_cleanup_jobs(self) -> None:
         """添加定期清理任务"""
@@ -136,6 +213,44 @@ class SchedulerInitializer:
         )
         self.logger.info("投票重新生成数据清理任务已配置：每天凌晨3点执行")
 
+        # 已结束的总结任务清理
+        self.scheduler.add_job(
+            cleanup_summary_jobs,
+            "cron",
+            hour=3,
+            minute=10,
+            id="cleanup_summary_jobs",
+        )
+        self.logger.info("已结束的总结任务清理已配置：每天凌晨3点10分执行")
+
+    def _add_usage_flush_job(self) -> None:
+        """添加 LLM 用量写入任务"""
+        self.scheduler.add_job(
+            flush_llm_usage,
+            "interval",
+            seconds=LLM_USAGE_FLUSH_INTERVAL,
+            id="flush_llm_usage",
+        )
+        self.logger.info(f"LLM 用量写入任务已配置：每{LLM_USAGE_FLUSH_INTERVAL}秒执行一次")
+
+    def _add_embedding_reembed_job(self) -> None:
+        """添加降级向量重新生成任务（仅在配置了降级后端时）"""
+        from core.ai.embedding_generator import get_embedding_generator
+
+        if not get_embedding_generator().fallback_name:
+            return
+
+        self.scheduler.add_job(
+            reembed_fallback_vectors,
+            "interval",
+            seconds=EMBEDDING_REEMBED_INTERVAL,
+            id="reembed_fallback_vectors",
+            replace_existing=True,
+        )
+        self.logger.info(
+            f"降级向量重新生成任务已配置：每{EMBEDDING_REEMBED_INTERVAL}秒检查一次主Embedding后端"
+        )
+
     def _add_communication_jobs(self, client: "TelegramClient") -> None:
         """添加跨Bot通信检查任务
 
@@ -0,0 +1,261 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+
+"""
+向量库迁移脚本：将已有向量降到 EMBEDDING_DIMENSION 维
+
+ChromaDB 的 HNSW 索引维度在首次写入后固定，无法原地改写，因此按 collection：
+1. 分批读取原 collection 的 id/文本/元数据/向量，降维后写入临时 collection
+2. 校验条目数一致后，原 collection 重命名为 <name>__backup_<原维度>，临时 collection 重命名为原名
+
+降维方式由 EMBEDDING_REDUCTION 决定（truncate / pca）。使用 pca 且投影矩阵不存在时，
+先从所有待迁移 collection 的向量中抽样拟合（summaries 与 messages 共用同一投影，
+保证查询向量与两者处于同一空间）。
+
+幂等性：已是目标维度的 collection 直接跳过。
+回滚：--rollback 删除迁移后的 collection 并把备份重命名回原名。
+执行前需停止 Bot（PersistentClient 不支持多进程同时写入）。
+
+用法:
+    python -m core.migrations.reduce_vector_dimension --dry-run
+    python -m core.migrations.reduce_vector_dimension
+    python -m core.migrations.reduce_vector_dimension --rollback
+
+版本：v1.8.8
+"""
+
+import argparse
+import logging
+import math
+import os
+import time
+
+from core.ai.dimension_reducer import REDUCTION_PCA, DimensionReducer
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAMES = ("summaries", "messages")
+# 每批读取/写入的条目数
+_BATCH_SIZE = 500
+# PCA 拟合最多抽取的样本数
+_PCA_SAMPLE_SIZE = 5000
+_TMP_SUFFIX = "__reduced"
+_BACKUP_SUFFIX = "__backup_"
+
+
+def _to_list(embeddings) -> list[list[float]]:
+    """ChromaDB 可能返回 numpy 数组，统一转换为列表"""
+    if embeddings is None:
+        return []
+    if hasattr(embeddings, "tolist"):
+        return embeddings.tolist()
+    return [list(e) for e in embeddings]
+
+
+def _get_collection(client, name: str):
+    try:
+        return client.get_collection(name=name)
+    except Exception:
+        return None
+
+
+def _stored_dimension(collection) -> int | None:
+    sample = collection.get(limit=1, include=["embeddings"])
+    embeddings = _to_list(sample.get("embeddings"))
+    return len(embeddings[0]) if embeddings else None
+
+
+def _fit_pca(collections: list, reducer: DimensionReducer) -> None:
+    """从待迁移 collection 中抽样拟合 PCA 投影矩阵"""
+    samples: list[list[float]] = []
+    per_collection = max(1, _PCA_SAMPLE_SIZE // len(collections))
+    for collection in collections:
+        offset = 0
+        while offset < per_collection:
+            batch = collection.get(
+                limit=min(_BATCH_SIZE, per_collection - offset),
+                offset=offset,
+                include=["embeddings"],
+            )
+            embeddings = _to_list(batch.get("embeddings"))
+            if not embeddings:
+                break
+            samples.extend(embeddings)
+            offset += len(embeddings)
+
+    logger.info(f"使用 {len(samples)} 个样本拟合 PCA 投影矩阵")
+    reducer.fit_pca(samples)
+
+
+def _migrate_collection(client, collection, reducer: DimensionReducer, dry_run: bool) -> dict:
+    """迁移单个 collection"""
+    name = collection.name
+    total = collection.count()
+    source_dimension = _stored_dimension(collection)
+    target_dimension = reducer.target_dimension
+    max_iterations = math.ceil(total / _BATCH_SIZE) + 1
+
+    if dry_run:
+        logger.info(
+            f"[dry-run] {name}: {total} 条, {source_dimension} → {target_dimension} 维, "
+            f"共 {max_iterations - 1} 批"
+        )
+        return {"collection": name, "total": total, "dry_run": True}
+
+    tmp_name = f"{name}{_TMP_SUFFIX}"
+    if _get_collection(client, tmp_name) is not None:
+        logger.info(f"删除上次未完成迁移遗留的临时 collection: {tmp_name}")
+        client.delete_collection(name=tmp_name)
+    target = client.create_collection(
+        name=tmp_name,
+        metadata={"hnsw:space": "cosine", "embedding_dimension": target_dimension},
+    )
+
+    started = time.monotonic()
+    migrated = 0
+    for iteration in range(max_iterations):
+        batch = collection.get(
+            limit=_BATCH_SIZE,
+            offset=migrated,
+            include=["embeddings", "documents", "metadatas"],
+        )
+        ids = batch.get("ids") or []
+        if not ids:
+            break
+
+        target.add(
+            ids=ids,
+            embeddings=reducer.reduce(_to_list(batch["embeddings"])),
+            documents=batch.get("documents"),
+            metadatas=batch.get("metadatas"),
+        )
+        migrated += len(ids)
+
+        if iteration == 0 and total > migrated:
+            elapsed = time.monotonic() - started
+            logger.info(f"{name}: 预计耗时 {elapsed * total / migrated:.0f} 秒")
+        logger.info(f"{name}: 已迁移 {migrated}/{total}")
+
+    if target.count() != total:
+        client.delete_collection(name=tmp_name)
+        raise RuntimeError(f"{name} 迁移后条目数不一致: {target.count()}/{total}，已放弃本次迁移")
+
+    backup_name = f"{name}{_BACKUP_SUFFIX}{source_dimension}"
+    if _get_collection(client, backup_name) is not None:
+        client.delete_collection(name=backup_name)
+    collection.modify(name=backup_name)
+    target.modify(name=name)
+
+    logger.info(
+        f"{name}: 迁移完成 {migrated} 条，用时 {time.monotonic() - started:.1f} 秒，"
+        f"原数据备份为 {backup_name}"
+    )
+    return {"collection": name, "total": total, "migrated": migrated, "backup": backup_name}
+
+
+def reduce_vector_dimension(client, reducer: DimensionReducer, dry_run: bool = False) -> dict:
+    """
+    将向量库中的已有向量降到目标维度
+
+    Args:
+        client: ChromaDB PersistentClient
+        reducer: 降维器
+        dry_run: 仅统计不写入
+
+    Returns:
+        dict: 迁移结果
+    """
+    result = {"success": False, "message": "", "details": []}
+
+    try:
+        pending = []
+        for name in COLLECTION_NAMES:
+            collection = _get_collection(client, name)
+            if collection is None:
+                continue
+            dimension = _stored_dimension(collection)
+            if dimension is None or not reducer.needs_reduction(dimension):
+                logger.info(f"{name}: 向量维度为 {dimension}，无需迁移")
+                result["details"].append({"collection": name, "skipped": True})
+                continue
+            pending.append(collection)
+
+        if not pending:
+            result.update(success=True, message="所有 collection 已是目标维度，无需迁移")
+            return result
+
+        if reducer.method == REDUCTION_PCA and not reducer.has_pca():
+            if dry_run:
+                logger.info(f"[dry-run] 将拟合 PCA 投影矩阵并保存到 {reducer.pca_path}")
+            else:
+                _fit_pca(pending, reducer)
+
+        for collection in pending:
+            result["details"].append(_migrate_collection(client, collection, reducer, dry_run))
+
+        result.update(success=True, message="迁移预览完成" if dry_run else "迁移完成")
+        return result
+
+    except Exception as e:
+        logger.error(f"向量降维迁移失败: {type(e).__name__}: {e}", exc_info=True)
+        result["message"] = f"迁移失败: {str(e)}"
+        return result
+
+
+def rollback_vector_dimension(client) -> dict:
+    """
+    回滚向量降维迁移：删除迁移后的 collection，并将备份重命名回原名
+
+    Args:
+        client: ChromaDB PersistentClient
+
+    Returns:
+        dict: 回滚结果
+    """
+    result = {"success": True, "message": "回滚完成", "details": []}
+    backups = {}
+    for collection in client.list_collections():
+        collection_name = getattr(collection, "name", collection)
+        for name in COLLECTION_NAMES:
+            if collection_name.startswith(f"{name}{_BACKUP_SUFFIX}"):
+                backups[name] = collection_name
+
+    for name, backup_name in backups.items():
+        try:
+            if _get_collection(client, name) is not None:
+                client.delete_collection(name=name)
+            client.get_collection(name=backup_name).modify(name=name)
+            logger.info(f"{name}: 已从 {backup_name} 恢复")
+            result["details"].append({"collection": name, "restored_from": backup_name})
+        except Exception as e:
+            logger.error(f"{name}: 回滚失败: {type(e).__name__}: {e}")
+            result["success"] = False
+            result["message"] = "部分 collection 回滚失败"
+
+    if not backups:
+        result["message"] = "没有可回滚的备份"
+    return result
+
+
+# 命令行执行支持
+if __name__ == "__main__":
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="将向量库中的已有向量降到 EMBEDDING_DIMENSION 维")
+    parser.add_argument("--dry-run", action="store_true", help="仅统计，不写入")
+    parser.add_argument("--rollback", action="store_true", help="从备份恢复迁移前的 collection")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    chroma_client = chromadb.PersistentClient(path=os.getenv("VECTOR_DB_PATH", "data/vectors"))
+    if args.rollback:
+        outcome = rollback_vector_dimension(chroma_client)
+    else:
+        outcome = reduce_vector_dimension(
+            chroma_client,
+            DimensionReducer.from_env(int(os.getenv("EMBEDDING_DIMENSION", "1024"))),
+            dry_run=args.dry_run,
+        )
+    print(f"迁移结果: {outcome}")
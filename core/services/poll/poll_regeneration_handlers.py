@@ -306,10 +306,13 @@ async def regenerate_poll(client, channel, summary_msg_id, regen_data):
 
         # 2. 生成新的投票内容
         from core.ai.ai_client import generate_poll_from_summary
+        from core.ai.usage_tracker import usage_channel
 
         summary_text = regen_data["summary_text"]
         logger.info(get_text("poll_regen.generating"))
-        new_poll_data = await generate_poll_from_summary(summary_text)
+        # 重新生成需要不同的投票，不使用响应缓存
+        with usage_channel(channel):
+            new_poll_data = await generate_poll_from_summary(summary_text, use_cache=False)
         logger.info(f"✅ 新投票生成成功: {new_poll_data['question']}")
 
         # 3. 根据原投票的发送位置,发送新投票
@@ -11,7 +11,7 @@
 import logging
 from typing import Any
 
-from core.ai.ai_client import async_client_llm, get_llm_model
+from core.ai.llm_gateway import Priority, get_llm_gateway
 from core.infrastructure.database.submission_repo import get_submission_repo
 
 logger = logging.getLogger(__name__)
@@ -94,10 +94,8 @@ class SubmissionService:
             title = submission["title"]
 
             # 调用 AI 服务
-            model = get_llm_model()
-            response = await async_client_llm.chat.completions.create(
-                model=model,
-                messages=[
+            response = await get_llm_gateway().chat(
+                [
                     {
                         "role": "system",
                         "content": (
@@ -114,6 +112,9 @@ class SubmissionService:
                         else f"标题：{title}\n\n正文：(无)",
                     },
                 ],
+                priority=Priority.INTERACTIVE,
+                cache=True,
+                subsystem="submission",
             )
 
             # 空值保护：校验 API 响应结构
@@ -13,6 +13,7 @@
 此模块使用 Pydantic Settings 来管理环境变量配置，提供类型验证和默认值。
 """
 
+import json
 import logging
 from pathlib import Path
 
@@ -60,12 +61,43 @@ class AISettings(BaseSettings):
     deepseek_api_key: str | None = Field(default=None, alias="DEEPSEEK_API_KEY")
     base_url: str = Field(default=DEFAULT_LLM_BASE_URL, alias="LLM_BASE_URL")
     model: str = Field(default=DEFAULT_LLM_MODEL, alias="LLM_MODEL")
+    # 备用服务商（JSON 数组），每项包含 base_url、api_key、model，可选 name
+    fallback_providers: str = Field(default="", alias="LLM_FALLBACK_PROVIDERS")
 
     @property
     def effective_api_key(self) -> str | None:
         """获取有效的 API Key（优先使用 LLM_API_KEY）"""
         return self.api_key or self.deepseek_api_key
 
+    @property
+    def fallback_provider_list(self) -> list[dict[str, str]]:
+        """获取备用服务商列表（格式错误或缺少字段的条目将被忽略）"""
+        if not self.fallback_providers.strip():
+            return []
+        try:
+            providers = json.loads(self.fallback_providers)
+        except json.JSONDecodeError:
+            logger.warning("LLM_FALLBACK_PROVIDERS 不是有效的 JSON，已忽略备用服务商")
+            return []
+        if not isinstance(providers, list):
+            logger.warning("LLM_FALLBACK_PROVIDERS 必须是 JSON 数组，已忽略备用服务商")
+            return []
+
+        valid = []
+        for index, provider in enumerate(providers, 1):
+            if isinstance(provider, dict) and provider.get("base_url") and provider.get("model"):
+                valid.append(
+                    {
+                        "name": str(provider.get("name") or f"fallback-{index}"),
+                        "base_url": str(provider["base_url"]),
+                        "api_key": str(provider.get("api_key") or ""),
+                        "model": str(provider["model"]),
+                    }
+                )
+            else:
+                logger.warning(f"备用服务商第 {index} 项缺少 base_url 或 model，已忽略")
+        return valid
+
     model_config = {"extra": "ignore"}
 
 
@@ -310,6 +342,11 @@ def get_llm_model() -> str:
     return get_settings().ai.model
 
 
+def get_llm_fallback_providers() -> list[dict[str, str]]:
+    """获取备用 LLM 服务商列表"""
+    return get_settings().ai.fallback_provider_list
+
+
 def get_channels() -> list[str]:
     """获取频道列表"""
     return get_settings().channel.channels
@@ -8,22 +8,197 @@
 # 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
 # 许可证全文：参见 LICENSE 文件
 
+"""
+上次总结时间存储
+
+各频道的上次总结时间与报告消息ID保存在 LAST_SUMMARY_FILE（JSON）中：
+- 读取：文件内容缓存在内存中，仅在文件的修改时间或大小变化时重新解析，
+  按频道查询为字典查找
+- 写入：在同目录写临时文件、fsync 后 os.replace 原子替换，崩溃时不会留下半个文件
+- 并发：主Bot与 Web API 在同一进程中，所有读-改-写都经由同一个存储实例并加锁；
+  其他进程的修改通过文件签名变化被感知
+"""
+
 import json
 import logging
 import os
-import shutil
 import tempfile
+import threading
 import time
 from datetime import UTC, datetime
+from typing import Any
 
 from core.config import normalize_channel_id
 
 logger = logging.getLogger(__name__)
 
+# Windows 下文件被其他程序占用时的重试次数与初始等待（秒）
+_REPLACE_RETRIES = 5
+_REPLACE_BASE_DELAY = 0.3
+
+
+class SummaryTimeStore:
+    """上次总结时间文件的缓存与原子写入"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        # 频道 → 原始记录（time 为 ISO 字符串）
+        self._data: dict[str, dict[str, Any]] | None = None
+        self._signature: tuple[int, int] | None = None
+
+    def _file_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """返回缓存的文件内容，文件变化时重新解析（需持有锁）"""
+        signature = self._file_signature()
+        if self._data is not None and signature == self._signature:
+            return self._data
+
+        data: dict[str, dict[str, Any]] = {}
+        if signature is not None:
+            with open(self.path, encoding="utf-8") as f:
+                content = f.read().strip()
+            if content:
+                data = json.loads(content)
+            logger.debug(f"已加载上次总结时间文件: {len(data)} 个频道")
+
+        self._data = data
+        self._signature = signature
+        return data
+
+    def _write(self, data: dict[str, dict[str, Any]]) -> None:
+        """原子写入文件并更新缓存（需持有锁）"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+        ) as temp_file:
+            json.dump(data, temp_file, ensure_ascii=False, indent=2)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+            temp_path = temp_file.name
+
+        try:
+            for attempt in range(_REPLACE_RETRIES):
+                try:
+                    os.replace(temp_path, self.path)
+                    break
+                except PermissionError as e:
+                    if attempt == _REPLACE_RETRIES - 1:
+                        raise PermissionError(
+                            f"无法保存文件 {self.path}，已被其他程序锁定。"
+                            "请关闭 VSCode 或其他可能打开该文件的程序。"
+                        ) from e
+                    # 指数退避：0.3, 0.6, 1.2, 2.4 秒
+                    delay = _REPLACE_BASE_DELAY * (2**attempt)
+                    logger.warning(
+                        f"文件被占用，第 {attempt + 1} 次重试... (等待 {delay:.1f}秒，错误: {e})"
+                    )
+                    time.sleep(delay)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+        self._data = data
+        self._signature = self._file_signature()
+
+    def exists(self) -> bool:
+        """存储文件是否存在"""
+        return self._file_signature() is not None
+
+    def get(self, channel: str) -> dict[str, Any] | None:
+        """获取指定频道的原始记录"""
+        with self._lock:
+            entry = self._load().get(channel)
+            return dict(entry) if entry is not None else None
+
+    def get_all(self) -> dict[str, dict[str, Any]]:
+        """获取所有频道的原始记录"""
+        with self._lock:
+            return {channel: dict(entry) for channel, entry in self._load().items()}
+
+    def set(self, channel: str, entry: dict[str, Any]) -> None:
+        """写入指定频道的记录"""
+        with self._lock:
+            data = dict(self._load())
+            data[channel] = entry
+            self._write(data)
+
+    def delete(self, channel: str) -> bool:
+        """删除指定频道的记录，返回是否存在该记录"""
+        with self._lock:
+            data = dict(self._load())
+            if data.pop(channel, None) is None:
+                return False
+            self._write(data)
+            return True
+
+    def clear(self) -> bool:
+        """删除存储文件，返回文件是否存在"""
+        with self._lock:
+            self._data = None
+            self._signature = None
+            try:
+                os.remove(self.path)
+                return True
+            except FileNotFoundError:
+                return False
+
+
+# 文件路径 → 存储实例
+_stores: dict[str, SummaryTimeStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_summary_time_store(path: str | None = None) -> SummaryTimeStore:
+    """获取上次总结时间存储实例（默认为 LAST_SUMMARY_FILE）"""
+    if path is None:
+        from core.config import LAST_SUMMARY_FILE
+
+        path = LAST_SUMMARY_FILE
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SummaryTimeStore(path)
+        return store
+
+
+def _parse_time(value: str) -> datetime:
+    time_obj = datetime.fromisoformat(value)
+    # 兼容旧格式：如果读取的时间没有时区信息，强制视为UTC
+    if time_obj.tzinfo is None:
+        time_obj = time_obj.replace(tzinfo=UTC)
+    return time_obj
+
+
+def _convert_entry(data: dict[str, Any], include_report_ids: bool) -> Any:
+    """将原始记录转换为时间对象，或包含时间与三类消息ID的字典"""
+    time_obj = _parse_time(data["time"])
+    if not include_report_ids:
+        return time_obj
+    # 兼容旧格式: report_message_ids
+    summary_key = "report_message_ids" if "report_message_ids" in data else "summary_message_ids"
+    return {
+        "time": time_obj,
+        "summary_message_ids": list(data.get(summary_key, [])),
+        "poll_message_ids": list(data.get("poll_message_ids", [])),
+        "button_message_ids": list(data.get("button_message_ids", [])),
+    }
+
 
 # 读取上次总结时间函数
 def load_last_summary_time(channel=None, include_report_ids=False):
-    """从文件中读取上次总结的时间和报告消息ID
+    """读取上次总结的时间和报告消息ID
 
     Args:
         channel: 可选，指定频道。如果提供，只返回该频道的信息；
@@ -31,107 +206,32 @@ def load_last_summary_time(channel=None, include_report_ids=False):
         include_report_ids: 可选，是否包含报告消息ID。默认False只返回时间，True返回包含时间和消息ID的字典
                                 新版: 返回summary_message_ids, poll_message_ids, button_message_ids三类ID
     """
-    from core.config import LAST_SUMMARY_FILE
-
-    logger.info(f"开始读取上次总结时间文件: {LAST_SUMMARY_FILE}")
+    store = get_summary_time_store()
 
     # 标准化频道ID（如果提供）
     normalized_channel = normalize_channel_id(channel) if channel else None
     if normalized_channel and normalized_channel != channel:
-        logger.info(f"频道ID已标准化: '{channel}' -> '{normalized_channel}'")
+        logger.debug(f"频道ID已标准化: '{channel}' -> '{normalized_channel}'")
 
     try:
-        with open(LAST_SUMMARY_FILE, encoding="utf-8") as f:
-            content = f.read().strip()
-            if content:
-                last_data = json.loads(content)
-                logger.info(f"成功读取所有频道的上次总结数据: {last_data}")
-
-                if normalized_channel:
-                    # 返回指定频道的信息（使用标准化后的ID）
-                    channel_data = last_data.get(normalized_channel)
-                    if channel_data:
-                        if include_report_ids:
-                            # 兼容旧格式: report_message_ids
-                            if "report_message_ids" in channel_data:
-                                # 旧格式
-                                return {
-                                    "time": datetime.fromisoformat(channel_data["time"]),
-                                    "summary_message_ids": channel_data.get(
-                                        "report_message_ids", []
-                                    ),
-                                    "poll_message_ids": channel_data.get("poll_message_ids", []),
-                                    "button_message_ids": channel_data.get(
-                                        "button_message_ids", []
-                                    ),
-                                }
-                            else:
-                                # 新格式
-                                return {
-                                    "time": datetime.fromisoformat(channel_data["time"]),
-                                    "summary_message_ids": channel_data.get(
-                                        "summary_message_ids", []
-                                    ),
-                                    "poll_message_ids": channel_data.get("poll_message_ids", []),
-                                    "button_message_ids": channel_data.get(
-                                        "button_message_ids", []
-                                    ),
-                                }
-                        else:
-                            # 只返回时间对象
-                            time_obj = datetime.fromisoformat(channel_data["time"])
-                            # 兼容旧格式：如果读取的时间没有时区信息，强制视为UTC
-                            if time_obj.tzinfo is None:
-                                time_obj = time_obj.replace(tzinfo=UTC)
-                                logger.debug("检测到旧格式时间戳，已自动转换为UTC")
-                            logger.info(
-                                f"成功读取频道 {channel} 的上次总结时间: {time_obj.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')}"
-                            )
-                            return time_obj
-                    else:
-                        logger.warning(f"频道 {channel} 的上次总结时间不存在")
-                        return None
-                else:
-                    # 返回所有频道的信息
-                    converted_data = {}
-                    for ch, data in last_data.items():
-                        if include_report_ids:
-                            # 兼容旧格式
-                            if "report_message_ids" in data:
-                                time_obj = datetime.fromisoformat(data["time"])
-                                if time_obj.tzinfo is None:
-                                    time_obj = time_obj.replace(tzinfo=UTC)
-                                converted_data[ch] = {
-                                    "time": time_obj,
-                                    "summary_message_ids": data.get("report_message_ids", []),
-                                    "poll_message_ids": data.get("poll_message_ids", []),
-                                    "button_message_ids": data.get("button_message_ids", []),
-                                }
-                            else:
-                                time_obj = datetime.fromisoformat(data["time"])
-                                if time_obj.tzinfo is None:
-                                    time_obj = time_obj.replace(tzinfo=UTC)
-                                converted_data[ch] = {
-                                    "time": time_obj,
-                                    "summary_message_ids": data.get("summary_message_ids", []),
-                                    "poll_message_ids": data.get("poll_message_ids", []),
-                                    "button_message_ids": data.get("button_message_ids", []),
-                                }
-                        else:
-                            time_obj = datetime.fromisoformat(data["time"])
-                            if time_obj.tzinfo is None:
-                                time_obj = time_obj.replace(tzinfo=UTC)
-                            converted_data[ch] = time_obj
-                    return converted_data
-            else:
-                logger.warning(f"上次总结时间文件 {LAST_SUMMARY_FILE} 内容为空")
-                return None if channel else {}
-    except FileNotFoundError:
-        logger.warning(f"上次总结时间文件 {LAST_SUMMARY_FILE} 不存在")
-        return None if channel else {}
+        if normalized_channel:
+            channel_data = store.get(normalized_channel)
+            if not channel_data:
+                logger.warning(f"频道 {channel} 的上次总结时间不存在")
+                return None
+            result = _convert_entry(channel_data, include_report_ids)
+            time_obj = result["time"] if include_report_ids else result
+            logger.debug(
+                f"读取频道 {channel} 的上次总结时间: {time_obj.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')}"
+            )
+            return result
+
+        return {
+            ch: _convert_entry(data, include_report_ids) for ch, data in store.get_all().items()
+        }
     except Exception as e:
         logger.error(
-            f"读取上次总结时间文件 {LAST_SUMMARY_FILE} 时出错: {type(e).__name__}: {e}",
+            f"读取上次总结时间文件 {store.path} 时出错: {type(e).__name__}: {e}",
             exc_info=True,
         )
         return None if channel else {}
@@ -146,7 +246,7 @@ def save_last_summary_time(
     button_message_ids=None,
     report_message_ids=None,
 ):
-    """将指定频道的上次总结时间和报告消息ID保存到文件中
+    """保存指定频道的上次总结时间和报告消息ID
 
     Args:
         channel: 频道标识
@@ -156,23 +256,12 @@ def save_last_summary_time(
         button_message_ids: 按钮消息ID列表(新格式)
         report_message_ids: 发送到源频道的报告消息ID列表(旧格式,兼容参数)
     """
-    from core.config import LAST_SUMMARY_FILE
-
     # 标准化频道ID
     normalized_channel = normalize_channel_id(channel)
     if normalized_channel != channel:
-        logger.info(f"频道ID已标准化: '{channel}' -> '{normalized_channel}'")
+        logger.debug(f"频道ID已标准化: '{channel}' -> '{normalized_channel}'")
 
-    logger.info(f"开始保存频道 {normalized_channel} 的上次总结时间到文件: {LAST_SUMMARY_FILE}")
     try:
-        # 先读取现有数据
-        existing_data = {}
-        if os.path.exists(LAST_SUMMARY_FILE):
-            with open(LAST_SUMMARY_FILE, encoding="utf-8") as f:
-                content = f.read().strip()
-                if content:
-                    existing_data = json.loads(content)
-
         # 支持新格式和旧格式
         # 如果提供report_message_ids(旧格式),将其作为summary_message_ids
         if report_message_ids is not None and summary_message_ids is None:
@@ -201,79 +290,23 @@ def save_last_summary_time(
             logger.error(f"button_message_ids类型错误: {type(button_message_ids)}, 使用空列表")
             button_message_ids = []
 
-        # 更新指定频道的时间和消息ID（使用标准化后的频道ID）
         # 使用UTC时间的isoformat()，会自动带上+00:00后缀
-        channel_data = {
-            "time": time_to_save.isoformat(),
-            "summary_message_ids": summary_message_ids or [],
-            "poll_message_ids": poll_message_ids or [],
-            "button_message_ids": button_message_ids or [],
-        }
-        existing_data[normalized_channel] = channel_data
-
-        # 使用临时文件+原子重命名的方式写入（避免文件被锁定的问题）
-        max_retries = 5
-        base_delay = 0.3  # 秒
-
-        for attempt in range(max_retries):
-            try:
-                # 创建临时文件
-                temp_dir = os.path.dirname(LAST_SUMMARY_FILE)
-                with tempfile.NamedTemporaryFile(
-                    mode="w", encoding="utf-8", dir=temp_dir, suffix=".tmp", delete=False
-                ) as temp_file:
-                    # 写入数据到临时文件
-                    json.dump(existing_data, temp_file, ensure_ascii=False, indent=2)
-                    temp_path = temp_file.name
-
-                # 刷新并关闭临时文件后，再进行原子替换
-                # 使用 shutil.move 实现跨文件系统的兼容性
-                try:
-                    # 先删除目标文件（如果存在）
-                    if os.path.exists(LAST_SUMMARY_FILE):
-                        os.remove(LAST_SUMMARY_FILE)
-                    # 重命名临时文件为目标文件
-                    shutil.move(temp_path, LAST_SUMMARY_FILE)
-                except OSError:
-                    # 如果删除或移动失败，清理临时文件
-                    try:
-                        os.unlink(temp_path)
-                    except OSError:
-                        pass
-                    raise
-
-                logger.info(
-                    f"成功保存频道 {channel} 的上次总结时间: {time_to_save.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')} (UTC: {time_to_save.strftime('%Y-%m-%d %H:%M:%S')})"
-                )
-                logger.debug(
-                    f"总结消息ID: {summary_message_ids}, 投票消息ID: {poll_message_ids}, 按钮消息ID: {button_message_ids}"
-                )
-                return  # 成功则退出函数
-
-            except PermissionError as e:
-                if attempt < max_retries - 1:
-                    # 指数退避：0.3, 0.6, 1.2, 2.4 秒
-                    delay = base_delay * (2**attempt)
-                    logger.warning(
-                        f"文件被占用，第 {attempt + 1} 次重试... (等待 {delay:.1f}秒，错误: {e})"
-                    )
-                    time.sleep(delay)
-                else:
-                    logger.error(
-                        "保存上次总结时间失败: 文件被其他程序占用或权限不足。请关闭可能打开该文件的程序后重试。"
-                    )
-                    logger.error(f"受影响的频道: {channel}, 时间: {time_to_save}")
-                    # 尝试回退到原始文件名（可能需要从备份恢复）
-                    raise PermissionError(
-                        f"无法保存文件 {LAST_SUMMARY_FILE}，已被其他程序锁定。请关闭 VSCode 或其他可能打开该文件的程序。"
-                    ) from e
+        get_summary_time_store().set(
+            normalized_channel,
+            {
+                "time": time_to_save.isoformat(),
+                "summary_message_ids": summary_message_ids or [],
+                "poll_message_ids": poll_message_ids or [],
+                "button_message_ids": button_message_ids or [],
+            },
+        )
 
-            except Exception as e:
-                logger.error(
-                    f"保存上次总结时间到文件 {LAST_SUMMARY_FILE} 时出错: {type(e).__name__}: {e}",
-                    exc_info=True,
-                )
-                raise
+        logger.info(
+            f"成功保存频道 {channel} 的上次总结时间: {time_to_save.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')} (UTC: {time_to_save.strftime('%Y-%m-%d %H:%M:%S')})"
+        )
+        logger.debug(
+            f"总结消息ID: {summary_message_ids}, 投票消息ID: {poll_message_ids}, 按钮消息ID: {button_message_ids}"
+        )
     except Exception as e:
         logger.error(f"保存上次总结时间失败: {type(e).__name__}: {e}", exc_info=True)
         raise
@@ -0,0 +1,227 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+滚动日摘要 - 将周报的 LLM 开销分摊到每天
+
+启用后，每天的摘要任务为每周总结一次的频道生成一份"日摘要"（内部总结类型
+daily_digest，只保存到数据库，不发送、不写入向量库）。每份日摘要覆盖从上一份
+摘要结束到生成时刻的消息，前后衔接、不重不漏。
+
+周报生成时只需为最后一份摘要之后的少量消息补一份摘要，再用频道提示词归并本周期
+的所有日摘要，不必重新阅读整周的原始消息。
+"""
+
+import logging
+import os
+from datetime import UTC, datetime, timedelta
+
+import core.config as config_module
+from core.ai.ai_client import analyze_with_ai
+from core.ai.usage_tracker import usage_channel
+from core.config import get_channel_schedule
+from core.summary_time_manager import load_last_summary_time
+from core.telegram.client import fetch_last_week_messages
+from core.telegram.client_management import get_active_client
+from core.telegram.entity_cache import get_cached_entity
+
+logger = logging.getLogger(__name__)
+
+ROLLING_SUMMARY_ENABLED = os.getenv("ROLLING_SUMMARY_ENABLED", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+# 日摘要任务的执行时间（本地时间）
+ROLLING_SUMMARY_HOUR = int(os.getenv("ROLLING_SUMMARY_HOUR", "0"))
+ROLLING_SUMMARY_MINUTE = 15
+# 内部总结类型，历史总结查询默认不包含（见 mysql.INTERNAL_SUMMARY_TYPES）
+DIGEST_SUMMARY_TYPE = "daily_digest"
+# 查找本周期日摘要时读取的最近记录数
+_DIGEST_LOOKUP_LIMIT = 64
+
+DIGEST_PROMPT = (
+    "请将以下频道消息整理为一份简洁的阶段摘要，供之后汇总为周报使用。"
+    "按话题分组，保留关键事实、数字和对应的消息链接，不要添加开场白或结论：\n\n"
+)
+
+
+def is_rolling_channel(channel: str) -> bool:
+    """频道是否使用滚动日摘要生成周报"""
+    if not ROLLING_SUMMARY_ENABLED:
+        return False
+    return get_channel_schedule(channel).get("frequency", "weekly") == "weekly"
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """转换为 naive UTC，与总结表的 DATETIME 列一致"""
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def _report_ids_to_exclude(summary_data: dict | None) -> list[int]:
+    """从上次总结数据中取出需要排除的报告消息ID"""
+    if not summary_data:
+        return []
+    if "summary_message_ids" not in summary_data:
+        return list(summary_data.get("report_message_ids") or [])
+    ids = []
+    for key in ("summary_message_ids", "poll_message_ids", "button_message_ids"):
+        value = summary_data.get(key)
+        if isinstance(value, list):
+            ids.extend(value)
+    return ids
+
+
+async def load_digests(channel: str, since: datetime | None) -> list[dict]:
+    """
+    读取频道在上次周报之后生成的日摘要
+
+    Args:
+        channel: 频道标识
+        since: 上次周报时间，None 表示从未总结过
+
+    Returns:
+        按结束时间升序排列的日摘要记录
+    """
+    from core.infrastructure.database import get_db_manager
+
+    rows = await get_db_manager().get_summaries(
+        channel_id=channel, limit=_DIGEST_LOOKUP_LIMIT, summary_type=DIGEST_SUMMARY_TYPE
+    )
+    since_naive = _to_naive_utc(since) if since else None
+    digests = [
+        row
+        for row in rows
+        if row.get("end_time") and (since_naive is None or row["end_time"] > since_naive)
+    ]
+    digests.sort(key=lambda row: row["end_time"])
+    return digests
+
+
+def _window_start(since: datetime | None, digests: list[dict]) -> datetime:
+    """下一份日摘要的起始时间：最后一份摘要的结束时间，或上次周报时间"""
+    start = since or datetime.now(UTC) - timedelta(days=7)
+    if digests:
+        start = max(start, digests[-1]["end_time"].replace(tzinfo=UTC))
+    return start
+
+
+async def _channel_title(channel: str) -> str:
+    """频道实际名称（与周报保存的名称一致），无法解析时使用链接末段"""
+    client = get_active_client()
+    if client is not None:
+        try:
+            return (await get_cached_entity(client, channel)).title
+        except Exception as e:
+            logger.debug(f"获取频道 {channel} 名称失败: {type(e).__name__}: {e}")
+    return channel.split("/")[-1]
+
+
+async def summarize_digest(
+    channel: str, start_time: datetime, report_message_ids: list[int]
+) -> dict | None:
+    """
+    为 start_time 至今的消息生成一份日摘要并保存
+
+    Returns:
+        日摘要记录（summary_text、message_count、start_time、end_time），没有新消息时返回 None
+
+    Raises:
+        RuntimeError: 频道不存在或无法访问
+    """
+    # 结束时间取抓取开始前的时刻：抓取期间的新消息宁可在下一份摘要中重复，也不遗漏
+    end_time = datetime.now(UTC)
+    messages_by_channel = await fetch_last_week_messages(
+        [channel], start_time=start_time, report_message_ids={channel: report_message_ids}
+    )
+    if channel not in messages_by_channel:
+        raise RuntimeError(f"频道 {channel} 不存在或无法访问")
+
+    messages = messages_by_channel[channel]
+    if not messages:
+        logger.info(f"频道 {channel} 自 {start_time} 以来没有新消息，跳过日摘要")
+        return None
+
+    with usage_channel(channel):
+        summary_text = await analyze_with_ai(messages, DIGEST_PROMPT)
+    digest = {
+        "summary_text": summary_text,
+        "message_count": len(messages),
+        "start_time": _to_naive_utc(start_time),
+        "end_time": _to_naive_utc(end_time),
+    }
+
+    from core.infrastructure.database import get_db_manager
+
+    summary_id = await get_db_manager().save_summary(
+        channel_id=channel,
+        channel_name=await _channel_title(channel),
+        summary_text=summary_text,
+        message_count=len(messages),
+        start_time=digest["start_time"],
+        end_time=digest["end_time"],
+        ai_model=config_module.LLM_MODEL,
+        summary_type=DIGEST_SUMMARY_TYPE,
+    )
+    logger.info(f"频道 {channel} 日摘要已生成，{len(messages)} 条消息，记录ID: {summary_id}")
+    return digest
+
+
+def _format_digest(digest: dict) -> str:
+    """在日摘要前标注其覆盖的时间范围（本地时间）"""
+    start = digest["start_time"].replace(tzinfo=UTC).astimezone()
+    end = digest["end_time"].replace(tzinfo=UTC).astimezone()
+    return (
+        f"【{start.strftime('%m-%d %H:%M')} ~ {end.strftime('%m-%d %H:%M')}】\n"
+        f"{digest['summary_text']}"
+    )
+
+
+async def prepare_weekly_inputs(
+    channel: str, since: datetime | None, report_message_ids: list[int]
+) -> tuple[list[str], int]:
+    """
+    为周报准备归并输入：补齐最后一份日摘要，返回本周期的全部日摘要
+
+    Args:
+        channel: 频道标识
+        since: 上次周报时间
+        report_message_ids: 需要排除的报告消息ID
+
+    Returns:
+        (按时间排列并标注时间范围的日摘要文本, 覆盖的消息总数)
+    """
+    digests = await load_digests(channel, since)
+    latest = await summarize_digest(channel, _window_start(since, digests), report_message_ids)
+    if latest:
+        digests.append(latest)
+
+    message_count = sum(digest.get("message_count") or 0 for digest in digests)
+    logger.info(f"频道 {channel} 周报将由 {len(digests)} 份日摘要归并，覆盖 {message_count} 条消息")
+    return [_format_digest(digest) for digest in digests], message_count
+
+
+async def run_daily_digests() -> None:
+    """日摘要任务：为每个使用滚动模式的频道生成上一份摘要之后的日摘要"""
+    channels = [channel for channel in config_module.CHANNELS if is_rolling_channel(channel)]
+    logger.info(f"开始生成日摘要，共 {len(channels)} 个频道")
+
+    for channel in channels:
+        try:
+            summary_data = load_last_summary_time(channel, include_report_ids=True)
+            since = summary_data["time"] if summary_data else None
+            digests = await load_digests(channel, since)
+            await summarize_digest(
+                channel, _window_start(since, digests), _report_ids_to_exclude(summary_data)
+            )
+        except Exception as e:
+            logger.error(f"频道 {channel} 日摘要生成失败: {type(e).__name__}: {e}", exc_info=True)
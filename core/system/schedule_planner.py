@@ -0,0 +1,187 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+定时总结计划 - 错峰与准入
+
+- 错峰：配置了相同触发时间的多个频道，在 SUMMARY_SCHEDULE_SPREAD_MINUTES 窗口内
+  按频道哈希排序后均匀错开（频道不变时偏移量不变，重启后计划一致）；
+  单独使用某个时间的频道不偏移
+- 准入：定时触发的总结在 LLM 网关有积压、或正在执行的定时总结已达网关并发上限时排队等待，
+  避免大量频道同时抢占 LLM 与 Telegram 配额
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from typing import Any
+
+from apscheduler.triggers.cron import CronTrigger
+
+from core.config import build_cron_trigger, get_channel_schedule
+
+logger = logging.getLogger(__name__)
+
+# 相同触发时间的频道错开的时间窗口（分钟），0 表示不错开
+SUMMARY_SCHEDULE_SPREAD_MINUTES = max(0, int(os.getenv("SUMMARY_SCHEDULE_SPREAD_MINUTES", "30")))
+# 准入检查间隔（秒）
+ADMISSION_POLL_SECONDS = 5.0
+
+_WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def _channel_rank_key(channel: str) -> str:
+    return hashlib.sha256(channel.encode("utf-8")).hexdigest()
+
+
+def _shift_days(day_of_week: str, days: int) -> str:
+    """将 day_of_week 表达式顺延若干天（偏移跨过午夜时使用）"""
+    if day_of_week == "*" or days == 0:
+        return day_of_week
+    shifted = [
+        _WEEKDAYS[(_WEEKDAYS.index(day) + days) % 7] if day in _WEEKDAYS else day
+        for day in day_of_week.split(",")
+    ]
+    return ",".join(shifted)
+
+
+def apply_offset(trigger: dict[str, Any], offset_seconds: int) -> dict[str, Any]:
+    """在 cron 触发器参数上加上偏移秒数"""
+    total = int(trigger["hour"]) * 3600 + int(trigger["minute"]) * 60 + offset_seconds
+    day_shift, total = divmod(total, 24 * 3600)
+    return {
+        "day_of_week": _shift_days(str(trigger["day_of_week"]), day_shift),
+        "hour": total // 3600,
+        "minute": total % 3600 // 60,
+        "second": total % 60,
+    }
+
+
+def plan_summary_triggers(
+    channels: Iterable[str], spread_minutes: int | None = None
+) -> dict[str, dict[str, Any]]:
+    """
+    为各频道生成错峰后的 cron 触发器参数
+
+    Args:
+        channels: 频道列表
+        spread_minutes: 错峰窗口（分钟），默认取 SUMMARY_SCHEDULE_SPREAD_MINUTES
+
+    Returns:
+        频道 → {"trigger": 触发器参数, "base": 配置的触发器参数, "offset_seconds": 偏移秒数}
+    """
+    if spread_minutes is None:
+        spread_minutes = SUMMARY_SCHEDULE_SPREAD_MINUTES
+    window = spread_minutes * 60
+
+    groups: dict[tuple, list[str]] = defaultdict(list)
+    bases: dict[str, dict[str, Any]] = {}
+    for channel in channels:
+        base = build_cron_trigger(get_channel_schedule(channel))
+        bases[channel] = base
+        groups[(str(base["day_of_week"]), int(base["hour"]), int(base["minute"]))].append(channel)
+
+    plan = {}
+    for members in groups.values():
+        members.sort(key=_channel_rank_key)
+        step = window // len(members) if window and len(members) > 1 else 0
+        for index, channel in enumerate(members):
+            offset = index * step
+            plan[channel] = {
+                "trigger": apply_offset(bases[channel], offset),
+                "base": bases[channel],
+                "offset_seconds": offset,
+            }
+    return plan
+
+
+def preview_summary_plan(
+    channels: Iterable[str], now: datetime | None = None, spread_minutes: int | None = None
+) -> list[dict[str, Any]]:
+    """各频道错峰后的触发时间与下次执行时间，按下次执行时间排序"""
+    now = now or datetime.now().astimezone()
+    items = []
+    for channel, entry in plan_summary_triggers(channels, spread_minutes).items():
+        trigger, base = entry["trigger"], entry["base"]
+        next_run = CronTrigger(**trigger, timezone=now.tzinfo).get_next_fire_time(None, now)
+        items.append(
+            {
+                "channel": channel,
+                "day_of_week": trigger["day_of_week"],
+                "configured_time": f"{int(base['hour']):02d}:{int(base['minute']):02d}",
+                "planned_time": (
+                    f"{trigger['hour']:02d}:{trigger['minute']:02d}:{trigger['second']:02d}"
+                ),
+                "offset_seconds": entry["offset_seconds"],
+                "next_run_time": next_run.isoformat() if next_run else None,
+            }
+        )
+    items.sort(key=lambda item: item["next_run_time"] or "")
+    return items
+
+
+class SummaryAdmission:
+    """按 LLM 网关余量准入定时总结"""
+
+    def __init__(self, poll_seconds: float = ADMISSION_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.running = 0
+        self.waiting = 0
+        # 定时总结结束时通知等待者；网关积压的变化按 poll_seconds 轮询
+        self._released = asyncio.Condition()
+
+    def _can_admit(self) -> bool:
+        if self.running == 0:
+            return True
+        from core.ai.llm_gateway import get_llm_gateway
+
+        metrics = get_llm_gateway().get_metrics()
+        return metrics["queued"] == 0 and self.running < metrics["max_concurrency"]
+
+    @asynccontextmanager
+    async def admit(self, channel: str) -> AsyncIterator[None]:
+        """等待网关有余量后执行；正在执行的定时总结计入占用"""
+        if not self._can_admit():
+            self.waiting += 1
+            logger.info(f"LLM 网关繁忙，频道 {channel} 的定时总结排队等待")
+            try:
+                async with self._released:
+                    while not self._can_admit():
+                        with suppress(TimeoutError):
+                            await asyncio.wait_for(self._released.wait(), self.poll_seconds)
+            finally:
+                self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            async with self._released:
+                self._released.notify_all()
+
+    def get_status(self) -> dict[str, int]:
+        return {"running": self.running, "waiting": self.waiting}
+
+
+# 全局准入实例
+_summary_admission: SummaryAdmission | None = None
+
+
+def get_summary_admission() -> SummaryAdmission:
+    """获取全局定时总结准入实例"""
+    global _summary_admission
+    if _summary_admission is None:
+        _summary_admission = SummaryAdmission()
+    return _summary_admission
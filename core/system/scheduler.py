@@ -8,28 +8,489 @@
 # 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
 # 许可证全文：参见 LICENSE 文件
 
+import asyncio
 import json
+import os
 from datetime import UTC, datetime, timedelta
 
 import core.config as config_module
 from core.ai.ai_client import analyze_with_ai
+from core.ai.summary_fingerprint import compute_summary_fingerprint, find_summary_by_fingerprint
+from core.ai.usage_tracker import usage_channel
 from core.config import logger
 from core.i18n.i18n import get_text
 from core.infrastructure.config.prompt_manager import load_prompt
 from core.summary_time_manager import load_last_summary_time, save_last_summary_time
+from core.system.rolling_summary import is_rolling_channel, prepare_weekly_inputs
+from core.system.schedule_planner import get_summary_admission
+from core.system.summary_jobs import (
+    SummaryJob,
+    create_job,
+    load_unfinished_job,
+    load_unfinished_jobs,
+    run_job,
+)
 from core.telegram.client import (
     extract_date_range_from_summary,
     fetch_last_week_messages,
     get_active_client,
     send_report,
 )
+from core.telegram.entity_cache import get_cached_entity
+
+# 全频道模式下同时进行的 Telegram 请求（抓取/发送）数与 LLM 调用数
+SUMMARY_TELEGRAM_CONCURRENCY = max(1, int(os.getenv("SUMMARY_TELEGRAM_CONCURRENCY", "3")))
+SUMMARY_LLM_CONCURRENCY = max(1, int(os.getenv("SUMMARY_LLM_CONCURRENCY", "2")))
+
+
+def _failed_result(channel: str, error_msg: str, processing_time: float) -> dict:
+    """构建单个频道的失败结果"""
+    return {
+        "success": False,
+        "channel": channel,
+        "message_count": 0,
+        "summary_length": 0,
+        "processing_time": processing_time,
+        "error": error_msg,
+        "details": f"频道 {channel} 处理失败: {error_msg}，处理时间 {processing_time:.2f}秒",
+    }
+
+
+def _skip_delivered_summary(
+    channel: str, previous: dict, message_count: int, channel_start_time: datetime
+) -> dict:
+    """输入与已发送的总结相同：不再生成和发送，只推进该频道的上次总结时间"""
+    poll_id = previous.get("poll_message_id")
+    button_id = previous.get("button_message_id")
+    save_last_summary_time(
+        channel,
+        datetime.now(UTC),
+        summary_message_ids=previous["summary_message_ids"],
+        poll_message_ids=[poll_id] if poll_id else [],
+        button_message_ids=[button_id] if button_id else [],
+    )
+
+    processing_time = (datetime.now(UTC) - channel_start_time).total_seconds()
+    result = {
+        "success": True,
+        "channel": channel,
+        "message_count": message_count,
+        "summary_length": len(previous["summary_body"]),
+        "processing_time": processing_time,
+        "error": None,
+        "details": f"频道 {channel} 的消息与已发送的总结（ID: {previous['id']}）相同，"
+        f"跳过本次生成与发送，处理时间 {processing_time:.2f}秒",
+    }
+    logger.info(result["details"])
+    return result
+
+
+async def _deliver_report(job: SummaryJob, telegram_semaphore: asyncio.Semaphore) -> None:
+    """deliver 阶段：发送报告给管理员，并根据配置发送回源频道"""
+    state = job.state
+    active_client = get_active_client()
+    async with telegram_semaphore:
+        if config_module.SEND_REPORT_TO_SOURCE:
+            report_result = await send_report(
+                state["report_text"],
+                job.channel,
+                client=active_client,
+                message_count=state["message_count"],
+            )
+        else:
+            report_result = await send_report(
+                state["report_text"], client=active_client, message_count=state["message_count"]
+            )
+
+    report_result = report_result or {}
+    summary_ids = report_result.get("summary_message_ids") or []
+    # send_report 不抛出异常：有接收方却没有任何消息发出即视为发送失败，交由阶段重试
+    if not summary_ids and (config_module.SEND_REPORT_TO_SOURCE or config_module.ADMIN_LIST):
+        raise RuntimeError(f"频道 {job.channel} 的报告未能发送")
+
+    state["summary_message_ids"] = summary_ids
+    state["poll_message_id"] = report_result.get("poll_message_id")
+    state["button_message_id"] = report_result.get("button_message_id")
+
+
+async def _persist_summary(job: SummaryJob) -> None:
+    """persist 阶段：保存总结到数据库和向量存储（失败只记录日志，不阻塞后续阶段）"""
+    state = job.state
+    channel = job.channel
+    channel_name = state["channel_name"]
+    report_text = state["report_text"]
+    frequency = state["frequency"]
+    summary_ids = state["summary_message_ids"]
+    try:
+        from core.infrastructure.database import get_db_manager
+
+        # 提取时间范围
+        start_time_db, end_time_db = extract_date_range_from_summary(report_text)
+
+        # 保存到数据库
+        db = get_db_manager()
+        summary_id = await db.save_summary(
+            channel_id=channel,
+            channel_name=channel_name,
+            summary_text=report_text,
+            message_count=state["message_count"],
+            start_time=start_time_db,
+            end_time=end_time_db,
+            summary_message_ids=summary_ids,
+            poll_message_id=state["poll_message_id"],
+            button_message_id=state["button_message_id"],
+            ai_model=config_module.LLM_MODEL,
+            summary_type=frequency,  # 'daily' 或 'weekly'
+            input_fingerprint=state["fingerprint"],
+        )
+
+        if summary_id:
+            state["summary_id"] = summary_id
+            logger.info(f"定时任务总结已保存到数据库，记录ID: {summary_id}")
+
+            from core.ai.memory_manager import schedule_summary_metadata
+
+            schedule_summary_metadata(summary_id, channel, channel_name, report_text)
+
+            # 生成并保存向量
+            from core.ai.vector_store import get_vector_store
+
+            vector_store = get_vector_store()
+
+            if vector_store.is_available():
+                success = vector_store.add_summary(
+                    summary_id=summary_id,
+                    text=report_text,
+                    metadata={
+                        "channel_id": channel,
+                        "channel_name": channel_name,
+                        "created_at": datetime.now(UTC).isoformat(),
+                        "summary_type": frequency,  # 'daily' 或 'weekly'
+                        "message_count": state["message_count"],
+                        "summary_message_ids": json.dumps(summary_ids, ensure_ascii=False),
+                    },
+                )
+
+                if success:
+                    logger.info(f"定时任务总结向量已成功保存，summary_id: {summary_id}")
+                else:
+                    logger.warning(
+                        f"定时任务总结向量保存失败，但数据库记录已保存，summary_id: {summary_id}"
+                    )
+            else:
+                logger.debug("向量存储不可用，跳过向量化")
+        else:
+            logger.warning("保存到数据库失败，但不影响定时任务执行")
+
+    except Exception as e:
+        logger.error(
+            f"保存定时任务总结到数据库时出错: {type(e).__name__}: {e}",
+            exc_info=True,
+        )
+        # 数据库保存失败不影响定时任务，只记录日志
+
+
+async def _notify_subscribers(job: SummaryJob) -> None:
+    """notify 阶段：通知订阅用户（跨Bot推送，失败只记录日志）"""
+    try:
+        from core.handlers.mainbot_push_handler import get_mainbot_push_handler
+
+        push_handler = get_mainbot_push_handler()
+
+        notified_count = await push_handler.notify_summary_subscribers(
+            channel_id=job.channel,
+            channel_name=job.state["channel_name"],
+            summary_text=job.state["report_text"],
+        )
+
+        if notified_count > 0:
+            logger.info(f"已成功通知 {notified_count} 个订阅用户")
+    except Exception as e:
+        logger.error(f"通知订阅用户失败: {type(e).__name__}: {e}", exc_info=True)
+
+
+async def _commit_summary_time(job: SummaryJob) -> None:
+    """commit 阶段：保存该频道的本次总结时间和所有相关消息ID"""
+    state = job.state
+    poll_id = state["poll_message_id"]
+    button_id = state["button_message_id"]
+    save_last_summary_time(
+        job.channel,
+        datetime.fromisoformat(state["window_end"]),
+        summary_message_ids=state["summary_message_ids"],
+        poll_message_ids=[poll_id] if poll_id else [],
+        button_message_ids=[button_id] if button_id else [],
+    )
+
+
+async def _run_summary_job(
+    job: SummaryJob, telegram_semaphore: asyncio.Semaphore, channel_start_time: datetime
+) -> dict:
+    """执行总结任务的剩余阶段（deliver → persist → notify → commit），返回频道处理结果"""
+
+    async def deliver_report(job: SummaryJob) -> None:
+        await _deliver_report(job, telegram_semaphore)
+
+    await run_job(
+        job,
+        {
+            "deliver": deliver_report,
+            "persist": _persist_summary,
+            "notify": _notify_subscribers,
+            "commit": _commit_summary_time,
+        },
+    )
+
+    channel = job.channel
+    message_count = job.state["message_count"]
+    summary_length = job.state["summary_length"]
+    channel_processing_time = (datetime.now(UTC) - channel_start_time).total_seconds()
+
+    # 构建结果信息
+    result = {
+        "success": True,
+        "channel": channel,
+        "message_count": message_count,
+        "summary_length": summary_length,
+        "processing_time": channel_processing_time,
+        "error": None,
+        "details": f"成功处理频道 {channel}，共 {message_count} 条消息，生成 {summary_length} 字符的总结，处理时间 {channel_processing_time:.2f}秒",
+    }
+    logger.info(f"频道 {channel} 处理完成: {result['details']}")
+    return result
+
+
+async def resume_summary_jobs() -> None:
+    """启动后恢复上次运行中断的总结任务（从未完成的阶段继续，不重新生成）"""
+    jobs = await load_unfinished_jobs()
+    if not jobs:
+        return
+
+    logger.info(f"发现 {len(jobs)} 个未完成的总结任务，开始恢复")
+    telegram_semaphore = asyncio.Semaphore(SUMMARY_TELEGRAM_CONCURRENCY)
+    for job in jobs:
+        try:
+            await _run_summary_job(job, telegram_semaphore, datetime.now(UTC))
+        except Exception as e:
+            logger.error(f"恢复总结任务 {job.label} 失败: {type(e).__name__}: {e}")
+
+
+async def _summarize_channel(
+    channel: str,
+    telegram_semaphore: asyncio.Semaphore,
+    llm_semaphore: asyncio.Semaphore,
+) -> dict:
+    """处理单个频道：抓取消息、AI 总结、发送报告、保存记录
+
+    Telegram 请求（抓取、获取实体、发送）与 LLM 调用分别受各自的信号量限制。
+
+    Returns:
+        dict: 单个频道的处理结果，格式同 main_job 的返回值
+    """
+    channel_start_time = datetime.now(UTC)
+    logger.info(f"开始处理频道: {channel}")
+
+    # 上次运行在生成之后中断（重启或发送失败）：从未完成的阶段继续，不重新生成
+    job = await load_unfinished_job(channel)
+    if job:
+        logger.info(f"频道 {channel} 存在未完成的总结任务 {job.label}，从阶段 {job.stage} 继续")
+        return await _run_summary_job(job, telegram_semaphore, channel_start_time)
+
+    # 读取该频道的上次总结时间和报告消息ID
+    channel_summary_data = load_last_summary_time(channel, include_report_ids=True)
+    if channel_summary_data:
+        channel_last_summary_time = channel_summary_data["time"]
+        # 使用新的键名: summary_message_ids
+        # 为了向后兼容,同时支持旧格式
+        if "summary_message_ids" in channel_summary_data:
+            # 新格式
+            summary_ids = channel_summary_data["summary_message_ids"]
+            # 类型检查: 如果summary_ids是字典,说明数据格式错误,需要修复
+            if isinstance(summary_ids, dict):
+                logger.warning(f"检测到summary_ids是字典格式,正在修复数据结构: {summary_ids}")
+                summary_ids = summary_ids.get("summary_message_ids", [])
+            # 确保是列表
+            if not isinstance(summary_ids, list):
+                logger.error(
+                    f"summary_ids类型错误: {type(summary_ids)}, 值: {summary_ids}, 使用空列表"
+                )
+                summary_ids = []
+
+            poll_ids = channel_summary_data.get("poll_message_ids", [])
+            button_ids = channel_summary_data.get("button_message_ids", [])
+            # 确保都是列表
+            if not isinstance(poll_ids, list):
+                poll_ids = []
+            if not isinstance(button_ids, list):
+                button_ids = []
+
+            # 合并所有消息ID用于排除
+            report_message_ids_to_exclude = summary_ids + poll_ids + button_ids
+        else:
+            # 旧格式,使用report_message_ids
+            report_message_ids_to_exclude = channel_summary_data["report_message_ids"]
+    else:
+        channel_last_summary_time = None
+        report_message_ids_to_exclude = []
+
+    if is_rolling_channel(channel):
+        # 滚动模式：补齐最后一份日摘要后，以本周期的日摘要作为归并输入
+        # （其中的抓取已受全局抓取限流器约束，这里只占用 LLM 名额）
+        async with llm_semaphore:
+            digests, message_count = await prepare_weekly_inputs(
+                channel, channel_last_summary_time, report_message_ids_to_exclude
+            )
+        messages_by_channel = {channel: digests}
+    else:
+        # 抓取该频道从上次总结时间开始的消息，排除已发送的报告消息
+        async with telegram_semaphore:
+            messages_by_channel = await fetch_last_week_messages(
+                [channel],
+                start_time=channel_last_summary_time,
+                report_message_ids={channel: report_message_ids_to_exclude},
+            )
+        message_count = len(messages_by_channel.get(channel, []))
+
+    # 获取该频道的消息
+    messages = messages_by_channel.get(channel, [])
+
+    # 检查频道是否存在（如果频道不存在，messages_by_channel可能不包含该频道）
+    if channel not in messages_by_channel:
+        # 频道不存在或无法访问
+        channel_end_time = datetime.now(UTC)
+        channel_processing_time = (channel_end_time - channel_start_time).total_seconds()
+
+        result = {
+            "success": False,
+            "channel": channel,
+            "message_count": 0,
+            "summary_length": 0,
+            "processing_time": channel_processing_time,
+            "error": f"频道 {channel} 不存在或无法访问",
+            "details": f"频道 {channel} 不存在或无法访问，处理时间 {channel_processing_time:.2f}秒",
+        }
+        logger.error(f"频道 {channel} 不存在或无法访问")
+        return result
+    if messages:
+        logger.info(f"开始处理频道 {channel} 的消息，共 {message_count} 条消息")
+        current_prompt = load_prompt()
+        fingerprint = compute_summary_fingerprint(
+            channel, messages, current_prompt, config_module.LLM_MODEL
+        )
+        previous = await find_summary_by_fingerprint(channel, fingerprint)
+        if previous and previous["summary_message_ids"]:
+            # 重试的任务：相同输入的总结已经发送过
+            return _skip_delivered_summary(channel, previous, message_count, channel_start_time)
+        if previous:
+            summary = previous["summary_body"]
+        else:
+            async with llm_semaphore:
+                with usage_channel(channel):
+                    summary = await analyze_with_ai(messages, current_prompt)
+
+        # 获取活动的客户端实例和频道的实际名称用于报告标题
+        active_client = get_active_client()
+        try:
+            async with telegram_semaphore:
+                channel_entity = await get_cached_entity(active_client, channel)
+            channel_name = channel_entity.title
+            logger.info(f"获取到频道实际名称: {channel_name}")
+        except Exception as e:
+            logger.warning(f"获取频道实体失败，使用链接后缀作为回退: {e}")
+            # 如果获取失败，使用链接后缀作为回退
+            channel_name = channel.split("/")[-1]
+
+        # 获取频道的调度配置，用于生成报告标题
+        from core.config import get_channel_schedule
+
+        schedule_config = get_channel_schedule(channel)
+        frequency = schedule_config.get("frequency", "weekly")
+
+        # 计算起始日期和终止日期
+        end_date = datetime.now(UTC)
+        if channel_last_summary_time:
+            start_date = channel_last_summary_time
+        else:
+            start_date = end_date - timedelta(days=7)
+
+        # 格式化日期为 月.日 格式
+        start_date_str = f"{start_date.month}.{start_date.day}"
+        end_date_str = f"{end_date.month}.{end_date.day}"
+
+        logger.debug(
+            f"总结时间范围: {start_date.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')} 至 {end_date.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')}"
+        )
+
+        # 根据频率生成报告标题
+        if frequency == "daily":
+            report_title = get_text("summary.daily_title", channel=channel_name, date=end_date_str)
+        else:  # weekly
+            report_title = get_text(
+                "summary.weekly_title",
+                channel=channel_name,
+                start_date=start_date_str,
+                end_date=end_date_str,
+            )
+
+        # 生成报告文本
+        report_text = f"**{report_title}**\n\n{summary}"
+
+        # 生成阶段完成：创建任务并保存检查点，之后的阶段失败或进程重启都不会重新生成
+        job = await create_job(
+            channel,
+            {
+                "channel_name": channel_name,
+                "frequency": frequency,
+                "report_text": report_text,
+                "message_count": message_count,
+                "summary_length": len(summary),
+                "fingerprint": fingerprint,
+                "window_end": datetime.now(UTC).isoformat(),
+            },
+        )
+        return await _run_summary_job(job, telegram_semaphore, channel_start_time)
+    else:
+        logger.info(f"频道 {channel} 没有新消息需要总结")
+        channel_end_time = datetime.now(UTC)
+        channel_processing_time = (channel_end_time - channel_start_time).total_seconds()
+
+        result = {
+            "success": True,
+            "channel": channel,
+            "message_count": 0,
+            "summary_length": 0,
+            "processing_time": channel_processing_time,
+            "error": None,
+            "details": f"频道 {channel} 没有新消息需要总结，处理时间 {channel_processing_time:.2f}秒",
+        }
+        return result
+
+
+async def _run_channel(
+    channel: str,
+    telegram_semaphore: asyncio.Semaphore,
+    llm_semaphore: asyncio.Semaphore,
+) -> dict:
+    """处理单个频道，异常只影响该频道"""
+    channel_start_time = datetime.now(UTC)
+    try:
+        return await _summarize_channel(channel, telegram_semaphore, llm_semaphore)
+    except Exception as e:
+        processing_time = (datetime.now(UTC) - channel_start_time).total_seconds()
+        error_msg = f"{type(e).__name__}: {e}"
+        logger.error(f"频道 {channel} 处理失败: {error_msg}", exc_info=True)
+        return _failed_result(channel, error_msg, processing_time)
 
 
-async def main_job(channel=None):
+async def main_job(channel=None, progress_callback=None):
     """定时任务主函数
 
+    全频道模式下各频道作为并发任务执行，Telegram 请求与 LLM 调用的并发数分别由
+    SUMMARY_TELEGRAM_CONCURRENCY 与 SUMMARY_LLM_CONCURRENCY 限制；单个频道失败不影响其他频道。
+
     Args:
         channel: 可选，指定要处理的频道。如果为None，则处理所有频道
+        progress_callback: 可选，每个频道完成时调用 progress_callback(done, total, result)
 
     Returns:
         dict: 包含任务执行结果的字典，格式为:
@@ -54,277 +515,30 @@ async def main_job(channel=None):
         logger.info(
             f"定时任务启动（全频道模式）: {start_time.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')}"
         )
-        channels_to_process = config_module.CHANNELS
+        channels_to_process = list(config_module.CHANNELS)
 
     try:
-        results = []
-        # 按频道分别处理
-        for channel in channels_to_process:
-            channel_start_time = datetime.now(UTC)
-            logger.info(f"开始处理频道: {channel}")
-
-            # 读取该频道的上次总结时间和报告消息ID
-            channel_summary_data = load_last_summary_time(channel, include_report_ids=True)
-            if channel_summary_data:
-                channel_last_summary_time = channel_summary_data["time"]
-                # 使用新的键名: summary_message_ids
-                # 为了向后兼容,同时支持旧格式
-                if "summary_message_ids" in channel_summary_data:
-                    # 新格式
-                    summary_ids = channel_summary_data["summary_message_ids"]
-                    # 类型检查: 如果summary_ids是字典,说明数据格式错误,需要修复
-                    if isinstance(summary_ids, dict):
-                        logger.warning(
-                            f"检测到summary_ids是字典格式,正在修复数据结构: {summary_ids}"
-                        )
-                        summary_ids = summary_ids.get("summary_message_ids", [])
-                    # 确保是列表
-                    if not isinstance(summary_ids, list):
-                        logger.error(
-                            f"summary_ids类型错误: {type(summary_ids)}, 值: {summary_ids}, 使用空列表"
-                        )
-                        summary_ids = []
-
-                    poll_ids = channel_summary_data.get("poll_message_ids", [])
-                    button_ids = channel_summary_data.get("button_message_ids", [])
-                    # 确保都是列表
-                    if not isinstance(poll_ids, list):
-                        poll_ids = []
-                    if not isinstance(button_ids, list):
-                        button_ids = []
-
-                    # 合并所有消息ID用于排除
-                    report_message_ids_to_exclude = summary_ids + poll_ids + button_ids
-                else:
-                    # 旧格式,使用report_message_ids
-                    report_message_ids_to_exclude = channel_summary_data["report_message_ids"]
-            else:
-                channel_last_summary_time = None
-                report_message_ids_to_exclude = []
-
-            # 抓取该频道从上次总结时间开始的消息，排除已发送的报告消息
-            messages_by_channel = await fetch_last_week_messages(
-                [channel],
-                start_time=channel_last_summary_time,
-                report_message_ids={channel: report_message_ids_to_exclude},
-            )
-
-            # 获取该频道的消息
-            messages = messages_by_channel.get(channel, [])
-
-            # 检查频道是否存在（如果频道不存在，messages_by_channel可能不包含该频道）
-            if channel not in messages_by_channel:
-                # 频道不存在或无法访问
-                channel_end_time = datetime.now(UTC)
-                channel_processing_time = (channel_end_time - channel_start_time).total_seconds()
-
-                result = {
-                    "success": False,
-                    "channel": channel,
-                    "message_count": 0,
-                    "summary_length": 0,
-                    "processing_time": channel_processing_time,
-                    "error": f"频道 {channel} 不存在或无法访问",
-                    "details": f"频道 {channel} 不存在或无法访问，处理时间 {channel_processing_time:.2f}秒",
-                }
-                results.append(result)
-                logger.error(f"频道 {channel} 不存在或无法访问")
-                continue
-            if messages:
-                logger.info(f"开始处理频道 {channel} 的消息，共 {len(messages)} 条消息")
-                current_prompt = load_prompt()
-                summary = await analyze_with_ai(messages, current_prompt)
-
-                # 获取活动的客户端实例和频道的实际名称用于报告标题
-                active_client = get_active_client()
+        telegram_semaphore = asyncio.Semaphore(SUMMARY_TELEGRAM_CONCURRENCY)
+        llm_semaphore = asyncio.Semaphore(SUMMARY_LLM_CONCURRENCY)
+        total = len(channels_to_process)
+        tasks = [
+            asyncio.create_task(_run_channel(ch, telegram_semaphore, llm_semaphore))
+            for ch in channels_to_process
+        ]
+
+        # 按完成顺序汇报进度，结果按频道原顺序返回
+        done = 0
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            done += 1
+            status = "成功" if result["success"] else "失败"
+            logger.info(f"总结进度: {done}/{total}，频道 {result['channel']} {status}")
+            if progress_callback:
                 try:
-                    channel_entity = await active_client.get_entity(channel)
-                    channel_name = channel_entity.title
-                    logger.info(f"获取到频道实际名称: {channel_name}")
+                    progress_callback(done, total, result)
                 except Exception as e:
-                    logger.warning(f"获取频道实体失败，使用链接后缀作为回退: {e}")
-                    # 如果获取失败，使用链接后缀作为回退
-                    channel_name = channel.split("/")[-1]
-
-                # 获取频道的调度配置，用于生成报告标题
-                from core.config import get_channel_schedule
-
-                schedule_config = get_channel_schedule(channel)
-                frequency = schedule_config.get("frequency", "weekly")
-
-                # 计算起始日期和终止日期
-                end_date = datetime.now(UTC)
-                if channel_last_summary_time:
-                    start_date = channel_last_summary_time
-                else:
-                    start_date = end_date - timedelta(days=7)
-
-                # 格式化日期为 月.日 格式
-                start_date_str = f"{start_date.month}.{start_date.day}"
-                end_date_str = f"{end_date.month}.{end_date.day}"
-
-                logger.debug(
-                    f"总结时间范围: {start_date.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')} 至 {end_date.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')}"
-                )
-
-                # 根据频率生成报告标题
-                if frequency == "daily":
-                    report_title = get_text(
-                        "summary.daily_title", channel=channel_name, date=end_date_str
-                    )
-                else:  # weekly
-                    report_title = get_text(
-                        "summary.weekly_title",
-                        channel=channel_name,
-                        start_date=start_date_str,
-                        end_date=end_date_str,
-                    )
-
-                # 生成报告文本
-                report_text = f"**{report_title}**\n\n{summary}"
-                # 发送报告给管理员，并根据配置决定是否发送回源频道
-                report_result = None
-
-                if config_module.SEND_REPORT_TO_SOURCE:
-                    report_result = await send_report(
-                        report_text, channel, client=active_client, message_count=len(messages)
-                    )
-                else:
-                    report_result = await send_report(
-                        report_text, client=active_client, message_count=len(messages)
-                    )
-
-                # 保存该频道的本次总结时间和所有相关消息ID
-                if report_result:
-                    summary_ids = report_result.get("summary_message_ids", [])
-                    poll_id = report_result.get("poll_message_id")
-                    button_id = report_result.get("button_message_id")
-
-                    # 转换单个ID为列表格式
-                    poll_ids = [poll_id] if poll_id else []
-                    button_ids = [button_id] if button_id else []
-
-                    # ✅ 新增：保存到数据库
-                    try:
-                        from core.infrastructure.database import get_db_manager
-
-                        # 提取时间范围
-                        start_time_db, end_time_db = extract_date_range_from_summary(report_text)
-
-                        # 保存到数据库
-                        db = get_db_manager()
-                        summary_id = await db.save_summary(
-                            channel_id=channel,
-                            channel_name=channel_name,
-                            summary_text=report_text,
-                            message_count=len(messages),
-                            start_time=start_time_db,
-                            end_time=end_time_db,
-                            summary_message_ids=summary_ids,
-                            poll_message_id=poll_id,
-                            button_message_id=button_id,
-                            ai_model=config_module.LLM_MODEL,
-                            summary_type=frequency,  # 'daily' 或 'weekly'
-                        )
-
-                        if summary_id:
-                            logger.info(f"定时任务总结已保存到数据库，记录ID: {summary_id}")
-
-                            # ✅ 新增：生成并保存向量
-                            from core.ai.vector_store import get_vector_store
-
-                            vector_store = get_vector_store()
-
-                            if vector_store.is_available():
-                                success = vector_store.add_summary(
-                                    summary_id=summary_id,
-                                    text=report_text,
-                                    metadata={
-                                        "channel_id": channel,
-                                        "channel_name": channel_name,
-                                        "created_at": datetime.now(UTC).isoformat(),
-                                        "summary_type": frequency,  # 'daily' 或 'weekly'
-                                        "message_count": len(messages),
-                                        "summary_message_ids": json.dumps(
-                                            summary_ids, ensure_ascii=False
-                                        ),
-                                    },
-                                )
-
-                                if success:
-                                    logger.info(
-                                        f"定时任务总结向量已成功保存，summary_id: {summary_id}"
-                                    )
-                                else:
-                                    logger.warning(
-                                        f"定时任务总结向量保存失败，但数据库记录已保存，summary_id: {summary_id}"
-                                    )
-                            else:
-                                logger.debug("向量存储不可用，跳过向量化")
-                        else:
-                            logger.warning("保存到数据库失败，但不影响定时任务执行")
-
-                    except Exception as e:
-                        logger.error(
-                            f"保存定时任务总结到数据库时出错: {type(e).__name__}: {e}",
-                            exc_info=True,
-                        )
-                        # 数据库保存失败不影响定时任务，只记录日志
-
-                    # 通知订阅用户（跨Bot推送）
-                    try:
-                        from core.handlers.mainbot_push_handler import get_mainbot_push_handler
-
-                        push_handler = get_mainbot_push_handler()
-
-                        notified_count = await push_handler.notify_summary_subscribers(
-                            channel_id=channel, channel_name=channel_name, summary_text=report_text
-                        )
-
-                        if notified_count > 0:
-                            logger.info(f"已成功通知 {notified_count} 个订阅用户")
-                    except Exception as e:
-                        logger.error(f"通知订阅用户失败: {type(e).__name__}: {e}", exc_info=True)
-
-                    save_last_summary_time(
-                        channel,
-                        datetime.now(UTC),
-                        summary_message_ids=summary_ids,
-                        poll_message_ids=poll_ids,
-                        button_message_ids=button_ids,
-                    )
-
-                channel_end_time = datetime.now(UTC)
-                channel_processing_time = (channel_end_time - channel_start_time).total_seconds()
-
-                # 构建结果信息
-                result = {
-                    "success": True,
-                    "channel": channel,
-                    "message_count": len(messages),
-                    "summary_length": len(summary),
-                    "processing_time": channel_processing_time,
-                    "error": None,
-                    "details": f"成功处理频道 {channel}，共 {len(messages)} 条消息，生成 {len(summary)} 字符的总结，处理时间 {channel_processing_time:.2f}秒",
-                }
-                results.append(result)
-
-                logger.info(f"频道 {channel} 处理完成: {result['details']}")
-            else:
-                logger.info(f"频道 {channel} 没有新消息需要总结")
-                channel_end_time = datetime.now(UTC)
-                channel_processing_time = (channel_end_time - channel_start_time).total_seconds()
-
-                result = {
-                    "success": True,
-                    "channel": channel,
-                    "message_count": 0,
-                    "summary_length": 0,
-                    "processing_time": channel_processing_time,
-                    "error": None,
-                    "details": f"频道 {channel} 没有新消息需要总结，处理时间 {channel_processing_time:.2f}秒",
-                }
-                results.append(result)
+                    logger.warning(f"进度回调执行失败: {type(e).__name__}: {e}")
+        results = [task.result() for task in tasks]
 
         end_time = datetime.now(UTC)
         processing_time = (end_time - start_time).total_seconds()
@@ -341,16 +555,24 @@ async def main_job(channel=None):
         # 返回结果
         if len(results) == 1:
             return results[0]
-        else:
-            return {
-                "success": True,
-                "channel": "all" if not channel else channel,
-                "message_count": sum(r["message_count"] for r in results),
-                "summary_length": sum(r["summary_length"] for r in results),
-                "processing_time": processing_time,
-                "error": None,
-                "details": f"成功处理 {len(results)} 个频道，共 {sum(r['message_count'] for r in results)} 条消息，总处理时间 {processing_time:.2f}秒",
-            }
+
+        failed = [r for r in results if not r["success"]]
+        message_count = sum(r["message_count"] for r in results)
+        details = (
+            f"成功处理 {len(results) - len(failed)} 个频道，共 {message_count} 条消息，"
+            f"总处理时间 {processing_time:.2f}秒"
+        )
+        if failed:
+            details += f"；{len(failed)} 个频道失败: {', '.join(r['channel'] for r in failed)}"
+        return {
+            "success": len(failed) < len(results) or not results,
+            "channel": "all" if not channel else channel,
+            "message_count": message_count,
+            "summary_length": sum(r["summary_length"] for r in results),
+            "processing_time": processing_time,
+            "error": "; ".join(f"{r['channel']}: {r['error']}" for r in failed) or None,
+            "details": details,
+        }
 
     except Exception as e:
         end_time = datetime.now(UTC)
@@ -380,6 +602,12 @@ async def main_job(channel=None):
         }
 
 
+async def scheduled_summary_job(channel):
+    """定时触发的单频道总结：LLM 网关有余量时才开始执行 main_job"""
+    async with get_summary_admission().admit(channel):
+        return await main_job(channel)
+
+
 async def cleanup_old_poll_regenerations():
     """定期清理超过30天的投票重新生成数据"""
     from core.config import cleanup_old_regenerations
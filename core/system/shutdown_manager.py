@@ -39,6 +39,7 @@ class ShutdownManager:
     TIMEOUT_DATABASE = int(os.getenv("SHUTDOWN_TIMEOUT_DATABASE", "2"))
     TIMEOUT_CLIENT = int(os.getenv("SHUTDOWN_TIMEOUT_CLIENT", "3"))
     TIMEOUT_TASKS = int(os.getenv("SHUTDOWN_TIMEOUT_TASKS", "2"))
+    TIMEOUT_METADATA = int(os.getenv("SHUTDOWN_TIMEOUT_METADATA", "10"))
     TOTAL_TIMEOUT = int(os.getenv("SHUTDOWN_TOTAL_TIMEOUT", "10"))
 
     def __init__(self):
@@ -116,7 +117,9 @@ class ShutdownManager:
             # 步骤3: 停止调度器
             await self._stop_scheduler_with_timeout(self.TIMEOUT_SCHEDULER)
 
-            # 步骤4: 关闭数据库连接池
+            # 步骤4: 写入未保存的 LLM 用量与队列中的总结元数据，关闭数据库连接池
+            await self._flush_llm_usage_with_timeout(self.TIMEOUT_DATABASE)
+            await self._flush_summary_metadata_with_timeout(self.TIMEOUT_METADATA)
             await self._close_database_with_timeout(self.TIMEOUT_DATABASE)
 
             # 步骤5: 断开Telegram客户端
@@ -199,6 +202,36 @@ class ShutdownManager:
         except Exception as e:
             logger.error(f"❌ 停止调度器失败: {type(e).__name__}: {e}")
 
+    async def _flush_llm_usage_with_timeout(self, timeout: int):
+        """写入内存中尚未保存的 LLM 用量（带超时）
+
+        Args:
+            timeout: 超时时间（秒）
+        """
+        try:
+            from core.ai.usage_tracker import flush_llm_usage
+
+            await asyncio.wait_for(flush_llm_usage(), timeout=timeout)
+        except TimeoutError:
+            logger.warning(f"⚠️ 写入 LLM 用量超时（{timeout}秒），强制继续")
+        except Exception as e:
+            logger.error(f"❌ 写入 LLM 用量失败: {type(e).__name__}: {e}")
+
+    async def _flush_summary_metadata_with_timeout(self, timeout: int):
+        """提取队列中尚未处理的总结元数据（带超时，超时的部分下次启动时补提取）
+
+        Args:
+            timeout: 超时时间（秒）
+        """
+        try:
+            from core.ai.memory_manager import flush_summary_metadata
+
+            await asyncio.wait_for(flush_summary_metadata(), timeout=timeout)
+        except TimeoutError:
+            logger.warning(f"⚠️ 提取总结元数据超时（{timeout}秒），将在下次启动时补提取")
+        except Exception as e:
+            logger.error(f"❌ 提取总结元数据失败: {type(e).__name__}: {e}")
+
     async def _close_database_with_timeout(self, timeout: int):
         """关闭数据库连接池（带超时）
 
@@ -0,0 +1,212 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+分阶段总结任务引擎 - 已生成的总结不因重启或发送失败而重新生成
+
+一次定时总结被建模为持久化的任务，依次经过以下阶段：
+
+    generate → deliver → persist → notify → commit
+
+generate（抓取消息并调用 LLM）完成后创建任务，生成结果作为第一个检查点写入
+summary_jobs 表；此后每完成一个阶段都保存检查点（下一个阶段与累积的阶段输出）。
+单个阶段失败时按指数退避重试，重试耗尽后任务标记为 failed 并保留检查点。
+
+下次调度或进程重启后，任务从第一个未完成的阶段继续执行，不会再次调用 LLM。
+数据库不可用时任务仍按阶段在内存中执行，只是没有检查点。
+"""
+
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from core.infrastructure.database.summary_job_repo import get_summary_job_repo
+from core.system.error_handler import RetryExhaustedError, retry_with_backoff
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_JOB_STAGES = ("generate", "deliver", "persist", "notify", "commit")
+# 所有阶段完成后记录的阶段名
+STAGE_DONE = "done"
+# 单个阶段失败后的重试次数与退避时间（秒）
+SUMMARY_JOB_STAGE_RETRIES = max(0, int(os.getenv("SUMMARY_JOB_STAGE_RETRIES", "3")))
+SUMMARY_JOB_RETRY_DELAY = 2.0
+SUMMARY_JOB_RETRY_MAX_DELAY = 60.0
+# 超过该天数仍未完成的任务不再恢复（总结内容已经过时）
+SUMMARY_JOB_MAX_AGE_DAYS = 7
+# 已结束任务的保留天数
+SUMMARY_JOB_RETENTION_DAYS = 30
+
+StageHandler = Callable[["SummaryJob"], Awaitable[None]]
+
+# 本进程中正在执行的任务ID，避免定时任务与启动恢复同时执行同一任务
+_active_job_ids: set[int] = set()
+
+
+class SummaryJob:
+    """总结任务：频道、下一个待执行的阶段与已完成阶段的输出"""
+
+    def __init__(
+        self,
+        channel: str,
+        stage: str,
+        state: dict[str, Any],
+        job_id: int | None = None,
+        created_at: datetime | None = None,
+    ):
+        self.channel = channel
+        self.stage = stage
+        self.state = state
+        self.id = job_id
+        self.created_at = created_at
+
+    @property
+    def label(self) -> str:
+        """日志中使用的任务标识"""
+        return f"#{self.id}（{self.channel}）" if self.id else f"（{self.channel}，无检查点）"
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "SummaryJob":
+        """从 summary_jobs 记录构建任务"""
+        return cls(
+            channel=row["channel_id"],
+            stage=row["stage"],
+            state=row.get("state") or {},
+            job_id=row["id"],
+            created_at=row.get("created_at"),
+        )
+
+
+def next_stage(stage: str) -> str:
+    """返回 stage 之后的阶段，最后一个阶段之后为 STAGE_DONE"""
+    index = SUMMARY_JOB_STAGES.index(stage)
+    return SUMMARY_JOB_STAGES[index + 1] if index + 1 < len(SUMMARY_JOB_STAGES) else STAGE_DONE
+
+
+async def create_job(channel: str, state: dict[str, Any]) -> SummaryJob:
+    """
+    generate 阶段完成后创建任务，生成结果作为第一个检查点
+
+    Args:
+        channel: 频道标识
+        state: generate 阶段的输出
+
+    Returns:
+        下一个阶段为 deliver 的任务；数据库不可用时返回没有检查点的任务
+    """
+    job = SummaryJob(channel, next_stage("generate"), state)
+    try:
+        job.id = await get_summary_job_repo().create_job(channel, job.stage, state)
+        logger.info(f"总结任务 {job.label} 已创建，生成结果已保存检查点")
+    except Exception as e:
+        logger.warning(f"创建总结任务检查点失败，任务将不可恢复: {type(e).__name__}: {e}")
+    return job
+
+
+async def _checkpoint(job: SummaryJob, status: str, last_error: str | None = None) -> None:
+    """保存任务检查点，失败只记录日志"""
+    if job.id is None:
+        return
+    try:
+        await get_summary_job_repo().save_checkpoint(
+            job.id, job.stage, job.state, status=status, last_error=last_error
+        )
+    except Exception as e:
+        logger.warning(f"保存总结任务 {job.label} 检查点失败: {type(e).__name__}: {e}")
+
+
+async def _abandon(job: SummaryJob) -> None:
+    """放弃过期任务"""
+    logger.warning(f"总结任务 {job.label} 创建于 {job.created_at}，已过期，不再恢复")
+    await _checkpoint(job, status="abandoned")
+
+
+async def load_unfinished_jobs(channel: str | None = None) -> list[SummaryJob]:
+    """
+    读取可恢复的未完成任务（过期任务标记为 abandoned，正在执行的任务跳过）
+
+    Args:
+        channel: 仅读取该频道的任务，None 表示所有频道
+
+    Returns:
+        按创建时间升序排列的任务
+    """
+    try:
+        rows = await get_summary_job_repo().get_unfinished_jobs(channel)
+    except Exception as e:
+        logger.warning(f"读取未完成的总结任务失败: {type(e).__name__}: {e}")
+        return []
+
+    cutoff = datetime.now() - timedelta(days=SUMMARY_JOB_MAX_AGE_DAYS)
+    jobs = []
+    for row in rows:
+        job = SummaryJob.from_row(row)
+        if job.id in _active_job_ids:
+            continue
+        if job.created_at and job.created_at < cutoff:
+            await _abandon(job)
+            continue
+        jobs.append(job)
+    return jobs
+
+
+async def load_unfinished_job(channel: str) -> SummaryJob | None:
+    """读取频道最早的可恢复任务，没有则返回 None"""
+    jobs = await load_unfinished_jobs(channel)
+    return jobs[0] if jobs else None
+
+
+async def run_job(job: SummaryJob, handlers: dict[str, StageHandler]) -> None:
+    """
+    从任务的当前阶段开始依次执行剩余阶段，每个阶段完成后保存检查点
+
+    Args:
+        job: 总结任务
+        handlers: 阶段名 → 处理函数，处理函数将阶段输出写入 job.state
+
+    Raises:
+        RuntimeError: 某个阶段重试耗尽，任务已标记为 failed 并保留检查点
+    """
+    if job.id is not None:
+        _active_job_ids.add(job.id)
+    try:
+        while job.stage != STAGE_DONE:
+            stage = job.stage
+            run_stage = retry_with_backoff(
+                max_retries=SUMMARY_JOB_STAGE_RETRIES,
+                base_delay=SUMMARY_JOB_RETRY_DELAY,
+                max_delay=SUMMARY_JOB_RETRY_MAX_DELAY,
+            )(handlers[stage])
+            try:
+                await run_stage(job)
+            except RetryExhaustedError as e:
+                error = f"{type(e.last_exception).__name__}: {e.last_exception}"
+                await _checkpoint(job, status="failed", last_error=error)
+                raise RuntimeError(
+                    f"总结任务 {job.label} 在阶段 {stage} 失败，下次将从该阶段继续: {error}"
+                ) from e.last_exception
+
+            job.stage = next_stage(stage)
+            await _checkpoint(job, status="completed" if job.stage == STAGE_DONE else "running")
+            logger.debug(f"总结任务 {job.label} 阶段 {stage} 完成")
+    finally:
+        _active_job_ids.discard(job.id)
+
+
+async def cleanup_summary_jobs() -> None:
+    """删除保留期之外的已结束任务"""
+    try:
+        deleted = await get_summary_job_repo().delete_finished_before(SUMMARY_JOB_RETENTION_DAYS)
+        if deleted:
+            logger.info(f"已清理 {deleted} 条已结束的总结任务")
+    except Exception as e:
+        logger.error(f"清理总结任务失败: {type(e).__name__}: {e}", exc_info=True)
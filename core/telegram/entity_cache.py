@@ -0,0 +1,266 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+Telegram 实体缓存
+
+缓存频道/群组/用户的 ID、名称、用户名与 access_hash，避免总结、发送报告、投票、
+转发底栏等热路径每次调用 get_entity()：
+- 内存层：查询为字典查找，条目超过 ENTITY_CACHE_TTL 后重新解析（解析失败时继续使用旧条目）
+- 持久层：解析结果写入 ENTITY_CACHE_FILE，重启后直接加载，无需启动时批量解析
+- access_hash 与登录账号绑定，缓存按账号（Bot / UserBot）分开保存
+- 频道失效（ChannelInvalid / ChannelPrivate）时移除条目，下次访问重新解析
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import weakref
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from telethon import utils
+from telethon.errors import ChannelInvalidError, ChannelPrivateError
+from telethon.tl.types import Channel, Chat, InputPeerChannel, InputPeerChat, InputPeerUser
+
+from core.infrastructure.utils.constants import ENTITY_CACHE_FILE
+
+logger = logging.getLogger(__name__)
+
+# 缓存条目的有效期（秒），过期后访问时重新解析
+ENTITY_CACHE_TTL = max(60, int(os.getenv("ENTITY_CACHE_TTL", "86400")))
+
+# 说明实体已失效、需要重新解析的错误
+INVALID_ENTITY_ERRORS = (ChannelInvalidError, ChannelPrivateError)
+
+
+@dataclass
+class CachedEntity:
+    """缓存的实体信息，提供与 Telethon 实体相同的 id / title / username 属性"""
+
+    id: int
+    peer_id: int
+    kind: str
+    title: str
+    username: str | None = None
+    access_hash: int | None = None
+    resolved_at: float = 0.0
+
+    @classmethod
+    def from_entity(cls, entity: Any) -> "CachedEntity":
+        if isinstance(entity, Channel):
+            kind = "channel"
+        elif isinstance(entity, Chat):
+            kind = "chat"
+        else:
+            kind = "user"
+        return cls(
+            id=entity.id,
+            peer_id=utils.get_peer_id(entity),
+            kind=kind,
+            title=utils.get_display_name(entity),
+            username=getattr(entity, "username", None),
+            access_hash=getattr(entity, "access_hash", None),
+            resolved_at=time.time(),
+        )
+
+    @property
+    def input_peer(self):
+        """可直接用于 API 调用的 InputPeer，无需再次解析"""
+        if self.kind == "channel":
+            return InputPeerChannel(self.id, self.access_hash or 0)
+        if self.kind == "chat":
+            return InputPeerChat(self.id)
+        return InputPeerUser(self.id, self.access_hash or 0)
+
+    def expired(self) -> bool:
+        return time.time() - self.resolved_at > ENTITY_CACHE_TTL
+
+
+def _normalize_key(key: Any) -> str:
+    """查询键：数字 ID 原样，用户名与链接不区分大小写"""
+    text = str(key).strip()
+    return text if text.lstrip("-").isdigit() else text.lower()
+
+
+class EntityCache:
+    """按账号分开的实体缓存，持久化到 JSON 文件"""
+
+    def __init__(self, path: str = ENTITY_CACHE_FILE):
+        self.path = path
+        # 账号 → {"entities": {peer_id: 条目}, "aliases": {查询键: peer_id}}
+        self._accounts: dict[str, dict[str, dict]] | None = None
+        self._account_keys: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._save_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict[str, dict[str, dict]]:
+        if self._accounts is not None:
+            return self._accounts
+        accounts: dict[str, dict[str, dict]] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+            for account, data in raw.items():
+                accounts[account] = {
+                    "entities": {
+                        peer_id: CachedEntity(**entry)
+                        for peer_id, entry in data.get("entities", {}).items()
+                    },
+                    "aliases": dict(data.get("aliases", {})),
+                }
+            logger.info(
+                f"已加载实体缓存: {sum(len(a['entities']) for a in accounts.values())} 个实体"
+            )
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"读取实体缓存失败，将重新解析: {type(e).__name__}: {e}")
+        self._accounts = accounts
+        return accounts
+
+    def _write(self, snapshot: dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            temp_path = f.name
+        try:
+            os.replace(temp_path, self.path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+    async def _save(self) -> None:
+        snapshot = {
+            account: {
+                "entities": {peer_id: asdict(entry) for peer_id, entry in data["entities"].items()},
+                "aliases": dict(data["aliases"]),
+            }
+            for account, data in self._load().items()
+        }
+        async with self._save_lock:
+            try:
+                await asyncio.to_thread(self._write, snapshot)
+            except Exception as e:
+                logger.warning(f"保存实体缓存失败: {type(e).__name__}: {e}")
+
+    async def _account_key(self, client) -> str:
+        """登录账号的用户 ID（登录后由 Telethon 缓存，不产生请求）"""
+        try:
+            return self._account_keys[client]
+        except (KeyError, TypeError):
+            pass
+        account = "default"
+        try:
+            me = await client.get_me(input_peer=True)
+            if isinstance(getattr(me, "user_id", None), int):
+                account = str(me.user_id)
+        except Exception:
+            pass
+        try:
+            self._account_keys[client] = account
+        except TypeError:
+            pass
+        return account
+
+    def _lookup(self, account: str, key: str) -> CachedEntity | None:
+        data = self._load().get(account)
+        if data is None:
+            return None
+        peer_id = data["aliases"].get(key, key)
+        return data["entities"].get(peer_id)
+
+    async def get(self, client, key: Any, refresh: bool = False) -> CachedEntity:
+        """
+        获取实体信息，未缓存或已过期时调用 get_entity() 解析
+
+        Args:
+            client: Telegram 客户端（决定使用哪个账号的缓存）
+            key: 频道链接、用户名或数字 ID
+            refresh: 是否忽略缓存强制重新解析
+
+        Raises:
+            未缓存且解析失败时抛出 get_entity() 的异常
+        """
+        account = await self._account_key(client)
+        normalized = _normalize_key(key)
+        cached = None if refresh else self._lookup(account, normalized)
+        if cached is not None and not cached.expired():
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        try:
+            entity = await client.get_entity(key)
+        except INVALID_ENTITY_ERRORS:
+            self.invalidate(key, client_account=account)
+            raise
+        except Exception as e:
+            if cached is not None:
+                logger.warning(f"刷新实体 {key} 失败，继续使用缓存: {type(e).__name__}: {e}")
+                return cached
+            raise
+
+        try:
+            resolved = CachedEntity.from_entity(entity)
+        except Exception:
+            # 无法识别的实体类型不写入缓存，直接返回原实体
+            return entity
+
+        data = self._load().setdefault(account, {"entities": {}, "aliases": {}})
+        peer_id = str(resolved.peer_id)
+        data["entities"][peer_id] = resolved
+        data["aliases"][normalized] = peer_id
+        if resolved.username:
+            data["aliases"][resolved.username.lower()] = peer_id
+        await self._save()
+        return resolved
+
+    def invalidate(self, key: Any, client_account: str | None = None) -> None:
+        """移除实体缓存（频道失效、权限变化时调用），下次访问重新解析"""
+        normalized = _normalize_key(key)
+        for account, data in self._load().items():
+            if client_account is not None and account != client_account:
+                continue
+            peer_id = data["aliases"].get(normalized, normalized)
+            if data["entities"].pop(peer_id, None) is not None:
+                logger.info(f"已移除失效的实体缓存: {key}")
+            data["aliases"] = {k: v for k, v in data["aliases"].items() if v != peer_id}
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "entities": sum(len(data["entities"]) for data in self._load().values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局实体缓存实例
+_entity_cache: EntityCache | None = None
+
+
+def get_entity_cache() -> EntityCache:
+    """获取全局实体缓存实例"""
+    global _entity_cache
+    if _entity_cache is None:
+        _entity_cache = EntityCache()
+    return _entity_cache
+
+
+async def get_cached_entity(client, key: Any) -> CachedEntity:
+    """获取实体信息（优先使用缓存）"""
+    return await get_entity_cache().get(client, key)
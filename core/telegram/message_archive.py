@@ -0,0 +1,227 @@
+"""
+频道消息本地归档
+由实时 NewMessage/MessageEdited/MessageDeleted 事件与启动时的追赶抓取保持更新，
+总结时从归档读取消息，只向 Telegram 请求上次归档之后的缺口。
+
+每个频道的同步状态（channel_archive_state）：
+- last_synced_id: 归档已连续覆盖到的最大消息ID，下次只抓取 id > last_synced_id 的消息
+- covered_since:  归档完整覆盖的起始时间，总结起点早于该时间时需要回填
+
+实时事件只写入消息，只有在本进程内完成过一次同步（追赶或总结抓取）之后、
+且消息ID紧接游标（last_synced_id + 1）时才推进 last_synced_id：
+Telegram 的更新推送不保证送达（断线重连、更新缺口、Bot 账号漏收），
+游标只越过确实连续收到的消息，漏收的消息会在下次同步时从游标处重新抓取。
+客户端断开连接后停止推进，直到再次同步。
+"""
+
+import asyncio
+import logging
+import os
+from datetime import UTC, datetime, timedelta
+
+import core.config as config_module
+from core.infrastructure.database.message_archive_repo import get_message_archive_repo
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_ARCHIVE_ENABLED = os.getenv("MESSAGE_ARCHIVE_ENABLED", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+# 归档保留天数，启动时清理更早的消息
+MESSAGE_ARCHIVE_RETENTION_DAYS = int(os.getenv("MESSAGE_ARCHIVE_RETENTION_DAYS", "30"))
+# 启动追赶时，从未归档过的频道回填的天数（与默认总结窗口一致）
+MESSAGE_ARCHIVE_BACKFILL_DAYS = 7
+# 抓取时每批写入归档的消息数
+_WRITE_BATCH_SIZE = 200
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """转换为 naive UTC，兼容 MySQL DATETIME 列"""
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def _bare_channel_id(value: str) -> str:
+    """去掉数字 ID 的 -100 前缀（事件中的 chat_id 带前缀，频道实体的 id 不带）"""
+    if value.startswith("-100") and value[4:].isdigit():
+        return value[4:]
+    if value.startswith("-") and value[1:].isdigit():
+        return value[1:]
+    return value
+
+
+def resolve_channel(chat_id: str, username: str | None = None) -> str | None:
+    """
+    将频道实体的 ID/username 映射为配置中的频道标识
+
+    Args:
+        chat_id: 频道数字 ID 字符串（可带 -100 前缀）
+        username: 频道 username（可选，不区分大小写）
+
+    Returns:
+        CHANNELS 中对应的频道字符串，未配置时返回 None
+    """
+    bare_id = _bare_channel_id(str(chat_id))
+    username = username.lower() if username else None
+    for channel in config_module.CHANNELS:
+        identifier = channel.strip().rstrip("/").split("/")[-1].lstrip("@")
+        if _bare_channel_id(identifier) == bare_id or (username and identifier.lower() == username):
+            return channel
+    return None
+
+
+class MessageArchive:
+    """频道消息归档服务"""
+
+    def __init__(self, repo=None):
+        self._repo = repo
+        # 本进程内已完成同步的频道 → 当前连续游标，实时事件只能将其推进一位
+        self._live: dict[str, int] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @property
+    def repo(self):
+        if self._repo is None:
+            self._repo = get_message_archive_repo()
+        return self._repo
+
+    def is_enabled(self) -> bool:
+        """归档功能是否启用"""
+        return MESSAGE_ARCHIVE_ENABLED
+
+    def _lock(self, channel: str) -> asyncio.Lock:
+        if channel not in self._locks:
+            self._locks[channel] = asyncio.Lock()
+        return self._locks[channel]
+
+    # ── 同步 ────────────────────────────────────────────────────────────
+
+    async def sync_channel(self, client, channel: str, start_time: datetime) -> int:
+        """
+        确保归档覆盖 start_time 至今的消息，只向 Telegram 抓取缺失的部分
+
+        Args:
+            client: 可读取频道历史的 Telethon 客户端（UserBot 或用户会话）
+            channel: 频道标识
+            start_time: 需要覆盖的起始时间
+
+        Returns:
+            本次从 Telegram 抓取的消息数
+        """
+        async with self._lock(channel):
+            state = await self.repo.get_state(channel)
+            since = _to_naive_utc(start_time)
+
+            if state is None or state["covered_since"] is None or state["covered_since"] > since:
+                # 首次归档或总结起点早于已覆盖范围：从起点回填
+                logger.info(f"频道 {channel} 归档未覆盖起始时间，从 {since} 回填")
+                fetched, last_id = await self._fetch_into_archive(
+                    client, channel, offset_date=start_time
+                )
+                covered_since = since
+            else:
+                fetched, last_id = await self._fetch_into_archive(
+                    client, channel, min_id=state["last_synced_id"]
+                )
+                covered_since = None
+
+            if state is not None:
+                last_id = max(last_id, state["last_synced_id"])
+            await self.repo.update_state(channel, last_id, covered_since)
+            # 同步期间实时事件可能已将游标推进得更远
+            self._live[channel] = max(last_id, self._live.get(channel, 0))
+            logger.info(f"频道 {channel} 归档同步完成，从 Telegram 抓取 {fetched} 条消息")
+            return fetched
+
+    async def _fetch_into_archive(self, client, channel: str, **iter_kwargs) -> tuple[int, int]:
+        """按时间顺序抓取消息写入归档，返回 (抓取条数, 最大消息ID)"""
+        fetched = 0
+        last_id = 0
+        buffer: list[tuple[int, str, datetime]] = []
+
+        async for message in client.iter_messages(channel, reverse=True, **iter_kwargs):
+            fetched += 1
+            last_id = max(last_id, message.id)
+            if message.text:
+                buffer.append((message.id, message.text, _to_naive_utc(message.date)))
+            if len(buffer) >= _WRITE_BATCH_SIZE:
+                await self.repo.upsert_messages(channel, buffer)
+                buffer = []
+
+        await self.repo.upsert_messages(channel, buffer)
+        return fetched, last_id
+
+    async def read_messages(self, channel: str, start_time: datetime) -> list[dict]:
+        """
+        读取归档中 start_time 之后的消息（按消息ID升序）
+
+        Returns:
+            包含 message_id、text、message_date 的字典列表
+        """
+        return await self.repo.get_messages(channel, _to_naive_utc(start_time))
+
+    async def catch_up(self, client, channels: list[str]) -> None:
+        """
+        启动时追赶：清理过期归档，并为每个频道抓取离线期间的消息
+
+        Args:
+            client: 可读取频道历史的 Telethon 客户端
+            channels: 频道列表
+        """
+        cutoff = datetime.now(UTC) - timedelta(days=MESSAGE_ARCHIVE_RETENTION_DAYS)
+        try:
+            pruned = await self.repo.prune_before(_to_naive_utc(cutoff))
+            if pruned:
+                logger.info(f"已清理 {pruned} 条过期归档消息")
+        except Exception as e:
+            logger.error(f"清理过期归档消息失败: {type(e).__name__}: {e}")
+
+        start_time = datetime.now(UTC) - timedelta(days=MESSAGE_ARCHIVE_BACKFILL_DAYS)
+        for channel in channels:
+            try:
+                await self.sync_channel(client, channel, start_time)
+            except Exception as e:
+                logger.error(f"频道 {channel} 归档追赶失败: {type(e).__name__}: {e}")
+
+    # ── 实时事件 ─────────────────────────────────────────────────────────
+
+    async def record_message(
+        self, channel: str, message_id: int, text: str, date: datetime
+    ) -> None:
+        """记录新消息或编辑后的消息"""
+        try:
+            await self.repo.upsert_messages(channel, [(message_id, text, _to_naive_utc(date))])
+            cursor = self._live.get(channel)
+            if cursor is not None and message_id == cursor + 1:
+                self._live[channel] = message_id
+                await self.repo.update_state(channel, message_id)
+        except Exception as e:
+            logger.error(f"归档消息失败: channel={channel}, msg_id={message_id}, {e}")
+
+    def reset_live(self) -> None:
+        """客户端断开连接时调用：之后的实时事件不再推进游标，直到再次同步"""
+        if self._live:
+            logger.info(f"客户端连接中断，{len(self._live)} 个频道的归档游标暂停推进")
+        self._live.clear()
+
+    async def record_delete(self, channel: str, message_ids: list[int]) -> None:
+        """删除归档中的消息"""
+        try:
+            await self.repo.delete_messages(channel, message_ids)
+        except Exception as e:
+            logger.error(f"删除归档消息失败: channel={channel}, {type(e).__name__}: {e}")
+
+
+# 全局实例
+_message_archive: MessageArchive | None = None
+
+
+def get_message_archive() -> MessageArchive:
+    """获取全局消息归档实例"""
+    global _message_archive
+    if _message_archive is None:
+        _message_archive = MessageArchive()
+    return _message_archive
@@ -0,0 +1,125 @@
+"""
+总结消息流水线
+将逐条抓取的频道消息直接整理为总结上下文，不先缓存完整的原始消息列表：
+
+- 跳过报告消息、无文本消息、纯链接消息与重复消息
+- 按本地估算的 token 数累计，超过预算后均匀抽样：
+  已保留的消息隔一条丢弃一条，之后的消息按加倍的步长采样，
+  保证内存与 LLM 开销有上限，同时保留整个时间范围内的消息分布
+
+启用代表性抽样时，收集预算放大为候选池，再由 core.ai.representative_sampler
+按话题聚类挑选到频道预算以内。
+"""
+
+import hashlib
+import os
+import re
+
+from core.ai.token_estimator import estimate_tokens
+
+# 每条消息保留的最大字符数
+MESSAGE_MAX_CHARS = 500
+# 每个频道总结上下文的 token 预算，0 表示不限制
+SUMMARY_CHANNEL_TOKEN_BUDGET = max(0, int(os.getenv("SUMMARY_CHANNEL_TOKEN_BUDGET", "60000")))
+
+_URL_PATTERN = re.compile(r"(?:https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+_NON_WORD_PATTERN = re.compile(r"[\W_]+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def is_link_only(text: str) -> bool:
+    """判断消息是否只有链接（去掉链接后不含任何文字）"""
+    if not _URL_PATTERN.search(text):
+        return False
+    return not _NON_WORD_PATTERN.sub("", _URL_PATTERN.sub("", text))
+
+
+def _fingerprint(text: str) -> bytes:
+    """忽略空白与大小写差异的消息指纹"""
+    normalized = _WHITESPACE_PATTERN.sub(" ", text).strip().casefold()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class ChannelMessageCollector:
+    """按 token 预算收集单个频道的总结消息"""
+
+    def __init__(self, channel: str, exclude_ids=(), token_budget: int | None = None):
+        """
+        Args:
+            channel: 频道标识（用于生成消息链接）
+            exclude_ids: 要排除的报告消息ID
+            token_budget: token 预算，None 时使用 SUMMARY_CHANNEL_TOKEN_BUDGET，0 表示不限制
+        """
+        self._link_prefix = f"https://t.me/{channel.split('/')[-1]}"
+        self._exclude_ids = set(exclude_ids)
+        self._budget = SUMMARY_CHANNEL_TOKEN_BUDGET if token_budget is None else token_budget
+        self._seen: set[bytes] = set()
+        self._kept: list[tuple[int, str, int]] = []
+        self._tokens = 0
+        # 当前采样步长与已通过过滤的消息序号
+        self._stride = 1
+        self._eligible = 0
+        self.stats = {
+            "processed": 0,
+            "excluded": 0,
+            "empty": 0,
+            "link_only": 0,
+            "duplicate": 0,
+            "sampled_out": 0,
+        }
+
+    def add(self, message_id: int, text: str | None) -> None:
+        """处理一条消息"""
+        self.stats["processed"] += 1
+        if message_id in self._exclude_ids:
+            self.stats["excluded"] += 1
+            return
+        if not text or not text.strip():
+            self.stats["empty"] += 1
+            return
+        if is_link_only(text):
+            self.stats["link_only"] += 1
+            return
+
+        digest = _fingerprint(text)
+        if digest in self._seen:
+            self.stats["duplicate"] += 1
+            return
+        self._seen.add(digest)
+
+        index = self._eligible
+        self._eligible += 1
+        if index % self._stride:
+            self.stats["sampled_out"] += 1
+            return
+
+        formatted = f"内容: {text[:MESSAGE_MAX_CHARS]}\n链接: {self._link_prefix}/{message_id}"
+        tokens = estimate_tokens(formatted)
+        self._kept.append((message_id, formatted, tokens))
+        self._tokens += tokens
+
+        # 超出预算：隔一条丢弃一条，后续按加倍步长采样
+        while self._budget and self._tokens > self._budget and len(self._kept) > 1:
+            dropped = len(self._kept) // 2
+            self._kept = self._kept[::2]
+            self._tokens = sum(tokens for _, _, tokens in self._kept)
+            self._stride *= 2
+            self.stats["sampled_out"] += dropped
+
+    @property
+    def tokens(self) -> int:
+        """已保留消息的估算 token 数"""
+        return self._tokens
+
+    @property
+    def sampled(self) -> bool:
+        """是否因超出预算进行了抽样"""
+        return self._stride > 1
+
+    def messages(self) -> list[str]:
+        """按时间顺序返回保留的格式化消息"""
+        return [formatted for _, formatted, _ in self._kept]
+
+    def entries(self) -> list[tuple[int, str, int]]:
+        """按时间顺序返回保留的 (消息ID, 格式化消息, token 数)"""
+        return list(self._kept)
@@ -3,12 +3,22 @@ Telegram消息发送模块
 包含消息抓取、长消息发送和报告发送功能
 """
 
+import asyncio
 import json
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
 from datetime import UTC, datetime, timedelta
 
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
 
+from core.ai.representative_sampler import (
+    REPRESENTATIVE_POOL_FACTOR,
+    REPRESENTATIVE_SAMPLING_ENABLED,
+    select_representative_indices,
+)
 from core.config import (
     ADMIN_LIST,
     API_HASH,
@@ -28,10 +38,175 @@ from .client_utils import (
     split_message_smart,
     validate_message_entities,
 )
+from .entity_cache import INVALID_ENTITY_ERRORS, get_cached_entity, get_entity_cache
+from .message_archive import get_message_archive
+from .message_pipeline import SUMMARY_CHANNEL_TOKEN_BUDGET, ChannelMessageCollector
 from .poll_handlers import send_poll
+from .report_delivery import DeliveryResult, deliver_report, send_parts, split_report
 
 logger = logging.getLogger(__name__)
 
+# 同时抓取的频道数（跨调用共享），单个频道遇到 FloodWait 后的最大重试次数
+FETCH_CHANNEL_CONCURRENCY = max(1, int(os.getenv("FETCH_CHANNEL_CONCURRENCY", "4")))
+FETCH_FLOOD_RETRIES = 3
+
+
+class FetchLimiter:
+    """跨调用共享的抓取限流器：限制同时抓取的频道数，遇到 FloodWait 时所有频道一起暂停"""
+
+    def __init__(self, concurrency: int):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._resume_at = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """获取一个抓取名额，并等待进行中的 FloodWait 结束"""
+        async with self._semaphore:
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                logger.info(f"等待 Telegram 限流解除: {delay:.0f} 秒")
+                await asyncio.sleep(delay)
+            yield
+
+    def report_flood_wait(self, seconds: float) -> None:
+        """记录 FloodWait，之后获取名额的抓取都会等待到限流解除"""
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+_fetch_limiter = FetchLimiter(FETCH_CHANNEL_CONCURRENCY)
+# 临时会话共用同一个会话文件，同一时间只允许一个调用使用
+_temp_session_lock = asyncio.Lock()
+
+
+async def _read_from_archive(client, channel, start_time):
+    """同步并读取频道的本地归档
+
+    Returns:
+        归档消息列表；归档未启用或不可用时返回 None，由调用方直接从 Telegram 抓取
+    """
+    archive = get_message_archive()
+    if not archive.is_enabled():
+        return None
+    try:
+        await archive.sync_channel(client, channel, start_time)
+        return await archive.read_messages(channel, start_time)
+    except FloodWaitError:
+        raise
+    except Exception as e:
+        logger.warning(
+            f"频道 {channel} 消息归档不可用，直接从 Telegram 抓取: {type(e).__name__}: {e}"
+        )
+        return None
+
+
+async def _fetch_channel(client, channel, start_time, exclude_ids):
+    """抓取单个频道的消息（优先读取本地归档）
+
+    消息逐条经过 ChannelMessageCollector 过滤、去重；超出频道 token 预算时
+    按消息向量聚类挑选代表性消息（不可用时按时间均匀抽样）。
+
+    Returns:
+        list[str]: 格式化后的消息列表
+    """
+    budget = SUMMARY_CHANNEL_TOKEN_BUDGET
+    pool_budget = budget * REPRESENTATIVE_POOL_FACTOR if REPRESENTATIVE_SAMPLING_ENABLED else budget
+    collector = ChannelMessageCollector(channel, exclude_ids, token_budget=pool_budget)
+    logger.info(f"开始抓取频道: {channel}")
+    logger.info(f"频道 {channel} 要排除的报告消息ID列表: {exclude_ids}")
+
+    # 优先从本地归档读取，只向 Telegram 抓取上次归档之后的缺口
+    archived = await _read_from_archive(client, channel, start_time)
+    if archived is not None:
+        source = "归档"
+        for row in archived:
+            collector.add(row["message_id"], row["text"])
+    else:
+        source = "Telegram"
+        async for message in client.iter_messages(channel, offset_date=start_time, reverse=True):
+            collector.add(message.id, message.text)
+
+    messages = collector.messages()
+    stats = collector.stats
+    logger.info(
+        f"频道 {channel} 从{source}抓取完成，共处理 {stats['processed']} 条消息，"
+        f"候选 {len(messages)} 条（约 {collector.tokens} tokens），"
+        f"跳过报告 {stats['excluded']} 条、无文本 {stats['empty']} 条、"
+        f"纯链接 {stats['link_only']} 条、重复 {stats['duplicate']} 条"
+    )
+    if collector.sampled:
+        logger.info(f"频道 {channel} 超出 token 预算，已均匀抽样丢弃 {stats['sampled_out']} 条消息")
+    if budget and collector.tokens > budget:
+        messages = await _select_representatives(client, channel, collector, budget)
+    return messages
+
+
+async def _select_representatives(client, channel, collector, budget):
+    """从候选池中挑选代表性消息，使总 token 数不超过频道预算"""
+    entries = collector.entries()
+    try:
+        # 实时 RAG 以频道实体 ID 作为消息向量 ID 前缀
+        entity = await get_cached_entity(client, channel)
+        channel_id = str(entity.id)
+    except Exception as e:
+        logger.warning(f"解析频道 {channel} 实体失败，改为均匀抽样: {type(e).__name__}: {e}")
+        channel_id = None
+
+    indices = await asyncio.to_thread(
+        select_representative_indices,
+        channel_id,
+        [message_id for message_id, _, _ in entries],
+        [tokens for _, _, tokens in entries],
+        budget,
+    )
+    logger.info(f"频道 {channel} 候选 {len(entries)} 条消息，抽样保留 {len(indices)} 条")
+    return [entries[i][1] for i in indices]
+
+
+async def _fetch_channel_with_limit(client, channel, start_time, exclude_ids):
+    """在共享限流器下抓取单个频道，遇到 FloodWait 时按提示等待后重试"""
+    for attempt in range(FETCH_FLOOD_RETRIES + 1):
+        async with _fetch_limiter.slot():
+            try:
+                return await _fetch_channel(client, channel, start_time, exclude_ids)
+            except FloodWaitError as e:
+                if attempt == FETCH_FLOOD_RETRIES:
+                    raise
+                logger.warning(
+                    f"抓取频道 {channel} 触发 FloodWait，{e.seconds} 秒后重试"
+                    f"（第 {attempt + 1}/{FETCH_FLOOD_RETRIES} 次）"
+                )
+                _fetch_limiter.report_flood_wait(e.seconds)
+
+
+async def _fetch_channels(client, channels, start_time, report_message_ids):
+    """并发抓取多个频道，单个频道失败不影响其他频道"""
+    messages_by_channel = {}
+    done = 0
+
+    async def fetch(channel):
+        nonlocal done
+        try:
+            result = await _fetch_channel_with_limit(
+                client, channel, start_time, report_message_ids.get(channel, [])
+            )
+        except Exception as e:
+            record_error(e, f"fetch_messages_channel_{channel}")
+            logger.error(f"抓取频道 {channel} 消息时出错: {e}")
+            result = None
+        done += 1
+        status = "完成" if result is not None else "失败"
+        logger.info(f"抓取进度: {done}/{len(channels)}，频道 {channel} {status}")
+        return result
+
+    results = await asyncio.gather(*(fetch(channel) for channel in channels))
+    for channel, result in zip(channels, results, strict=True):
+        if result is not None:
+            messages_by_channel[channel] = result
+
+    total = sum(len(messages) for messages in messages_by_channel.values())
+    logger.info(f"所有指定频道消息抓取完成，共 {total} 条有效消息")
+    return messages_by_channel
+
 
 @retry_with_backoff(
     max_retries=3,
@@ -45,32 +220,16 @@ async def fetch_last_week_messages(
 ):
     """抓取指定时间范围的频道消息
 
+    多个频道并发抓取，并发数由 FETCH_CHANNEL_CONCURRENCY 限制；遇到 FloodWait 时
+    所有抓取按 Telegram 提示的时间暂停后重试。
+
     Args:
         channels_to_fetch: 可选，要抓取的频道列表。如果为None，则抓取所有配置的频道。
         start_time: 可选，开始抓取的时间。如果为None，则默认抓取过去一周的消息。
         report_message_ids: 可选，要排除的报告消息ID列表，按频道分组。
     """
-    # 确保 API_ID 是整数
     logger.info("开始抓取指定时间范围的频道消息")
 
-    # 优先使用 UserBot 客户端
-    userbot = get_userbot_client()
-    use_temp_session = False
-
-    if userbot and userbot.is_available():
-        logger.info("使用 UserBot 客户端抓取消息")
-        client = userbot.get_client()
-        # UserBot 已经是连接状态，不需要使用 async with
-    else:
-        # 降级方案：创建临时会话
-        if userbot:
-            logger.warning("UserBot 不可用，使用临时会话抓取消息")
-        else:
-            logger.info("UserBot 未启用，使用临时会话抓取消息")
-
-        client = TelegramClient("data/sessions/user_session", int(API_ID), API_HASH)
-        use_temp_session = True
-
     # 如果没有提供开始时间，则默认抓取过去一周的消息
     if start_time is None:
         start_time = datetime.now(UTC) - timedelta(days=7)
@@ -82,7 +241,6 @@ async def fetch_last_week_messages(
             f"抓取时间范围：{start_time.astimezone().strftime('%Y-%m-%d %H:%M:%S %Z')} 至今"
         )
 
-    messages_by_channel = {}  # 按频道分组的消息字典
     report_message_ids = report_message_ids or {}
 
     # 确定要抓取的频道
@@ -94,74 +252,32 @@ async def fetch_last_week_messages(
         # 抓取所有配置的频道
         if not CHANNELS:
             logger.warning("没有配置任何频道，无法抓取消息")
-            if use_temp_session:
-                await client.disconnect()
-            return messages_by_channel
+            return {}
         channels = CHANNELS
         logger.info(f"正在抓取所有 {len(channels)} 个频道的消息，时间范围: {start_time} 至今")
 
-    total_message_count = 0
-
-    try:
-        # 如果使用临时会话，需要连接
-        if use_temp_session:
-            await client.connect()
-
-        # 遍历所有要抓取的频道
-        for channel in channels:
-            channel_messages = []
-            channel_message_count = 0
-            skipped_report_count = 0
-            logger.info(f"开始抓取频道: {channel}")
-
-            # 获取当前频道要排除的报告消息ID列表
-            exclude_ids = report_message_ids.get(channel, [])
-            logger.info(f"频道 {channel} 要排除的报告消息ID列表: {exclude_ids}")
-
-            try:
-                async for message in client.iter_messages(
-                    channel, offset_date=start_time, reverse=True
-                ):
-                    total_message_count += 1
-                    channel_message_count += 1
-
-                    # 跳过报告消息
-                    if message.id in exclude_ids:
-                        skipped_report_count += 1
-                        logger.debug(f"跳过报告消息，ID: {message.id}")
-                        continue
-
-                    if message.text:
-                        # 动态获取频道名用于生成链接
-                        channel_part = channel.split("/")[-1]
-                        msg_link = f"https://t.me/{channel_part}/{message.id}"
-                        channel_messages.append(f"内容: {message.text[:500]}\n链接: {msg_link}")
-
-                        # 每抓取10条消息记录一次日志
-                        if len(channel_messages) % 10 == 0:
-                            logger.debug(
-                                f"频道 {channel} 已抓取 {len(channel_messages)} 条有效消息"
-                            )
-            except Exception as e:
-                record_error(e, f"fetch_messages_channel_{channel}")
-                logger.error(f"抓取频道 {channel} 消息时出错: {e}")
-                # 继续处理其他频道
-                continue
-
-            # 将当前频道的消息添加到字典中
-            messages_by_channel[channel] = channel_messages
-            logger.info(
-                f"频道 {channel} 抓取完成，共处理 {channel_message_count} 条消息，其中 {len(channel_messages)} 条包含文本内容，跳过了 {skipped_report_count} 条报告消息"
-            )
-
-        logger.info(f"所有指定频道消息抓取完成，共处理 {total_message_count} 条消息")
+    # 优先使用 UserBot 客户端
+    userbot = get_userbot_client()
+    if userbot and userbot.is_available():
+        logger.info("使用 UserBot 客户端抓取消息")
+        # UserBot 已经是连接状态，不需要使用 async with
+        return await _fetch_channels(userbot.get_client(), channels, start_time, report_message_ids)
 
-    finally:
-        # 如果使用临时会话，需要断开连接
-        if use_temp_session and client.is_connected():
-            await client.disconnect()
+    # 降级方案：创建临时会话
+    if userbot:
+        logger.warning("UserBot 不可用，使用临时会话抓取消息")
+    else:
+        logger.info("UserBot 未启用，使用临时会话抓取消息")
 
-    return messages_by_channel
+    async with _temp_session_lock:
+        client = TelegramClient("data/sessions/user_session", int(API_ID), API_HASH)
+        try:
+            await client.connect()
+            return await _fetch_channels(client, channels, start_time, report_message_ids)
+        finally:
+            # 如果使用临时会话，需要断开连接
+            if client.is_connected():
+                await client.disconnect()
 
 
 async def send_long_message(
@@ -340,11 +456,60 @@ async def send_long_message(
                         logger.error(f"即使移除格式后发送第 {i + 1} 段仍然失败: {e2}")
 
 
+def _split_source_report(summary_text, channel_title=None):
+    """将发往源频道的报告按消息长度分段（预留分段标题的长度），并修复各段的格式问题"""
+    max_length = 4000
+    if len(summary_text) <= max_length:
+        return [summary_text]
+
+    channel_title = channel_title or get_text("messaging.channel_title_fallback")
+    max_title_length = len(f"📋 **{channel_title} (99/99)**\n\n")
+    content_max_length = max_length - max_title_length
+
+    # 使用智能分割算法
+    try:
+        parts = split_message_smart(summary_text, content_max_length, preserve_md=True)
+        logger.info(f"智能分割完成，共分成 {len(parts)} 段")
+
+        # 验证每个分段的实体完整性
+        for i, part in enumerate(parts):
+            is_valid, error_msg = validate_message_entities(part)
+            if not is_valid:
+                logger.warning(f"第 {i + 1} 段实体验证失败: {error_msg}")
+                # 尝试修复：移除有问题的格式
+                parts[i] = part.replace("**", "").replace("`", "")
+                logger.info(f"已修复第 {i + 1} 段的格式问题")
+    except Exception as e:
+        logger.error(f"智能分割失败，使用简单分割: {e}")
+        # 回退到简单分割
+        parts = [
+            summary_text[i : i + content_max_length]
+            for i in range(0, len(summary_text), content_max_length)
+        ]
+        logger.info(f"简单分割完成，共分成 {len(parts)} 段")
+    return parts
+
+
+def _source_delivery_notice(delivery: DeliveryResult, channel: str) -> str:
+    """源频道投递完成后发给管理员的通知：全部送达为成功，有分段失败时报告失败段数"""
+    if not delivery.failed_parts:
+        return get_text("messaging.send_success", channel=channel)
+    error = get_text(
+        "messaging.partial_delivery",
+        failed=delivery.failed_parts,
+        total=len(delivery.message_ids) + delivery.failed_parts,
+        error=delivery.error,
+    )
+    return get_text("messaging.send_error", channel=channel, error=error)
+
+
 async def send_report(
     summary_text, source_channel=None, client=None, skip_admins=False, message_count=0
 ):
     """发送报告
 
+    管理员之间并发投递，同一聊天内的分段按顺序发送，限流与 FloodWait 重试见 report_delivery。
+
     Args:
         summary_text: 报告内容
         source_channel: 源频道，可选。如果提供，将向该频道发送报告
@@ -357,7 +522,8 @@ async def send_report(
             {
                 "summary_message_ids": [12345, 12346],  # 总结消息ID列表
                 "poll_message_id": 12347,                # 投票消息ID(单个)
-                "button_message_id": 12348               # 按钮消息ID(单个)
+                "button_message_id": 12348,              # 按钮消息ID(单个)
+                "admin_deliveries": [...]                # 每个管理员的投递结果
             }
     """
     logger.info("开始发送报告")
@@ -367,6 +533,8 @@ async def send_report(
     report_message_ids = []
     poll_message_id = None
     button_message_id = None
+    # 每个管理员的投递结果
+    admin_deliveries = []
 
     try:
         # 确定使用哪个客户端实例
@@ -397,7 +565,7 @@ async def send_report(
             channel_actual_name = None
             if source_channel:
                 try:
-                    channel_entity = await use_client.get_entity(source_channel)
+                    channel_entity = await get_cached_entity(use_client, source_channel)
                     channel_actual_name = channel_entity.title
                     logger.info(f"获取到频道实际名称: {channel_actual_name}")
                 except Exception as e:
@@ -416,31 +584,11 @@ async def send_report(
             # 跟踪源频道的消息ID（用于置顶和投票回复）
             source_channel_message_ids = []
             if not skip_admins:
-                for admin_id in ADMIN_LIST:
-                    try:
-                        logger.info(f"正在向管理员 {admin_id} 发送报告")
-                        # 发送消息并收集消息ID
-                        if len(summary_text_for_admins) <= 4000:
-                            msg = await use_client.send_message(
-                                admin_id, summary_text_for_admins, link_preview=False
-                            )
-                            admin_message_ids.append(msg.id)
-                        else:
-                            # 长消息分段发送
-                            parts = split_message_smart(
-                                summary_text_for_admins, 4000, preserve_md=True
-                            )
-                            for part in parts:
-                                msg = await use_client.send_message(
-                                    admin_id, part, link_preview=False
-                                )
-                                admin_message_ids.append(msg.id)
-                        logger.info(f"成功向管理员 {admin_id} 发送报告")
-                    except Exception as e:
-                        logger.error(
-                            f"向管理员 {admin_id} 发送报告失败: {type(e).__name__}: {e}",
-                            exc_info=True,
-                        )
+                admin_deliveries = await deliver_report(
+                    use_client, ADMIN_LIST, split_report(summary_text_for_admins)
+                )
+                for delivery in admin_deliveries:
+                    admin_message_ids.extend(delivery.message_ids)
 
                 # 如果成功发送给管理员，使用这些消息ID作为 report_message_ids
                 if admin_message_ids and not report_message_ids:
@@ -455,117 +603,38 @@ async def send_report(
                 try:
                     logger.info(f"正在向源频道 {source_channel} 发送报告")
 
-                    # 检查频道是否为仅讨论组模式（无写入权限）
-                    try:
-                        # 尝试获取频道实体和权限
-                        channel_entity = await use_client.get_entity(source_channel)
-                        logger.info(
-                            f"成功获取频道实体: {channel_entity.title if hasattr(channel_entity, 'title') else source_channel}"
-                        )
-
-                        # 检查是否可以发送消息（发送测试）
-                        # 注意：某些频道只允许讨论组，不允许直接发送消息
-                        # 如果发送失败，跳过频道发送但继续执行管理员通知
-
-                    except Exception as e:
-                        logger.warning(f"获取频道实体失败: {e}，将尝试直接发送")
+                    # 按顺序发送各分段并收集消息ID
+                    source_delivery = await send_parts(
+                        use_client,
+                        source_channel,
+                        _split_source_report(summary_text_for_source, channel_actual_name),
+                    )
+                    source_channel_message_ids.extend(source_delivery.message_ids)
+                    report_message_ids.extend(source_delivery.message_ids)
+                    if source_delivery.exception is not None and not source_delivery.message_ids:
+                        raise source_delivery.exception
 
-                    # 直接调用use_client.send_message并收集消息ID
-                    if len(summary_text_for_source) <= 4000:
-                        # 短消息直接发送
-                        msg = await use_client.send_message(
-                            source_channel, summary_text_for_source, link_preview=False
+                    if source_delivery.failed_parts:
+                        logger.warning(
+                            f"向源频道 {source_channel} 发送报告部分失败，"
+                            f"{source_delivery.failed_parts} 段未发送，消息ID: {report_message_ids}"
                         )
-                        source_channel_message_ids.append(msg.id)
-                        report_message_ids.append(msg.id)
                     else:
-                        # 长消息分段发送，收集每个分段的消息ID
-                        # 使用频道实际名称作为分段消息标题
-                        channel_title = (
-                            channel_actual_name
-                            if channel_actual_name
-                            else get_text("messaging.channel_title_fallback")
+                        logger.info(
+                            f"成功向源频道 {source_channel} 发送报告，消息ID: {report_message_ids}"
                         )
 
-                        # 使用send_long_message函数进行智能分割和发送
-                        # 但需要收集消息ID，所以需要自定义实现
-                        max_length = 4000
-                        max_title_length = len(f"📋 **{channel_title} (99/99)**\n\n")
-                        content_max_length = max_length - max_title_length
-
-                        # 使用智能分割算法
-                        try:
-                            parts = split_message_smart(
-                                summary_text_for_source, content_max_length, preserve_md=True
-                            )
-                            logger.info(f"智能分割完成，共分成 {len(parts)} 段")
-
-                            # 验证每个分段的实体完整性
-                            for i, part in enumerate(parts):
-                                is_valid, error_msg = validate_message_entities(part)
-                                if not is_valid:
-                                    logger.warning(f"第 {i + 1} 段实体验证失败: {error_msg}")
-                                    # 尝试修复：移除有问题的格式
-                                    parts[i] = part.replace("**", "").replace("`", "")
-                                    logger.info(f"已修复第 {i + 1} 段的格式问题")
-                        except Exception as e:
-                            logger.error(f"智能分割失败，使用简单分割: {e}")
-                            # 回退到简单分割
-                            parts = []
-                            text_length = len(summary_text_for_source)
-                            for i in range(0, text_length, content_max_length):
-                                part = summary_text_for_source[i : i + content_max_length]
-                                if part:
-                                    parts.append(part)
-                            logger.info(f"简单分割完成，共分成 {len(parts)} 段")
-
-                        # 发送所有部分并收集消息ID
-                        for i, part in enumerate(parts):
-                            # 不显示任何标题，直接发送内容
-                            part_text = part
-                            try:
-                                msg = await use_client.send_message(
-                                    source_channel, part_text, link_preview=False
-                                )
-                                source_channel_message_ids.append(msg.id)
-                                report_message_ids.append(msg.id)
-                                logger.debug(
-                                    f"成功发送第 {i + 1}/{len(parts)} 段，消息ID: {msg.id}"
-                                )
-                            except Exception as e:
-                                logger.error(f"发送第 {i + 1} 段失败: {e}")
-                                # 尝试移除格式后重试
-                                try:
-                                    plain_text = part_text.replace("**", "").replace("`", "")
-                                    msg = await use_client.send_message(
-                                        source_channel, plain_text, link_preview=False
-                                    )
-                                    source_channel_message_ids.append(msg.id)
-                                    report_message_ids.append(msg.id)
-                                    logger.info(
-                                        f"已成功发送第 {i + 1} 段（移除格式后），消息ID: {msg.id}"
-                                    )
-                                except Exception as e2:
-                                    logger.error(f"即使移除格式后发送第 {i + 1} 段仍然失败: {e2}")
-
-                    logger.info(
-                        f"成功向源频道 {source_channel} 发送报告，消息ID: {report_message_ids}"
-                    )
-
-                    # 向管理员发送频道发送成功的通知
+                    # 向管理员发送频道投递结果的通知
                     if not skip_admins:
-                        for admin_id in ADMIN_LIST:
-                            try:
-                                await use_client.send_message(
-                                    admin_id,
-                                    get_text(
-                                        "messaging.send_success",
-                                        channel=channel_actual_name or source_channel,
-                                    ),
-                                    link_preview=False,
+                        await deliver_report(
+                            use_client,
+                            ADMIN_LIST,
+                            [
+                                _source_delivery_notice(
+                                    source_delivery, channel_actual_name or source_channel
                                 )
-                            except Exception as e:
-                                logger.debug(f"发送频道成功通知到管理员失败: {e}")
+                            ],
+                        )
 
                     # 自动置顶第一条消息（必须使用频道中的消息ID）
                     if source_channel_message_ids:
@@ -603,6 +672,8 @@ async def send_report(
                         f"向源频道 {source_channel} 发送报告失败: {type(e).__name__}: {e}",
                         exc_info=True,
                     )
+                    if isinstance(e, INVALID_ENTITY_ERRORS):
+                        get_entity_cache().invalidate(source_channel)
 
                     # 特殊处理：频道无写入权限错误
                     if "ChatWriteForbiddenError" in type(
@@ -619,36 +690,28 @@ async def send_report(
 
                         # 向管理员发送详细的失败通知
                         if not skip_admins:
-                            for admin_id in ADMIN_LIST:
-                                try:
-                                    notification = (
-                                        get_text(
-                                            "messaging.send_forbidden",
-                                            channel=channel_actual_name or source_channel,
-                                        )
-                                        + f"\n\n{summary_text_for_source}"
-                                    )
-                                    await use_client.send_message(
-                                        admin_id, notification, link_preview=False
-                                    )
-                                except Exception as notify_error:
-                                    logger.error(f"发送失败通知到管理员失败: {notify_error}")
+                            notification = (
+                                get_text(
+                                    "messaging.send_forbidden",
+                                    channel=channel_actual_name or source_channel,
+                                )
+                                + f"\n\n{summary_text_for_source}"
+                            )
+                            await deliver_report(use_client, ADMIN_LIST, split_report(notification))
                     else:
                         # 其他错误，也向管理员发送通知
                         if not skip_admins:
-                            for admin_id in ADMIN_LIST:
-                                try:
-                                    await use_client.send_message(
-                                        admin_id,
-                                        get_text(
-                                            "messaging.send_error",
-                                            channel=channel_actual_name or source_channel,
-                                            error=f"{type(e).__name__}: {e}",
-                                        ),
-                                        link_preview=False,
+                            await deliver_report(
+                                use_client,
+                                ADMIN_LIST,
+                                [
+                                    get_text(
+                                        "messaging.send_error",
+                                        channel=channel_actual_name or source_channel,
+                                        error=f"{type(e).__name__}: {e}",
                                     )
-                                except Exception as notify_error:
-                                    logger.error(f"发送失败通知到管理员失败: {notify_error}")
+                                ],
+                            )
         else:
             # 创建新的客户端实例
             async with use_client:
@@ -659,7 +722,7 @@ async def send_report(
                 channel_actual_name = None
                 if source_channel:
                     try:
-                        channel_entity = await use_client.get_entity(source_channel)
+                        channel_entity = await get_cached_entity(use_client, source_channel)
                         channel_actual_name = channel_entity.title
                         logger.info(f"获取到频道实际名称: {channel_actual_name}")
                     except Exception as e:
@@ -674,18 +737,9 @@ async def send_report(
 
                 # 向所有管理员发送消息（除非跳过）
                 if not skip_admins:
-                    for admin_id in ADMIN_LIST:
-                        try:
-                            logger.info(f"正在向管理员 {admin_id} 发送报告")
-                            await send_long_message(
-                                use_client, admin_id, summary_text_for_admins, show_pagination=False
-                            )
-                            logger.info(f"成功向管理员 {admin_id} 发送报告")
-                        except Exception as e:
-                            logger.error(
-                                f"向管理员 {admin_id} 发送报告失败: {type(e).__name__}: {e}",
-                                exc_info=True,
-                            )
+                    admin_deliveries = await deliver_report(
+                        use_client, ADMIN_LIST, split_report(summary_text_for_admins)
+                    )
                 else:
                     logger.info("跳过向管理员发送报告")
 
@@ -694,86 +748,40 @@ async def send_report(
                     try:
                         logger.info(f"正在向源频道 {source_channel} 发送报告")
 
-                        # 直接调用use_client.send_message并收集消息ID
-                        if len(summary_text_for_source) <= 4000:
-                            # 短消息直接发送
-                            msg = await use_client.send_message(
-                                source_channel, summary_text_for_source, link_preview=False
+                        # 按顺序发送各分段并收集消息ID
+                        source_delivery = await send_parts(
+                            use_client,
+                            source_channel,
+                            _split_source_report(summary_text_for_source, channel_actual_name),
+                        )
+                        report_message_ids.extend(source_delivery.message_ids)
+                        if (
+                            source_delivery.exception is not None
+                            and not source_delivery.message_ids
+                        ):
+                            raise source_delivery.exception
+
+                        if source_delivery.failed_parts:
+                            logger.warning(
+                                f"向源频道 {source_channel} 发送报告部分失败，"
+                                f"{source_delivery.failed_parts} 段未发送，"
+                                f"消息ID: {report_message_ids}"
                             )
-                            report_message_ids.append(msg.id)
+                            if not skip_admins:
+                                await deliver_report(
+                                    use_client,
+                                    ADMIN_LIST,
+                                    [
+                                        _source_delivery_notice(
+                                            source_delivery, channel_actual_name or source_channel
+                                        )
+                                    ],
+                                )
                         else:
-                            # 长消息分段发送，收集每个分段的消息ID
-                            # 使用频道实际名称作为分段消息标题
-                            channel_title = (
-                                channel_actual_name
-                                if channel_actual_name
-                                else get_text("messaging.channel_title_fallback")
+                            logger.info(
+                                f"成功向源频道 {source_channel} 发送报告，消息ID: {report_message_ids}"
                             )
 
-                            # 使用智能分割算法
-                            max_length = 4000
-                            max_title_length = len(f"📋 **{channel_title} (99/99)**\n\n")
-                            content_max_length = max_length - max_title_length
-
-                            # 使用智能分割算法
-                            try:
-                                parts = split_message_smart(
-                                    summary_text_for_source, content_max_length, preserve_md=True
-                                )
-                                logger.info(f"智能分割完成，共分成 {len(parts)} 段")
-
-                                # 验证每个分段的实体完整性
-                                for i, part in enumerate(parts):
-                                    is_valid, error_msg = validate_message_entities(part)
-                                    if not is_valid:
-                                        logger.warning(f"第 {i + 1} 段实体验证失败: {error_msg}")
-                                        # 尝试修复：移除有问题的格式
-                                        parts[i] = part.replace("**", "").replace("`", "")
-                                        logger.info(f"已修复第 {i + 1} 段的格式问题")
-                            except Exception as e:
-                                logger.error(f"智能分割失败，使用简单分割: {e}")
-                                # 回退到简单分割
-                                parts = []
-                                text_length = len(summary_text_for_source)
-                                for i in range(0, text_length, content_max_length):
-                                    part = summary_text_for_source[i : i + content_max_length]
-                                    if part:
-                                        parts.append(part)
-                                logger.info(f"简单分割完成，共分成 {len(parts)} 段")
-
-                            # 发送所有部分并收集消息ID
-                            for i, part in enumerate(parts):
-                                # 不显示任何标题，直接发送内容
-                                part_text = part
-                                try:
-                                    msg = await use_client.send_message(
-                                        source_channel, part_text, link_preview=False
-                                    )
-                                    report_message_ids.append(msg.id)
-                                    logger.debug(
-                                        f"成功发送第 {i + 1}/{len(parts)} 段，消息ID: {msg.id}"
-                                    )
-                                except Exception as e:
-                                    logger.error(f"发送第 {i + 1} 段失败: {e}")
-                                    # 尝试移除格式后重试
-                                    try:
-                                        plain_text = part_text.replace("**", "").replace("`", "")
-                                        msg = await use_client.send_message(
-                                            source_channel, plain_text, link_preview=False
-                                        )
-                                        report_message_ids.append(msg.id)
-                                        logger.info(
-                                            f"已成功发送第 {i + 1} 段（移除格式后），消息ID: {msg.id}"
-                                        )
-                                    except Exception as e2:
-                                        logger.error(
-                                            f"即使移除格式后发送第 {i + 1} 段仍然失败: {e2}"
-                                        )
-
-                        logger.info(
-                            f"成功向源频道 {source_channel} 发送报告，消息ID: {report_message_ids}"
-                        )
-
                         # 自动置顶第一条消息
                         if report_message_ids:
                             try:
@@ -802,6 +810,8 @@ async def send_report(
                             f"向源频道 {source_channel} 发送报告失败: {type(e).__name__}: {e}",
                             exc_info=True,
                         )
+                        if isinstance(e, INVALID_ENTITY_ERRORS):
+                            get_entity_cache().invalidate(source_channel)
 
         # ✅ 新增：保存到数据库
         # 如果有消息ID（说明发送成功），就保存到数据库
@@ -816,7 +826,7 @@ async def send_report(
                 save_channel_id = CHANNELS[0]
                 # 重新获取频道名称
                 try:
-                    channel_entity = await use_client.get_entity(save_channel_id)
+                    channel_entity = await get_cached_entity(use_client, save_channel_id)
                     save_channel_name = channel_entity.title
                 except Exception:
                     save_channel_name = save_channel_id.split("/")[-1]
@@ -845,6 +855,12 @@ async def send_report(
                 if summary_id:
                     logger.info(f"总结已保存到数据库，记录ID: {summary_id}")
 
+                    from core.ai.memory_manager import schedule_summary_metadata
+
+                    schedule_summary_metadata(
+                        summary_id, save_channel_id, save_channel_name, summary_text_for_source
+                    )
+
                     # ✅ v3.0.0新增：生成并保存向量
                     try:
                         from core.ai.vector_store import get_vector_store
@@ -895,9 +911,15 @@ async def send_report(
             "summary_message_ids": report_message_ids,
             "poll_message_id": poll_message_id,
             "button_message_id": button_message_id,
+            "admin_deliveries": [delivery.to_dict() for delivery in admin_deliveries],
         }
 
     except Exception as e:
         logger.error(f"发送报告时发生严重错误: {type(e).__name__}: {e}", exc_info=True)
         # 返回空字典，而不是让程序崩溃
-        return {"summary_message_ids": [], "poll_message_id": None, "button_message_id": None}
+        return {
+            "summary_message_ids": [],
+            "poll_message_id": None,
+            "button_message_id": None,
+            "admin_deliveries": [],
+        }
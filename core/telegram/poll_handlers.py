@@ -11,6 +11,7 @@ from telethon.tl.types import InputMediaPoll, Poll, PollAnswer, TextWithEntities
 
 import core.config as config_module
 from core.ai.ai_client import generate_poll_from_summary
+from core.ai.usage_tracker import usage_channel
 from core.config import (
     ENABLE_POLL,
     POLL_PUBLIC_VOTERS,
@@ -19,6 +20,8 @@ from core.config import (
 from core.i18n.i18n import get_text
 from core.system.error_handler import record_error
 
+from .entity_cache import get_cached_entity
+
 logger = logging.getLogger(__name__)
 
 
@@ -96,14 +99,15 @@ async def send_poll_to_channel(client, channel, summary_message_id, summary_text
     try:
         # 获取频道实体
         logger.info(f"获取频道实体: {channel}")
-        channel_entity = await client.get_entity(channel)
+        channel_entity = await get_cached_entity(client, channel)
         logger.info(
             f"成功获取频道实体: {channel_entity.title if hasattr(channel_entity, 'title') else channel}"
         )
 
         # 生成投票内容
         logger.info("开始生成投票内容")
-        poll_data = await generate_poll_from_summary(summary_text)
+        with usage_channel(channel):
+            poll_data = await generate_poll_from_summary(summary_text)
 
         if not poll_data or "question" not in poll_data or "options" not in poll_data:
             logger.error("生成投票内容失败，使用默认投票")
@@ -193,7 +197,7 @@ async def send_poll_to_discussion_group(client, channel, summary_message_id, sum
     try:
         # 获取频道实体
         logger.info(f"获取频道实体: {channel}")
-        channel_entity = await client.get_entity(channel)
+        channel_entity = await get_cached_entity(client, channel)
         channel_id = channel_entity.id
         channel_name = channel_entity.title if hasattr(channel_entity, "title") else channel
 
@@ -245,7 +249,8 @@ async def send_poll_to_discussion_group(client, channel, summary_message_id, sum
         try:
             # 生成投票内容（期间转发消息会到达并被监听器捕获）
             logger.info("开始生成投票内容（同时监听转发消息）")
-            poll_data = await generate_poll_from_summary(summary_text)
+            with usage_channel(channel):
+                poll_data = await generate_poll_from_summary(summary_text)
 
             if not poll_data or "question" not in poll_data or "options" not in poll_data:
                 logger.error("生成投票内容失败，使用默认投票")
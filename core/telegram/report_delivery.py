@@ -0,0 +1,193 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+报告投递
+
+向多个接收者（管理员、源频道）发送分段报告：
+- 不同接收者并发发送，并发数由 REPORT_DELIVERY_CONCURRENCY 限制
+- 全局发送速率（REPORT_MESSAGES_PER_SECOND）与单个聊天的发送间隔（REPORT_CHAT_INTERVAL）
+  由共享限流器控制；同一聊天内的分段按顺序发送，某段失败后不再发送后续分段
+- 遇到 FloodWait 时该聊天按提示暂停后重试，等待时间超过 REPORT_MAX_FLOOD_WAIT 时
+  该接收者直接失败，不阻塞整个投递；格式错误时改为纯文本重发
+- 每个接收者返回一份投递结果（消息ID、失败分段数、FloodWait 次数、错误）
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from telethon.errors import FloodWaitError
+
+from .client_utils import sanitize_markdown, split_message_smart
+
+logger = logging.getLogger(__name__)
+
+# 同时发送报告的接收者数
+REPORT_DELIVERY_CONCURRENCY = max(1, int(os.getenv("REPORT_DELIVERY_CONCURRENCY", "5")))
+# 全局每秒发送的消息数（0 表示不限制），单个聊天两条消息之间的最小间隔（秒）
+REPORT_MESSAGES_PER_SECOND = max(0.0, float(os.getenv("REPORT_MESSAGES_PER_SECOND", "20")))
+REPORT_CHAT_INTERVAL = max(0.0, float(os.getenv("REPORT_CHAT_INTERVAL", "1")))
+# 单条消息遇到 FloodWait 后的最大重试次数
+REPORT_FLOOD_RETRIES = 3
+# FloodWait 要求的等待时间（秒）超过该值时不再等待，该接收者投递失败
+REPORT_MAX_FLOOD_WAIT = max(0, int(os.getenv("REPORT_MAX_FLOOD_WAIT", "120")))
+# Telegram 单条消息的分段长度
+REPORT_MAX_LENGTH = 4000
+
+
+class DeliveryLimiter:
+    """跨调用共享的发送限流器：为每条消息预约发送时间，遇到 FloodWait 时暂停对应聊天"""
+
+    def __init__(self, messages_per_second: float, chat_interval: float):
+        self.global_interval = 1 / messages_per_second if messages_per_second > 0 else 0.0
+        self.chat_interval = chat_interval
+        self._next_global = 0.0
+        self._next_by_chat: dict[Any, float] = {}
+
+    async def wait(self, chat_id: Any) -> None:
+        """等待到该聊天可以发送下一条消息"""
+        now = time.monotonic()
+        send_at = max(now, self._next_global, self._next_by_chat.get(chat_id, 0.0))
+        self._next_global = send_at + self.global_interval
+        self._next_by_chat[chat_id] = send_at + self.chat_interval
+        if len(self._next_by_chat) > 1000:
+            self._next_by_chat = {k: v for k, v in self._next_by_chat.items() if v > now}
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+
+    def report_flood_wait(self, chat_id: Any, seconds: float) -> None:
+        """记录 FloodWait，该聊天之后的消息等待到限流解除"""
+        resume_at = time.monotonic() + seconds
+        self._next_by_chat[chat_id] = max(self._next_by_chat.get(chat_id, 0.0), resume_at)
+
+
+_delivery_limiter = DeliveryLimiter(REPORT_MESSAGES_PER_SECOND, REPORT_CHAT_INTERVAL)
+
+
+@dataclass
+class DeliveryResult:
+    """单个接收者的投递结果"""
+
+    chat_id: Any
+    message_ids: list[int] = field(default_factory=list)
+    failed_parts: int = 0
+    flood_waits: int = 0
+    error: str | None = None
+    exception: BaseException | None = field(default=None, repr=False)
+
+    @property
+    def delivered(self) -> bool:
+        return bool(self.message_ids) and self.failed_parts == 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "chat_id": self.chat_id,
+            "delivered": self.delivered,
+            "message_ids": self.message_ids,
+            "failed_parts": self.failed_parts,
+            "flood_waits": self.flood_waits,
+            "error": self.error,
+        }
+
+
+def split_report(text: str, max_length: int = REPORT_MAX_LENGTH) -> list[str]:
+    """按 Telegram 消息长度分段，短消息不分段"""
+    if len(text) <= max_length:
+        return [text]
+    return split_message_smart(text, max_length, preserve_md=True)
+
+
+async def _send_with_flood_retry(client, chat_id, text: str, result: DeliveryResult):
+    """在限流器下发送一条消息，遇到 FloodWait 时按提示等待后重试"""
+    for attempt in range(REPORT_FLOOD_RETRIES + 1):
+        await _delivery_limiter.wait(chat_id)
+        try:
+            return await client.send_message(chat_id, text, link_preview=False)
+        except FloodWaitError as e:
+            result.flood_waits += 1
+            if e.seconds > REPORT_MAX_FLOOD_WAIT:
+                logger.warning(
+                    f"向 {chat_id} 发送消息需等待 {e.seconds} 秒，超过上限 "
+                    f"{REPORT_MAX_FLOOD_WAIT} 秒，放弃该接收者"
+                )
+                raise
+            if attempt == REPORT_FLOOD_RETRIES:
+                raise
+            logger.warning(
+                f"向 {chat_id} 发送消息触发 FloodWait，{e.seconds} 秒后重试"
+                f"（第 {attempt + 1}/{REPORT_FLOOD_RETRIES} 次）"
+            )
+            _delivery_limiter.report_flood_wait(chat_id, e.seconds)
+
+
+async def send_parts(client, chat_id, parts: list[str]) -> DeliveryResult:
+    """
+    按顺序向一个聊天发送报告分段
+
+    Returns:
+        投递结果；某段失败后不再发送后续分段，剩余分段计入 failed_parts
+    """
+    result = DeliveryResult(chat_id)
+    for index, part in enumerate(parts):
+        try:
+            try:
+                message = await _send_with_flood_retry(client, chat_id, part, result)
+            except FloodWaitError:
+                raise
+            except Exception as e:
+                # 多为 Markdown 实体错误，移除格式后重发
+                logger.warning(
+                    f"向 {chat_id} 发送第 {index + 1}/{len(parts)} 段失败，移除格式后重试: "
+                    f"{type(e).__name__}: {e}"
+                )
+                plain = sanitize_markdown(part, aggressive=True)
+                message = await _send_with_flood_retry(client, chat_id, plain, result)
+            result.message_ids.append(message.id)
+        except Exception as e:
+            result.failed_parts = len(parts) - index
+            result.error = f"{type(e).__name__}: {e}"
+            result.exception = e
+            logger.error(f"向 {chat_id} 发送第 {index + 1}/{len(parts)} 段失败: {result.error}")
+            break
+    return result
+
+
+async def deliver_report(client, chat_ids: Iterable[Any], parts: list[str]) -> list[DeliveryResult]:
+    """
+    并发向多个聊天发送相同的报告分段
+
+    Args:
+        client: Telegram 客户端
+        chat_ids: 接收者列表
+        parts: 报告分段（已按消息长度切分）
+
+    Returns:
+        与 chat_ids 顺序一致的投递结果
+    """
+    chat_ids = list(chat_ids)
+    semaphore = asyncio.Semaphore(REPORT_DELIVERY_CONCURRENCY)
+
+    async def deliver(chat_id):
+        async with semaphore:
+            return await send_parts(client, chat_id, parts)
+
+    results = await asyncio.gather(*(deliver(chat_id) for chat_id in chat_ids))
+    delivered = sum(result.delivered for result in results)
+    flood_waits = sum(result.flood_waits for result in results)
+    logger.info(
+        f"报告投递完成: {delivered}/{len(results)} 个接收者成功，"
+        f"共 {len(parts)} 段，FloodWait {flood_waits} 次"
+    )
+    return results
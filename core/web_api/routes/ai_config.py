@@ -124,6 +124,14 @@ async def update_ai_config(request: AIConfigUpdateRequest):
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.get("/gateway/metrics")
+async def get_gateway_metrics():
+    """获取 LLM 网关的并发、排队与请求统计"""
+    from core.ai.llm_gateway import get_llm_gateway
+
+    return {"success": True, "data": get_llm_gateway().get_metrics()}
+
+
 @router.get("/prompts")
 async def list_prompts():
     """获取所有提示词"""
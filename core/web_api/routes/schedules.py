@@ -37,9 +37,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# 仅保护当前 FastAPI 进程内的并发读-改-写；多 worker/多进程部署仍需文件系统原子操作或外部锁。
-_summary_time_file_lock = asyncio.Lock()
-
 
 @router.get("")
 async def list_schedules():
@@ -78,6 +75,32 @@ async def list_schedules():
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.get("/plan")
+async def preview_schedule_plan():
+    """预览错峰后各频道定时总结的计划执行时间"""
+    try:
+        from core.system.schedule_planner import (
+            SUMMARY_SCHEDULE_SPREAD_MINUTES,
+            get_summary_admission,
+            preview_summary_plan,
+        )
+
+        channels = get_config().get("channels", [])
+        items = preview_summary_plan(channels)
+        return {
+            "success": True,
+            "data": {
+                "items": items,
+                "total": len(items),
+                "spread_minutes": SUMMARY_SCHEDULE_SPREAD_MINUTES,
+                "admission": get_summary_admission().get_status(),
+            },
+        }
+    except Exception as e:
+        logger.error(f"预览定时任务计划失败: {type(e).__name__}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
 # ==================== 上次总结时间 ====================
 
 
@@ -105,22 +128,6 @@ def _clean_summary_channel(channel: str) -> str:
     return normalize_channel_id(channel)
 
 
-async def _read_summary_time_file() -> dict:
-    """Async 读取上次总结时间文件。"""
-    async with aiofiles.open(LAST_SUMMARY_FILE, encoding="utf-8") as f:
-        content = (await f.read()).strip()
-    return json.loads(content) if content else {}
-
-
-async def _write_summary_time_file(data: dict) -> None:
-    """Async 写入或清理上次总结时间文件。"""
-    if data:
-        async with aiofiles.open(LAST_SUMMARY_FILE, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(data, ensure_ascii=False, indent=2))
-    else:
-        await _remove_file_if_exists(LAST_SUMMARY_FILE)
-
-
 @router.get("/summary-times")
 async def list_last_summary_times():
     """读取所有频道的上次总结时间记录。"""
@@ -178,22 +185,17 @@ async def delete_last_summary_time(channel: str):
     """删除指定频道的上次总结时间记录。"""
     try:
         channel = _clean_summary_channel(channel)
-        async with _summary_time_file_lock:
-            try:
-                data = await _read_summary_time_file()
-            except FileNotFoundError:
-                return {"success": False, "message": "上次总结时间文件不存在"}
-            except json.JSONDecodeError as e:
-                raise HTTPException(status_code=409, detail="上次总结时间文件内容已损坏") from e
-
-            if channel not in data:
-                return {"success": False, "message": f"该频道无上次总结时间记录: {channel}"}
-
-            del data[channel]
-            try:
-                await _write_summary_time_file(data)
-            except FileNotFoundError:
-                return {"success": False, "message": "上次总结时间文件已被其他进程删除"}
+        from core.summary_time_manager import get_summary_time_store
+
+        store = get_summary_time_store(LAST_SUMMARY_FILE)
+        if not await asyncio.to_thread(store.exists):
+            return {"success": False, "message": "上次总结时间文件不存在"}
+        try:
+            deleted = await asyncio.to_thread(store.delete, channel)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=409, detail="上次总结时间文件内容已损坏") from e
+        if not deleted:
+            return {"success": False, "message": f"该频道无上次总结时间记录: {channel}"}
 
         logger.info(f"已通过 WebUI 删除上次总结时间: {channel}")
         return {"success": True, "message": f"上次总结时间已删除: {channel}"}
@@ -208,7 +210,9 @@ async def delete_last_summary_time(channel: str):
 async def delete_all_last_summary_times():
     """删除全部上次总结时间记录文件。"""
     try:
-        removed = await _remove_file_if_exists(LAST_SUMMARY_FILE)
+        from core.summary_time_manager import get_summary_time_store
+
+        removed = await asyncio.to_thread(get_summary_time_store(LAST_SUMMARY_FILE).clear)
         message = "已删除全部上次总结时间记录" if removed else "上次总结时间文件不存在"
         logger.info(f"已通过 WebUI 删除全部上次总结时间记录: removed={removed}")
         return {"success": True, "message": message, "data": {"removed": removed}}
@@ -11,7 +11,7 @@
 """
 统计数据 API 路由
 
-提供总结统计、历史记录、频道排名等数据查询。
+提供总结统计、历史记录、频道排名、LLM 用量等数据查询。
 """
 
 import logging
@@ -102,6 +102,60 @@ async def export_summaries():
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.get("/llm-usage")
+async def get_llm_usage(
+    days: int = Query(7, ge=1, le=366, description="统计天数（含今天）"),
+    group_by: str = Query(
+        "subsystem,model", description="分组维度，逗号分隔：date / subsystem / channel / model"
+    ),
+):
+    """获取 LLM / Embedding 的 token 用量与费用（按子系统、频道、模型等分组）"""
+    from core.ai.usage_tracker import estimate_cost, get_usage_tracker
+    from core.infrastructure.database.llm_usage_repo import USAGE_GROUP_COLUMNS, get_llm_usage_repo
+
+    groups = [g.strip() for g in group_by.split(",") if g.strip()]
+    invalid = [g for g in groups if g not in USAGE_GROUP_COLUMNS]
+    if invalid or not groups:
+        raise HTTPException(status_code=400, detail=f"无效的分组维度: {', '.join(invalid)}")
+
+    try:
+        # 先写入内存中尚未保存的用量，保证数据为最新
+        tracker = get_usage_tracker()
+        await tracker.flush()
+        rows = await get_llm_usage_repo().get_usage(days=days, group_by=groups)
+
+        total_cost = 0.0
+        for row in rows:
+            for field in ("requests", "prompt_tokens", "completion_tokens"):
+                row[field] = int(row[field] or 0)
+            if "usage_date" in row:
+                row["usage_date"] = str(row["usage_date"])
+            cost = (
+                estimate_cost(row["model"], row["prompt_tokens"], row["completion_tokens"])
+                if "model" in row
+                else None
+            )
+            row["cost"] = round(cost, 6) if cost is not None else None
+            total_cost += cost or 0.0
+
+        return {
+            "success": True,
+            "data": {
+                "days": days,
+                "group_by": groups,
+                "rows": rows,
+                "total_prompt_tokens": sum(row["prompt_tokens"] for row in rows),
+                "total_completion_tokens": sum(row["completion_tokens"] for row in rows),
+                "total_cost": round(total_cost, 6),
+                "process_totals": tracker.get_totals(),
+            },
+        }
+
+    except Exception as e:
+        logger.error(f"获取 LLM 用量失败: {type(e).__name__}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
 def _get_db():
     """安全获取数据库管理器"""
     try:
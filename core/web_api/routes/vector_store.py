@@ -11,14 +11,24 @@
 """
 向量存储管理 API 路由
 
-提供向量存储（ChromaDB）的浏览、搜索、删除等管理功能。
+提供向量存储（ChromaDB）的浏览、搜索、删除、快照导出/恢复等管理功能。
 """
 
+import asyncio
+import json
 import logging
+import os
+import re
+import time
+from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse
 
+from core.ai.vector_snapshot import SNAPSHOT_DIR
 from core.ai.vector_store import get_vector_store
+from core.web_api.deps import actor_from_request, audit_duration, record_system_audit
+from core.web_api.schemas.vector_store import SnapshotRestoreRequest
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +38,7 @@ VALID_COLLECTIONS = frozenset(("summaries", "messages"))
 VALID_SEARCH_COLLECTIONS = VALID_COLLECTIONS | frozenset(("all",))
 MAX_BATCH_DELETE_IDS = 500
 CLEAR_COLLECTION_BATCH_SIZE = 1000
+SNAPSHOT_FILENAME_PATTERN = re.compile(r"^[\w.-]+\.zip$")
 
 
 def _validate_collection(collection_name: str) -> None:
@@ -72,6 +83,36 @@ def _delete_collection_in_batches(collection) -> int:
         deleted_count += len(ids)
 
 
+def _snapshot_path(filename: str) -> str:
+    """校验快照文件名并返回其路径，防止路径穿越。"""
+    if not SNAPSHOT_FILENAME_PATTERN.match(filename) or filename.startswith("."):
+        raise HTTPException(status_code=400, detail=f"无效的快照文件名: {filename}")
+    path = os.path.join(SNAPSHOT_DIR, filename)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"快照不存在: {filename}")
+    return path
+
+
+def _list_snapshot_files() -> list[dict]:
+    """列出快照目录中的快照文件（按时间倒序）。"""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+
+    snapshots = []
+    for entry in os.scandir(SNAPSHOT_DIR):
+        if entry.is_file() and SNAPSHOT_FILENAME_PATTERN.match(entry.name):
+            stat = entry.stat()
+            snapshots.append(
+                {
+                    "filename": entry.name,
+                    "size": stat.st_size,
+                    "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                }
+            )
+    snapshots.sort(key=lambda s: s["created_at"], reverse=True)
+    return snapshots
+
+
 @router.get("/stats")
 async def get_vector_stats():
     """获取向量存储统计信息
@@ -88,6 +129,123 @@ async def get_vector_stats():
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.get("/snapshots")
+async def list_snapshots():
+    """列出已导出的向量快照
+
+    Returns:
+        快照文件名、大小与创建时间列表
+    """
+    try:
+        snapshots = await asyncio.to_thread(_list_snapshot_files)
+        return {"success": True, "data": {"snapshots": snapshots, "total": len(snapshots)}}
+    except Exception as e:
+        logger.error(f"列出向量快照失败: {type(e).__name__}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@router.post("/snapshots")
+async def create_snapshot(request: Request):
+    """导出向量快照
+
+    Returns:
+        快照文件名与各 collection 的条目数
+    """
+    started_at = time.perf_counter()
+    actor = actor_from_request(request)
+    filename = f"vectors_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+    try:
+        vs = get_vector_store()
+        if not vs.is_available():
+            raise HTTPException(status_code=503, detail="向量存储不可用")
+
+        manifest = await asyncio.to_thread(vs.export_snapshot, os.path.join(SNAPSHOT_DIR, filename))
+        counts = {name: info["count"] for name, info in manifest["collections"].items()}
+        await record_system_audit(
+            action="vector_store.snapshot.export",
+            actor=actor,
+            target=filename,
+            params_summary=json.dumps(counts, ensure_ascii=False),
+            success=True,
+            message="导出成功",
+            duration_ms=audit_duration(started_at),
+        )
+        return {"success": True, "data": {"filename": filename, "counts": counts}}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        message = f"导出向量快照失败: {type(e).__name__}: {e}"
+        await record_system_audit(
+            action="vector_store.snapshot.export",
+            actor=actor,
+            target=filename,
+            success=False,
+            message=message,
+            duration_ms=audit_duration(started_at),
+        )
+        logger.error(message, exc_info=True)
+        raise HTTPException(status_code=500, detail=message) from e
+
+
+@router.post("/snapshots/restore")
+async def restore_snapshot(request_data: SnapshotRestoreRequest, request: Request):
+    """从向量快照恢复
+
+    Args:
+        request_data: 快照文件名与恢复模式（merge / replace）
+
+    Returns:
+        各 collection 恢复的条目数
+    """
+    started_at = time.perf_counter()
+    actor = actor_from_request(request)
+    path = _snapshot_path(request_data.filename)
+    params_summary = json.dumps({"mode": request_data.mode}, ensure_ascii=False)
+
+    try:
+        vs = get_vector_store()
+        if not vs.is_available():
+            raise HTTPException(status_code=503, detail="向量存储不可用")
+
+        restored = await asyncio.to_thread(vs.restore_snapshot, path, request_data.mode)
+        await record_system_audit(
+            action="vector_store.snapshot.restore",
+            actor=actor,
+            target=request_data.filename,
+            params_summary=params_summary,
+            success=True,
+            message=f"恢复成功: {restored}",
+            duration_ms=audit_duration(started_at),
+        )
+        return {"success": True, "data": {"restored": restored}}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        message = f"恢复向量快照失败: {type(e).__name__}: {e}"
+        await record_system_audit(
+            action="vector_store.snapshot.restore",
+            actor=actor,
+            target=request_data.filename,
+            params_summary=params_summary,
+            success=False,
+            message=message,
+            duration_ms=audit_duration(started_at),
+        )
+        logger.error(message, exc_info=True)
+        status_code = 400 if isinstance(e, ValueError) else 500
+        raise HTTPException(status_code=status_code, detail=message) from e
+
+
+@router.get("/snapshots/{filename}")
+async def download_snapshot(filename: str):
+    """下载向量快照文件"""
+    path = _snapshot_path(filename)
+    return FileResponse(path, media_type="application/zip", filename=filename)
+
+
 @router.get("/collections/{collection_name}")
 async def list_collection_documents(
     collection_name: str,
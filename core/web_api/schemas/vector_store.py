@@ -0,0 +1,26 @@
+# Copyright 2026 Sakura-Bot
+#
+# 本项目采用 GNU Affero General Public License Version 3.0 (AGPL-3.0) 许可
+#
+# - 署名：必须提供本项目的原始来源链接
+# - 相同方式共享：衍生作品必须采用相同的许可证
+#
+# 本项目源代码：https://github.com/Sakura520222/Sakura-Bot
+# 许可证全文：参见 LICENSE 文件
+
+"""
+向量存储管理相关的请求/响应模型
+"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class SnapshotRestoreRequest(BaseModel):
+    """向量快照恢复请求"""
+
+    filename: str = Field(..., max_length=128, description="快照文件名")
+    mode: Literal["merge", "replace"] = Field(
+        default="merge", description="merge - 合并到现有数据；replace - 先清空再恢复"
+    )
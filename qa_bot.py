@@ -34,6 +34,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from core.ai.conversation_manager import get_conversation_manager
 from core.ai.qa_engine_v3 import get_qa_engine_v3
 from core.ai.quota_manager import get_quota_manager
+from core.ai.usage_tracker import LLM_USAGE_FLUSH_INTERVAL, flush_llm_usage
 from core.config import get_qa_bot_persona
 from core.infrastructure.exceptions import DatabaseError
 from core.infrastructure.logging import setup_component_logging
@@ -892,6 +893,12 @@ class QABot:
         # 将命令注册添加到post_init回调
         self.application.post_init = register_commands
 
+        # 退出前写入内存中剩余的 LLM 用量
+        async def flush_usage_on_shutdown(application):
+            await flush_llm_usage()
+
+        self.application.post_shutdown = flush_usage_on_shutdown
+
         # 投稿处理器（ConversationHandler）—— 必须在 /start 之前注册，
         # 以便深链接 /start submit 能被 ConversationHandler 的入口点捕获
         try:
@@ -961,6 +968,15 @@ class QABot:
         self.application.job_queue.run_repeating(check_notifications_job, interval=30, first=10)
         logger.info("✅ 跨Bot通知检查任务已启动：每30秒执行一次，首次执行延迟10秒")
 
+        # 定期写入 LLM 用量统计（问答Bot进程没有调度器，由 job_queue 执行）
+        async def flush_usage_job(context=None):
+            await flush_llm_usage()
+
+        self.application.job_queue.run_repeating(
+            flush_usage_job, interval=LLM_USAGE_FLUSH_INTERVAL, first=LLM_USAGE_FLUSH_INTERVAL
+        )
+        logger.info(f"LLM 用量写入任务已启动：每{LLM_USAGE_FLUSH_INTERVAL}秒执行一次")
+
         # 启动Bot
         logger.info("问答Bot已启动，等待消息...")
         self.application.run_polling(allowed_updates=Update.ALL_TYPES)
@@ -0,0 +1,137 @@
+"""测试向量降维与降维迁移
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import math
+import random
+
+import pytest
+
+from core.ai.dimension_reducer import DimensionReducer
+from core.migrations.reduce_vector_dimension import (
+    reduce_vector_dimension,
+    rollback_vector_dimension,
+)
+
+
+def _random_vectors(count: int, dimension: int, seed: int = 0) -> list[list[float]]:
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dimension)] for _ in range(count)]
+
+
+def _norm(vector: list[float]) -> float:
+    return math.sqrt(sum(v * v for v in vector))
+
+
+@pytest.mark.unit
+class TestTruncate:
+    """截断降维测试"""
+
+    def test_truncate_and_renormalize(self):
+        """测试截断后重新归一化"""
+        reducer = DimensionReducer(target_dimension=2)
+
+        (vector,) = reducer.reduce([[3.0, 4.0, 12.0]])
+
+        assert vector == pytest.approx([0.6, 0.8])
+
+    def test_smaller_vectors_untouched(self):
+        """测试不大于目标维度的向量原样返回"""
+        reducer = DimensionReducer(target_dimension=4)
+        vectors = [[1.0, 2.0, 3.0, 4.0]]
+
+        assert reducer.reduce(vectors) is vectors
+
+    def test_unknown_method_falls_back_to_truncate(self):
+        """测试未知降维方式回退到截断"""
+        assert DimensionReducer(target_dimension=2, method="bogus").method == "truncate"
+
+
+@pytest.mark.unit
+class TestPCA:
+    """PCA 降维测试"""
+
+    def test_fit_and_reduce(self, tmp_path):
+        """测试拟合 PCA 后降维结果维度正确且已归一化"""
+        path = str(tmp_path / "pca.npz")
+        reducer = DimensionReducer(target_dimension=4, method="pca", pca_path=path)
+        reducer.fit_pca(_random_vectors(32, 16))
+
+        reduced = reducer.reduce(_random_vectors(3, 16, seed=1))
+
+        assert all(len(v) == 4 for v in reduced)
+        assert all(_norm(v) == pytest.approx(1.0) for v in reduced)
+
+        # 重新加载的投影与拟合结果一致
+        reloaded = DimensionReducer(target_dimension=4, method="pca", pca_path=path)
+        assert reloaded.has_pca()
+        for got, expected in zip(
+            reloaded.reduce(_random_vectors(3, 16, seed=1)), reduced, strict=True
+        ):
+            assert got == pytest.approx(expected)
+
+    def test_reduce_without_projection_raises(self, tmp_path):
+        """测试未拟合投影矩阵时降维报错"""
+        reducer = DimensionReducer(
+            target_dimension=4, method="pca", pca_path=str(tmp_path / "missing.npz")
+        )
+
+        with pytest.raises(ValueError):
+            reducer.reduce(_random_vectors(1, 16))
+
+    def test_fit_requires_enough_samples(self, tmp_path):
+        """测试样本数少于目标维度时拒绝拟合"""
+        reducer = DimensionReducer(
+            target_dimension=8, method="pca", pca_path=str(tmp_path / "pca.npz")
+        )
+
+        with pytest.raises(ValueError):
+            reducer.fit_pca(_random_vectors(4, 16))
+
+
+@pytest.mark.unit
+class TestReduceVectorDimensionMigration:
+    """降维迁移测试"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        chromadb = pytest.importorskip("chromadb")
+        client = chromadb.PersistentClient(path=str(tmp_path / "vectors"))
+        messages = client.get_or_create_collection("messages", metadata={"hnsw:space": "cosine"})
+        messages.add(
+            ids=[f"c:{i}" for i in range(20)],
+            embeddings=_random_vectors(20, 16),
+            documents=[f"doc {i}" for i in range(20)],
+            metadatas=[{"channel_id": "c"} for _ in range(20)],
+        )
+        return client
+
+    def test_dry_run_does_not_write(self, client):
+        """测试 dry-run 不修改数据"""
+        result = reduce_vector_dimension(client, DimensionReducer(target_dimension=8), dry_run=True)
+
+        assert result["success"]
+        stored = client.get_collection("messages").get(limit=1, include=["embeddings"])
+        assert len(stored["embeddings"][0]) == 16
+
+    def test_migrate_then_rollback(self, client):
+        """测试迁移改写向量维度，重复执行幂等，回滚恢复原数据"""
+        result = reduce_vector_dimension(client, DimensionReducer(target_dimension=8))
+
+        assert result["success"]
+        migrated = client.get_collection("messages")
+        assert migrated.count() == 20
+        stored = migrated.get(ids=["c:3"], include=["embeddings", "documents", "metadatas"])
+        assert len(stored["embeddings"][0]) == 8
+        assert stored["documents"] == ["doc 3"]
+        assert stored["metadatas"][0]["channel_id"] == "c"
+
+        again = reduce_vector_dimension(client, DimensionReducer(target_dimension=8))
+        assert again["details"] == [{"collection": "messages", "skipped": True}]
+
+        rollback = rollback_vector_dimension(client)
+        assert rollback["success"]
+        restored = client.get_collection("messages").get(limit=1, include=["embeddings"])
+        assert len(restored["embeddings"][0]) == 16
@@ -0,0 +1,111 @@
+"""测试 Embedding 后端注册表
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import math
+import os
+from unittest.mock import patch
+
+import pytest
+
+from core.ai.embedding_backends import (
+    EmbeddingBackend,
+    HashingEmbeddingBackend,
+    create_embedding_backend,
+    get_registered_backends,
+    hash_embed_texts,
+    register_embedding_backend,
+)
+
+
+@pytest.mark.unit
+class TestHashEmbedTexts:
+    """哈希 n-gram 向量测试"""
+
+    def test_dimension_and_normalization(self):
+        """测试输出维度与 L2 归一化"""
+        (vector,) = hash_embed_texts(["Telegram 频道总结"], dimension=128)
+
+        assert len(vector) == 128
+        assert math.isclose(math.sqrt(sum(v * v for v in vector)), 1.0, rel_tol=1e-9)
+
+    def test_deterministic(self):
+        """测试相同文本得到相同向量"""
+        assert hash_embed_texts(["hello"], 64) == hash_embed_texts(["hello"], 64)
+
+    def test_similar_texts_closer_than_unrelated(self):
+        """测试相似文本的余弦相似度高于无关文本"""
+        a, b, c = hash_embed_texts(
+            ["今天发布了新版本的机器人", "今天发布了机器人的新版本", "weather forecast rain"], 256
+        )
+
+        def cos(x, y):
+            return sum(i * j for i, j in zip(x, y, strict=True))
+
+        assert cos(a, b) > cos(a, c)
+
+    def test_empty_text_zero_vector(self):
+        """测试空文本返回零向量"""
+        assert hash_embed_texts(["   "], 16) == [[0.0] * 16]
+
+
+@pytest.mark.unit
+class TestHashingEmbeddingBackend:
+    """本地后端测试"""
+
+    def test_small_batch_runs_in_process(self):
+        """测试小批量不创建进程池"""
+        with patch.dict(os.environ, {"EMBEDDING_LOCAL_WORKERS": "4"}):
+            backend = HashingEmbeddingBackend(dimension=32)
+
+        assert len(backend.embed(["a", "b"])) == 2
+        assert backend._pool is None
+
+    def test_large_batch_preserves_order(self):
+        """测试进程池分块后结果顺序与输入一致"""
+        texts = [f"message {i}" for i in range(80)]
+        with patch.dict(os.environ, {"EMBEDDING_LOCAL_WORKERS": "2"}):
+            backend = HashingEmbeddingBackend(dimension=32)
+        try:
+            assert backend.embed(texts) == hash_embed_texts(texts, 32)
+        finally:
+            backend.close()
+
+
+@pytest.mark.unit
+class TestBackendRegistry:
+    """注册表测试"""
+
+    def test_builtin_backends_registered(self):
+        """测试内置后端已注册"""
+        assert {"openai", "local", "onnx"} <= set(get_registered_backends())
+
+    def test_register_custom_backend(self):
+        """测试注册自定义后端"""
+
+        class ConstantBackend(EmbeddingBackend):
+            name = "constant"
+
+            def is_available(self) -> bool:
+                return True
+
+            def embed(self, texts):
+                return [[1.0] * self.dimension for _ in texts]
+
+        register_embedding_backend("constant", ConstantBackend)
+        backend = create_embedding_backend("Constant", dimension=3)
+
+        assert backend.embed(["x"]) == [[1.0, 1.0, 1.0]]
+
+    def test_unknown_backend_returns_none(self):
+        """测试未知后端返回 None"""
+        assert create_embedding_backend("missing", dimension=8) is None
+
+    def test_onnx_backend_unavailable_without_model_path(self):
+        """测试未配置模型路径时 ONNX 后端不可用"""
+        with patch.dict(os.environ, {"EMBEDDING_ONNX_MODEL_PATH": ""}):
+            backend = create_embedding_backend("onnx", dimension=8)
+
+        assert backend.is_available() is False
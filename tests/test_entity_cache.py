@@ -0,0 +1,170 @@
+"""测试 Telegram 实体缓存
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telethon.errors import ChannelInvalidError
+from telethon.tl.types import Channel, ChatPhotoEmpty, InputPeerChannel, InputPeerUser
+
+from core.telegram.entity_cache import ENTITY_CACHE_TTL, EntityCache
+
+
+def _channel(channel_id: int = 12345, username: str = "sakura", title: str = "樱花频道"):
+    return Channel(
+        id=channel_id,
+        title=title,
+        photo=ChatPhotoEmpty(),
+        date=None,
+        access_hash=987654321,
+        username=username,
+        broadcast=True,
+    )
+
+
+def _client(entity=None, error: Exception | None = None, user_id: int = 42) -> MagicMock:
+    client = MagicMock()
+    client.get_me = AsyncMock(return_value=InputPeerUser(user_id, 0))
+    client.get_entity = AsyncMock(return_value=entity, side_effect=error)
+    return client
+
+
+@pytest.mark.unit
+class TestEntityCache:
+    """测试实体缓存"""
+
+    @pytest.mark.asyncio
+    async def test_second_lookup_uses_cache(self, tmp_path):
+        """同一频道第二次查询不再调用 get_entity"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        client = _client(_channel())
+
+        first = await cache.get(client, "https://t.me/sakura")
+        second = await cache.get(client, "https://t.me/sakura")
+
+        assert client.get_entity.await_count == 1
+        assert second is first
+        assert first.id == 12345
+        assert first.title == "樱花频道"
+        assert first.input_peer == InputPeerChannel(12345, 987654321)
+        assert cache.get_stats() == {"entities": 1, "hits": 1, "misses": 1}
+
+    @pytest.mark.asyncio
+    async def test_username_and_peer_id_aliases(self, tmp_path):
+        """解析后用户名（不区分大小写）与带前缀的数字 ID 都能命中"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        client = _client(_channel())
+
+        await cache.get(client, "https://t.me/sakura")
+        by_username = await cache.get(client, "Sakura")
+        by_peer_id = await cache.get(client, -1000000012345)
+
+        assert client.get_entity.await_count == 1
+        assert by_username.id == by_peer_id.id == 12345
+
+    @pytest.mark.asyncio
+    async def test_persisted_across_instances(self, tmp_path):
+        """缓存写入文件，新实例加载后无需再次解析"""
+        path = str(tmp_path / "entities.json")
+        await EntityCache(path).get(_client(_channel()), "https://t.me/sakura")
+
+        client = _client(_channel())
+        entity = await EntityCache(path).get(client, "https://t.me/sakura")
+
+        client.get_entity.assert_not_awaited()
+        assert entity.username == "sakura"
+        assert entity.access_hash == 987654321
+
+    @pytest.mark.asyncio
+    async def test_cache_is_per_account(self, tmp_path):
+        """不同账号（access_hash 不同）分别解析"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        bot = _client(_channel(), user_id=1)
+        userbot = _client(_channel(), user_id=2)
+
+        await cache.get(bot, "https://t.me/sakura")
+        await cache.get(userbot, "https://t.me/sakura")
+
+        assert bot.get_entity.await_count == 1
+        assert userbot.get_entity.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_channel_drops_entry(self, tmp_path):
+        """频道失效时移除缓存，下次访问重新解析"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        client = _client(_channel())
+        await cache.get(client, "https://t.me/sakura")
+
+        client.get_entity.side_effect = ChannelInvalidError(request=None)
+        with pytest.raises(ChannelInvalidError):
+            await cache.get(client, "https://t.me/sakura", refresh=True)
+
+        assert cache.get_stats()["entities"] == 0
+        client.get_entity.side_effect = None
+        await cache.get(client, "sakura")
+        assert client.get_entity.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidate_removes_aliases(self, tmp_path):
+        """invalidate 按任一查询键移除条目及其所有别名"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        client = _client(_channel())
+        await cache.get(client, "https://t.me/sakura")
+
+        cache.invalidate("sakura")
+        await cache.get(client, "https://t.me/sakura")
+
+        assert client.get_entity.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_refreshed(self, tmp_path):
+        """过期条目重新解析并更新名称"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        client = _client(_channel())
+        entry = await cache.get(client, "https://t.me/sakura")
+        entry.resolved_at = time.time() - ENTITY_CACHE_TTL - 1
+
+        client.get_entity.return_value = _channel(title="新名称")
+        refreshed = await cache.get(client, "https://t.me/sakura")
+
+        assert client.get_entity.await_count == 2
+        assert refreshed.title == "新名称"
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_used_when_refresh_fails(self, tmp_path):
+        """过期条目刷新失败（网络错误等）时继续使用旧条目"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        client = _client(_channel())
+        entry = await cache.get(client, "https://t.me/sakura")
+        entry.resolved_at = time.time() - ENTITY_CACHE_TTL - 1
+
+        client.get_entity.side_effect = ConnectionError("timeout")
+        stale = await cache.get(client, "https://t.me/sakura")
+
+        assert stale is entry
+
+    @pytest.mark.asyncio
+    async def test_miss_without_cache_raises(self, tmp_path):
+        """未缓存且解析失败时抛出原异常"""
+        cache = EntityCache(str(tmp_path / "entities.json"))
+        client = _client(error=ValueError('No user has "missing" as username'))
+
+        with pytest.raises(ValueError):
+            await cache.get(client, "missing")
+
+    @pytest.mark.asyncio
+    async def test_corrupted_file_is_ignored(self, tmp_path):
+        """缓存文件损坏时忽略并重新解析"""
+        path = tmp_path / "entities.json"
+        path.write_text("{not json", encoding="utf-8")
+        cache = EntityCache(str(path))
+        client = _client(_channel())
+
+        entity = await cache.get(client, "https://t.me/sakura")
+
+        assert entity.id == 12345
+        assert client.get_entity.await_count == 1
@@ -0,0 +1,132 @@
+"""测试频道消息并发抓取
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from core.telegram import messaging
+from core.telegram.messaging import FetchLimiter, fetch_last_week_messages
+
+START_TIME = datetime.now(UTC) - timedelta(days=1)
+
+
+class FakeClient:
+    """按频道返回固定消息的客户端，记录同时进行的抓取数"""
+
+    def __init__(self, messages, failures=None, delay=0.0):
+        self.messages = messages
+        # {频道: [依次抛出的异常]}
+        self.failures = failures or {}
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.calls: list[str] = []
+
+    async def iter_messages(self, channel, **kwargs):
+        self.calls.append(channel)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures.get(channel):
+                raise self.failures[channel].pop(0)
+            for message_id, text in self.messages.get(channel, []):
+                yield SimpleNamespace(id=message_id, text=text)
+        finally:
+            self.active -= 1
+
+
+def _userbot(client):
+    return SimpleNamespace(is_available=lambda: True, get_client=lambda: client)
+
+
+async def _fetch(client, channels, concurrency=4, **kwargs):
+    archive = SimpleNamespace(is_enabled=lambda: False)
+    with (
+        patch.object(messaging, "get_userbot_client", return_value=_userbot(client)),
+        patch.object(messaging, "get_message_archive", return_value=archive),
+        patch.object(messaging, "_fetch_limiter", FetchLimiter(concurrency)),
+    ):
+        return await fetch_last_week_messages(channels, start_time=START_TIME, **kwargs)
+
+
+@pytest.mark.unit
+class TestFetchLastWeekMessages:
+    """并发抓取测试"""
+
+    @pytest.mark.asyncio
+    async def test_fetches_channels_concurrently_within_limit(self):
+        """测试多个频道并发抓取且不超过并发上限"""
+        channels = [f"https://t.me/c{i}" for i in range(5)]
+        client = FakeClient(
+            {channel: [(1, f"消息 {channel[-2:]}")] for channel in channels}, delay=0.01
+        )
+
+        result = await _fetch(client, channels, concurrency=2)
+
+        assert client.max_active == 2
+        assert list(result) == channels
+        assert result["https://t.me/c3"] == ["内容: 消息 c3\n链接: https://t.me/c3/1"]
+
+    @pytest.mark.asyncio
+    async def test_excludes_report_messages(self):
+        """测试跳过报告消息与无文本消息"""
+        channel = "https://t.me/c"
+        client = FakeClient({channel: [(1, "a"), (2, "report"), (3, None)]})
+
+        result = await _fetch(client, [channel], report_message_ids={channel: [2]})
+
+        assert result == {channel: ["内容: a\n链接: https://t.me/c/1"]}
+
+    @pytest.mark.asyncio
+    async def test_channel_failure_is_isolated(self):
+        """测试单个频道失败不影响其他频道"""
+        client = FakeClient(
+            {"https://t.me/ok": [(1, "a")]},
+            failures={"https://t.me/bad": [ValueError("boom")]},
+        )
+
+        result = await _fetch(client, ["https://t.me/bad", "https://t.me/ok"])
+
+        assert result == {"https://t.me/ok": ["内容: a\n链接: https://t.me/ok/1"]}
+
+    @pytest.mark.asyncio
+    async def test_flood_wait_pauses_and_retries(self):
+        """测试 FloodWait 按提示时间暂停后重试该频道"""
+        channel = "https://t.me/c"
+        client = FakeClient(
+            {channel: [(1, "a")]},
+            failures={channel: [FloodWaitError(request=None, capture=30)]},
+        )
+
+        with patch.object(messaging.asyncio, "sleep", new=AsyncMock()) as sleep:
+            result = await _fetch(client, [channel])
+
+        assert result == {channel: ["内容: a\n链接: https://t.me/c/1"]}
+        assert client.calls == [channel, channel]
+        delay = max(call.args[0] for call in sleep.await_args_list)
+        assert 29 < delay <= 30
+
+    @pytest.mark.asyncio
+    async def test_flood_wait_gives_up_after_retries(self):
+        """测试 FloodWait 超过重试次数后该频道失败"""
+        channel = "https://t.me/c"
+        floods = [
+            FloodWaitError(request=None, capture=1)
+            for _ in range(messaging.FETCH_FLOOD_RETRIES + 1)
+        ]
+        client = FakeClient({channel: [(1, "a")]}, failures={channel: floods})
+
+        with patch.object(messaging.asyncio, "sleep", new=AsyncMock()):
+            result = await _fetch(client, [channel])
+
+        assert result == {}
+        assert len(client.calls) == messaging.FETCH_FLOOD_RETRIES + 1
@@ -2,9 +2,14 @@
 测试转发消息过滤器
 """
 
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
-from core.forwarding.filters import should_forward_original_only
+from core.forwarding.filters import (
+    KeywordMatcher,
+    RuleFilter,
+    should_forward_by_keywords,
+    should_forward_original_only,
+)
 
 
 class TestShouldForwardOriginalOnly:
@@ -71,3 +76,112 @@ class TestShouldForwardOriginalOnly:
 
         # 测试：不传参数时，默认为 False，应该转发所有消息
         assert should_forward_original_only(message) is True
+
+
+class TestKeywordMatcher:
+    """测试 Aho-Corasick 关键词匹配"""
+
+    def test_matches_any_keyword(self):
+        """任一关键词出现在文本中即命中"""
+        matcher = KeywordMatcher(["he", "she", "his", "hers"])
+
+        assert matcher.search("ushers") in {"she", "he", "hers"}
+        assert matcher.search("ahishers") is not None
+        assert matcher.search("xyz") is None
+
+    def test_suffix_keyword_is_found(self):
+        """关键词是另一个关键词路径的后缀时也能命中"""
+        matcher = KeywordMatcher(["abcd", "bc"])
+
+        assert matcher.search("xabcx") == "bc"
+        assert matcher.search("abd") is None
+
+    def test_case_insensitive_and_cjk(self):
+        """关键词不区分大小写，支持中文"""
+        matcher = KeywordMatcher(["Python", "樱花"])
+
+        assert matcher.search("学习 python 中") == "python"
+        assert matcher.search("今天的樱花开了") == "樱花"
+
+    def test_many_keywords_agree_with_substring_check(self):
+        """大量关键词时结果与逐个子串判断一致"""
+        keywords = [f"kw{i}x" for i in range(500)]
+        matcher = KeywordMatcher(keywords)
+
+        for text in ["nothing here", "has kw42x inside", "kw499", "kw499x", "kkw1xx"]:
+            expected = any(keyword in text for keyword in keywords)
+            assert (matcher.search(text) is not None) is expected
+
+    def test_empty_keyword_matches_everything(self):
+        """空关键词与任何文本匹配（与子串判断一致）"""
+        assert KeywordMatcher([""]).search("abc") == ""
+        assert not KeywordMatcher([])
+
+
+class TestRuleFilter:
+    """测试编译后的规则过滤条件"""
+
+    @staticmethod
+    def _message(text, forwarded=False):
+        message = Mock()
+        message.message = text
+        message.forward = Mock() if forwarded else None
+        message.fwd_from = None
+        return message
+
+    def test_no_filters_forwards_everything(self):
+        """未配置过滤条件时转发所有消息（包括无文本的消息）"""
+        assert RuleFilter.from_rule({}).should_forward(self._message("")) is True
+
+    def test_blacklist_takes_priority(self):
+        """黑名单关键词优先于白名单"""
+        rule_filter = RuleFilter.from_rule({"keywords": ["news"], "blacklist": ["AD"]})
+
+        assert rule_filter.should_forward(self._message("Daily News")) is True
+        assert rule_filter.should_forward(self._message("news with ad")) is False
+        assert rule_filter.should_forward(self._message("weather")) is False
+        assert rule_filter.should_forward(self._message("")) is False
+
+    def test_regex_filters(self):
+        """正则白名单与黑名单"""
+        rule_filter = RuleFilter.from_rule(
+            {"patterns": [r"v\d+\.\d+"], "blacklist_patterns": [r"^beta"]}
+        )
+
+        assert rule_filter.should_forward(self._message("Released V2.1")) is True
+        assert rule_filter.should_forward(self._message("beta v2.1")) is False
+        assert rule_filter.should_forward(self._message("no version")) is False
+
+    def test_invalid_pattern_reported_once_at_compile(self):
+        """无效正则在编译时报告一次，之后的消息不再报告"""
+        with patch("core.forwarding.filters.logger") as mock_logger:
+            rule_filter = RuleFilter.from_rule({"patterns": ["(unclosed", "ok"]})
+            assert mock_logger.warning.call_count == 1
+
+            assert rule_filter.should_forward(self._message("ok")) is True
+            assert rule_filter.should_forward(self._message("other")) is False
+            assert mock_logger.warning.call_count == 1
+
+    def test_only_invalid_whitelist_blocks_all(self):
+        """白名单正则全部无效时不转发（与逐条匹配的行为一致）"""
+        rule_filter = RuleFilter.from_rule({"patterns": ["(unclosed"]})
+
+        assert rule_filter.should_forward(self._message("anything")) is False
+
+    def test_original_only(self):
+        """只转发原创消息时跳过转发来的消息"""
+        rule_filter = RuleFilter.from_rule({"forward_original_only": True})
+
+        assert rule_filter.should_forward(self._message("text", forwarded=True)) is False
+        assert rule_filter.should_forward(self._message("text")) is True
+
+    def test_matches_uncompiled_filters(self):
+        """编译后的结果与 should_forward_by_keywords 一致"""
+        keywords, blacklist = ["alpha", "Beta"], ["gamma"]
+        rule_filter = RuleFilter.from_rule({"keywords": keywords, "blacklist": blacklist})
+
+        for text in ["ALPHA", "beta gamma", "delta", "xbetax"]:
+            message = self._message(text)
+            assert rule_filter.should_forward(message) is should_forward_by_keywords(
+                message, keywords, blacklist
+            )
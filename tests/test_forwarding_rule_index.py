@@ -0,0 +1,129 @@
+"""测试转发规则索引
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.forwarding.forwarding_handler import ForwardingHandler
+from core.forwarding.rule_index import ForwardingRuleIndex, normalize_source_key
+
+
+def _rule(source: str, target: str = "https://t.me/target", **extra) -> dict:
+    return {"source_channel": source, "target_channel": target, **extra}
+
+
+def _message(username: str | None, chat_id: int, message_id: int = 1):
+    return SimpleNamespace(id=message_id, chat=SimpleNamespace(username=username, id=chat_id))
+
+
+@pytest.mark.unit
+class TestNormalizeSourceKey:
+    """测试源频道标准化"""
+
+    @pytest.mark.parametrize(
+        "value",
+        ["https://t.me/Sakura", "https://t.me/sakura/", "@sakura", "sakura", "t.me/SAKURA"],
+    )
+    def test_username_forms(self, value):
+        """各种用户名写法标准化为同一个键"""
+        assert normalize_source_key(value) == "sakura"
+
+    @pytest.mark.parametrize(
+        "value",
+        ["-1001234567890", "1234567890", 1234567890, "https://t.me/c/1234567890/42"],
+    )
+    def test_numeric_forms(self, value):
+        """带 -100 前缀的ID、私有频道链接与消息中的频道ID一致"""
+        assert normalize_source_key(value) == "1234567890"
+
+
+@pytest.mark.unit
+class TestForwardingRuleIndex:
+    """测试规则索引"""
+
+    def test_lookup_by_username_and_id(self):
+        """按用户名或数字ID查找规则"""
+        index = ForwardingRuleIndex(
+            [_rule("https://t.me/Sakura"), _rule("-1001234567890", "https://t.me/other")]
+        )
+
+        assert [r.target_channel for r in index.lookup("sakura")] == ["https://t.me/target"]
+        assert [r.target_channel for r in index.lookup(None, 1234567890)] == ["https://t.me/other"]
+        assert index.lookup("unknown", 42) == []
+
+    def test_no_substring_match(self):
+        """不再按子串匹配：规则 sakura 不匹配 sakura_news"""
+        index = ForwardingRuleIndex([_rule("https://t.me/sakura"), _rule("123")])
+
+        assert index.lookup("sakura_news") == []
+        assert index.lookup(None, 1234) == []
+
+    def test_rules_from_both_keys_keep_config_order(self):
+        """用户名和数字ID分别命中的规则按配置顺序合并，不重复"""
+        index = ForwardingRuleIndex(
+            [
+                _rule("1234567890", "https://t.me/a"),
+                _rule("https://t.me/sakura", "https://t.me/b"),
+                _rule("https://t.me/sakura", "https://t.me/c"),
+            ]
+        )
+
+        matched = index.lookup("sakura", 1234567890)
+
+        assert [r.target_channel for r in matched] == [
+            "https://t.me/a",
+            "https://t.me/b",
+            "https://t.me/c",
+        ]
+
+    def test_rules_without_source_are_skipped(self):
+        """缺少源频道的规则不编入索引"""
+        index = ForwardingRuleIndex([{"target_channel": "https://t.me/x"}, _rule("sakura")])
+
+        assert len(index) == 2
+        assert index.source_keys == frozenset({"sakura"})
+        assert index.contains("SAKURA")
+        assert not index.contains(None, "")
+
+
+@pytest.mark.unit
+class TestForwardingHandlerRuleLookup:
+    """测试转发处理器使用规则索引"""
+
+    def _handler(self, rules: list[dict]) -> ForwardingHandler:
+        db = MagicMock()
+        db.is_message_forwarded = AsyncMock(return_value=False)
+        handler = ForwardingHandler(db, MagicMock(), MagicMock())
+        handler.set_config({"enabled": True, "rules": rules})
+        handler.enabled = True
+        return handler
+
+    @pytest.mark.asyncio
+    async def test_matches_rule_by_numeric_id_when_chat_has_username(self):
+        """频道有用户名时，以数字ID配置的规则也能匹配"""
+        handler = self._handler([_rule("-1001234567890")])
+
+        with patch.object(handler, "_forward_message", AsyncMock(return_value=True)) as forward:
+            assert await handler.process_message(_message("sakura", 1234567890)) is True
+
+        forward.assert_awaited_once()
+        assert forward.await_args.args[1] == "https://t.me/target"
+
+    @pytest.mark.asyncio
+    async def test_hot_reload_swaps_index(self):
+        """配置更新后使用新的规则索引"""
+        handler = self._handler([_rule("https://t.me/old")])
+        handler.set_config({"enabled": True, "rules": [_rule("https://t.me/new")]})
+
+        with patch.object(handler, "_forward_message", AsyncMock(return_value=True)) as forward:
+            assert await handler.process_message(_message("old", 1)) is False
+            assert await handler.process_message(_message("New", 2)) is True
+
+        forward.assert_awaited_once()
+        assert handler.is_source_channel("new", None)
+        assert not handler.is_source_channel("old", "1")
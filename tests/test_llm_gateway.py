@@ -0,0 +1,259 @@
+"""测试 LLM 网关与响应缓存
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+import time
+from contextlib import ExitStack
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+from core.ai import ai_client, llm_gateway, response_cache
+from core.ai.llm_gateway import LLMGateway, Priority, TokenBucket
+from core.ai.response_cache import ResponseCache, make_cache_key
+
+
+def _response(content: str = "ok") -> MagicMock:
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+def _rate_limit_error(headers: dict | None = None) -> RateLimitError:
+    request = httpx.Request("POST", "https://api.example.com/chat/completions")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def _client(create) -> MagicMock:
+    client = MagicMock()
+    client.chat.completions.create = create
+    return client
+
+
+@pytest.mark.unit
+class TestPriorityScheduling:
+    """并发与优先级测试"""
+
+    @pytest.mark.asyncio
+    async def test_waiters_served_by_priority(self):
+        """测试名额空出时交互请求先于总结与后台请求执行"""
+        gateway = LLMGateway(max_concurrency=1, model_concurrency=1, requests_per_minute=0)
+        order = []
+        release = asyncio.Event()
+
+        async def create(model, messages, **kwargs):
+            order.append(messages[0]["content"])
+            if messages[0]["content"] == "first":
+                await release.wait()
+            return _response()
+
+        def ask(name, priority):
+            return gateway.chat([{"role": "user", "content": name}], priority=priority, model="m")
+
+        with patch.object(ai_client, "async_client_llm", _client(create)):
+            first = asyncio.create_task(ask("first", Priority.BACKGROUND))
+            await asyncio.sleep(0)
+            waiting = [
+                asyncio.create_task(ask("background", Priority.BACKGROUND)),
+                asyncio.create_task(ask("scheduled", Priority.SCHEDULED)),
+                asyncio.create_task(ask("interactive", Priority.INTERACTIVE)),
+            ]
+            await asyncio.sleep(0.01)
+            assert gateway.get_metrics()["queued"] == 3
+            release.set()
+            await asyncio.gather(first, *waiting)
+
+        assert order == ["first", "interactive", "scheduled", "background"]
+
+    @pytest.mark.asyncio
+    async def test_per_model_limit(self):
+        """测试单模型并发上限不影响其他模型"""
+        gateway = LLMGateway(max_concurrency=4, model_concurrency=1, requests_per_minute=0)
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        async def create(model, messages, **kwargs):
+            running[model] += 1
+            peak[model] = max(peak[model], running[model])
+            await asyncio.sleep(0.01)
+            running[model] -= 1
+            return _response()
+
+        with patch.object(ai_client, "async_client_llm", _client(create)):
+            await asyncio.gather(
+                *(gateway.chat([], model=model) for model in ("a", "a", "a", "b", "b"))
+            )
+
+        assert peak == {"a": 1, "b": 1}
+        assert gateway.get_metrics()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """测试取消排队中的请求后不占用名额"""
+        gateway = LLMGateway(max_concurrency=1, model_concurrency=1, requests_per_minute=0)
+        release = asyncio.Event()
+
+        async def create(model, messages, **kwargs):
+            await release.wait()
+            return _response()
+
+        with patch.object(ai_client, "async_client_llm", _client(create)):
+            running = asyncio.create_task(gateway.chat([], model="m"))
+            await asyncio.sleep(0)
+            waiting = asyncio.create_task(gateway.chat([], model="m"))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            await running
+
+        assert gateway.get_metrics()["queued"] == 0
+        assert gateway.get_metrics()["in_flight"] == 0
+
+
+@pytest.mark.unit
+class TestRateLimiting:
+    """限流测试"""
+
+    @pytest.mark.asyncio
+    async def test_retry_after_honoured(self):
+        """测试 429 后按 Retry-After 暂停并重试，同时降低令牌桶速率"""
+        gateway = LLMGateway(max_concurrency=2, model_concurrency=2, requests_per_minute=600)
+        create = AsyncMock(side_effect=[_rate_limit_error({"retry-after": "7"}), _response("done")])
+        sleep = AsyncMock()
+
+        with patch.object(ai_client, "async_client_llm", _client(create)):
+            with patch.object(llm_gateway.asyncio, "sleep", sleep):
+                response = await gateway.chat([], model="m")
+
+        assert response.choices[0].message.content == "done"
+        assert create.await_count == 2
+        assert sleep.await_args_list[0].args[0] == pytest.approx(7, abs=0.5)
+        metrics = gateway.get_metrics()
+        assert metrics["by_priority"]["scheduled"]["rate_limited"] == 1
+        assert metrics["requests_per_minute"] < 600
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_retries_exhausted(self):
+        """测试连续 429 超过重试次数后抛出异常"""
+        gateway = LLMGateway(requests_per_minute=0)
+        create = AsyncMock(side_effect=_rate_limit_error({"retry-after-ms": "10"}))
+
+        with patch.object(ai_client, "async_client_llm", _client(create)):
+            with pytest.raises(RateLimitError):
+                await gateway.chat([], priority=Priority.BACKGROUND, model="m")
+
+        assert create.await_count == llm_gateway.LLM_RATE_LIMIT_RETRIES + 1
+        assert gateway.get_metrics()["by_priority"]["background"]["failures"] == 1
+
+    def test_token_bucket_recovers(self):
+        """测试令牌桶降速后随成功请求逐步恢复"""
+        bucket = TokenBucket(60)
+        bucket.throttle()
+        assert bucket.rate == pytest.approx(0.5)
+
+        for _ in range(20):
+            bucket.recover()
+        assert bucket.rate == pytest.approx(1.0)
+
+
+@pytest.mark.unit
+class TestStream:
+    """流式请求测试"""
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_deltas(self):
+        """测试流式请求产出文本增量并跳过空块"""
+        gateway = LLMGateway(requests_per_minute=0)
+
+        def chunk(content):
+            item = MagicMock()
+            item.choices[0].delta.content = content
+            return item
+
+        async def events():
+            for content in ("你好", None, "世界"):
+                yield chunk(content)
+
+        create = AsyncMock(return_value=events())
+
+        with patch.object(ai_client, "async_client_llm", _client(create)):
+            deltas = [delta async for delta in gateway.stream([], model="m")]
+
+        assert deltas == ["你好", "世界"]
+        assert create.await_args.kwargs["stream"] is True
+        assert gateway.get_metrics()["by_priority"]["interactive"]["requests"] == 1
+
+
+@pytest.mark.unit
+class TestResponseCache:
+    """响应缓存测试"""
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_served_from_cache(self):
+        """测试相同请求只调用一次，参数不同或未启用缓存时重新请求"""
+        gateway = LLMGateway(requests_per_minute=0)
+        create = AsyncMock(return_value=_response())
+        messages = [{"role": "user", "content": "poll"}]
+
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(ai_client, "async_client_llm", _client(create)))
+            stack.enter_context(
+                patch.object(llm_gateway, "get_response_cache", return_value=ResponseCache())
+            )
+            first = await gateway.chat(messages, model="m", cache=True, temperature=0.3)
+            second = await gateway.chat(messages, model="m", cache=True, temperature=0.3)
+            await gateway.chat(messages, model="m", cache=True, temperature=0.7)
+            await gateway.chat(messages, model="m", temperature=0.3)
+
+            assert second is first
+            assert create.await_count == 3
+            assert gateway.get_metrics()["cache"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_call(self):
+        """测试同一请求进行中时重复请求等待其结果"""
+        cache = ResponseCache()
+        calls = []
+
+        async def create():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(cache.get_or_create("k", create) for _ in range(3)))
+
+        assert results == ["answer"] * 3
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_and_expired_entries_not_reused(self):
+        """测试失败的请求不写入缓存，过期条目重新请求"""
+        cache = ResponseCache(max_size=2, ttl=60)
+
+        with pytest.raises(ConnectionError):
+            await cache.get_or_create("k", AsyncMock(side_effect=ConnectionError("boom")))
+        assert cache.size() == 0
+
+        await cache.get_or_create("k", AsyncMock(return_value="old"))
+        with patch.object(response_cache.time, "monotonic", return_value=time.monotonic() + 61):
+            assert await cache.get_or_create("k", AsyncMock(return_value="new")) == "new"
+
+    def test_lru_eviction_and_key(self):
+        """测试超出容量时淘汰最久未使用的条目，缓存键与参数顺序无关"""
+        cache = ResponseCache(max_size=2, ttl=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+        assert make_cache_key("m", [], temperature=0.3, tools=[]) == make_cache_key(
+            "m", [], tools=[], temperature=0.3
+        )
@@ -0,0 +1,150 @@
+"""测试 LLM 服务商池
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from openai import APIConnectionError, BadRequestError
+
+from core.ai import llm_providers
+from core.ai.llm_providers import Provider, ProviderPool
+
+REQUEST = httpx.Request("POST", "https://api.example.com/chat/completions")
+
+
+def _client(name: str, delay: float = 0.0, error: Exception | None = None) -> MagicMock:
+    """构造返回 (服务商名, 模型) 的客户端，记录调用与取消"""
+    client = MagicMock()
+    client.calls = []
+    client.cancelled = False
+
+    async def create(model, messages, **kwargs):
+        client.calls.append(model)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            client.cancelled = True
+            raise
+        if error is not None:
+            raise error
+        return (name, model)
+
+    client.chat.completions.create = create
+    return client
+
+
+def _pool(*clients: MagicMock, hedge_delay: float = 30.0) -> ProviderPool:
+    providers = [
+        Provider(f"p{index}", model=f"model-{index}" if index else None, client=client)
+        for index, client in enumerate(clients)
+    ]
+    return ProviderPool(providers, hedge_delay=hedge_delay)
+
+
+async def _run(pool: ProviderPool, model: str = "requested"):
+    return await pool.run(
+        model,
+        lambda client, provider_model: client.chat.completions.create(
+            model=provider_model, messages=[]
+        ),
+    )
+
+
+@pytest.mark.unit
+class TestFailover:
+    """故障转移测试"""
+
+    @pytest.mark.asyncio
+    async def test_failed_provider_skipped_until_cooldown_ends(self):
+        """测试主服务商连接失败时转移到备用服务商，并在冷却期内排到后面"""
+        primary = _client("p0", error=APIConnectionError(request=REQUEST))
+        fallback = _client("p1")
+        pool = _pool(primary, fallback)
+
+        assert await _run(pool) == ("p1", "model-1")
+        assert primary.calls == ["requested"]
+        assert [p.name for p in pool.ordered()] == ["p1", "p0"]
+
+        assert await _run(pool) == ("p1", "model-1")
+        assert len(primary.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_request_error_not_failed_over(self):
+        """测试请求本身的错误（400）直接抛出，不转移也不降低健康评分"""
+        response = httpx.Response(400, request=REQUEST)
+        primary = _client("p0", error=BadRequestError("bad", response=response, body=None))
+        fallback = _client("p1")
+        pool = _pool(primary, fallback)
+
+        with pytest.raises(BadRequestError):
+            await _run(pool)
+
+        assert fallback.calls == []
+        assert pool.providers[0].healthy
+
+    @pytest.mark.asyncio
+    async def test_all_providers_failed(self):
+        """测试所有服务商都失败时抛出最后一个错误"""
+        pool = _pool(_client("p0", error=ConnectionError("a")), _client("p1", error=TimeoutError()))
+
+        with pytest.raises(TimeoutError):
+            await _run(pool)
+
+
+@pytest.mark.unit
+class TestHedging:
+    """对冲请求测试"""
+
+    @pytest.mark.asyncio
+    async def test_slow_provider_hedged_and_cancelled(self):
+        """测试超过对冲延迟后请求下一个服务商，先返回者胜出，落败请求被取消"""
+        primary = _client("p0", delay=5)
+        fallback = _client("p1", delay=0.01)
+        pool = _pool(primary, fallback, hedge_delay=0.05)
+
+        assert await asyncio.wait_for(_run(pool), timeout=2) == ("p1", "model-1")
+        await asyncio.sleep(0)
+
+        assert primary.cancelled
+        assert pool.hedged == 1
+        assert not pool.providers[0].healthy
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_with_single_provider(self):
+        """测试只有主服务商或对冲延迟为 0 时不发起对冲"""
+        assert _pool(_client("p0")).current_hedge_delay() is None
+        assert _pool(_client("p0"), _client("p1"), hedge_delay=0).current_hedge_delay() is None
+
+    def test_adaptive_delay_follows_recent_latency(self):
+        """测试样本足够后对冲延迟取近期耗时的 P95 并限制在上下限内"""
+        pool = _pool(_client("p0"), _client("p1"))
+        assert pool.current_hedge_delay() == 30.0
+
+        pool._latencies.extend([4.0] * 95 + [9.0] * 5)
+        assert 4.0 <= pool.current_hedge_delay() <= 9.0
+
+        pool._latencies.clear()
+        pool._latencies.extend([0.1] * llm_providers.HEDGE_MIN_SAMPLES)
+        assert pool.current_hedge_delay() == llm_providers.HEDGE_MIN_DELAY
+
+
+@pytest.mark.unit
+class TestFromSettings:
+    """服务商池配置测试"""
+
+    def test_primary_first_then_fallbacks(self):
+        """测试主服务商在前，备用服务商按配置顺序排列"""
+        fallbacks = [
+            {"name": "backup", "base_url": "https://b.example.com/v1", "api_key": "k", "model": "m"}
+        ]
+        with patch.object(llm_providers, "get_llm_fallback_providers", return_value=fallbacks):
+            pool = ProviderPool.from_settings()
+
+        assert [p.name for p in pool.providers] == ["primary", "backup"]
+        assert pool.providers[0].model is None
+        assert pool.providers[1].client.base_url.host == "b.example.com"
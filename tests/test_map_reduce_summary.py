@@ -0,0 +1,129 @@
+"""测试分层（map-reduce）总结与 token 估算
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from core.ai import ai_client
+from core.ai.token_estimator import estimate_tokens, truncate_to_tokens
+
+
+@pytest.mark.unit
+class TestTokenEstimator:
+    """token 估算测试"""
+
+    def test_cjk_and_ascii(self):
+        """测试中日韩字符按字计、其他字符按 4 字符计"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("你好世界") == 4
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("你好abcde") == 4
+
+    def test_truncate_respects_budget(self):
+        """测试截断结果不超过预算，未超限时原样返回"""
+        text = "你好" * 50 + "hello world" * 20
+
+        truncated = truncate_to_tokens(text, 30)
+
+        assert estimate_tokens(truncated) <= 30
+        assert text.startswith(truncated)
+        assert truncate_to_tokens("short", 30) == "short"
+
+
+@pytest.mark.unit
+class TestChunkMessages:
+    """按预算分段测试"""
+
+    def test_chunks_within_budget_and_order_kept(self):
+        """测试每段不超预算且保持消息顺序"""
+        messages = [f"消息{i}" * 10 for i in range(20)]
+
+        chunks = ai_client.chunk_messages(messages, 100)
+
+        assert len(chunks) > 1
+        assert [m for chunk in chunks for m in chunk] == messages
+        separator_tokens = estimate_tokens(ai_client.MESSAGE_SEPARATOR)
+        for chunk in chunks:
+            assert sum(estimate_tokens(m) + separator_tokens for m in chunk) <= 100
+
+    def test_oversized_message_truncated(self):
+        """测试超出预算的单条消息被截断"""
+        chunks = ai_client.chunk_messages(["长" * 500], 100)
+
+        assert len(chunks) == 1
+        assert estimate_tokens(chunks[0][0]) <= 100
+
+
+@pytest.mark.unit
+class TestAnalyzeWithAI:
+    """分层总结流程测试"""
+
+    @pytest.mark.asyncio
+    async def test_small_input_single_request(self):
+        """测试未超预算时只发送一次请求"""
+        prompts = []
+
+        async def complete(prompt):
+            prompts.append(prompt)
+            return "summary"
+
+        with patch.object(ai_client, "_complete_summary", side_effect=complete):
+            result = await ai_client.analyze_with_ai(["a", "b"], "P:")
+
+        assert result == "summary"
+        assert prompts == ["P:a\n\n---\n\nb"]
+
+    @pytest.mark.asyncio
+    async def test_large_input_map_reduce(self):
+        """测试超预算时分段并发总结、限制并发，并用频道提示词生成最终报告"""
+        in_flight = 0
+        peak = 0
+        prompts = []
+
+        async def complete(prompt):
+            nonlocal in_flight, peak
+            prompts.append(prompt)
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "要点"
+
+        messages = ["消息内容" * 50 for _ in range(40)]
+        with (
+            patch.object(ai_client, "SUMMARY_CHUNK_TOKENS", 1000),
+            patch.object(ai_client, "SUMMARY_MAP_CONCURRENCY", 2),
+            patch.object(ai_client, "_complete_summary", side_effect=complete),
+        ):
+            result = await ai_client.analyze_with_ai(messages, "频道提示词:")
+
+        assert result == "要点"
+        map_calls = [p for p in prompts if p.startswith("以下是某个频道")]
+        assert len(map_calls) > 1
+        assert peak <= 2
+        assert prompts[-1].startswith("频道提示词:")
+
+    @pytest.mark.asyncio
+    async def test_partials_reduced_recursively(self):
+        """测试分段摘要总量仍超预算时逐层归并"""
+        prompts = []
+
+        async def complete(prompt):
+            prompts.append(prompt)
+            # 分段摘要很长，归并摘要很短
+            return "长摘要" * 150 if prompt.startswith("以下是某个频道") else "短"
+
+        messages = ["消息内容" * 50 for _ in range(40)]
+        with (
+            patch.object(ai_client, "SUMMARY_CHUNK_TOKENS", 1000),
+            patch.object(ai_client, "_complete_summary", side_effect=complete),
+        ):
+            await ai_client.analyze_with_ai(messages, "频道提示词:")
+
+        assert any(p.startswith("以下是同一频道") for p in prompts)
+        assert estimate_tokens(prompts[-1]) <= 1000
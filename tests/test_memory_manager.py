@@ -9,6 +9,13 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 
 from core.ai.memory_manager import MemoryManager, get_memory_manager
+from core.ai.response_cache import get_response_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """元数据提取使用 LLM 响应缓存，测试之间互不影响"""
+    get_response_cache().clear()
 
 
 @pytest.mark.unit
@@ -26,21 +33,28 @@ class TestMemoryManagerInit:
         assert manager.db == mock_db
 
 
+def _llm_response(content: str) -> MagicMock:
+    """构造异步客户端的返回值（经 LLM 网关调用）"""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
 @pytest.mark.unit
 class TestExtractMetadata:
     """提取元数据测试"""
 
-    @patch("core.ai.memory_manager.client_llm")
-    @patch("core.ai.memory_manager.get_llm_model")
+    @patch("core.ai.ai_client.async_client_llm")
+    @patch("core.ai.llm_gateway.get_llm_model")
     @patch("core.ai.memory_manager.get_db_manager")
-    def test_extract_metadata_success(self, mock_get_db, mock_model, mock_client):
+    @pytest.mark.asyncio
+    async def test_extract_metadata_success(self, mock_get_db, mock_model, mock_client):
         """测试成功提取元数据"""
-        mock_db = MagicMock()
-        mock_get_db.return_value = mock_db
+        mock_get_db.return_value = MagicMock()
         mock_model.return_value = "test-model"
-
-        mock_response = MagicMock()
-        mock_response.choices[0].message.content.strip.return_value = """
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_llm_response(
+                """
         {
             "keywords": ["AI", "ML"],
             "topics": ["技术"],
@@ -48,27 +62,135 @@ class TestExtractMetadata:
             "entities": ["OpenAI"]
         }
         """
-        mock_client.chat.completions.create.return_value = mock_response
+            )
+        )
 
         manager = MemoryManager()
-        metadata = manager.extract_metadata("Test summary")
+        metadata = await manager.extract_metadata("Test summary")
 
-        assert "keywords" in metadata
-        assert "topics" in metadata
+        assert metadata["keywords"] == ["AI", "ML"]
+        assert metadata["topics"] == ["技术"]
+        assert metadata["sentiment"] == "positive"
 
+    @patch("core.ai.ai_client.async_client_llm")
     @patch("core.ai.memory_manager.get_db_manager")
-    def test_extract_metadata_default(self, mock_get_db):
+    @pytest.mark.asyncio
+    async def test_extract_metadata_default(self, mock_get_db, mock_client):
         """测试提取元数据失败时返回默认值"""
-        mock_db = MagicMock()
-        mock_get_db.return_value = mock_db
+        mock_get_db.return_value = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=ConnectionError("boom"))
 
         manager = MemoryManager()
-        metadata = manager.extract_metadata("Test")
+        metadata = await manager.extract_metadata("Test")
 
         assert metadata["keywords"] == []
         assert metadata["topics"] == []
         assert metadata["sentiment"] == "neutral"
 
+    @patch("core.ai.ai_client.async_client_llm")
+    @patch("core.ai.memory_manager.get_db_manager")
+    @pytest.mark.asyncio
+    async def test_extract_metadata_batch_single_request(self, mock_get_db, mock_client):
+        """测试多份总结在一次请求中提取，按序号对应，缺失条目使用默认值"""
+        mock_get_db.return_value = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_llm_response(
+                '[{"index": 3, "keywords": ["c"], "sentiment": "negative"},'
+                ' {"index": 1, "keywords": ["a"], "topics": "技术"}]'
+            )
+        )
+
+        manager = MemoryManager()
+        results = await manager.extract_metadata_batch(["A", "B", "C"])
+
+        mock_client.chat.completions.create.assert_awaited_once()
+        assert [r["keywords"] for r in results] == [["a"], [], ["c"]]
+        assert results[0]["topics"] == ["技术"]
+        assert results[2]["sentiment"] == "negative"
+
+
+@pytest.mark.unit
+class TestMetadataQueue:
+    """元数据批量提取队列测试"""
+
+    @patch("core.ai.ai_client.async_client_llm")
+    @patch("core.ai.memory_manager.get_db_manager")
+    @pytest.mark.asyncio
+    async def test_queued_summaries_share_one_request(self, mock_get_db, mock_client):
+        """测试入队的多份总结合并为一次请求，并写回总结记录和频道画像"""
+        mock_db = MagicMock()
+        mock_db.update_summary_metadata = AsyncMock()
+        mock_db.update_channel_profile = AsyncMock()
+        mock_get_db.return_value = mock_db
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_llm_response(
+                '[{"index": 1, "keywords": ["a"]}, {"index": 2, "keywords": ["b"]}]'
+            )
+        )
+
+        manager = MemoryManager()
+        with patch("core.ai.memory_manager.METADATA_BATCH_SIZE", 2):
+            manager.enqueue_metadata(1, "https://t.me/a", "A", "summary a")
+            manager.enqueue_metadata(2, "https://t.me/b", "B", "summary b")
+            await manager._metadata_task
+
+        mock_client.chat.completions.create.assert_awaited_once()
+        assert [c.args[0] for c in mock_db.update_summary_metadata.await_args_list] == [1, 2]
+        assert mock_db.update_summary_metadata.await_args_list[1].kwargs["keywords"] == ["b"]
+        assert mock_db.update_channel_profile.await_count == 2
+        assert manager._pending_metadata == []
+
+    @patch("core.ai.ai_client.async_client_llm")
+    @patch("core.ai.memory_manager.get_db_manager")
+    @pytest.mark.asyncio
+    async def test_flush_pending_metadata_skips_batch_delay(self, mock_get_db, mock_client):
+        """测试关机时立即提取队列中的元数据，不再等待批次计时"""
+        mock_db = MagicMock()
+        mock_db.update_summary_metadata = AsyncMock()
+        mock_db.update_channel_profile = AsyncMock()
+        mock_get_db.return_value = mock_db
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_llm_response('[{"index": 1, "keywords": ["a"]}]')
+        )
+
+        manager = MemoryManager()
+        with patch("core.ai.memory_manager.METADATA_BATCH_DELAY", 3600):
+            manager.enqueue_metadata(1, "https://t.me/a", "A", "summary a")
+            timer = manager._metadata_task
+            await manager.flush_pending_metadata()
+
+        assert timer.cancelled() or timer.done()
+        mock_db.update_summary_metadata.assert_awaited_once()
+        assert manager._pending_metadata == []
+
+    @patch("core.ai.memory_manager.get_db_manager")
+    @pytest.mark.asyncio
+    async def test_requeue_missing_metadata(self, mock_get_db):
+        """测试启动时将缺少元数据的总结重新入队（已在队列中的不重复）"""
+        mock_db = MagicMock()
+        mock_db.get_summaries_missing_metadata = AsyncMock(
+            return_value=[
+                {"id": 1, "channel_id": "https://t.me/a", "channel_name": "A", "summary_text": "a"},
+                {
+                    "id": 2,
+                    "channel_id": "https://t.me/b",
+                    "channel_name": None,
+                    "summary_text": "b",
+                },
+            ]
+        )
+        mock_get_db.return_value = mock_db
+
+        manager = MemoryManager()
+        with patch("core.ai.memory_manager.METADATA_BATCH_DELAY", 3600):
+            manager.enqueue_metadata(1, "https://t.me/a", "A", "a")
+            count = await manager.requeue_missing_metadata()
+            manager._metadata_task.cancel()
+
+        assert count == 1
+        assert [item["summary_id"] for item in manager._pending_metadata] == [1, 2]
+        assert manager._pending_metadata[1]["channel_name"] == ""
+
 
 @pytest.mark.unit
 class TestUpdateChannelProfile:
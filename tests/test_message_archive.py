@@ -0,0 +1,268 @@
+"""测试频道消息本地归档
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.initializers import message_archive_initializer
+from core.initializers.message_archive_initializer import MessageArchiveInitializer
+from core.telegram.message_archive import MessageArchive, resolve_channel
+
+CHANNEL = "https://t.me/test_channel"
+
+
+class FakeArchiveRepo:
+    """内存版归档仓库"""
+
+    def __init__(self):
+        self.messages: dict[int, tuple[str, datetime]] = {}
+        self.state: dict | None = None
+
+    async def upsert_messages(self, channel_id, messages):
+        for message_id, text, date in messages:
+            self.messages[message_id] = (text, date)
+        return len(messages)
+
+    async def delete_messages(self, channel_id, message_ids):
+        for message_id in message_ids:
+            self.messages.pop(message_id, None)
+        return len(message_ids)
+
+    async def get_messages(self, channel_id, since):
+        return [
+            {"message_id": mid, "text": text, "message_date": date}
+            for mid, (text, date) in sorted(self.messages.items())
+            if date >= since
+        ]
+
+    async def get_state(self, channel_id):
+        return dict(self.state) if self.state else None
+
+    async def update_state(self, channel_id, last_synced_id, covered_since=None):
+        if self.state is None:
+            self.state = {"last_synced_id": last_synced_id, "covered_since": covered_since}
+            return
+        self.state["last_synced_id"] = max(self.state["last_synced_id"], last_synced_id)
+        if covered_since is not None and (
+            self.state["covered_since"] is None or covered_since < self.state["covered_since"]
+        ):
+            self.state["covered_since"] = covered_since
+
+
+class FakeClient:
+    """按 min_id / offset_date 过滤的 iter_messages"""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.calls = []
+
+    async def iter_messages(self, channel, reverse=True, offset_date=None, min_id=0):
+        self.calls.append({"offset_date": offset_date, "min_id": min_id})
+        for message in self.messages:
+            if message.id <= min_id:
+                continue
+            if offset_date and message.date < offset_date:
+                continue
+            yield message
+
+
+def _message(message_id: int, days_ago: float, text: str | None = "hello"):
+    date = datetime.now(UTC) - timedelta(days=days_ago)
+    return SimpleNamespace(id=message_id, date=date, text=text)
+
+
+@pytest.mark.unit
+class TestMessageArchive:
+    """归档同步与读取测试"""
+
+    @pytest.mark.asyncio
+    async def test_first_sync_backfills_from_start_time(self):
+        """测试首次同步从起始时间回填，无文本消息只推进游标"""
+        repo = FakeArchiveRepo()
+        client = FakeClient([_message(1, 10), _message(2, 3), _message(3, 2, text=None)])
+        archive = MessageArchive(repo=repo)
+        start_time = datetime.now(UTC) - timedelta(days=7)
+
+        fetched = await archive.sync_channel(client, CHANNEL, start_time)
+        rows = await archive.read_messages(CHANNEL, start_time)
+
+        assert fetched == 2
+        assert [r["message_id"] for r in rows] == [2]
+        assert repo.state["last_synced_id"] == 3
+        assert client.calls == [{"offset_date": start_time, "min_id": 0}]
+
+    @pytest.mark.asyncio
+    async def test_second_sync_only_fetches_gap(self):
+        """测试已覆盖时只抓取上次归档之后的消息"""
+        repo = FakeArchiveRepo()
+        messages = [_message(1, 3), _message(2, 2)]
+        client = FakeClient(messages)
+        archive = MessageArchive(repo=repo)
+        start_time = datetime.now(UTC) - timedelta(days=7)
+        await archive.sync_channel(client, CHANNEL, start_time)
+
+        messages.append(_message(3, 1))
+        fetched = await archive.sync_channel(client, CHANNEL, start_time)
+
+        assert fetched == 1
+        assert client.calls[-1] == {"offset_date": None, "min_id": 2}
+        assert [r["message_id"] for r in await archive.read_messages(CHANNEL, start_time)] == [
+            1,
+            2,
+            3,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_earlier_start_time_triggers_backfill(self):
+        """测试总结起点早于已覆盖范围时重新回填"""
+        repo = FakeArchiveRepo()
+        client = FakeClient([_message(1, 10), _message(2, 2)])
+        archive = MessageArchive(repo=repo)
+        await archive.sync_channel(client, CHANNEL, datetime.now(UTC) - timedelta(days=7))
+
+        earlier = datetime.now(UTC) - timedelta(days=14)
+        await archive.sync_channel(client, CHANNEL, earlier)
+
+        assert client.calls[-1]["offset_date"] == earlier
+        assert [r["message_id"] for r in await archive.read_messages(CHANNEL, earlier)] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_realtime_events_advance_cursor_only_after_sync(self):
+        """测试实时消息只在本进程同步过后推进游标，编辑与删除更新归档"""
+        repo = FakeArchiveRepo()
+        archive = MessageArchive(repo=repo)
+        now = datetime.now(UTC)
+
+        await archive.record_message(CHANNEL, 5, "early", now)
+        assert repo.state is None
+
+        await archive.sync_channel(FakeClient([_message(5, 0)]), CHANNEL, now - timedelta(days=7))
+        await archive.record_message(CHANNEL, 6, "live", now)
+        await archive.record_message(CHANNEL, 6, "edited", now)
+        await archive.record_delete(CHANNEL, [5])
+
+        assert repo.state["last_synced_id"] == 6
+        rows = await archive.read_messages(CHANNEL, now - timedelta(days=1))
+        assert [(r["message_id"], r["text"]) for r in rows] == [(6, "edited")]
+
+    @pytest.mark.asyncio
+    async def test_missed_update_keeps_cursor_and_is_fetched(self):
+        """测试漏收的消息不会被游标越过，下次同步时抓取"""
+        repo = FakeArchiveRepo()
+        archive = MessageArchive(repo=repo)
+        start_time = datetime.now(UTC) - timedelta(days=7)
+        messages = [_message(1, 1), _message(2, 0.5), _message(3, 0.1)]
+        client = FakeClient(messages[:1])
+        await archive.sync_channel(client, CHANNEL, start_time)
+
+        # 消息 2 的更新丢失，只收到消息 3
+        await archive.record_message(CHANNEL, 3, "hello", messages[2].date)
+        assert repo.state["last_synced_id"] == 1
+
+        client.messages = messages
+        await archive.sync_channel(client, CHANNEL, start_time)
+
+        assert client.calls[-1]["min_id"] == 1
+        assert sorted(repo.messages) == [1, 2, 3]
+        assert repo.state["last_synced_id"] == 3
+
+    @pytest.mark.asyncio
+    async def test_reset_live_stops_cursor(self):
+        """测试客户端断开后实时事件只写入消息，不再推进游标"""
+        repo = FakeArchiveRepo()
+        archive = MessageArchive(repo=repo)
+        now = datetime.now(UTC)
+        await archive.sync_channel(FakeClient([_message(1, 0)]), CHANNEL, now - timedelta(days=7))
+
+        archive.reset_live()
+        await archive.record_message(CHANNEL, 2, "after reconnect", now)
+
+        assert repo.state["last_synced_id"] == 1
+        assert 2 in repo.messages
+
+
+@pytest.mark.unit
+class TestResolveChannel:
+    """频道映射测试"""
+
+    def test_match_by_username_or_id(self):
+        """测试按 username 或数字 ID 匹配配置的频道"""
+        with patch("core.config.CHANNELS", [CHANNEL, "https://t.me/1234567"]):
+            assert resolve_channel("999", "test_channel") == CHANNEL
+            assert resolve_channel("1234567") == "https://t.me/1234567"
+            assert resolve_channel("42", "other") is None
+
+    def test_marked_id_and_username_case(self):
+        """事件中带 -100 前缀的 ID 与大小写不同的 username 也能匹配"""
+        with patch("core.config.CHANNELS", [CHANNEL, "https://t.me/1234567"]):
+            assert resolve_channel("-1001234567") == "https://t.me/1234567"
+            assert resolve_channel("-1009999", "Test_Channel") == CHANNEL
+
+
+class ListenerClient:
+    """记录 client.on 注册的事件处理函数"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event_builder):
+        def decorator(func):
+            self.handlers[func.__name__] = func
+            return func
+
+        return decorator
+
+
+@pytest.mark.unit
+class TestArchiveListeners:
+    """归档事件监听器测试"""
+
+    def _register(self):
+        client = ListenerClient()
+        archive = MagicMock()
+        archive.record_message = AsyncMock()
+        archive.record_delete = AsyncMock()
+        MessageArchiveInitializer()._register_listeners(client, archive)
+        return client, archive
+
+    @pytest.mark.asyncio
+    async def test_delete_on_username_channel(self):
+        """按 username 配置的频道，删除事件（仅有 -100 前缀 ID）也能删除归档"""
+        client, archive = self._register()
+        event = SimpleNamespace(chat_id=-1009999, deleted_ids=[5, 6])
+        entity = SimpleNamespace(id=9999, username="test_channel")
+
+        with (
+            patch("core.config.CHANNELS", [CHANNEL]),
+            patch.object(
+                message_archive_initializer,
+                "get_cached_entity",
+                AsyncMock(return_value=entity),
+            ),
+        ):
+            await client.handlers["on_message_deleted"](event)
+
+        archive.record_delete.assert_awaited_once_with(CHANNEL, [5, 6])
+
+    @pytest.mark.asyncio
+    async def test_live_message_archives_formatted_text(self):
+        """实时消息与抓取路径一样归档 message.text"""
+        client, archive = self._register()
+        date = datetime.now(UTC)
+        message = SimpleNamespace(id=7, text="**bold**", message="bold", date=date)
+        event = SimpleNamespace(
+            is_channel=True,
+            chat=SimpleNamespace(id=9999, username="test_channel"),
+            message=message,
+        )
+
+        with patch("core.config.CHANNELS", [CHANNEL]):
+            await client.handlers["on_new_message"](event)
+
+        archive.record_message.assert_awaited_once_with(CHANNEL, 7, "**bold**", date)
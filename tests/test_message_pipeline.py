@@ -0,0 +1,75 @@
+"""测试总结消息流水线
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import pytest
+
+from core.ai.token_estimator import estimate_tokens
+from core.telegram.message_pipeline import ChannelMessageCollector, is_link_only
+
+CHANNEL = "https://t.me/test_channel"
+
+
+@pytest.mark.unit
+class TestIsLinkOnly:
+    """纯链接判断测试"""
+
+    @pytest.mark.parametrize(
+        "text",
+        ["https://example.com/a", "🔗 https://example.com\n t.me/other", "www.example.com !"],
+    )
+    def test_link_only(self, text):
+        """测试只有链接与符号的消息被识别为纯链接"""
+        assert is_link_only(text)
+
+    @pytest.mark.parametrize("text", ["新版本发布 https://example.com", "没有链接", "🎉🎉"])
+    def test_not_link_only(self, text):
+        """测试包含文字或不含链接的消息不是纯链接"""
+        assert not is_link_only(text)
+
+
+@pytest.mark.unit
+class TestChannelMessageCollector:
+    """频道消息收集测试"""
+
+    def test_formats_and_filters(self):
+        """测试格式化消息并跳过报告、无文本、纯链接与重复消息"""
+        collector = ChannelMessageCollector(CHANNEL, exclude_ids=[2], token_budget=0)
+        collector.add(1, "第一条消息")
+        collector.add(2, "报告")
+        collector.add(3, None)
+        collector.add(4, "https://example.com")
+        collector.add(5, "  第一条消息 ")
+        collector.add(6, "x" * 800)
+
+        assert collector.messages() == [
+            "内容: 第一条消息\n链接: https://t.me/test_channel/1",
+            f"内容: {'x' * 500}\n链接: https://t.me/test_channel/6",
+        ]
+        assert collector.stats == {
+            "processed": 6,
+            "excluded": 1,
+            "empty": 1,
+            "link_only": 1,
+            "duplicate": 1,
+            "sampled_out": 0,
+        }
+        assert not collector.sampled
+
+    def test_samples_evenly_within_budget(self):
+        """测试超出预算后均匀抽样，结果不超预算且覆盖整个时间范围"""
+        unit = estimate_tokens("内容: 消息000\n链接: https://t.me/test_channel/000")
+        collector = ChannelMessageCollector(CHANNEL, token_budget=unit * 10)
+
+        for i in range(100):
+            collector.add(i, f"消息{i:03d}")
+
+        kept = collector.messages()
+        assert collector.sampled
+        assert collector.tokens <= unit * 10
+        assert 5 <= len(kept) <= 10
+        assert kept[0].startswith("内容: 消息000")
+        assert "消息09" in kept[-1]
+        assert collector.stats["sampled_out"] == 100 - len(kept)
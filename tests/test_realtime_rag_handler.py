@@ -0,0 +1,158 @@
+"""测试实时 RAG 处理器
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from core.handlers.realtime_rag_handler import RealtimeRAGHandler
+
+
+def _make_running_handler(window: float) -> RealtimeRAGHandler:
+    """创建处于运行状态但不启动 worker 的处理器"""
+    handler = RealtimeRAGHandler(edit_coalesce_window=window)
+    handler._running = True
+    return handler
+
+
+def _drain(handler: RealtimeRAGHandler) -> list[dict]:
+    """取出队列中全部条目"""
+    items = []
+    while not handler._queue.empty():
+        items.append(handler._queue.get_nowait())
+    return items
+
+
+@pytest.mark.unit
+class TestEditCoalescing:
+    """编辑合并测试"""
+
+    def test_edits_within_window_keep_latest_text(self):
+        """测试窗口内多次编辑只保留最后一次文本"""
+        handler = _make_running_handler(window=30)
+
+        for text in ("v1", "v2", "v3"):
+            assert handler.enqueue_message_update("100", "频道", 1, text)
+
+        assert handler._queue.qsize() == 0
+        assert handler.get_stats()["pending_edits"] == 1
+        assert handler.get_stats()["coalesced_count"] == 2
+
+        handler._flush_pending_edits(force=True)
+        items = _drain(handler)
+
+        assert len(items) == 1
+        assert items[0]["text"] == "v3"
+        assert items[0]["vector_id"] == "100:1"
+
+    def test_edits_of_different_messages_not_merged(self):
+        """测试不同消息的编辑互不合并"""
+        handler = _make_running_handler(window=30)
+
+        handler.enqueue_message_update("100", "频道", 1, "a")
+        handler.enqueue_message_update("100", "频道", 2, "b")
+
+        assert handler.get_stats()["pending_edits"] == 2
+
+    def test_flush_respects_window(self):
+        """测试未到期的编辑不会出队"""
+        handler = _make_running_handler(window=30)
+        handler.enqueue_message_update("100", "频道", 1, "a")
+
+        assert handler._flush_pending_edits() == 0
+
+        with patch("core.handlers.realtime_rag_handler.time.monotonic", return_value=1e12):
+            assert handler._flush_pending_edits() == 1
+
+        assert handler._queue.qsize() == 1
+
+    def test_superseded_queue_entry_is_dropped(self):
+        """测试队列中被新编辑取代的条目会被识别为过期"""
+        handler = _make_running_handler(window=0)
+
+        handler.enqueue_message_update("100", "频道", 1, "old")
+        handler.enqueue_message_update("100", "频道", 1, "new")
+        old_item, new_item = _drain(handler)
+
+        assert handler._is_superseded(old_item) is True
+        assert handler._is_superseded(new_item) is False
+        # 最新条目出队后清理序号记录
+        assert handler._edit_seq == {}
+
+    def test_new_message_never_superseded(self):
+        """测试新消息条目不受编辑序号影响"""
+        handler = _make_running_handler(window=30)
+
+        handler.enqueue_message("100", "频道", 1, "text")
+        handler.enqueue_message_update("100", "频道", 1, "edited")
+
+        (item,) = _drain(handler)
+        assert handler._is_superseded(item) is False
+
+    def test_empty_text_rejected(self):
+        """测试空文本编辑被拒绝"""
+        handler = _make_running_handler(window=30)
+
+        assert handler.enqueue_message_update("100", "频道", 1, "   ") is False
+        assert handler.get_stats()["pending_edits"] == 0
+
+
+@pytest.mark.unit
+class TestWorkerCoalescing:
+    """worker 合并处理测试"""
+
+    @pytest.mark.asyncio
+    async def test_worker_processes_only_latest_edit(self):
+        """测试 worker 只处理最新编辑并在停止时清空待合并编辑"""
+        handler = RealtimeRAGHandler(edit_coalesce_window=0)
+        handler._process_batch = AsyncMock()
+
+        await handler.start()
+        handler.enqueue_message_update("100", "频道", 1, "old")
+        handler.enqueue_message_update("100", "频道", 1, "new")
+        await handler.stop()
+
+        processed = [
+            item for call in handler._process_batch.await_args_list for item in call.args[0]
+        ]
+        assert [item["text"] for item in processed] == ["new"]
+        assert handler.get_stats()["coalesced_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending_edits(self):
+        """测试停止时窗口内的编辑仍会被处理"""
+        handler = RealtimeRAGHandler(edit_coalesce_window=3600)
+        handler._process_batch = AsyncMock()
+
+        await handler.start()
+        handler.enqueue_message_update("100", "频道", 1, "v1")
+        handler.enqueue_message_update("100", "频道", 1, "v2")
+        await handler.stop()
+
+        processed = [
+            item for call in handler._process_batch.await_args_list for item in call.args[0]
+        ]
+        assert [item["text"] for item in processed] == ["v2"]
+        assert handler.get_stats()["pending_edits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_edits_beyond_queue_capacity(self):
+        """测试待合并编辑多于队列容量时，停止时在队列腾出空间后全部处理"""
+        handler = RealtimeRAGHandler(edit_coalesce_window=3600)
+        handler._queue = asyncio.Queue(maxsize=2)
+        handler._process_batch = AsyncMock()
+
+        await handler.start()
+        for message_id in range(1, 8):
+            handler.enqueue_message_update("100", "频道", message_id, f"v{message_id}")
+        await handler.stop()
+
+        processed = [
+            item for call in handler._process_batch.await_args_list for item in call.args[0]
+        ]
+        assert sorted(item["message_id"] for item in processed) == list(range(1, 8))
+        assert handler.get_stats()["pending_edits"] == 0
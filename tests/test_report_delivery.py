@@ -0,0 +1,176 @@
+"""测试报告投递
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from core.telegram import messaging, report_delivery
+from core.telegram.report_delivery import (
+    DeliveryLimiter,
+    DeliveryResult,
+    deliver_report,
+    send_parts,
+)
+
+
+def _client(failures: dict | None = None, delay: float = 0.0) -> MagicMock:
+    """记录 (聊天, 文本) 的客户端；failures 为聊天 → 依次抛出的异常（None 表示成功）"""
+    client = MagicMock()
+    client.sent = []
+    client.running = 0
+    client.peak = 0
+    failures = {chat: list(errors) for chat, errors in (failures or {}).items()}
+
+    async def send_message(chat_id, text, link_preview=False):
+        client.running += 1
+        client.peak = max(client.peak, client.running)
+        try:
+            await asyncio.sleep(delay)
+            pending = failures.get(chat_id)
+            error = pending.pop(0) if pending else None
+            if error is not None:
+                raise error
+            client.sent.append((chat_id, text))
+            return MagicMock(id=len(client.sent))
+        finally:
+            client.running -= 1
+
+    client.send_message = send_message
+    return client
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit():
+    """默认不限速，避免测试等待"""
+    with patch.object(report_delivery, "_delivery_limiter", DeliveryLimiter(0, 0)):
+        yield
+
+
+@pytest.mark.unit
+class TestDeliverReport:
+    """投递测试"""
+
+    @pytest.mark.asyncio
+    async def test_recipients_concurrent_parts_ordered(self):
+        """测试不同接收者并发发送，同一接收者的分段按顺序发送"""
+        client = _client(delay=0.01)
+
+        results = await deliver_report(client, [1, 2, 3], ["a", "b", "c"])
+
+        assert client.peak > 1
+        for chat_id in (1, 2, 3):
+            assert [text for chat, text in client.sent if chat == chat_id] == ["a", "b", "c"]
+        assert all(result.delivered for result in results)
+        assert [result.chat_id for result in results] == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_flood_wait_retried(self):
+        """测试 FloodWait 后按提示时间暂停该聊天再重试"""
+        client = _client({1: [FloodWaitError(request=None, capture=7)]})
+        sleep = AsyncMock()
+
+        with patch.object(report_delivery.asyncio, "sleep", sleep):
+            result = await send_parts(client, 1, ["a"])
+
+        assert result.delivered
+        assert result.flood_waits == 1
+        assert max(call.args[0] for call in sleep.await_args_list) == pytest.approx(7, abs=0.5)
+
+    @pytest.mark.asyncio
+    async def test_long_flood_wait_fails_recipient(self):
+        """测试 FloodWait 超过上限时不等待，该接收者直接失败，其他接收者照常投递"""
+        client = _client({1: [FloodWaitError(request=None, capture=3600)]})
+        sleep = AsyncMock()
+
+        with (
+            patch.object(report_delivery, "REPORT_MAX_FLOOD_WAIT", 60),
+            patch.object(report_delivery.asyncio, "sleep", sleep),
+        ):
+            first, second = await deliver_report(client, [1, 2], ["a", "b"])
+
+        assert all(call.args[0] < 1 for call in sleep.await_args_list)
+        assert not first.delivered
+        assert first.failed_parts == 2
+        assert first.flood_waits == 1
+        assert first.error.startswith("FloodWaitError")
+        assert second.delivered
+
+    @pytest.mark.asyncio
+    async def test_failed_part_stops_chat_only(self):
+        """测试格式错误改为纯文本重发；仍失败时停止该聊天的后续分段，不影响其他接收者"""
+        client = _client(
+            {
+                1: [ValueError("invalid bounds"), None],
+                2: [ValueError("forbidden"), ValueError("forbidden")],
+            }
+        )
+
+        first, second = await deliver_report(client, [1, 2], ["**a**", "b"])
+
+        assert first.delivered
+        assert [text for chat, text in client.sent if chat == 1] == ["a", "b"]
+        assert second.message_ids == []
+        assert second.failed_parts == 2
+        assert second.error == "ValueError: forbidden"
+
+    @pytest.mark.asyncio
+    async def test_limiter_spaces_messages(self):
+        """测试限流器按全局速率与单聊天间隔预约发送时间"""
+        limiter = DeliveryLimiter(messages_per_second=10, chat_interval=1)
+        sleep = AsyncMock()
+
+        with patch.object(report_delivery.asyncio, "sleep", sleep):
+            await limiter.wait(1)
+            await limiter.wait(2)
+            await limiter.wait(1)
+
+        delays = [call.args[0] for call in sleep.await_args_list]
+        assert delays == [pytest.approx(0.1, abs=0.05), pytest.approx(1.0, abs=0.05)]
+
+
+@pytest.mark.unit
+class TestSourceDeliveryNotice:
+    """源频道投递结果通知测试"""
+
+    @pytest.mark.asyncio
+    async def test_partial_source_delivery_reported_as_error(self):
+        """测试源频道部分分段发送失败时通知管理员失败段数，而不是发送成功"""
+        partial = DeliveryResult(
+            "https://t.me/test", message_ids=[11], failed_parts=2, error="RPCError: boom"
+        )
+        notify = AsyncMock(return_value=[])
+        db = MagicMock()
+        db.save_summary = AsyncMock(return_value=None)
+
+        with (
+            patch.object(messaging, "ADMIN_LIST", [1]),
+            patch.object(messaging, "SEND_REPORT_TO_SOURCE", True),
+            patch.object(
+                messaging, "get_cached_entity", AsyncMock(return_value=MagicMock(title="测试频道"))
+            ),
+            patch.object(messaging, "send_parts", AsyncMock(return_value=partial)),
+            patch.object(messaging, "deliver_report", notify),
+            patch.object(messaging, "send_poll", AsyncMock(return_value=None)),
+            patch("core.infrastructure.database.get_db_manager", return_value=db),
+        ):
+            result = await messaging.send_report(
+                "报告",
+                source_channel="https://t.me/test",
+                client=MagicMock(pin_message=AsyncMock()),
+            )
+
+        assert result["summary_message_ids"] == [11]
+        notice = notify.await_args_list[-1].args[2][0]
+        assert notice == messaging.get_text(
+            "messaging.send_error",
+            channel="测试频道",
+            error=messaging.get_text(
+                "messaging.partial_delivery", failed=2, total=3, error="RPCError: boom"
+            ),
+        )
@@ -0,0 +1,106 @@
+"""测试代表性消息抽样
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from core.ai.representative_sampler import (
+    even_pick,
+    select_representative_indices,
+    select_representatives,
+)
+
+
+def _clustered_embeddings(sizes: list[int], dimension: int = 8, seed: int = 0):
+    """生成若干个相互分离的簇，返回 (向量, 每条消息的簇编号)"""
+    rng = np.random.default_rng(seed)
+    vectors, labels = [], []
+    for cluster, size in enumerate(sizes):
+        center = np.zeros(dimension)
+        center[cluster] = 1.0
+        vectors.append(center + rng.normal(scale=0.05, size=(size, dimension)))
+        labels.extend([cluster] * size)
+    return np.vstack(vectors), labels
+
+
+@pytest.mark.unit
+class TestEvenPick:
+    """均匀抽样测试"""
+
+    def test_within_budget_keeps_all(self):
+        """测试未超预算时全部保留"""
+        assert even_pick([0, 1, 2], [5, 5, 5], 15) == [0, 1, 2]
+
+    def test_picks_evenly_within_budget(self):
+        """测试超预算时按时间均匀挑选且不超预算"""
+        picked = even_pick(list(range(100)), [10] * 100, 100)
+
+        assert len(picked) == 10
+        assert picked[0] == 0 and picked[-1] >= 90
+
+
+@pytest.mark.unit
+class TestSelectRepresentatives:
+    """聚类挑选测试"""
+
+    def test_covers_every_cluster_weighted_by_size(self):
+        """测试每个话题簇都有代表，名额随簇大小增加"""
+        embeddings, labels = _clustered_embeddings([60, 30, 10])
+        tokens = [10] * len(labels)
+
+        picked = select_representatives(embeddings, tokens, budget=200)
+
+        assert sum(tokens[i] for i in picked) <= 200
+        counts = [sum(1 for i in picked if labels[i] == c) for c in range(3)]
+        assert all(count > 0 for count in counts)
+        assert counts[0] > counts[1] > counts[2]
+        assert picked == sorted(picked)
+
+    def test_within_budget_keeps_all(self):
+        """测试未超预算时全部保留"""
+        embeddings, _ = _clustered_embeddings([3])
+
+        assert select_representatives(embeddings, [1, 1, 1], budget=10) == [0, 1, 2]
+
+
+@pytest.mark.unit
+class TestSelectRepresentativeIndices:
+    """抽样入口测试"""
+
+    def test_unknown_channel_falls_back_to_even(self):
+        """测试无法确定频道 ID 时退化为均匀抽样"""
+        picked = select_representative_indices(None, list(range(100)), [10] * 100, 100)
+
+        assert picked == even_pick(list(range(100)), [10] * 100, 100)
+
+    def test_low_coverage_falls_back_to_even(self):
+        """测试消息向量覆盖率不足时退化为均匀抽样"""
+        store = SimpleNamespace(get_message_embeddings=lambda ids: {ids[0]: [1.0, 0.0]})
+
+        with patch("core.ai.vector_store.get_vector_store", return_value=store):
+            picked = select_representative_indices("42", list(range(100)), [10] * 100, 100)
+
+        assert picked == even_pick(list(range(100)), [10] * 100, 100)
+
+    def test_clusters_messages_with_embeddings(self):
+        """测试使用向量库中的消息向量聚类挑选，缺少向量的消息按比例均匀补充"""
+        embeddings, labels = _clustered_embeddings([45, 45])
+        message_ids = list(range(100, 200))
+        # 最后 10 条消息没有向量
+        vectors = {f"42:{mid}": embeddings[i].tolist() for i, mid in enumerate(message_ids[:90])}
+        store = SimpleNamespace(
+            get_message_embeddings=lambda ids: {vid: vectors[vid] for vid in ids if vid in vectors}
+        )
+
+        with patch("core.ai.vector_store.get_vector_store", return_value=store):
+            picked = select_representative_indices("42", message_ids, [10] * 100, 200)
+
+        assert len(picked) <= 20
+        assert any(i < 45 for i in picked) and any(45 <= i < 90 for i in picked)
+        assert any(i >= 90 for i in picked)
@@ -0,0 +1,268 @@
+"""测试滚动日摘要
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from contextlib import ExitStack
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.infrastructure.database.mysql import MySQLManager
+from core.system import rolling_summary
+
+CHANNEL = "https://t.me/test_channel"
+SINCE = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class FakeDB:
+    """记录保存的日摘要，按类型返回已有总结"""
+
+    def __init__(self, digests=None):
+        self.digests = digests or []
+        self.saved = []
+
+    async def get_summaries(self, channel_id=None, limit=10, summary_type=None, **kwargs):
+        assert summary_type == rolling_summary.DIGEST_SUMMARY_TYPE
+        return list(self.digests)
+
+    async def save_summary(self, **kwargs):
+        self.saved.append(kwargs)
+        return len(self.saved)
+
+
+def _digest(days: int, text: str, count: int) -> dict:
+    start = SINCE.replace(tzinfo=None) + timedelta(days=days)
+    return {
+        "summary_text": text,
+        "message_count": count,
+        "start_time": start,
+        "end_time": start + timedelta(days=1),
+    }
+
+
+def _patched(stack: ExitStack, db: FakeDB, messages_by_channel: dict, fetch_calls: list):
+    async def fetch(channels, start_time=None, report_message_ids=None):
+        fetch_calls.append(start_time)
+        return messages_by_channel
+
+    async def analyze(messages, prompt):
+        return f"digest of {len(messages)}"
+
+    stack.enter_context(patch("core.infrastructure.database.get_db_manager", return_value=db))
+    stack.enter_context(
+        patch.object(rolling_summary, "fetch_last_week_messages", side_effect=fetch)
+    )
+    stack.enter_context(patch.object(rolling_summary, "analyze_with_ai", side_effect=analyze))
+    stack.enter_context(patch.object(rolling_summary, "get_active_client", return_value=None))
+
+
+@pytest.mark.unit
+class TestRollingSummary:
+    """滚动日摘要测试"""
+
+    def test_only_weekly_channels_when_enabled(self):
+        """测试仅在启用时对每周总结的频道生效"""
+        weekly = {"frequency": "weekly"}
+        with patch.object(rolling_summary, "get_channel_schedule", return_value=weekly):
+            with patch.object(rolling_summary, "ROLLING_SUMMARY_ENABLED", False):
+                assert not rolling_summary.is_rolling_channel(CHANNEL)
+            with patch.object(rolling_summary, "ROLLING_SUMMARY_ENABLED", True):
+                assert rolling_summary.is_rolling_channel(CHANNEL)
+
+        daily = {"frequency": "daily"}
+        with patch.object(rolling_summary, "get_channel_schedule", return_value=daily):
+            with patch.object(rolling_summary, "ROLLING_SUMMARY_ENABLED", True):
+                assert not rolling_summary.is_rolling_channel(CHANNEL)
+
+    @pytest.mark.asyncio
+    async def test_weekly_inputs_reduce_existing_digests(self):
+        """测试周报输入为已有日摘要加上最后一段消息的补充摘要"""
+        db = FakeDB([_digest(1, "day 2", 5), _digest(0, "day 1", 3)])
+        fetch_calls = []
+
+        with ExitStack() as stack:
+            _patched(stack, db, {CHANNEL: ["m1", "m2"]}, fetch_calls)
+            inputs, message_count = await rolling_summary.prepare_weekly_inputs(CHANNEL, SINCE, [9])
+
+        assert message_count == 10
+        assert [text.split("\n", 1)[1] for text in inputs] == ["day 1", "day 2", "digest of 2"]
+        # 补充摘要从最后一份日摘要结束时开始抓取
+        assert fetch_calls == [SINCE + timedelta(days=2)]
+        assert db.saved[0]["summary_type"] == rolling_summary.DIGEST_SUMMARY_TYPE
+        assert db.saved[0]["message_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_digest_saved_with_channel_title(self):
+        """测试日摘要以频道实际名称保存，与周报记录的名称一致"""
+        db = FakeDB()
+
+        with ExitStack() as stack:
+            _patched(stack, db, {CHANNEL: ["m1"]}, [])
+            stack.enter_context(
+                patch.object(rolling_summary, "get_active_client", return_value=MagicMock())
+            )
+            stack.enter_context(
+                patch.object(
+                    rolling_summary,
+                    "get_cached_entity",
+                    AsyncMock(return_value=SimpleNamespace(title="测试频道")),
+                )
+            )
+            await rolling_summary.summarize_digest(CHANNEL, SINCE, [])
+
+        assert db.saved[0]["channel_name"] == "测试频道"
+
+    @pytest.mark.asyncio
+    async def test_digest_skipped_without_new_messages(self):
+        """测试没有新消息时不生成日摘要"""
+        db = FakeDB()
+        fetch_calls = []
+
+        with ExitStack() as stack:
+            _patched(stack, db, {CHANNEL: []}, fetch_calls)
+            inputs, message_count = await rolling_summary.prepare_weekly_inputs(CHANNEL, SINCE, [])
+
+        assert (inputs, message_count) == ([], 0)
+        assert fetch_calls == [SINCE]
+        assert db.saved == []
+
+    @pytest.mark.asyncio
+    async def test_inaccessible_channel_raises(self):
+        """测试频道无法访问时报错"""
+        with ExitStack() as stack:
+            _patched(stack, FakeDB(), {}, [])
+            with pytest.raises(RuntimeError):
+                await rolling_summary.summarize_digest(CHANNEL, SINCE, [])
+
+    @pytest.mark.asyncio
+    async def test_daily_job_isolates_channel_failures(self):
+        """测试日摘要任务中单个频道失败不影响其他频道"""
+        channels = ["https://t.me/bad", CHANNEL]
+        db = FakeDB()
+
+        async def fetch(channels, start_time=None, report_message_ids=None):
+            if channels[0] == "https://t.me/bad":
+                raise ConnectionError("boom")
+            return {channels[0]: ["m1"]}
+
+        async def analyze(messages, prompt):
+            return "digest"
+
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(rolling_summary.config_module, "CHANNELS", channels))
+            stack.enter_context(patch.object(rolling_summary, "ROLLING_SUMMARY_ENABLED", True))
+            stack.enter_context(
+                patch.object(
+                    rolling_summary, "get_channel_schedule", return_value={"frequency": "weekly"}
+                )
+            )
+            stack.enter_context(
+                patch.object(
+                    rolling_summary,
+                    "load_last_summary_time",
+                    return_value={
+                        "time": SINCE,
+                        "summary_message_ids": [1],
+                        "poll_message_ids": [2],
+                    },
+                )
+            )
+            stack.enter_context(
+                patch("core.infrastructure.database.get_db_manager", return_value=db)
+            )
+            stack.enter_context(
+                patch.object(rolling_summary, "fetch_last_week_messages", side_effect=fetch)
+            )
+            stack.enter_context(
+                patch.object(rolling_summary, "analyze_with_ai", side_effect=analyze)
+            )
+            await rolling_summary.run_daily_digests()
+
+        assert [saved["channel_id"] for saved in db.saved] == [CHANNEL]
+
+
+@pytest.mark.unit
+class TestSummaryTypeCondition:
+    """历史总结查询的类型过滤测试"""
+
+    def test_internal_types_excluded_by_default(self):
+        """测试未指定类型时排除内部总结类型"""
+        conditions, params = [], []
+        MySQLManager._add_summary_type_condition(conditions, params, None)
+
+        assert "NOT IN" in conditions[0]
+        assert params == [rolling_summary.DIGEST_SUMMARY_TYPE]
+
+    def test_explicit_type(self):
+        """测试指定类型时只查询该类型"""
+        conditions, params = [], []
+        MySQLManager._add_summary_type_condition(conditions, params, "daily_digest")
+
+        assert conditions == ["summary_type = %s"]
+        assert params == ["daily_digest"]
+
+
+class RecordingCursor:
+    """记录执行的 SQL 与参数"""
+
+    def __init__(self):
+        self.queries = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None):
+        self.queries.append((query, list(params or [])))
+
+    async def fetchone(self):
+        return (0, None)
+
+    async def fetchall(self):
+        return []
+
+
+def _manager_with_cursor(cursor: RecordingCursor) -> MySQLManager:
+    manager = MySQLManager(host="localhost", port=3306, user="u", password="p", database="d")
+    conn = MagicMock()
+    conn.__aenter__ = AsyncMock(return_value=conn)
+    conn.__aexit__ = AsyncMock(return_value=False)
+    conn.cursor = MagicMock(return_value=cursor)
+    manager.pool = MagicMock()
+    manager.pool.acquire = MagicMock(return_value=conn)
+    return manager
+
+
+@pytest.mark.unit
+class TestAggregatesExcludeDigests:
+    """统计、排行与频道列表不计入日摘要"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("method", "args"),
+        [
+            ("get_statistics", ()),
+            ("get_statistics", (CHANNEL,)),
+            ("get_channel_ranking", ()),
+            ("get_all_channels", ()),
+            ("get_channel_summary_stats", (CHANNEL,)),
+        ],
+    )
+    async def test_queries_exclude_internal_types(self, method, args):
+        """测试每条汇总查询都排除内部总结类型"""
+        cursor = RecordingCursor()
+        manager = _manager_with_cursor(cursor)
+
+        with patch("core.config.CHANNELS", []):
+            await getattr(manager, method)(*args)
+
+        assert cursor.queries
+        for query, params in cursor.queries:
+            assert "NOT IN" in query
+            assert rolling_summary.DIGEST_SUMMARY_TYPE in params
@@ -0,0 +1,109 @@
+"""测试定时总结错峰与准入
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from core.ai import llm_gateway
+from core.system import schedule_planner
+from core.system.schedule_planner import (
+    SummaryAdmission,
+    apply_offset,
+    plan_summary_triggers,
+    preview_summary_plan,
+)
+
+DAILY_9 = {"frequency": "daily", "hour": 9, "minute": 0}
+
+
+def _plan(schedules: dict, spread_minutes: int = 30) -> dict:
+    with patch.object(schedule_planner, "get_channel_schedule", side_effect=schedules.get):
+        return plan_summary_triggers(list(schedules), spread_minutes)
+
+
+@pytest.mark.unit
+class TestPlan:
+    """错峰计划测试"""
+
+    def test_same_time_channels_spread_evenly(self):
+        """测试相同触发时间的频道在窗口内均匀错开，单独时间的频道不偏移"""
+        schedules = {f"https://t.me/c{i}": DAILY_9 for i in range(6)}
+        schedules["https://t.me/solo"] = {"frequency": "daily", "hour": 20, "minute": 30}
+
+        plan = _plan(schedules)
+
+        offsets = sorted(plan[f"https://t.me/c{i}"]["offset_seconds"] for i in range(6))
+        assert offsets == [0, 300, 600, 900, 1200, 1500]
+        assert plan["https://t.me/solo"]["offset_seconds"] == 0
+        assert plan["https://t.me/solo"]["trigger"]["hour"] == 20
+        assert _plan(schedules) == plan
+
+    def test_spread_disabled(self):
+        """测试错峰窗口为 0 时保持配置的时间"""
+        plan = _plan({"https://t.me/a": DAILY_9, "https://t.me/b": DAILY_9}, spread_minutes=0)
+
+        assert {entry["offset_seconds"] for entry in plan.values()} == {0}
+
+    def test_offset_past_midnight_shifts_days(self):
+        """测试偏移跨过午夜时星期顺延到下一天"""
+        trigger = {"day_of_week": "mon,sun", "hour": 23, "minute": 50}
+
+        assert apply_offset(trigger, 15 * 60 + 7) == {
+            "day_of_week": "tue,mon",
+            "hour": 0,
+            "minute": 5,
+            "second": 7,
+        }
+
+    def test_preview_sorted_by_next_run(self):
+        """测试预览按下次执行时间排序"""
+        schedules = {"https://t.me/a": DAILY_9, "https://t.me/b": DAILY_9}
+        now = datetime(2026, 1, 5, 8, 0, tzinfo=ZoneInfo("UTC"))
+
+        with patch.object(schedule_planner, "get_channel_schedule", side_effect=schedules.get):
+            items = preview_summary_plan(list(schedules), now=now, spread_minutes=10)
+
+        assert [item["next_run_time"] for item in items] == [
+            "2026-01-05T09:00:00+00:00",
+            "2026-01-05T09:05:00+00:00",
+        ]
+        assert items[1]["planned_time"] == "09:05:00"
+
+
+@pytest.mark.unit
+class TestAdmission:
+    """准入测试"""
+
+    @pytest.mark.asyncio
+    async def test_waits_while_gateway_backlogged(self):
+        """测试网关有积压时后续总结等待，积压清空后放行"""
+        admission = SummaryAdmission(poll_seconds=0.01)
+        metrics = {"queued": 3, "max_concurrency": 4}
+        gateway = MagicMock(get_metrics=lambda: metrics)
+        started = []
+
+        async def job(name):
+            async with admission.admit(name):
+                started.append(name)
+                await asyncio.sleep(0.05)
+
+        with patch.object(llm_gateway, "get_llm_gateway", return_value=gateway):
+            first = asyncio.create_task(job("first"))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(job("second"))
+            await asyncio.sleep(0.02)
+            assert started == ["first"]
+            assert admission.get_status() == {"running": 1, "waiting": 1}
+
+            metrics["queued"] = 0
+            await asyncio.gather(first, second)
+
+        assert started == ["first", "second"]
+        assert admission.get_status() == {"running": 0, "waiting": 0}
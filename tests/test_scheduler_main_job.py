@@ -0,0 +1,266 @@
+"""测试定时总结任务的多频道并发处理
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import asyncio
+import copy
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.system import scheduler, summary_jobs
+
+CHANNELS = ["https://t.me/a", "https://t.me/b", "https://t.me/c"]
+
+
+class FakeJobRepo:
+    """内存中的 summary_jobs 表"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def create_job(self, channel_id, stage, state):
+        job_id = len(self.rows) + 1
+        self.rows[job_id] = {
+            "id": job_id,
+            "channel_id": channel_id,
+            "stage": stage,
+            "state": copy.deepcopy(state),
+            "status": "running",
+            "created_at": datetime.now(),
+        }
+        return job_id
+
+    async def save_checkpoint(self, job_id, stage, state, status="running", last_error=None):
+        self.rows[job_id].update(stage=stage, state=copy.deepcopy(state), status=status)
+
+    async def get_unfinished_jobs(self, channel_id=None):
+        return [
+            copy.deepcopy(row)
+            for row in self.rows.values()
+            if row["status"] in ("running", "failed") and channel_id in (None, row["channel_id"])
+        ]
+
+
+async def _send_report(*_args, **_kwargs):
+    return {"summary_message_ids": [100], "poll_message_id": None, "button_message_id": None}
+
+
+async def _run_main_job(
+    fetch,
+    analyze,
+    *args,
+    previous=None,
+    repo=None,
+    send_report=_send_report,
+    save_time=None,
+    **kwargs,
+):
+    """替换频道处理流程中的外部依赖后执行 main_job；保存与通知阶段被替换为空操作
+
+    previous 为按输入指纹查到的已有总结（默认没有），repo 为总结任务表（默认为空表）
+    """
+    client = MagicMock()
+    client.get_entity.side_effect = Exception("offline")
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(scheduler.config_module, "CHANNELS", CHANNELS))
+        stack.enter_context(patch.object(scheduler, "load_last_summary_time", return_value=None))
+        stack.enter_context(patch.object(scheduler, "fetch_last_week_messages", side_effect=fetch))
+        stack.enter_context(patch.object(scheduler, "analyze_with_ai", side_effect=analyze))
+        stack.enter_context(patch.object(scheduler, "load_prompt", return_value="prompt"))
+        stack.enter_context(patch.object(scheduler, "get_active_client", return_value=client))
+        stack.enter_context(patch.object(scheduler, "send_report", side_effect=send_report))
+        stack.enter_context(
+            patch.object(scheduler, "find_summary_by_fingerprint", return_value=previous)
+        )
+        stack.enter_context(
+            patch.object(summary_jobs, "get_summary_job_repo", return_value=repo or FakeJobRepo())
+        )
+        stack.enter_context(patch.object(summary_jobs, "SUMMARY_JOB_RETRY_DELAY", 0))
+        stack.enter_context(patch.object(scheduler, "_persist_summary", AsyncMock()))
+        stack.enter_context(patch.object(scheduler, "_notify_subscribers", AsyncMock()))
+        stack.enter_context(
+            patch.object(scheduler, "save_last_summary_time", save_time or MagicMock())
+        )
+        return await scheduler.main_job(*args, **kwargs)
+
+
+async def _fetch(channels, start_time=None, report_message_ids=None):
+    return {channels[0]: ["msg"]}
+
+
+@pytest.mark.unit
+class TestMainJobConcurrency:
+    """全频道模式并发测试"""
+
+    @pytest.mark.asyncio
+    async def test_channels_run_concurrently_within_llm_limit(self):
+        """测试各频道并发执行且 LLM 调用数不超过上限"""
+        in_flight = 0
+        peak = 0
+
+        async def analyze(messages, prompt):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.3)
+            in_flight -= 1
+            return "summary"
+
+        with patch.object(scheduler, "SUMMARY_LLM_CONCURRENCY", 2):
+            started = time.monotonic()
+            result = await _run_main_job(_fetch, analyze)
+            elapsed = time.monotonic() - started
+
+        assert result["success"] is True
+        assert result["message_count"] == 3
+        assert peak == 2
+        # 两轮并发约 0.6 秒，串行需 0.9 秒
+        assert elapsed < 0.9
+
+    @pytest.mark.asyncio
+    async def test_failed_channel_is_isolated(self):
+        """测试单个频道失败不影响其他频道，并逐个汇报进度"""
+
+        async def analyze(messages, prompt):
+            return "summary"
+
+        async def fetch(channels, start_time=None, report_message_ids=None):
+            if channels[0] == CHANNELS[1]:
+                raise ConnectionError("boom")
+            return {channels[0]: ["msg"]}
+
+        progress = []
+        result = await _run_main_job(
+            fetch, analyze, progress_callback=lambda done, total, r: progress.append((done, total))
+        )
+
+        assert result["success"] is True
+        assert result["message_count"] == 2
+        assert CHANNELS[1] in result["error"]
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+
+    @pytest.mark.asyncio
+    async def test_single_channel_failure_returns_channel_result(self):
+        """测试单频道模式下失败返回该频道的结果"""
+
+        async def fetch(channels, start_time=None, report_message_ids=None):
+            raise ConnectionError("boom")
+
+        result = await _run_main_job(fetch, None, CHANNELS[0])
+
+        assert result["success"] is False
+        assert result["channel"] == CHANNELS[0]
+        assert "ConnectionError" in result["error"]
+
+
+@pytest.mark.unit
+class TestMainJobFingerprint:
+    """输入指纹复用测试"""
+
+    @pytest.mark.asyncio
+    async def test_delivered_summary_skips_run(self):
+        """测试相同输入的总结已发送时跳过生成与发送，只推进上次总结时间"""
+        analyze = MagicMock()
+        previous = {
+            "id": 7,
+            "summary_body": "old summary",
+            "summary_message_ids": [11, 12],
+            "poll_message_id": 13,
+            "button_message_id": None,
+        }
+
+        save_time = MagicMock()
+        result = await _run_main_job(
+            _fetch, analyze, CHANNELS[0], previous=previous, save_time=save_time
+        )
+
+        assert result["success"] is True
+        analyze.assert_not_called()
+        save_time.assert_called_once()
+        assert save_time.call_args.kwargs["summary_message_ids"] == [11, 12]
+        assert save_time.call_args.kwargs["poll_message_ids"] == [13]
+
+    @pytest.mark.asyncio
+    async def test_undelivered_summary_is_reused(self):
+        """测试相同输入的总结未发送过时复用文本，不再调用 LLM"""
+        analyze = MagicMock()
+        previous = {"id": 7, "summary_body": "old summary", "summary_message_ids": []}
+
+        result = await _run_main_job(_fetch, analyze, CHANNELS[0], previous=previous)
+
+        assert result["success"] is True
+        assert result["summary_length"] == len("old summary")
+        analyze.assert_not_called()
+
+
+@pytest.mark.unit
+class TestMainJobCheckpoints:
+    """分阶段任务检查点测试"""
+
+    @pytest.mark.asyncio
+    async def test_completed_job_commits_generation_time(self):
+        """测试各阶段完成后任务标记为完成，并以生成时刻作为本次总结时间"""
+        repo = FakeJobRepo()
+        save_time = MagicMock()
+
+        async def analyze(messages, prompt):
+            return "summary"
+
+        result = await _run_main_job(_fetch, analyze, CHANNELS[0], repo=repo, save_time=save_time)
+
+        assert result["success"] is True
+        row = repo.rows[1]
+        assert (row["status"], row["stage"]) == ("completed", summary_jobs.STAGE_DONE)
+        assert row["state"]["summary_message_ids"] == [100]
+        committed_at = save_time.call_args.args[1]
+        assert committed_at == datetime.fromisoformat(row["state"]["window_end"])
+
+    @pytest.mark.asyncio
+    async def test_failed_delivery_resumes_without_regenerating(self):
+        """测试发送失败后任务保留在 deliver 阶段，下次运行直接发送，不再调用 LLM"""
+        repo = FakeJobRepo()
+        analyze = AsyncMock(return_value="summary")
+
+        async def failing_send(*_args, **_kwargs):
+            raise ConnectionError("telegram down")
+
+        first = await _run_main_job(
+            _fetch, analyze, CHANNELS[0], repo=repo, send_report=failing_send
+        )
+
+        assert first["success"] is False
+        assert (repo.rows[1]["status"], repo.rows[1]["stage"]) == ("failed", "deliver")
+
+        fetch = AsyncMock()
+        second = await _run_main_job(fetch, analyze, CHANNELS[0], repo=repo)
+
+        assert second["success"] is True
+        assert second["summary_length"] == len("summary")
+        analyze.assert_awaited_once()
+        fetch.assert_not_called()
+        assert repo.rows[1]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_empty_delivery_is_retried(self):
+        """测试 send_report 没有发出任何消息时按阶段重试"""
+        calls = []
+
+        async def flaky_send(*_args, **_kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                return {"summary_message_ids": [], "poll_message_id": None}
+            return await _send_report()
+
+        async def analyze(messages, prompt):
+            return "summary"
+
+        result = await _run_main_job(_fetch, analyze, CHANNELS[0], send_report=flaky_send)
+
+        assert result["success"] is True
+        assert len(calls) == 2
@@ -104,6 +104,24 @@ class TestAISettings:
             settings = AISettings()
             assert settings.effective_api_key is None
 
+    def test_fallback_provider_list(self):
+        """测试备用服务商解析，忽略缺少字段的条目与无效 JSON"""
+        providers = (
+            '[{"base_url": "https://b.example.com/v1", "api_key": "k", "model": "m"},'
+            ' {"base_url": "https://c.example.com/v1"}]'
+        )
+        with patch.dict(os.environ, {"LLM_FALLBACK_PROVIDERS": providers}, clear=True):
+            assert AISettings().fallback_provider_list == [
+                {
+                    "name": "fallback-1",
+                    "base_url": "https://b.example.com/v1",
+                    "api_key": "k",
+                    "model": "m",
+                }
+            ]
+        with patch.dict(os.environ, {"LLM_FALLBACK_PROVIDERS": "not json"}, clear=True):
+            assert AISettings().fallback_provider_list == []
+
 
 @pytest.mark.unit
 class TestChannelSettings:
@@ -0,0 +1,78 @@
+"""测试总结输入指纹
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.ai.summary_fingerprint import (
+    compute_summary_fingerprint,
+    find_summary_by_fingerprint,
+    strip_report_title,
+)
+
+CHANNEL = "https://t.me/test_channel"
+MESSAGES = [
+    "内容: a\n链接: https://t.me/test_channel/1",
+    "内容: b\n链接: https://t.me/test_channel/2",
+]
+
+
+@pytest.mark.unit
+class TestComputeSummaryFingerprint:
+    """指纹计算测试"""
+
+    def test_same_input_same_fingerprint(self):
+        """测试相同输入得到相同指纹"""
+        assert compute_summary_fingerprint(
+            CHANNEL, MESSAGES, "prompt", "model"
+        ) == compute_summary_fingerprint(CHANNEL, list(MESSAGES), "prompt", "model")
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ("https://t.me/other", MESSAGES, "prompt", "model"),
+            (CHANNEL, MESSAGES[:1], "prompt", "model"),
+            (CHANNEL, [*MESSAGES, "内容: c\n链接: https://t.me/test_channel/3"], "prompt", "model"),
+            (CHANNEL, MESSAGES, "new prompt", "model"),
+            (CHANNEL, MESSAGES, "prompt", "other-model"),
+        ],
+    )
+    def test_any_change_changes_fingerprint(self, args):
+        """测试频道、消息范围、提示词或模型变化时指纹不同"""
+        base = compute_summary_fingerprint(CHANNEL, MESSAGES, "prompt", "model")
+
+        assert compute_summary_fingerprint(*args) != base
+
+
+@pytest.mark.unit
+class TestFindSummaryByFingerprint:
+    """已有总结查询测试"""
+
+    def test_strip_report_title(self):
+        """测试去掉报告标题得到总结正文"""
+        assert strip_report_title("**频道周报 1.1-1.7**\n\n正文\n\n第二段") == "正文\n\n第二段"
+        assert strip_report_title("正文") == "正文"
+
+    @pytest.mark.asyncio
+    async def test_returns_record_with_body(self):
+        """测试查到记录时附加总结正文"""
+        db = MagicMock()
+        db.get_summary_by_fingerprint = AsyncMock(
+            return_value={"id": 3, "summary_text": "**标题**\n\n正文"}
+        )
+
+        with patch("core.infrastructure.database.get_db_manager", return_value=db):
+            record = await find_summary_by_fingerprint(CHANNEL, "abc")
+
+        assert record["summary_body"] == "正文"
+        db.get_summary_by_fingerprint.assert_awaited_once_with(CHANNEL, "abc")
+
+    @pytest.mark.asyncio
+    async def test_database_error_returns_none(self):
+        """测试数据库不可用时返回 None"""
+        with patch("core.infrastructure.database.get_db_manager", side_effect=RuntimeError):
+            assert await find_summary_by_fingerprint(CHANNEL, "abc") is None
@@ -0,0 +1,167 @@
+"""测试分阶段总结任务引擎
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from core.system import summary_jobs
+from core.system.summary_jobs import STAGE_DONE, SummaryJob, create_job, run_job
+
+CHANNEL = "https://t.me/test_channel"
+
+
+class FakeJobRepo:
+    """记录检查点的 summary_jobs 表"""
+
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.checkpoints = []
+
+    async def create_job(self, channel_id, stage, state):
+        return 1
+
+    async def save_checkpoint(self, job_id, stage, state, status="running", last_error=None):
+        self.checkpoints.append((stage, status, dict(state)))
+
+    async def get_unfinished_jobs(self, channel_id=None):
+        return list(self.rows)
+
+
+class BrokenRepo:
+    """数据库不可用"""
+
+    async def create_job(self, *args, **kwargs):
+        raise RuntimeError("数据库连接池尚未初始化")
+
+
+def _handlers(calls: list, failures: dict | None = None):
+    """构建记录调用顺序的阶段处理函数，failures 为阶段名 → 失败次数"""
+    failures = dict(failures or {})
+
+    def make(stage):
+        async def handler(job):
+            calls.append(stage)
+            if failures.get(stage, 0) > 0:
+                failures[stage] -= 1
+                raise ConnectionError(f"{stage} failed")
+            job.state[stage] = True
+
+        handler.__name__ = f"{stage}_handler"
+        return handler
+
+    return {stage: make(stage) for stage in summary_jobs.SUMMARY_JOB_STAGES[1:]}
+
+
+@pytest.mark.unit
+class TestRunJob:
+    """阶段执行测试"""
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_after_each_stage(self):
+        """测试每个阶段完成后保存检查点，最后标记为完成"""
+        repo = FakeJobRepo()
+        calls = []
+
+        with patch.object(summary_jobs, "get_summary_job_repo", return_value=repo):
+            job = await create_job(CHANNEL, {"report_text": "r"})
+            await run_job(job, _handlers(calls))
+
+        assert calls == ["deliver", "persist", "notify", "commit"]
+        assert [(stage, status) for stage, status, _ in repo.checkpoints] == [
+            ("persist", "running"),
+            ("notify", "running"),
+            ("commit", "running"),
+            (STAGE_DONE, "completed"),
+        ]
+        assert repo.checkpoints[0][2]["deliver"] is True
+
+    @pytest.mark.asyncio
+    async def test_stage_retried_with_backoff(self):
+        """测试阶段失败后重试，不重复执行已完成的阶段"""
+        calls = []
+
+        with patch.object(summary_jobs, "get_summary_job_repo", return_value=FakeJobRepo()):
+            with patch.object(summary_jobs, "SUMMARY_JOB_RETRY_DELAY", 0):
+                job = await create_job(CHANNEL, {})
+                await run_job(job, _handlers(calls, {"persist": 2}))
+
+        assert calls == ["deliver", "persist", "persist", "persist", "notify", "commit"]
+
+    @pytest.mark.asyncio
+    async def test_exhausted_stage_marks_job_failed(self):
+        """测试重试耗尽时任务标记为失败并停在该阶段"""
+        repo = FakeJobRepo()
+        calls = []
+
+        with patch.object(summary_jobs, "get_summary_job_repo", return_value=repo):
+            with patch.object(summary_jobs, "SUMMARY_JOB_RETRY_DELAY", 0):
+                job = await create_job(CHANNEL, {})
+                with pytest.raises(RuntimeError, match="deliver"):
+                    await run_job(job, _handlers(calls, {"deliver": 99}))
+
+        assert job.stage == "deliver"
+        assert repo.checkpoints[-1][:2] == ("deliver", "failed")
+        assert "persist" not in calls
+
+    @pytest.mark.asyncio
+    async def test_runs_without_database(self):
+        """测试数据库不可用时任务在内存中执行"""
+        calls = []
+
+        with patch.object(summary_jobs, "get_summary_job_repo", return_value=BrokenRepo()):
+            job = await create_job(CHANNEL, {})
+            await run_job(job, _handlers(calls))
+
+        assert job.id is None
+        assert job.stage == STAGE_DONE
+
+
+@pytest.mark.unit
+class TestLoadUnfinishedJobs:
+    """未完成任务读取测试"""
+
+    @pytest.mark.asyncio
+    async def test_expired_jobs_abandoned(self):
+        """测试过期任务被放弃，其余任务按阶段恢复"""
+        now = datetime.now()
+        repo = FakeJobRepo(
+            [
+                {
+                    "id": 1,
+                    "channel_id": CHANNEL,
+                    "stage": "deliver",
+                    "state": {},
+                    "created_at": now - timedelta(days=summary_jobs.SUMMARY_JOB_MAX_AGE_DAYS + 1),
+                },
+                {
+                    "id": 2,
+                    "channel_id": CHANNEL,
+                    "stage": "notify",
+                    "state": {"report_text": "r"},
+                    "created_at": now,
+                },
+            ]
+        )
+
+        with patch.object(summary_jobs, "get_summary_job_repo", return_value=repo):
+            job = await summary_jobs.load_unfinished_job(CHANNEL)
+
+        assert (job.id, job.stage, job.state) == (2, "notify", {"report_text": "r"})
+        assert repo.checkpoints == [("deliver", "abandoned", {})]
+
+    @pytest.mark.asyncio
+    async def test_running_job_skipped(self):
+        """测试本进程正在执行的任务不会被再次读取"""
+        row = {"id": 5, "channel_id": CHANNEL, "stage": "deliver", "state": {}}
+        repo = FakeJobRepo([row])
+
+        with patch.object(summary_jobs, "get_summary_job_repo", return_value=repo):
+            with patch.object(summary_jobs, "_active_job_ids", {5}):
+                assert await summary_jobs.load_unfinished_job(CHANNEL) is None
+
+        assert SummaryJob.from_row(row).label.startswith("#5")
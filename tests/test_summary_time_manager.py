@@ -0,0 +1,110 @@
+"""测试上次总结时间存储
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import json
+import os
+import threading
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+import pytest
+
+from core import summary_time_manager
+from core.summary_time_manager import (
+    SummaryTimeStore,
+    load_last_summary_time,
+    save_last_summary_time,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """指向临时文件的存储，替换全局默认实例"""
+    store = SummaryTimeStore(str(tmp_path / ".last_summary_time.json"))
+    with patch.object(summary_time_manager, "get_summary_time_store", return_value=store):
+        yield store
+
+
+@pytest.mark.unit
+class TestSummaryTimeStore:
+    """存储测试"""
+
+    def test_save_and_load_round_trip(self, store):
+        """测试保存后按频道读取时间与消息ID，频道ID被标准化"""
+        time_value = datetime(2026, 1, 1, 8, 0, tzinfo=UTC)
+        save_last_summary_time(
+            "@example", time_value, summary_message_ids=[1], poll_message_ids=[2]
+        )
+
+        assert load_last_summary_time("https://t.me/example") == time_value
+        data = load_last_summary_time("@example", include_report_ids=True)
+        assert data["summary_message_ids"] == [1]
+        assert data["poll_message_ids"] == [2]
+        assert data["button_message_ids"] == []
+        assert set(load_last_summary_time()) == {"https://t.me/example"}
+
+    def test_reads_served_from_cache(self, store):
+        """测试文件未变化时不重复读取文件"""
+        save_last_summary_time("https://t.me/a", datetime.now(UTC))
+
+        with patch("builtins.open", side_effect=AssertionError("不应读取文件")):
+            assert load_last_summary_time("https://t.me/a") is not None
+            assert load_last_summary_time("https://t.me/missing") is None
+
+    def test_external_change_reloaded(self, store):
+        """测试其他进程修改文件后重新解析，兼容旧格式与无时区时间"""
+        save_last_summary_time("https://t.me/a", datetime.now(UTC))
+        with open(store.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"https://t.me/b": {"time": "2026-01-01T00:00:00", "report_message_ids": [9]}},
+                f,
+            )
+        os.utime(store.path, ns=(0, 1))
+
+        data = load_last_summary_time("https://t.me/b", include_report_ids=True)
+        assert data["time"] == datetime(2026, 1, 1, tzinfo=UTC)
+        assert data["summary_message_ids"] == [9]
+        assert load_last_summary_time("https://t.me/a") is None
+
+    def test_failed_write_keeps_previous_file(self, store):
+        """测试写入中途失败时原文件不变且不残留临时文件"""
+        save_last_summary_time("https://t.me/a", datetime(2026, 1, 1, tzinfo=UTC))
+
+        with patch.object(summary_time_manager.os, "replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                save_last_summary_time("https://t.me/b", datetime.now(UTC))
+
+        with open(store.path, encoding="utf-8") as f:
+            assert list(json.load(f)) == ["https://t.me/a"]
+        assert os.listdir(os.path.dirname(store.path)) == [".last_summary_time.json"]
+
+    def test_concurrent_saves_not_lost(self, store):
+        """测试多线程同时保存不同频道时不丢失记录"""
+        threads = [
+            threading.Thread(
+                target=save_last_summary_time, args=(f"https://t.me/c{i}", datetime.now(UTC))
+            )
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(store.path, encoding="utf-8") as f:
+            assert len(json.load(f)) == 8
+
+    def test_delete_and_clear(self, store):
+        """测试删除单个频道与清空全部记录"""
+        save_last_summary_time("https://t.me/a", datetime.now(UTC))
+        save_last_summary_time("https://t.me/b", datetime.now(UTC))
+
+        assert store.delete("https://t.me/a") is True
+        assert store.delete("https://t.me/a") is False
+        assert set(store.get_all()) == {"https://t.me/b"}
+        assert store.clear() is True
+        assert not store.exists()
+        assert load_last_summary_time() == {}
@@ -0,0 +1,119 @@
+"""测试 LLM 用量统计
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.ai import ai_client, llm_gateway, usage_tracker
+from core.ai.llm_gateway import LLMGateway
+from core.ai.usage_tracker import UsageTracker, usage_channel
+from core.infrastructure.database import llm_usage_repo
+
+
+def _response(prompt_tokens: int = 10, completion_tokens: int = 5) -> MagicMock:
+    response = MagicMock()
+    response.model = "m"
+    response.usage.prompt_tokens = prompt_tokens
+    response.usage.completion_tokens = completion_tokens
+    return response
+
+
+@pytest.mark.unit
+class TestRecord:
+    """用量记录测试"""
+
+    def test_aggregated_by_subsystem_channel_and_model(self):
+        """测试同一天相同子系统、频道、模型的调用合并为一行，频道取自上下文"""
+        tracker = UsageTracker()
+        with usage_channel("https://t.me/a"):
+            tracker.record("summary", "m", 100, 20)
+            tracker.record("summary", "m", 50, 10)
+        tracker.record("summary", "m", 1, 1)
+        tracker.record("embedding_search", "e", 7)
+
+        today = date.today()
+        assert tracker._pending[(today, "summary", "https://t.me/a", "m")] == {
+            "requests": 2,
+            "prompt_tokens": 150,
+            "completion_tokens": 30,
+        }
+        assert tracker._pending[(today, "summary", "", "m")]["requests"] == 1
+        assert tracker.get_totals()["summary"]["prompt_tokens"] == 151
+        assert tracker.get_totals()["embedding_search"]["completion_tokens"] == 0
+
+    def test_record_response_reads_usage(self):
+        """测试从响应 usage 字段读取 token 数，缺少 usage 时只计请求数"""
+        tracker = UsageTracker()
+        tracker.record_response("qa", "requested", _response(12, 3))
+        tracker.record_response("qa", "requested", object())
+
+        totals = tracker.get_totals()["qa"]
+        assert totals == {"requests": 2, "prompt_tokens": 12, "completion_tokens": 3}
+        assert {key[3] for key in tracker._pending} == {"m", "requested"}
+
+    def test_estimate_cost(self):
+        """测试按每百万 token 单价计算费用，未配置单价的模型返回 None"""
+        pricing = {"m": {"prompt": 2.0, "completion": 8.0}}
+        with patch.object(usage_tracker, "LLM_PRICING", pricing):
+            assert usage_tracker.estimate_cost("m", 1_000_000, 500_000) == pytest.approx(6.0)
+            assert usage_tracker.estimate_cost("other", 1, 1) is None
+
+
+@pytest.mark.unit
+class TestFlush:
+    """写入数据库测试"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_and_clears(self):
+        """测试写入成功后清空内存中的用量"""
+        tracker = UsageTracker()
+        tracker.record("poll", "m", 10, 2, channel="c")
+        repo = MagicMock(add_usage=AsyncMock())
+
+        with patch.object(llm_usage_repo, "get_llm_usage_repo", return_value=repo):
+            assert await tracker.flush() == 1
+            assert await tracker.flush() == 0
+
+        rows = repo.add_usage.await_args.args[0]
+        assert rows[0]["subsystem"] == "poll"
+        assert rows[0]["channel_id"] == "c"
+        assert rows[0]["prompt_tokens"] == 10
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_kept_for_next_time(self):
+        """测试写入失败时用量保留，并与期间新增的用量合并"""
+        tracker = UsageTracker()
+        tracker.record("poll", "m", 10, 2)
+        repo = MagicMock(add_usage=AsyncMock(side_effect=RuntimeError("db down")))
+
+        with patch.object(llm_usage_repo, "get_llm_usage_repo", return_value=repo):
+            assert await tracker.flush() == 0
+        tracker.record("poll", "m", 5, 1)
+
+        (counts,) = tracker._pending.values()
+        assert counts == {"requests": 2, "prompt_tokens": 15, "completion_tokens": 3}
+
+
+@pytest.mark.unit
+class TestGatewayUsage:
+    """网关用量记录测试"""
+
+    @pytest.mark.asyncio
+    async def test_gateway_records_subsystem(self):
+        """测试网关请求成功后按子系统与频道记录用量"""
+        gateway = LLMGateway(requests_per_minute=0)
+        tracker = UsageTracker()
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=_response(30, 4))
+
+        with patch.object(ai_client, "async_client_llm", client):
+            with patch.object(llm_gateway, "get_usage_tracker", return_value=tracker):
+                with usage_channel("c"):
+                    await gateway.chat([], model="m", subsystem="summary")
+
+        assert tracker._pending[(date.today(), "summary", "c", "m")]["prompt_tokens"] == 30
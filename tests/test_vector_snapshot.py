@@ -0,0 +1,130 @@
+"""测试向量库快照导出与恢复
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+import random
+import zipfile
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from core.ai.vector_snapshot import export_collections, read_manifest, restore_collection
+from core.web_api.routes import vector_store as vector_store_routes
+from core.web_api.schemas.vector_store import SnapshotRestoreRequest
+
+
+def _random_vectors(count: int, dimension: int, seed: int = 0) -> list[list[float]]:
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dimension)] for _ in range(count)]
+
+
+def _request(user_id: str = "admin"):
+    return SimpleNamespace(state=SimpleNamespace(user=SimpleNamespace(user_id=user_id)))
+
+
+@pytest.mark.unit
+class TestVectorSnapshot:
+    """快照导出/恢复测试"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        chromadb = pytest.importorskip("chromadb")
+        client = chromadb.PersistentClient(path=str(tmp_path / "vectors"))
+        messages = client.get_or_create_collection("messages", metadata={"hnsw:space": "cosine"})
+        messages.add(
+            ids=[f"c:{i}" for i in range(25)],
+            embeddings=_random_vectors(25, 8),
+            documents=[f"doc {i}" for i in range(25)],
+            metadatas=[{"channel_id": "c", "message_id": i} for i in range(25)],
+        )
+        return client
+
+    def test_export_writes_chunks_and_manifest(self, client, tmp_path):
+        """测试导出按块写入并记录条目数、块数与维度"""
+        path = str(tmp_path / "snap.zip")
+
+        manifest = export_collections({"messages": client.get_collection("messages")}, path, 10)
+
+        assert manifest["collections"]["messages"] == {"count": 25, "chunks": 3, "dimension": 8}
+        assert read_manifest(path) == manifest
+        with zipfile.ZipFile(path) as archive:
+            assert "messages/00002/embeddings.npy" in archive.namelist()
+
+    def test_round_trip_restores_same_data(self, client, tmp_path):
+        """测试导出后恢复到空 collection，数据一致"""
+        path = str(tmp_path / "snap.zip")
+        source = client.get_collection("messages")
+        export_collections({"messages": source}, path, 10)
+        target = client.create_collection("restored", metadata={"hnsw:space": "cosine"})
+
+        restored = restore_collection(path, "messages", target, batch_size=7)
+
+        assert restored == 25
+        assert target.count() == 25
+        got = target.get(ids=["c:4"], include=["embeddings", "documents", "metadatas"])
+        expected = source.get(ids=["c:4"], include=["embeddings"])
+        assert got["documents"] == ["doc 4"]
+        assert got["metadatas"][0]["message_id"] == 4
+        # float16 存储的精度损失在 1e-3 量级
+        assert list(got["embeddings"][0]) == pytest.approx(
+            list(expected["embeddings"][0]), abs=1e-3
+        )
+
+    def test_unknown_collection_restores_nothing(self, client, tmp_path):
+        """测试快照中不存在的 collection 不写入任何数据"""
+        path = str(tmp_path / "snap.zip")
+        export_collections({"messages": client.get_collection("messages")}, path)
+        target = client.create_collection("empty")
+
+        assert restore_collection(path, "summaries", target) == 0
+        assert target.count() == 0
+
+
+@pytest.mark.unit
+class TestSnapshotRoutes:
+    """快照 API 测试"""
+
+    @pytest.mark.parametrize("filename", ["../secret.zip", "snap.txt", ".hidden.zip"])
+    def test_invalid_filename_rejected(self, filename):
+        """测试非法快照文件名被拒绝，防止路径穿越"""
+        with pytest.raises(HTTPException) as exc:
+            vector_store_routes._snapshot_path(filename)
+
+        assert exc.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_restore_missing_snapshot_returns_404(self, tmp_path):
+        """测试恢复不存在的快照返回 404"""
+        with patch.object(vector_store_routes, "SNAPSHOT_DIR", str(tmp_path)):
+            with pytest.raises(HTTPException) as exc:
+                await vector_store_routes.restore_snapshot(
+                    SnapshotRestoreRequest(filename="missing.zip"), _request()
+                )
+
+        assert exc.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_restore_calls_store_and_audits(self, tmp_path):
+        """测试恢复接口调用向量存储并写入审计记录"""
+        (tmp_path / "snap.zip").write_bytes(b"")
+        store = SimpleNamespace(
+            is_available=lambda: True,
+            restore_snapshot=lambda path, mode: {"messages": 3},
+        )
+
+        with (
+            patch.object(vector_store_routes, "SNAPSHOT_DIR", str(tmp_path)),
+            patch.object(vector_store_routes, "get_vector_store", return_value=store),
+            patch.object(vector_store_routes, "record_system_audit", new=AsyncMock()) as audit,
+        ):
+            result = await vector_store_routes.restore_snapshot(
+                SnapshotRestoreRequest(filename="snap.zip", mode="replace"), _request()
+            )
+
+        assert result == {"success": True, "data": {"restored": {"messages": 3}}}
+        assert audit.await_args.kwargs["action"] == "vector_store.snapshot.restore"
+        assert audit.await_args.kwargs["success"] is True
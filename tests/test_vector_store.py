@@ -4,10 +4,12 @@ Copyright 2026 Sakura-Bot
 本项目采用 AGPL-3.0 许可
 """
 
+import os
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from core.ai.embedding_generator import EmbeddingGenerator
 from core.ai.vector_store import VectorStore, get_vector_store
 
 
@@ -82,7 +84,8 @@ class TestAddSummary:
 
         mock_emb_gen = MagicMock()
         mock_emb_gen.is_available.return_value = True
-        mock_emb_gen.generate.return_value = [0.1, 0.2]
+        mock_emb_gen.generate_with_backend.return_value = ([0.1, 0.2], "openai")
+        mock_emb_gen.backend_filter.return_value = None
         mock_get_emb.return_value = mock_emb_gen
 
         store = VectorStore()
@@ -100,7 +103,7 @@ class TestAddSummary:
 
         mock_emb_gen = MagicMock()
         mock_emb_gen.is_available.return_value = True
-        mock_emb_gen.generate.return_value = None
+        mock_emb_gen.generate_with_backend.return_value = (None, None)
         mock_get_emb.return_value = mock_emb_gen
 
         store = VectorStore()
@@ -139,7 +142,8 @@ class TestSearchSimilar:
 
         mock_emb_gen = MagicMock()
         mock_emb_gen.is_available.return_value = True
-        mock_emb_gen.generate.return_value = [0.1, 0.2]
+        mock_emb_gen.generate_with_backend.return_value = ([0.1, 0.2], "openai")
+        mock_emb_gen.backend_filter.return_value = None
         mock_get_emb.return_value = mock_emb_gen
 
         store = VectorStore()
@@ -159,7 +163,8 @@ class TestSearchSimilar:
 
         mock_emb_gen = MagicMock()
         mock_emb_gen.is_available.return_value = True
-        mock_emb_gen.generate.return_value = [0.1, 0.2]
+        mock_emb_gen.generate_with_backend.return_value = ([0.1, 0.2], "openai")
+        mock_emb_gen.backend_filter.return_value = None
         mock_get_emb.return_value = mock_emb_gen
 
         store = VectorStore()
@@ -168,6 +173,78 @@ class TestSearchSimilar:
         assert results == []
 
 
+def _openai_response(model=None, input=()):
+    """远程后端返回与输入等长的 8 维向量"""
+    return MagicMock(data=[MagicMock(embedding=[1.0] + [0.0] * 7) for _ in input])
+
+
+@pytest.mark.unit
+class TestFallbackVectors:
+    """降级后端向量隔离与重新生成测试"""
+
+    @patch("core.ai.embedding_backends.OpenAI")
+    def test_fallback_vectors_isolated_and_reembedded(self, mock_openai, tmp_path):
+        """降级向量只被降级后端的查询检索到，主后端恢复后重新生成"""
+        create = mock_openai.return_value.embeddings.create
+        create.side_effect = ConnectionError("primary down")
+        with patch.dict(
+            os.environ,
+            {
+                "EMBEDDING_API_KEY": "test_key",
+                "EMBEDDING_FALLBACK_BACKEND": "local",
+                "EMBEDDING_DIMENSION": "8",
+                "EMBEDDING_LOCAL_WORKERS": "1",
+                "VECTOR_DB_PATH": str(tmp_path),
+            },
+            clear=True,
+        ):
+            generator = EmbeddingGenerator()
+            store = VectorStore()
+
+        with patch("core.ai.embedding_generator.get_embedding_generator", return_value=generator):
+            assert store.add_summary(1, "降级期间的总结", {"channel_id": "c"})
+            # 主后端不可用时查询向量也来自降级后端，能检索到降级向量
+            assert [r["summary_id"] for r in store.search_similar("总结")] == [1]
+
+            create.side_effect = _openai_response
+            assert store.add_summary(2, "恢复后的总结", {"channel_id": "c"})
+            assert [r["summary_id"] for r in store.search_similar("总结")] == [2]
+
+            assert store.reembed_fallback_vectors() == 1
+            assert store.reembed_fallback_vectors() == 0
+
+            results = store.search_similar("总结")
+
+        assert sorted(r["summary_id"] for r in results) == [1, 2]
+        assert {r["metadata"]["embedding_backend"] for r in results} == {"openai"}
+
+    @patch("core.ai.embedding_backends.OpenAI")
+    def test_reembed_stops_while_primary_down(self, mock_openai, tmp_path):
+        """主后端仍不可用时不改动降级向量"""
+        mock_openai.return_value.embeddings.create.side_effect = ConnectionError("down")
+        with patch.dict(
+            os.environ,
+            {
+                "EMBEDDING_API_KEY": "test_key",
+                "EMBEDDING_FALLBACK_BACKEND": "local",
+                "EMBEDDING_DIMENSION": "8",
+                "EMBEDDING_LOCAL_WORKERS": "1",
+                "VECTOR_DB_PATH": str(tmp_path),
+            },
+            clear=True,
+        ):
+            generator = EmbeddingGenerator()
+            store = VectorStore()
+
+        with patch("core.ai.embedding_generator.get_embedding_generator", return_value=generator):
+            store.add_summary(1, "降级期间的总结", {"channel_id": "c"})
+
+            assert store.reembed_fallback_vectors() == 0
+
+        stored = store.collection.get(ids=["1"], include=["metadatas"])
+        assert stored["metadatas"][0]["embedding_backend"] == "local"
+
+
 @pytest.mark.unit
 class TestDeleteSummary:
     """删除总结测试"""
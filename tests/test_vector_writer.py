@@ -0,0 +1,118 @@
+"""测试向量存储单写线程
+
+Copyright 2026 Sakura-Bot
+本项目采用 AGPL-3.0 许可
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.ai.vector_writer import VectorStoreWriter
+
+
+def _make_store(upsert_result=None):
+    """创建模拟 VectorStore，默认 upsert 全部成功"""
+    store = MagicMock()
+    if upsert_result is None:
+        store.add_messages_batch.side_effect = lambda ids, **_: len(ids)
+    else:
+        store.add_messages_batch.side_effect = upsert_result
+    store.delete_messages.return_value = True
+    return store
+
+
+def _upsert(writer, ids):
+    return writer.submit_upsert(
+        ids=ids,
+        texts=[f"text-{i}" for i in ids],
+        metadatas=[{"id": i} for i in ids],
+        embeddings=[[0.1, 0.2] for _ in ids],
+    )
+
+
+@pytest.mark.unit
+class TestVectorStoreWriter:
+    """写线程测试"""
+
+    def test_consecutive_upserts_merged_into_one_transaction(self):
+        """测试连续提交的 upsert 合并为一次写入"""
+        store = _make_store()
+        writer = VectorStoreWriter(vector_store=store, linger=0.5)
+
+        f1 = _upsert(writer, ["c:1", "c:2"])
+        f2 = _upsert(writer, ["c:3"])
+        writer.stop()
+
+        assert f1.result(timeout=5) == 2
+        assert f2.result(timeout=5) == 1
+        store.add_messages_batch.assert_called_once()
+        assert store.add_messages_batch.call_args.kwargs["ids"] == ["c:1", "c:2", "c:3"]
+        assert writer.get_stats()["transaction_count"] == 1
+
+    def test_duplicate_ids_keep_latest_version(self):
+        """测试同一事务内重复 ID 只保留最后提交的版本"""
+        store = _make_store()
+        writer = VectorStoreWriter(vector_store=store, linger=0.5)
+
+        _upsert(writer, ["c:1"])
+        writer.submit_upsert(ids=["c:1"], texts=["edited"], metadatas=[{}], embeddings=[[0.3, 0.4]])
+        writer.stop()
+
+        kwargs = store.add_messages_batch.call_args.kwargs
+        assert kwargs["ids"] == ["c:1"]
+        assert kwargs["texts"] == ["edited"]
+
+    def test_delete_acts_as_barrier(self):
+        """测试删除操作不会越过之前提交的 upsert"""
+        store = _make_store()
+        calls = []
+        store.add_messages_batch.side_effect = lambda ids, **_: (
+            calls.append(("upsert", ids)) or len(ids)
+        )
+        store.delete_messages.side_effect = lambda ids: calls.append(("delete", ids)) or True
+        writer = VectorStoreWriter(vector_store=store, linger=0.5)
+
+        _upsert(writer, ["c:1"])
+        deleted = writer.submit_delete(["c:1"])
+        _upsert(writer, ["c:2"])
+        writer.stop()
+
+        assert deleted.result(timeout=5) is True
+        assert calls == [("upsert", ["c:1"]), ("delete", ["c:1"]), ("upsert", ["c:2"])]
+
+    def test_failed_merge_retries_each_operation(self):
+        """测试合并写入失败后逐个重试，坏批次不影响其他批次"""
+
+        def _upsert_result(ids, **_):
+            return 0 if "bad" in ids else len(ids)
+
+        store = _make_store(upsert_result=_upsert_result)
+        writer = VectorStoreWriter(vector_store=store, linger=0.5)
+
+        good = _upsert(writer, ["c:1"])
+        bad = _upsert(writer, ["bad"])
+        writer.stop()
+
+        assert good.result(timeout=5) == 1
+        assert bad.result(timeout=5) == 0
+        assert writer.get_stats()["failed_count"] == 1
+
+    def test_exception_propagates_to_future(self):
+        """测试写入异常传递给调用方"""
+        store = _make_store(upsert_result=RuntimeError("disk full"))
+        writer = VectorStoreWriter(vector_store=store, linger=0)
+
+        future = _upsert(writer, ["c:1"])
+        writer.stop()
+
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+    def test_stop_without_start(self):
+        """测试未启动时停止无副作用"""
+        writer = VectorStoreWriter(vector_store=_make_store())
+
+        writer.stop()
+
+        assert writer.is_running() is False